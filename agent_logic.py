@@ -10,16 +10,24 @@ from backend.triage_core import (
     triage_with_context as real_triage_with_context,
     triage_with_embedding as real_triage_with_embedding,
     triage_with_outcomes as real_triage_with_outcomes,
+    prepare_embedding_text,
+    summarize_similar_emails,
+    vote_neighbor_labels,
     safe_openai_chat_completion
 )
+from backend.embedding_service import get_embedding
 from backend.supabase_client import (
     get_sender_profile,
     find_similar_emails,
+    find_similar_emails_with_labels,
+    split_neighbor_rows,
     get_recent_triage_results,
-    store_embedding,
-    embedding_exists
+    store_embedding
 )
 from backend.config import Config
+from backend.pattern_matcher import PatternMatcher
+from backend.rules_engine import classify_with_rules
+from backend.strategy_executor import StrategyGraph
 
 # Load environment variables
 load_dotenv()
@@ -48,6 +56,33 @@ PRIORITY_TO_HUMAN = {
     "not_urgent_not_important": "Not Urgent, Not Important",
 }
 
+# Keyword heuristics used when the LLM strategies fail
+URGENT_KEYWORDS = ['urgent', 'asap', 'immediate', 'emergency', 'critical', 'deadline']
+IMPORTANT_KEYWORDS = ['important', 'priority', 'key', 'essential', 'vital', 'crucial']
+IMPORTANT_DOMAINS = ['company.com', 'boss.com', 'executive.com', 'management.com']
+TIME_PATTERNS = ['today', 'tomorrow', 'this week', 'by end of day', 'deadline']
+OUTCOME_KEYWORDS = {
+    'high_impact': ['revenue', 'profit', 'loss', 'customer', 'contract', 'deal'],
+    'medium_impact': ['project', 'meeting', 'report', 'review', 'update'],
+    'low_impact': ['newsletter', 'announcement', 'update', 'information']
+}
+
+# Compiled once; pattern ids are "<group>:<keyword>" so one call answers every group
+_PRIORITY_MATCHER = PatternMatcher(
+    [(f"urgent:{kw}", kw) for kw in URGENT_KEYWORDS] + [(f"important:{kw}", kw) for kw in IMPORTANT_KEYWORDS]
+)
+_DOMAIN_MATCHER = PatternMatcher((domain, domain) for domain in IMPORTANT_DOMAINS)
+_TIME_MATCHER = PatternMatcher((pattern, pattern) for pattern in TIME_PATTERNS)
+_OUTCOME_MATCHER = PatternMatcher(
+    (f"{level}:{kw}", kw) for level, keywords in OUTCOME_KEYWORDS.items() for kw in keywords
+)
+
+
+def _keywords_found(matched: set, group: str, keywords: List[str]) -> List[str]:
+    """Keywords of a group present in a PatternMatcher result, in list order."""
+    return [kw for kw in keywords if f"{group}:{kw}" in matched]
+
+
 def to_human_priority(priority_code: str) -> str:
     return PRIORITY_TO_HUMAN.get(priority_code, priority_code.replace('_', ' ').title())
 
@@ -63,12 +98,25 @@ def run_all_triage(subject: str, sender: str, body: str) -> Dict[str, Dict[str,
     Returns:
         Dictionary containing results from all triage strategies
     """
-    results = {}
-    
     # Generate a unique email ID for this analysis
     email_id = f"streamlit_{int(time.time())}_{hash(subject + sender)}"
     
-    # Run each triage strategy
+    # Emails matched by a triage rule need no model calls at all
+    rule_result = classify_with_rules(subject, body, sender)
+    if rule_result:
+        priority = QUADRANT_TO_PRIORITY.get(rule_result['quadrant'], 'not_urgent_not_important')
+        return {
+            strategy_name: {
+                'priority': priority,
+                'human_priority': to_human_priority(priority),
+                'confidence': rule_result['confidence'],
+                'reasoning': rule_result['reasoning'],
+                'metadata': {'strategy': 'triage_rule', 'email_id': email_id}
+            }
+            for strategy_name in ('email_only', 'contextual', 'embedding', 'outcomes')
+        }
+    
+    # Run each triage strategy; none depends on another, so all four run concurrently
     strategies = [
         ('email_only', triage_email_only),
         ('contextual', triage_contextual),
@@ -76,19 +124,25 @@ def run_all_triage(subject: str, sender: str, body: str) -> Dict[str, Dict[str,
         ('outcomes', triage_outcomes)
     ]
     
+    def guarded(strategy_name, strategy_func):
+        def run():
+            try:
+                return strategy_func(subject, sender, body, email_id)
+            except Exception as e:
+                # Log error and provide fallback result
+                print(f"Error in {strategy_name} strategy: {e}")
+                return {
+                    'priority': 'not_urgent_not_important',
+                    'confidence': 0.0,
+                    'reasoning': f'Error occurred during analysis: {str(e)}',
+                    'metadata': {'error': True, 'error_message': str(e)}
+                }
+        return run
+    
+    graph = StrategyGraph()
     for strategy_name, strategy_func in strategies:
-        try:
-            result = strategy_func(subject, sender, body, email_id)
-            results[strategy_name] = result
-        except Exception as e:
-            # Log error and provide fallback result
-            print(f"Error in {strategy_name} strategy: {e}")
-            results[strategy_name] = {
-                'priority': 'not_urgent_not_important',
-                'confidence': 0.0,
-                'reasoning': f'Error occurred during analysis: {str(e)}',
-                'metadata': {'error': True, 'error_message': str(e)}
-            }
+        graph.add(strategy_name, guarded(strategy_name, strategy_func))
+    results = graph.run_sync()
     
     return results
 
@@ -190,12 +244,17 @@ def triage_embedding(subject: str, sender: str, body: str, email_id: str = None)
         Triage result dictionary
     """
     try:
-        # Check if embedding already exists
-        if email_id and embedding_exists(email_id):
-            print(f"Using existing embedding for {email_id}")
+        # Re-analysing the same email reuses the cached embedding
+        embedding = get_embedding(prepare_embedding_text(subject, body))
+        similar_emails, triage_results, _ = split_neighbor_rows(find_similar_emails_with_labels(embedding, top_k=5))
+        
+        lookup_id = email_id or "streamlit_email"
+        similar_contexts, fallback = summarize_similar_emails(lookup_id, similar_emails, triage_results)
+        # A decisive vote of the neighbours' labels answers without GPT-4; split votes still ask it
+        fallback = vote_neighbor_labels(similar_emails, triage_results, lookup_id) or fallback
         
         # Call the real embedding triage function
-        result = real_triage_with_embedding(subject, body, email_id or "streamlit_email")
+        result = fallback or real_triage_with_embedding(subject, body, similar_contexts)
         
         # Convert the backend result format to our Streamlit format
         priority_raw = result.get('quadrant', 'not_urgent_not_important')
@@ -207,10 +266,10 @@ def triage_embedding(subject: str, sender: str, body: str, email_id: str = None)
             'reasoning': result.get('reasoning', 'No reasoning provided'),
             'metadata': {
                 'strategy': 'real_llm_embedding',
-                'model_used': Config.OPENAI_MODEL,
+                'model_used': Config.OPENAI_MODEL if result.get('source') == 'llm' else result.get('source'),
                 'embedding_model': Config.EMBEDDING_MODEL,
                 'email_id': email_id,
-                'similar_emails_found': result.get('similar_emails_count', 0),
+                'similar_emails_found': len(similar_emails),
                 'tokens_used': result.get('tokens_used', 0)
             }
         }
@@ -275,14 +334,13 @@ def triage_outcomes(subject: str, sender: str, body: str, email_id: str = None)
 # Fallback functions for when real LLM calls fail
 def fallback_email_only_triage(subject: str, body: str) -> Dict[str, Any]:
     """Fallback keyword-based analysis when LLM fails"""
-    urgent_keywords = ['urgent', 'asap', 'immediate', 'emergency', 'critical', 'deadline']
-    important_keywords = ['important', 'priority', 'key', 'essential', 'vital', 'crucial']
-    
-    subject_lower = subject.lower()
-    body_lower = body.lower()
+    # Subject and body in one scan; keywords never span the separator
+    matched = _PRIORITY_MATCHER.find_all(f"{subject}\n{body}")
+    urgent_found = _keywords_found(matched, 'urgent', URGENT_KEYWORDS)
+    important_found = _keywords_found(matched, 'important', IMPORTANT_KEYWORDS)
     
-    is_urgent = any(keyword in subject_lower or keyword in body_lower for keyword in urgent_keywords)
-    is_important = any(keyword in subject_lower or keyword in body_lower for keyword in important_keywords)
+    is_urgent = bool(urgent_found)
+    is_important = bool(important_found)
     
     if is_urgent and is_important:
         priority = 'urgent_important'
@@ -305,8 +363,8 @@ def fallback_email_only_triage(subject: str, body: str) -> Dict[str, Any]:
         'reasoning': f"Fallback keyword analysis. Urgent: {is_urgent}, Important: {is_important}",
         'metadata': {
             'strategy': 'fallback_keyword',
-            'urgent_keywords_found': [kw for kw in urgent_keywords if kw in subject_lower or kw in body_lower],
-            'important_keywords_found': [kw for kw in important_keywords if kw in subject_lower or kw in body_lower]
+            'urgent_keywords_found': urgent_found,
+            'important_keywords_found': important_found
         }
     }
 
@@ -314,11 +372,8 @@ def fallback_email_only_triage(subject: str, body: str) -> Dict[str, Any]:
 def fallback_contextual_triage(subject: str, sender: str, body: str) -> Dict[str, Any]:
     """Fallback contextual analysis when LLM fails"""
     sender_domain = sender.split('@')[-1] if '@' in sender else ''
-    important_domains = ['company.com', 'boss.com', 'executive.com', 'management.com']
-    is_important_sender = any(domain in sender_domain.lower() for domain in important_domains)
-    
-    time_patterns = ['today', 'tomorrow', 'this week', 'by end of day', 'deadline']
-    has_time_constraint = any(pattern in body.lower() for pattern in time_patterns)
+    is_important_sender = _DOMAIN_MATCHER.search(sender_domain) is not None
+    has_time_constraint = _TIME_MATCHER.search(body) is not None
     
     if is_important_sender and has_time_constraint:
         priority = 'urgent_important'
@@ -386,18 +441,11 @@ def fallback_embedding_triage(subject: str, body: str) -> Dict[str, Any]:
 
 def fallback_outcomes_triage(subject: str, body: str) -> Dict[str, Any]:
     """Fallback outcomes analysis when LLM fails"""
-    outcome_keywords = {
-        'high_impact': ['revenue', 'profit', 'loss', 'customer', 'contract', 'deal'],
-        'medium_impact': ['project', 'meeting', 'report', 'review', 'update'],
-        'low_impact': ['newsletter', 'announcement', 'update', 'information']
-    }
-    
-    full_text = f"{subject} {body}".lower()
+    matched = _OUTCOME_MATCHER.find_all(f"{subject} {body}")
     
     impact_scores = {}
-    for impact_level, keywords in outcome_keywords.items():
-        score = sum(1 for keyword in keywords if keyword in full_text)
-        impact_scores[impact_level] = score
+    for impact_level, keywords in OUTCOME_KEYWORDS.items():
+        impact_scores[impact_level] = len(_keywords_found(matched, impact_level, keywords))
     
     max_impact = max(impact_scores.items(), key=lambda x: x[1])
     impact_level = max_impact[0]
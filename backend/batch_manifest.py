@@ -0,0 +1,269 @@
+"""
+Batch run manifest for EisenhowerTriageAgent.
+
+BatchManifest records, per source file, its size, modification time and
+content hash, the message_id it produced, the prompt fingerprint it was
+classified under, and the time each pipeline stage finished. Batch runs use
+it to resume where a previous run stopped and to skip files that are
+already done: an unchanged file is recognised from os.stat() alone (one
+local SQLite lookup, no Supabase round trip); a touched file is re-hashed,
+and only files whose content or prompt fingerprint changed are processed
+again.
+
+Messages that are not files of their own (e.g. one message of an mbox file)
+are tracked under a caller-chosen key with the content hash the caller
+computed, passed as content_hash.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+# Pipeline stages in order; each is timestamped when it finishes
+STAGES = ("parsed", "embedded", "triaged", "stored")
+
+# Statuses that need no further work while the file is unchanged
+SETTLED_STATUSES = ("done", "unprocessable")
+
+
+def file_content_hash(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    """
+    SHA-256 hex digest of a file's bytes.
+
+    Args:
+        path: File to hash
+        chunk_size: Read size in bytes
+
+    Returns:
+        64-character hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BatchManifest:
+    """
+    SQLite table of per-file processing state.
+
+    Safe to share between threads; writes are committed immediately so a crash
+    loses at most the stage in progress.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Args:
+            path: SQLite database file (parent directories are created)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " content_hash TEXT NOT NULL,"
+            " message_id TEXT,"
+            " prompt_version TEXT,"
+            " status TEXT NOT NULL,"
+            " stages TEXT NOT NULL DEFAULT '{}',"
+            " error TEXT,"
+            " started_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+        self.skipped = 0
+        self.rehashed = 0
+
+    @staticmethod
+    def _key(path: Union[str, Path]) -> str:
+        return str(Path(path).resolve())
+
+    def is_done(self, path: Union[str, Path], prompt_version: str, content_hash: Optional[str] = None) -> bool:
+        """
+        Whether a file was fully processed under this prompt version and is unchanged.
+
+        A matching size and mtime is trusted without reading the file; otherwise
+        the content is re-hashed and a file that was only touched is still done.
+
+        Args:
+            path: Source file, or the key of a message given with content_hash
+            prompt_version: Current prompt fingerprint
+            content_hash: Hash of a message that is not a file of its own; compared
+                with the stored hash instead of checking the file
+
+        Returns:
+            True if the file can be skipped
+        """
+        key = self._key(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, content_hash, prompt_version, status FROM files WHERE path = ?", (key,)
+            ).fetchone()
+        if row is None or row[4] not in SETTLED_STATUSES or row[3] != prompt_version:
+            return False
+
+        if content_hash is not None:
+            if content_hash != row[2]:
+                return False
+            self.skipped += 1
+            return True
+
+        stat = os.stat(path)
+        if (stat.st_size, stat.st_mtime_ns) != (row[0], row[1]):
+            self.rehashed += 1
+            if file_content_hash(path) != row[2]:
+                return False
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?", (stat.st_size, stat.st_mtime_ns, key)
+                )
+                self._conn.commit()
+        self.skipped += 1
+        return True
+
+    def start(self, path: Union[str, Path], prompt_version: str, content_hash: Optional[str] = None) -> str:
+        """
+        Record that a file is being (re)processed, clearing its previous stages.
+
+        Args:
+            path: Source file, or the key of a message given with content_hash
+            prompt_version: Prompt fingerprint the file is processed under
+            content_hash: Hash of a message that is not a file of its own
+
+        Returns:
+            Content hash of the file
+        """
+        if content_hash is None:
+            stat = os.stat(path)
+            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+            content_hash = file_content_hash(path)
+        else:
+            size, mtime_ns = 0, 0
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files"
+                " (path, size, mtime_ns, content_hash, message_id, prompt_version, status, stages, error,"
+                "  started_at, updated_at)"
+                " VALUES (?, ?, ?, ?, NULL, ?, 'pending', '{}', NULL, ?, ?)",
+                (self._key(path), size, mtime_ns, content_hash, prompt_version, now, now)
+            )
+            self._conn.commit()
+        return content_hash
+
+    def _update(self, path: Union[str, Path], stage: Optional[str] = None, **columns: Any) -> None:
+        """Set columns on a started file and timestamp a stage."""
+        key = self._key(path)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT stages FROM files WHERE path = ?", (key,)).fetchone()
+            if row is None:
+                raise KeyError(f"{path} was not started in the manifest")
+            stages = json.loads(row[0])
+            if stage is not None:
+                stages[stage] = now
+            assignments = ", ".join(f"{column} = ?" for column in columns)
+            self._conn.execute(
+                f"UPDATE files SET {assignments + ', ' if assignments else ''}stages = ?, updated_at = ? WHERE path = ?",
+                (*columns.values(), json.dumps(stages), now, key)
+            )
+            self._conn.commit()
+
+    def record_stage(self, path: Union[str, Path], stage: str, message_id: Optional[str] = None) -> None:
+        """
+        Timestamp a finished stage.
+
+        Args:
+            path: Source file
+            stage: One of STAGES
+            message_id: Message-ID, once known
+        """
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage}")
+        if message_id is not None:
+            self._update(path, stage, message_id=message_id)
+        else:
+            self._update(path, stage)
+
+    def mark_done(self, path: Union[str, Path]) -> None:
+        """Mark a file as fully processed (its final stage timestamped)."""
+        self._update(path, STAGES[-1], status="done", error=None)
+
+    def mark_unprocessable(self, path: Union[str, Path], reason: str) -> None:
+        """
+        Mark a file that can never be processed as it is (e.g. it has no text body).
+
+        Unlike a failure, it is skipped by later runs until its content changes.
+
+        Args:
+            path: Source file
+            reason: Why the file cannot be processed
+        """
+        self._update(path, status="unprocessable", error=reason[:500])
+
+    def mark_failed(self, path: Union[str, Path], error: str) -> None:
+        """
+        Mark a file as failed (e.g. an API error); the next run processes it again.
+
+        Args:
+            path: Source file
+            error: Short description of what failed
+        """
+        self._update(path, status="failed", error=error[:500])
+
+    def get(self, path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+        """
+        Manifest row for a file.
+
+        Args:
+            path: Source file
+
+        Returns:
+            Dictionary of the row's columns (stages decoded), or None if unknown
+        """
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM files WHERE path = ?", (self._key(path),))
+            row = cursor.fetchone()
+            names = [column[0] for column in cursor.description]
+        if row is None:
+            return None
+        entry = dict(zip(names, row))
+        entry["stages"] = json.loads(entry["stages"])
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        File counts by status plus this run's skip counters.
+
+        Returns:
+            Dictionary with done, pending, failed, unprocessable, skipped and rehashed
+        """
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM files GROUP BY status").fetchall())
+        return {
+            "done": counts.get("done", 0),
+            "pending": counts.get("pending", 0),
+            "failed": counts.get("failed", 0),
+            "unprocessable": counts.get("unprocessable", 0),
+            "skipped": self.skipped,
+            "rehashed": self.rehashed,
+        }
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
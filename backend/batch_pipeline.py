@@ -0,0 +1,266 @@
+"""
+Staged, concurrent batch pipeline for EisenhowerTriageAgent.
+
+A StagedPipeline is a chain of stages, each served by its own pool of worker
+threads and connected to the next by a bounded queue. CPU-bound parsing,
+batched embedding requests, network-bound chat requests and database writes
+therefore overlap instead of running one email at a time, and a slow stage
+applies backpressure: once its input queue is full, upstream workers block
+rather than buffering the whole corpus in memory. Overall throughput ends up
+limited by the slowest stage, normally the OpenAI rate limits enforced by
+backend/rate_limiter.py.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input; one is queued per downstream worker
+_DONE = object()
+
+
+class Stage:
+    """
+    One step of a StagedPipeline.
+
+    func receives one item and returns the item to pass on, or None to drop
+    it. With batch_size > 1 it receives a list of up to batch_size items
+    (flushed early once max_wait seconds pass after the first one arrived) and
+    returns a list of the same length, None entries being dropped.
+    """
+
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int = 1,
+                 batch_size: int = 1, max_wait: float = 0.5):
+        """
+        Args:
+            name: Stage name, used in stats and log messages
+            func: Item (or batch) handler
+            workers: Number of worker threads
+            batch_size: Items per call of func
+            max_wait: Seconds a partial batch waits for more items
+        """
+        if workers < 1:
+            raise ValueError(f"Stage '{name}' needs at least one worker")
+        if batch_size < 1:
+            raise ValueError(f"Stage '{name}' needs a batch size of at least one")
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+
+
+class StagedPipeline:
+    """
+    Runs items through a chain of Stages connected by bounded queues.
+
+    An exception raised by a stage drops the affected item(s); it is logged and
+    passed to on_error so the caller can record the failure.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 32,
+                 on_error: Optional[Callable[[str, Any, Exception], None]] = None):
+        """
+        Args:
+            stages: Stages in processing order
+            queue_size: Capacity of each stage's input queue
+            on_error: Called with (stage name, item, exception) for every failed item
+        """
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.on_error = on_error
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self.elapsed_seconds = 0.0
+
+    def _count(self, stage: Stage, **increments: float) -> None:
+        with self._lock:
+            stats = self._stats[stage.name]
+            for key, value in increments.items():
+                stats[key] += value
+
+    def _fail(self, stage: Stage, items: List[Any], error: Exception) -> None:
+        logger.error(f"Pipeline stage '{stage.name}' failed: {str(error)}")
+        self._count(stage, failed=len(items))
+        if self.on_error:
+            for item in items:
+                try:
+                    self.on_error(stage.name, item, error)
+                except Exception as e:
+                    logger.error(f"Pipeline error handler failed: {str(e)}")
+
+    def _next_batch(self, stage: Stage, inbox: "queue.Queue") -> tuple:
+        """Collect up to batch_size items; returns (items, whether the input ended)."""
+        first = inbox.get()
+        if first is _DONE:
+            return [], True
+        items = [first]
+        deadline = time.monotonic() + stage.max_wait
+        while len(items) < stage.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = inbox.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _DONE:
+                return items, True
+            items.append(item)
+        return items, False
+
+    def _worker(self, index: int, inbox: "queue.Queue", outbox: Optional["queue.Queue"],
+                results: Optional[List[Any]], remaining_workers: List[int]) -> None:
+        stage = self.stages[index]
+        finished = False
+        while not finished:
+            items, finished = self._next_batch(stage, inbox)
+            if not items:
+                continue
+
+            started = time.perf_counter()
+            try:
+                if stage.batch_size > 1:
+                    outputs = stage.func(items)
+                    if len(outputs) != len(items):
+                        raise ValueError(f"returned {len(outputs)} results for {len(items)} items")
+                else:
+                    outputs = [stage.func(items[0])]
+            except Exception as e:
+                self._count(stage, busy_seconds=time.perf_counter() - started)
+                self._fail(stage, items, e)
+                continue
+            self._count(stage, busy_seconds=time.perf_counter() - started, processed=len(items),
+                        batches=1, dropped=sum(1 for output in outputs if output is None))
+
+            for output in outputs:
+                if output is None:
+                    continue
+                if outbox is None:
+                    if results is not None:
+                        with self._lock:
+                            results.append(output)
+                    continue
+                # Blocks while the next stage is saturated (backpressure)
+                blocked = time.perf_counter()
+                outbox.put(output)
+                self._count(stage, blocked_seconds=time.perf_counter() - blocked)
+
+        # The last worker of a stage to finish closes the next stage's input
+        with self._lock:
+            remaining_workers[index] -= 1
+            last = remaining_workers[index] == 0
+        if last and outbox is not None:
+            for _ in range(self.stages[index + 1].workers):
+                outbox.put(_DONE)
+
+    def run(self, items: Iterable[Any], collect: bool = True) -> List[Any]:
+        """
+        Feed items through every stage and wait for the pipeline to drain.
+
+        Args:
+            items: Inputs of the first stage (consumed lazily, subject to backpressure)
+            collect: Keep the last stage's outputs; disable for unbounded streams
+                so memory stays constant (stats() still counts them)
+
+        Returns:
+            Non-None outputs of the last stage in completion order ([] if not collected)
+        """
+        self._stats = {
+            stage.name: {"workers": stage.workers, "processed": 0, "dropped": 0, "failed": 0, "batches": 0,
+                          "busy_seconds": 0.0, "blocked_seconds": 0.0}
+            for stage in self.stages
+        }
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        remaining_workers = [stage.workers for stage in self.stages]
+        results: Optional[List[Any]] = [] if collect else None
+
+        threads = []
+        for index, stage in enumerate(self.stages):
+            outbox = queues[index + 1] if index + 1 < len(queues) else None
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker, args=(index, queues[index], outbox, results, remaining_workers),
+                    name=f"pipeline-{stage.name}-{n}", daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        started = time.perf_counter()
+        try:
+            for item in items:
+                queues[0].put(item)
+        finally:
+            for _ in range(self.stages[0].workers):
+                queues[0].put(_DONE)
+            for thread in threads:
+                thread.join()
+            self.elapsed_seconds = time.perf_counter() - started
+        return results if results is not None else []
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-stage counters of the last run.
+
+        busy_seconds is the time spent inside the stage function summed over
+        workers; blocked_seconds is the time spent waiting for room in the next
+        stage's queue. The stage with the highest utilization
+        (busy_seconds / (workers * elapsed)) limits throughput.
+
+        Returns:
+            Dictionary mapping stage name to workers, processed, dropped, failed,
+            batches, busy_seconds, blocked_seconds and utilization
+        """
+        elapsed = self.elapsed_seconds
+        with self._lock:
+            stats = {name: dict(values) for name, values in self._stats.items()}
+        for values in stats.values():
+            capacity = values["workers"] * elapsed
+            values["utilization"] = values["busy_seconds"] / capacity if capacity else 0.0
+        return stats
+
+
+class LatencyTracker:
+    """
+    Thread-safe record of recent latencies with percentile summaries.
+    """
+
+    def __init__(self, window: int = 10000):
+        """
+        Args:
+            window: Number of most recent latencies the percentiles are computed over
+        """
+        self._latencies = deque(maxlen=window)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Add one latency in seconds."""
+        with self._lock:
+            self._latencies.append(seconds)
+            self._count += 1
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Summary of the recorded latencies.
+
+        Returns:
+            Dictionary with count (all time) and, over the recent window, mean,
+            p50, p90, p95, p99 and max in seconds (0.0 when nothing was recorded)
+        """
+        with self._lock:
+            ordered = sorted(self._latencies)
+            count = self._count
+        summary = {"count": count, "mean": sum(ordered) / len(ordered) if ordered else 0.0}
+        for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p95", 0.95), ("p99", 0.99)):
+            summary[name] = ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+        summary["max"] = ordered[-1] if ordered else 0.0
+        return summary
@@ -18,18 +18,95 @@ class Config:
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4")
     OPENAI_MAX_TOKENS: int = int(os.getenv("OPENAI_MAX_TOKENS", "400"))
     OPENAI_TEMPERATURE: float = float(os.getenv("OPENAI_TEMPERATURE", "0.1"))
+    # Model cascade: classify with OPENAI_CHEAP_MODEL first and re-run with OPENAI_MODEL only when its
+    # answer is invalid or below MODEL_CASCADE_THRESHOLD confidence
+    MODEL_CASCADE_ENABLED: bool = os.getenv("MODEL_CASCADE_ENABLED", "False").lower() == "true"
+    OPENAI_CHEAP_MODEL: str = os.getenv("OPENAI_CHEAP_MODEL", "gpt-4o-mini")
+    MODEL_CASCADE_THRESHOLD: float = float(os.getenv("MODEL_CASCADE_THRESHOLD", "0.8"))
+    # Whether answers the cheap model settled (source "llm_cheap") may vote and train like OPENAI_MODEL labels
+    CASCADE_CHEAP_LABELS_TRUSTED: bool = os.getenv("CASCADE_CHEAP_LABELS_TRUSTED", "False").lower() == "true"
+    # Maximum OpenAI requests in flight per event loop for the async call layer
+    OPENAI_MAX_CONCURRENCY: int = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+    # Proactive rate limits shared by every chat call (0 disables a bucket)
+    OPENAI_REQUESTS_PER_MINUTE: int = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500"))
+    OPENAI_TOKENS_PER_MINUTE: int = int(os.getenv("OPENAI_TOKENS_PER_MINUTE", "30000"))
+    
+    # "separate" sends one chat request per strategy; "fused" asks for all four judgments in one
+    TRIAGE_MODE: str = os.getenv("TRIAGE_MODE", "separate").lower()
+    TRIAGE_FUSED_MAX_TOKENS: int = int(os.getenv("TRIAGE_FUSED_MAX_TOKENS", "1200"))
+    
+    # Declarative rules that classify obvious emails (auto-replies, meeting responses...) without GPT-4
+    TRIAGE_RULES_ENABLED: bool = os.getenv("TRIAGE_RULES_ENABLED", "True").lower() == "true"
+    TRIAGE_RULES_PATH: str = os.getenv("TRIAGE_RULES_PATH", os.path.join(os.path.dirname(__file__), "triage_rules.json"))
+    # Batch runs read only the headers first; messages a rule settles from them are never fully decoded
+    HEADER_PREFILTER_ENABLED: bool = os.getenv("HEADER_PREFILTER_ENABLED", "True").lower() == "true"
+    # Visible text kept from an HTML body; conversion stops parsing once it is reached (0 = no limit)
+    HTML_TEXT_MAX_CHARS: int = int(os.getenv("HTML_TEXT_MAX_CHARS", "32000"))
+    
+    # Embedding strategy: a similarity-weighted vote of labelled neighbours settles the email without
+    # GPT-4 when at least KNN_VOTE_MIN_NEIGHBORS voted and the winner holds KNN_VOTE_MIN_SHARE of the weight
+    KNN_VOTE_ENABLED: bool = os.getenv("KNN_VOTE_ENABLED", "True").lower() == "true"
+    KNN_VOTE_MIN_NEIGHBORS: int = int(os.getenv("KNN_VOTE_MIN_NEIGHBORS", "3"))
+    KNN_VOTE_MIN_SHARE: float = float(os.getenv("KNN_VOTE_MIN_SHARE", "0.7"))
+    
+    # Local embedding classifier; when enabled, confident predictions skip every LLM strategy
+    LOCAL_CLASSIFIER_ENABLED: bool = os.getenv("LOCAL_CLASSIFIER_ENABLED", "False").lower() == "true"
+    LOCAL_CLASSIFIER_PATH: str = os.getenv("LOCAL_CLASSIFIER_PATH", ".cache/local_classifier.npz")
+    LOCAL_CLASSIFIER_THRESHOLD: float = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0"))  # 0 = threshold tuned at training
+    
+    # Persistent cache of chat responses keyed by (model, temperature, max_tokens, messages)
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "True").lower() == "true"
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", ".cache/llm_responses.sqlite3")
+    LLM_CACHE_MAX_MB: int = int(os.getenv("LLM_CACHE_MAX_MB", "256"))
+    LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+    
+    # Per-file state of batch runs (content hash, prompt fingerprint, stage timestamps) for resume/skip
+    BATCH_MANIFEST_PATH: str = os.getenv("BATCH_MANIFEST_PATH", ".cache/batch_manifest.sqlite3")
+    
+    # Batch pipeline workers per stage and queue capacity (overridable with run_batch_from_eml.py flags)
+    BATCH_PARSE_WORKERS: int = int(os.getenv("BATCH_PARSE_WORKERS", "0"))  # processes; 0 = one per CPU
+    BATCH_PREFILTER_WORKERS: int = int(os.getenv("BATCH_PREFILTER_WORKERS", "4"))
+    BATCH_EMBED_BATCH_SIZE: int = int(os.getenv("BATCH_EMBED_BATCH_SIZE", "64"))
+    BATCH_LLM_WORKERS: int = int(os.getenv("BATCH_LLM_WORKERS", "4"))
+    BATCH_DB_WRITERS: int = int(os.getenv("BATCH_DB_WRITERS", "2"))
+    BATCH_QUEUE_SIZE: int = int(os.getenv("BATCH_QUEUE_SIZE", "32"))
     
     # Supabase Configuration
     SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
     SUPABASE_KEY: str = os.getenv("SUPABASE_KEY", "")
     SUPABASE_SERVICE_ROLE_KEY: Optional[str] = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
     
+    # Sender profile cache (entries, TTL for profiles, TTL for "no profile" results)
+    SENDER_PROFILE_CACHE_SIZE: int = int(os.getenv("SENDER_PROFILE_CACHE_SIZE", "4096"))
+    SENDER_PROFILE_CACHE_TTL_SECONDS: int = int(os.getenv("SENDER_PROFILE_CACHE_TTL_SECONDS", "600"))
+    SENDER_PROFILE_NEGATIVE_TTL_SECONDS: int = int(os.getenv("SENDER_PROFILE_NEGATIVE_TTL_SECONDS", "120"))
+    
     # Application Configuration
     DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     
     # Optional: Embedding Configuration
     EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+    # Proactive rate limits shared by every embedding call (0 disables a bucket)
+    EMBEDDING_REQUESTS_PER_MINUTE: int = int(os.getenv("EMBEDDING_REQUESTS_PER_MINUTE", "3000"))
+    EMBEDDING_TOKENS_PER_MINUTE: int = int(os.getenv("EMBEDDING_TOKENS_PER_MINUTE", "1000000"))
+    # Embedding cache keyed by hash(model, normalised text); memory tier of 0 disables it
+    EMBEDDING_CACHE_ENABLED: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "True").lower() == "true"
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite3")
+    EMBEDDING_CACHE_MAX_MB: int = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "512"))
+    EMBEDDING_CACHE_MEMORY_ENTRIES: int = int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "2048"))
+    # Bulk ingestion packs inputs into requests bounded by count and total tokens
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+    EMBEDDING_BATCH_MAX_TOKENS: int = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "250000"))
+    
+    # Similarity search: "rpc" (Supabase match_embeddings) or "local" (in-process vector index)
+    VECTOR_SEARCH_BACKEND: str = os.getenv("VECTOR_SEARCH_BACKEND", "rpc").lower()
+    SIMILARITY_THRESHOLD: float = float(os.getenv("SIMILARITY_THRESHOLD", "0.5"))
+    VECTOR_INDEX_PATH: str = os.getenv("VECTOR_INDEX_PATH", ".cache/vector_index.npz")
+    # "exact" scans every row; "ivf" scans the VECTOR_INDEX_IVF_PROBES closest clusters
+    VECTOR_INDEX_MODE: str = os.getenv("VECTOR_INDEX_MODE", "exact").lower()
+    VECTOR_INDEX_IVF_LISTS: int = int(os.getenv("VECTOR_INDEX_IVF_LISTS", "0"))  # 0 = sqrt(n)
+    VECTOR_INDEX_IVF_PROBES: int = int(os.getenv("VECTOR_INDEX_IVF_PROBES", "8"))
     
     @classmethod
     def validate(cls) -> bool:
@@ -62,12 +139,29 @@ class Config:
         """Print current configuration (without sensitive values)."""
         print("Configuration:")
         print(f"  OpenAI Model: {cls.OPENAI_MODEL}")
+        if cls.MODEL_CASCADE_ENABLED:
+            print(f"  Model Cascade: {cls.OPENAI_CHEAP_MODEL} first, escalate below {cls.MODEL_CASCADE_THRESHOLD} confidence")
         print(f"  OpenAI Max Tokens: {cls.OPENAI_MAX_TOKENS}")
         print(f"  OpenAI Temperature: {cls.OPENAI_TEMPERATURE}")
+        print(f"  OpenAI Max Concurrency: {cls.OPENAI_MAX_CONCURRENCY}")
+        print(f"  Triage Mode: {cls.TRIAGE_MODE}")
+        print(f"  Triage Rules: {'enabled' if cls.TRIAGE_RULES_ENABLED else 'disabled'} ({cls.TRIAGE_RULES_PATH})")
+        print(f"  Header Prefilter: {'enabled' if cls.HEADER_PREFILTER_ENABLED else 'disabled'}")
+        print(f"  HTML Text Budget: {cls.HTML_TEXT_MAX_CHARS or 'unlimited'} chars")
+        print(f"  kNN Vote: {'enabled' if cls.KNN_VOTE_ENABLED else 'disabled'} "
+              f"(min {cls.KNN_VOTE_MIN_NEIGHBORS} neighbours, share {cls.KNN_VOTE_MIN_SHARE})")
+        print(f"  Local Classifier: {'enabled' if cls.LOCAL_CLASSIFIER_ENABLED else 'disabled'} ({cls.LOCAL_CLASSIFIER_PATH})")
+        print(f"  LLM Cache: {'enabled' if cls.LLM_CACHE_ENABLED else 'disabled'} ({cls.LLM_CACHE_PATH})")
+        print(f"  Batch Pipeline: {cls.BATCH_PARSE_WORKERS or 'per-CPU'} parse processes, {cls.BATCH_PREFILTER_WORKERS} prefilters, "
+              f"embedding batches of {cls.BATCH_EMBED_BATCH_SIZE}, {cls.BATCH_LLM_WORKERS} LLM workers, {cls.BATCH_DB_WRITERS} DB writers (queues of {cls.BATCH_QUEUE_SIZE})")
         print(f"  Supabase URL: {cls.SUPABASE_URL}")
         print(f"  Debug Mode: {cls.DEBUG}")
         print(f"  Log Level: {cls.LOG_LEVEL}")
         print(f"  Embedding Model: {cls.EMBEDDING_MODEL}")
+        print(f"  Embedding Cache: {'enabled' if cls.EMBEDDING_CACHE_ENABLED else 'disabled'} ({cls.EMBEDDING_CACHE_PATH})")
+        print(f"  Vector Search: {cls.VECTOR_SEARCH_BACKEND} ({cls.VECTOR_INDEX_MODE}, threshold {cls.SIMILARITY_THRESHOLD})")
+        print(f"  Chat Rate Limit: {cls.OPENAI_REQUESTS_PER_MINUTE} RPM / {cls.OPENAI_TOKENS_PER_MINUTE} TPM")
+        print(f"  Embedding Rate Limit: {cls.EMBEDDING_REQUESTS_PER_MINUTE} RPM / {cls.EMBEDDING_TOKENS_PER_MINUTE} TPM")
 
 
 # Eisenhower Matrix quadrants configuration
@@ -119,4 +213,60 @@ def get_all_quadrants() -> dict:
     Returns:
         Dictionary of all quadrant configurations
     """
-    return EISENHOWER_QUADRANTS.copy() 
\ No newline at end of file
+    return EISENHOWER_QUADRANTS.copy() 
+
+# Where a classification came from, stored with it as "source". Only "llm" judgments are
+# ground truth: training, evaluating or voting on the others feeds the system its own outputs
+LABEL_SOURCES = ("llm", "llm_cheap", "rule", "local", "knn", "fallback")
+
+# Classifications stored before they carried a source, recognised by their reasoning
+_LEGACY_SOURCE_MARKERS = (
+    ("(rule: ", "rule"),
+    ("Meeting acceptance/rejection notification", "rule"),
+    ("insufficient content for meaningful triage", "rule"),
+    ("Local embedding classifier", "local"),
+    ("Similarity-weighted vote", "knn"),
+    ("Fallback", "fallback"),
+    ("Failed to parse", "fallback"),
+    ("Skipped due to", "fallback"),
+    ("No similar emails found", "fallback"),
+    ("No valid triage results", "fallback"),
+    ("No local classifier trained", "fallback"),
+)
+
+
+def label_source(result: Optional[dict]) -> Optional[str]:
+    """
+    Get where a stored classification came from.
+    
+    Args:
+        result: Classification dictionary (a triage_results JSONB value)
+        
+    Returns:
+        One of LABEL_SOURCES (inferred from the reasoning for results stored
+        before sources were recorded), or None if result is not a classification
+    """
+    if not isinstance(result, dict):
+        return None
+    if result.get("source"):
+        return result["source"]
+    reasoning = str(result.get("reasoning") or "")
+    for marker, source in _LEGACY_SOURCE_MARKERS:
+        if marker in reasoning:
+            return source
+    return "llm"
+
+
+def is_llm_label(result: Optional[dict]) -> bool:
+    """
+    Check whether a stored classification is a model judgment usable as a label.
+    
+    Args:
+        result: Classification dictionary (a triage_results JSONB value)
+        
+    Returns:
+        True for classifications whose source is "llm", and for cheap-model
+        cascade answers ("llm_cheap") only if Config.CASCADE_CHEAP_LABELS_TRUSTED
+    """
+    source = label_source(result)
+    return source == "llm" or (source == "llm_cheap" and Config.CASCADE_CHEAP_LABELS_TRUSTED)
@@ -0,0 +1,453 @@
+"""
+Embedding service for EisenhowerTriageAgent.
+
+Every embedding request (batch script, strategy executor, Streamlit) goes
+through get_embedding() / get_embedding_async(). Text is normalised and
+truncated to the embedding limit, then looked up by a content hash of
+(model, text) in two cache tiers: an in-process LRU and a SQLite file on
+disk. Only misses reach the OpenAI API, and concurrent requests for the same
+text share a single call, so each distinct text is embedded once per model.
+"""
+
+import array
+import asyncio
+import logging
+import re
+import threading
+import unicodedata
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from backend.cache import DiskLRUCache, MemoryLRUCache, content_hash
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_HORIZONTAL_SPACE = re.compile(r"[ \t\f\v]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def normalize_embedding_text(text: str) -> str:
+    """
+    Canonicalise text so trivially different copies share one embedding.
+
+    Applies Unicode NFC, unifies line endings, collapses runs of spaces and
+    tabs, drops trailing spaces and limits blank lines to one.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        Normalised text
+    """
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    text = _HORIZONTAL_SPACE.sub(" ", text)
+    text = "\n".join(line.rstrip() for line in text.split("\n"))
+    return _BLANK_LINES.sub("\n\n", text).strip()
+
+
+def pack_embedding_batches(token_counts: Sequence[int], max_inputs: int, max_tokens: int) -> List[List[int]]:
+    """
+    Group inputs into consecutive requests bounded by input count and total tokens.
+
+    An input larger than max_tokens on its own still gets a batch of one.
+
+    Args:
+        token_counts: Token count of each input, in order
+        max_inputs: Maximum inputs per request
+        max_tokens: Maximum total tokens per request
+
+    Returns:
+        List of batches, each a list of input indices
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for index, tokens in enumerate(token_counts):
+        if current and (len(current) >= max_inputs or current_tokens + tokens > max_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _pack_vector(vector: List[float]) -> bytes:
+    """Serialise an embedding as packed float32 (the API's own precision)."""
+    return array.array("f", vector).tobytes()
+
+
+def _unpack_vector(value: bytes) -> List[float]:
+    """Inverse of _pack_vector."""
+    vector = array.array("f")
+    vector.frombytes(value)
+    return vector.tolist()
+
+
+class EmbeddingService:
+    """
+    Two-tier content-addressed embedding cache in front of an embedding function.
+    """
+
+    def __init__(self, embed: Callable[[str, str], List[float]],
+                 embed_async: Optional[Callable[[str, str], Awaitable[List[float]]]] = None,
+                 default_model: str = "text-embedding-ada-002",
+                 memory_cache: Optional[MemoryLRUCache] = None,
+                 disk_cache: Optional[DiskLRUCache] = None,
+                 prepare_text: Callable[[str], str] = normalize_embedding_text,
+                 embed_batch: Optional[Callable[[List[str], str], List[List[float]]]] = None,
+                 count_tokens: Callable[[str], int] = lambda text: len(text) // 4,
+                 batch_size: int = 256,
+                 batch_max_tokens: int = 250000):
+        """
+        Args:
+            embed: Blocking function (text, model) -> vector, called on a miss
+            embed_async: Awaitable variant used by embed_async(); defaults to
+                running embed in a worker thread
+            default_model: Model used when callers don't name one
+            memory_cache: In-process tier (None disables it)
+            disk_cache: Persistent tier (None disables it)
+            prepare_text: Normalisation/truncation applied before hashing and embedding
+            embed_batch: Function (texts, model) -> vectors used by embed_many();
+                defaults to calling embed once per text
+            count_tokens: Token counter used to size batches
+            batch_size: Maximum inputs per embed_many() request
+            batch_max_tokens: Maximum total tokens per embed_many() request
+        """
+        self._embed = embed
+        self._embed_async = embed_async
+        self.default_model = default_model
+        self.memory_cache = memory_cache
+        self.disk_cache = disk_cache
+        self._prepare_text = prepare_text
+        self._embed_batch = embed_batch
+        self._count_tokens = count_tokens
+        self.batch_size = batch_size
+        self.batch_max_tokens = batch_max_tokens
+
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Event] = {}
+        self._inflight_async: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = weakref.WeakKeyDictionary()
+
+        self.requests = 0
+        self.cache_hits = 0
+        self.api_calls = 0
+        self.deduplicated = 0
+        self.embedded_texts = 0
+
+    def cache_key(self, text: str, model: Optional[str] = None):
+        """
+        Return (key, prepared_text) for a request.
+
+        Args:
+            text: Text to embed
+            model: Embedding model (default: the service's default model)
+
+        Returns:
+            Tuple of content hash and the exact text that would be embedded
+        """
+        prepared = self._prepare_text(text)
+        return content_hash({"model": model or self.default_model, "text": prepared}), prepared
+
+    def _lookup(self, key: str) -> Optional[List[float]]:
+        """Check the memory tier, then the disk tier (promoting disk hits)."""
+        if self.memory_cache is not None:
+            vector = self.memory_cache.get(key)
+            if vector is not None:
+                return vector
+        if self.disk_cache is not None:
+            try:
+                value = self.disk_cache.get(key)
+            except Exception as e:
+                logger.warning(f"Error reading embedding cache entry {key[:12]}: {str(e)}")
+                value = None
+            if value is not None:
+                vector = _unpack_vector(value)
+                if self.memory_cache is not None:
+                    self.memory_cache.set(key, vector)
+                return vector
+        return None
+
+    def _store(self, key: str, vector: List[float]) -> None:
+        """Write a freshly computed vector to both tiers."""
+        if self.memory_cache is not None:
+            self.memory_cache.set(key, vector)
+        if self.disk_cache is not None:
+            try:
+                self.disk_cache.set(key, _pack_vector(vector))
+            except Exception as e:
+                logger.warning(f"Error writing embedding cache entry {key[:12]}: {str(e)}")
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            if hit:
+                self.cache_hits += 1
+
+    def embed(self, text: str, model: Optional[str] = None) -> List[float]:
+        """
+        Return the embedding for text, calling the API only on a cache miss.
+
+        Args:
+            text: Text to embed
+            model: Embedding model (default: the service's default model)
+
+        Returns:
+            Embedding vector as a list of floats
+        """
+        model = model or self.default_model
+        key, prepared = self.cache_key(text, model)
+        vector = self._lookup(key)
+        if vector is not None:
+            self._count(hit=True)
+            return vector
+
+        with self._lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                self._inflight[key] = threading.Event()
+
+        if pending is not None:
+            # Another thread is already embedding this text
+            pending.wait()
+            vector = self._lookup(key)
+            if vector is not None:
+                with self._lock:
+                    self.deduplicated += 1
+                self._count(hit=True)
+                return vector
+            return self.embed(text, model)
+
+        try:
+            self._count(hit=False)
+            with self._lock:
+                self.api_calls += 1
+                self.embedded_texts += 1
+            vector = self._embed(prepared, model)
+            self._store(key, vector)
+            return vector
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    async def embed_async(self, text: str, model: Optional[str] = None) -> List[float]:
+        """
+        Awaitable variant of embed(); concurrent callers on one loop share a request.
+
+        Args:
+            text: Text to embed
+            model: Embedding model (default: the service's default model)
+
+        Returns:
+            Embedding vector as a list of floats
+        """
+        model = model or self.default_model
+        key, prepared = self.cache_key(text, model)
+        vector = self._lookup(key)
+        if vector is not None:
+            self._count(hit=True)
+            return vector
+
+        loop = asyncio.get_running_loop()
+        inflight = self._inflight_async.setdefault(loop, {})
+        pending = inflight.get(key)
+        if pending is not None:
+            with self._lock:
+                self.deduplicated += 1
+            self._count(hit=True)
+            return list(await asyncio.shield(pending))
+
+        future = loop.create_future()
+        inflight[key] = future
+        try:
+            self._count(hit=False)
+            with self._lock:
+                self.api_calls += 1
+                self.embedded_texts += 1
+            if self._embed_async is not None:
+                vector = await self._embed_async(prepared, model)
+            else:
+                vector = await asyncio.to_thread(self._embed, prepared, model)
+            self._store(key, vector)
+            future.set_result(vector)
+            return vector
+        except BaseException as e:
+            future.set_exception(e)
+            # Waiters re-raise it; don't warn about an unretrieved exception otherwise
+            future.exception()
+            raise
+        finally:
+            inflight.pop(key, None)
+
+    def embed_many(self, texts: Sequence[str], model: Optional[str] = None) -> List[List[float]]:
+        """
+        Embed many texts, sending only cache misses in as few requests as possible.
+
+        Misses are deduplicated by cache key and packed into requests bounded by
+        batch_size inputs and batch_max_tokens tokens.
+
+        Args:
+            texts: Texts to embed
+            model: Embedding model (default: the service's default model)
+
+        Returns:
+            Embedding vectors in the same order as texts
+        """
+        model = model or self.default_model
+        keys = []
+        vectors: List[Optional[List[float]]] = []
+        missing: Dict[str, str] = {}
+        for text in texts:
+            key, prepared = self.cache_key(text, model)
+            keys.append(key)
+            vector = None if key in missing else self._lookup(key)
+            vectors.append(vector)
+            if vector is None:
+                missing.setdefault(key, prepared)
+                self._count(hit=False)
+            else:
+                self._count(hit=True)
+
+        if missing:
+            miss_keys = list(missing)
+            miss_texts = [missing[key] for key in miss_keys]
+            batches = pack_embedding_batches(
+                [self._count_tokens(text) for text in miss_texts], self.batch_size, self.batch_max_tokens
+            )
+            fresh: Dict[str, List[float]] = {}
+            for batch in batches:
+                batch_texts = [miss_texts[i] for i in batch]
+                with self._lock:
+                    self.api_calls += len(batch) if self._embed_batch is None else 1
+                    self.embedded_texts += len(batch)
+                if self._embed_batch is None:
+                    batch_vectors = [self._embed(text, model) for text in batch_texts]
+                else:
+                    batch_vectors = self._embed_batch(batch_texts, model)
+                for i, vector in zip(batch, batch_vectors):
+                    self._store(miss_keys[i], vector)
+                    fresh[miss_keys[i]] = vector
+            logger.info(f"Embedded {len(miss_texts)} new texts in {len(batches)} requests "
+                        f"({len(texts) - len(miss_texts)} served from cache or duplicates)")
+            vectors = [vector if vector is not None else fresh[key] for key, vector in zip(keys, vectors)]
+
+        return vectors
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return request counters and per-tier cache statistics.
+
+        Returns:
+            Dictionary with requests, cache_hits, api_calls (HTTP requests),
+            embedded_texts, deduplicated, hit_rate, memory and disk
+        """
+        with self._lock:
+            stats = {
+                "requests": self.requests,
+                "cache_hits": self.cache_hits,
+                "api_calls": self.api_calls,
+                "embedded_texts": self.embedded_texts,
+                "deduplicated": self.deduplicated,
+                "hit_rate": round(self.cache_hits / self.requests, 3) if self.requests else 0.0,
+            }
+        stats["memory"] = self.memory_cache.stats() if self.memory_cache is not None else {}
+        stats["disk"] = self.disk_cache.stats() if self.disk_cache is not None else {}
+        return stats
+
+
+_service: Optional[EmbeddingService] = None
+_service_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """
+    Return the process-wide embedding service backed by the OpenAI API.
+
+    Configured by Config.EMBEDDING_MODEL, EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_MB, EMBEDDING_CACHE_MEMORY_ENTRIES,
+    EMBEDDING_BATCH_SIZE and EMBEDDING_BATCH_MAX_TOKENS.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            from backend.config import Config
+            from backend.triage_core import (
+                count_tokens,
+                create_embedding,
+                create_embedding_async,
+                create_embeddings,
+                truncate_embedding_text,
+            )
+
+            memory_cache = None
+            if Config.EMBEDDING_CACHE_MEMORY_ENTRIES > 0:
+                memory_cache = MemoryLRUCache(Config.EMBEDDING_CACHE_MEMORY_ENTRIES)
+            disk_cache = None
+            if Config.EMBEDDING_CACHE_ENABLED:
+                disk_cache = DiskLRUCache(
+                    Config.EMBEDDING_CACHE_PATH,
+                    max_bytes=Config.EMBEDDING_CACHE_MAX_MB * 1024 * 1024
+                )
+
+            _service = EmbeddingService(
+                embed=create_embedding,
+                embed_async=create_embedding_async,
+                default_model=Config.EMBEDDING_MODEL,
+                memory_cache=memory_cache,
+                disk_cache=disk_cache,
+                prepare_text=lambda text: normalize_embedding_text(truncate_embedding_text(text)),
+                embed_batch=create_embeddings,
+                count_tokens=count_tokens,
+                batch_size=Config.EMBEDDING_BATCH_SIZE,
+                batch_max_tokens=Config.EMBEDDING_BATCH_MAX_TOKENS
+            )
+        return _service
+
+
+def get_embedding(text: str, model: Optional[str] = None) -> List[float]:
+    """
+    Embed text through the shared cache.
+
+    Args:
+        text: Text to embed (normalised and truncated here)
+        model: Embedding model (default: Config.EMBEDDING_MODEL)
+
+    Returns:
+        Embedding vector as a list of floats
+    """
+    return get_embedding_service().embed(text, model)
+
+
+async def get_embedding_async(text: str, model: Optional[str] = None) -> List[float]:
+    """
+    Awaitable variant of get_embedding().
+
+    Args:
+        text: Text to embed (normalised and truncated here)
+        model: Embedding model (default: Config.EMBEDDING_MODEL)
+
+    Returns:
+        Embedding vector as a list of floats
+    """
+    return await get_embedding_service().embed_async(text, model)
+
+
+def embed_many(texts: Sequence[str], model: Optional[str] = None) -> List[List[float]]:
+    """
+    Embed many texts through the shared cache using batched requests.
+
+    Args:
+        texts: Texts to embed (normalised and truncated here)
+        model: Embedding model (default: Config.EMBEDDING_MODEL)
+
+    Returns:
+        Embedding vectors in the same order as texts
+    """
+    return get_embedding_service().embed_many(texts, model)
+
+
+def get_embedding_cache_stats() -> Dict[str, Any]:
+    """Return counters for the shared embedding service."""
+    return get_embedding_service().stats()
@@ -0,0 +1,378 @@
+"""
+Local quadrant classifier for EisenhowerTriageAgent.
+
+Once triage_results holds enough labelled emails, many new emails land in
+well-populated regions of embedding space and are easy to classify without
+GPT-4. LocalClassifier is a multinomial logistic regression over the stored
+1536-dimensional embeddings, trained with NumPy from the quadrants already in
+triage_results. Its softmax probability is the confidence; emails at or above
+the cascade threshold take the local classification and every chat request
+for them is skipped (Config.LOCAL_CLASSIFIER_ENABLED).
+
+Train and evaluate it offline with scripts/train_local_classifier.py, which
+also picks the threshold that reaches a target accuracy on held-out emails.
+"""
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+QUADRANT_LABELS = ("do", "schedule", "delegate", "delete")
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalise each row; zero rows stay zero."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    """Row-wise softmax, shifted for numerical stability."""
+    shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return shifted / shifted.sum(axis=1, keepdims=True)
+
+
+class LocalClassifier:
+    """
+    Multinomial logistic regression from email embeddings to quadrants.
+
+    Inputs are L2-normalised and centred on the training mean, since ada-002
+    embeddings share a large common component that carries no label signal.
+    """
+
+    def __init__(self, dim: int = 1536, labels: Sequence[str] = QUADRANT_LABELS):
+        """
+        Args:
+            dim: Embedding dimension
+            labels: Class labels, in output order
+        """
+        self.dim = dim
+        self.labels: List[str] = list(labels)
+        self.weights = np.zeros((dim, len(self.labels)), dtype=np.float32)
+        self.bias = np.zeros(len(self.labels), dtype=np.float32)
+        self.mean = np.zeros(dim, dtype=np.float32)
+        # Confidence at which the cascade accepts a prediction, tuned at training time
+        self.threshold: Optional[float] = None
+        self.trained_on = 0
+
+    def _features(self, vectors: Union[Sequence[Sequence[float]], np.ndarray]) -> np.ndarray:
+        """Normalised, centred float32 feature matrix."""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if matrix.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional vectors, got {matrix.shape[1]}")
+        return _normalize_rows(matrix) - self.mean
+
+    def fit(self, vectors: Union[Sequence[Sequence[float]], np.ndarray], labels: Sequence[str],
+            epochs: int = 300, learning_rate: float = 4.0, l2: float = 1e-4) -> List[float]:
+        """
+        Train by full-batch gradient descent on the cross-entropy loss.
+
+        Classes are weighted inversely to their frequency so a rare quadrant
+        ("do") is not drowned out by the common ones.
+
+        Args:
+            vectors: Embedding vectors
+            labels: Quadrant of each vector (must be in self.labels)
+            epochs: Gradient steps
+            learning_rate: Step size (inputs are unit length, so a large step is stable)
+            l2: L2 penalty on the weights
+
+        Returns:
+            Training loss after each epoch
+        """
+        matrix = _normalize_rows(np.asarray(vectors, dtype=np.float32).reshape(len(labels), -1))
+        if matrix.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional vectors, got {matrix.shape[1]}")
+        index = {label: i for i, label in enumerate(self.labels)}
+        unknown = sorted(set(labels) - set(index))
+        if unknown:
+            raise ValueError(f"Unknown labels: {', '.join(unknown)}")
+        targets = np.array([index[label] for label in labels])
+        if not len(targets):
+            raise ValueError("No training examples")
+
+        self.mean = matrix.mean(axis=0)
+        features = matrix - self.mean
+        one_hot = np.eye(len(self.labels), dtype=np.float32)[targets]
+        counts = np.bincount(targets, minlength=len(self.labels))
+        class_weights = len(targets) / (len(self.labels) * np.maximum(counts, 1))
+        sample_weights = (class_weights[targets] / len(targets)).astype(np.float32)[:, None]
+
+        self.weights = np.zeros((self.dim, len(self.labels)), dtype=np.float32)
+        self.bias = np.zeros(len(self.labels), dtype=np.float32)
+        rows = np.arange(len(targets))
+        losses = []
+        for _ in range(epochs):
+            probabilities = _softmax(features @ self.weights + self.bias)
+            losses.append(float(-(sample_weights[:, 0] * np.log(probabilities[rows, targets] + 1e-12)).sum()))
+            gradient = sample_weights * (probabilities - one_hot)
+            self.weights -= learning_rate * (features.T @ gradient + l2 * self.weights)
+            self.bias -= learning_rate * gradient.sum(axis=0)
+        self.trained_on = len(targets)
+        return losses
+
+    def predict_proba(self, vectors: Union[Sequence[Sequence[float]], np.ndarray]) -> np.ndarray:
+        """
+        Class probabilities for each vector.
+
+        Args:
+            vectors: One embedding or a matrix of embeddings
+
+        Returns:
+            (n, len(labels)) array of probabilities
+        """
+        return _softmax(self._features(vectors) @ self.weights + self.bias)
+
+    def classify(self, vector: Sequence[float]) -> Tuple[str, float]:
+        """
+        Most likely quadrant for one embedding.
+
+        Args:
+            vector: Embedding vector
+
+        Returns:
+            Tuple of (quadrant, confidence)
+        """
+        probabilities = self.predict_proba(vector)[0]
+        best = int(np.argmax(probabilities))
+        return self.labels[best], float(probabilities[best])
+
+    def evaluate(self, vectors: Union[Sequence[Sequence[float]], np.ndarray], labels: Sequence[str],
+                 thresholds: Sequence[float] = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.99)) -> List[Dict[str, float]]:
+        """
+        Accuracy and coverage of the cascade at each confidence threshold.
+
+        Coverage is the fraction of emails the local model would classify on
+        its own, i.e. the fraction of LLM calls saved.
+
+        Args:
+            vectors: Held-out embedding vectors
+            labels: Their true quadrants
+            thresholds: Confidence thresholds to report
+
+        Returns:
+            One {"threshold", "coverage", "accuracy", "accepted"} dict per threshold;
+            accuracy is over the accepted emails (None when none are accepted)
+        """
+        probabilities = self.predict_proba(vectors)
+        predicted = np.array(self.labels)[np.argmax(probabilities, axis=1)]
+        confidence = probabilities.max(axis=1)
+        correct = predicted == np.asarray(labels)
+
+        report = []
+        for threshold in thresholds:
+            accepted = confidence >= threshold
+            count = int(accepted.sum())
+            report.append({
+                "threshold": float(threshold),
+                "coverage": count / len(correct) if len(correct) else 0.0,
+                "accuracy": float(correct[accepted].mean()) if count else None,
+                "accepted": count,
+            })
+        return report
+
+    @staticmethod
+    def choose_threshold(report: List[Dict[str, float]], target_accuracy: float) -> Optional[float]:
+        """
+        Lowest threshold (largest coverage) whose accuracy reaches the target.
+
+        Args:
+            report: Output of evaluate()
+            target_accuracy: Required accuracy on accepted emails
+
+        Returns:
+            Threshold, or None if no threshold reaches the target
+        """
+        for row in sorted(report, key=lambda row: row["threshold"]):
+            if row["accuracy"] is not None and row["accuracy"] >= target_accuracy:
+                return row["threshold"]
+        return None
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        Persist the model to a .npz file (written atomically).
+
+        Args:
+            path: Destination file
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp.npz")
+        np.savez(
+            tmp_path,
+            weights=self.weights,
+            bias=self.bias,
+            mean=self.mean,
+            labels=np.array(self.labels, dtype=str),
+            threshold=np.array(-1.0 if self.threshold is None else self.threshold),
+            trained_on=np.array(self.trained_on),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "LocalClassifier":
+        """
+        Load a model written by save().
+
+        Args:
+            path: .npz file
+
+        Returns:
+            LocalClassifier instance
+        """
+        with np.load(path) as data:
+            model = cls(dim=data["weights"].shape[0], labels=[str(label) for label in data["labels"]])
+            model.weights = data["weights"].astype(np.float32)
+            model.bias = data["bias"].astype(np.float32)
+            model.mean = data["mean"].astype(np.float32)
+            threshold = float(data["threshold"])
+            model.threshold = threshold if threshold >= 0 else None
+            model.trained_on = int(data["trained_on"])
+        return model
+
+
+def load_training_data(label_column: str = "triage_email_only",
+                       labels: Sequence[str] = QUADRANT_LABELS) -> Tuple[List[str], np.ndarray, List[str]]:
+    """
+    Join email_embeddings with the quadrants stored in triage_results.
+
+    Only LLM judgments are used: rule, local classifier and neighbour vote
+    results are the system's own outputs, and training or evaluating on them
+    would lock in their mistakes.
+
+    Args:
+        label_column: triage_results JSONB column whose quadrant is the label
+        labels: Quadrants to keep; rows with any other value are skipped
+
+    Returns:
+        Tuple of (email_ids, vectors, quadrants) for every embedded email labelled by the LLM
+    """
+    from backend.config import is_llm_label
+    from backend.supabase_client import fetch_embeddings, get_triage_results_many
+
+    email_ids: List[str] = []
+    vectors: List[List[float]] = []
+    quadrants: List[str] = []
+    for rows in fetch_embeddings():
+        # Keep the id lists short enough for a PostgREST query string
+        for start in range(0, len(rows), 200):
+            chunk = rows[start:start + 200]
+            results = get_triage_results_many([row["email_id"] for row in chunk], columns=f"message_id, {label_column}")
+            for row in chunk:
+                result = (results.get(row["email_id"]) or {}).get(label_column)
+                label = result.get("quadrant") if is_llm_label(result) else None
+                if label in labels:
+                    email_ids.append(row["email_id"])
+                    vectors.append(row["embedding"])
+                    quadrants.append(label)
+    return email_ids, np.asarray(vectors, dtype=np.float32), quadrants
+
+
+_model: Optional[LocalClassifier] = None
+_model_loaded = False
+_model_lock = threading.Lock()
+_stats = {"evaluated": 0, "accepted": 0}
+_stats_lock = threading.Lock()
+
+
+def get_local_classifier() -> Optional[LocalClassifier]:
+    """
+    Return the shared classifier, loading Config.LOCAL_CLASSIFIER_PATH on first use.
+
+    Returns:
+        LocalClassifier, or None when no trained model is available
+    """
+    global _model, _model_loaded
+    from backend.config import Config
+
+    with _model_lock:
+        if not _model_loaded:
+            _model_loaded = True
+            path = Path(Config.LOCAL_CLASSIFIER_PATH)
+            try:
+                _model = LocalClassifier.load(path)
+                logger.info(f"Loaded local classifier trained on {_model.trained_on} emails from {path}")
+            except Exception as e:
+                # Without a model every email simply goes to the LLM strategies
+                print(f"⚠️  Local classifier unavailable ({path}): {str(e)}")
+                logger.warning(f"Local classifier unavailable ({path}): {str(e)}")
+                _model = None
+    return _model
+
+
+def cascade_threshold(model: LocalClassifier) -> float:
+    """Confidence required to skip the LLM: Config.LOCAL_CLASSIFIER_THRESHOLD, else the model's tuned value."""
+    from backend.config import Config
+
+    if Config.LOCAL_CLASSIFIER_THRESHOLD > 0:
+        return Config.LOCAL_CLASSIFIER_THRESHOLD
+    return model.threshold if model.threshold is not None else 0.9
+
+
+def classify_local(embedding: Sequence[float]) -> Optional[Dict[str, Any]]:
+    """
+    Classify an email from its embedding with the shared classifier.
+
+    Args:
+        embedding: Embedding vector of the email
+
+    Returns:
+        {"quadrant", "confidence", "reasoning", "source"} dict, or None when no model is available
+    """
+    model = get_local_classifier()
+    if model is None:
+        return None
+    quadrant, confidence = model.classify(embedding)
+    return {
+        "quadrant": quadrant,
+        "confidence": round(confidence, 3),
+        "reasoning": f"Local embedding classifier ({model.trained_on} labelled emails), confidence {confidence:.2f}",
+        "source": "local"
+    }
+
+
+def confident_local_result(embedding: Sequence[float]) -> Optional[Dict[str, Any]]:
+    """
+    Cascade gate: the local classification if it is confident enough to skip the LLM.
+
+    Args:
+        embedding: Embedding vector of the email
+
+    Returns:
+        Classification dict when its confidence reaches the cascade threshold, otherwise None
+    """
+    model = get_local_classifier()
+    result = classify_local(embedding)
+    if result is None:
+        return None
+    accepted = result["confidence"] >= cascade_threshold(model)
+    with _stats_lock:
+        _stats["evaluated"] += 1
+        _stats["accepted"] += int(accepted)
+    return result if accepted else None
+
+
+def get_local_classifier_stats() -> Dict[str, Any]:
+    """
+    Cascade counters since startup.
+
+    Returns:
+        Dictionary with evaluated, accepted (LLM skipped) and acceptance_rate
+    """
+    with _stats_lock:
+        evaluated, accepted = _stats["evaluated"], _stats["accepted"]
+    return {
+        "evaluated": evaluated,
+        "accepted": accepted,
+        "acceptance_rate": accepted / evaluated if evaluated else 0.0,
+    }
@@ -0,0 +1,175 @@
+"""
+Multi-pattern matching for EisenhowerTriageAgent.
+
+PatternMatcher holds many keyword patterns, each tagged with an id, prepared
+once (lowercased, deduplicated and grouped by id). Matching lowercases the
+text once and returns every id with at least one matching pattern; an id's
+remaining keywords are skipped as soon as one of them is found.
+
+How the text is scanned depends on the number of keywords. CPython's
+substring search runs at memory speed, so for up to a few hundred keywords
+one `in` test per keyword beats both a combined regular expression and a
+pure-Python automaton. Beyond LARGE_PATTERN_SET keywords they are merged
+into a single trie-shaped regular expression and the text is scanned once.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Keyword count above which one combined regex scan beats per-keyword search
+LARGE_PATTERN_SET = 256
+
+# Marks the end of a keyword in the trie
+_END = ""
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """
+    Build a regular expression matching any of the words, factored as a trie.
+
+    Args:
+        words: Literal (non-empty) words
+
+    Returns:
+        Regular expression source equivalent to an alternation of the words
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[_END] = True
+
+    def render(node: Dict) -> str:
+        optional = _END in node
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char != _END]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        # Longer continuations are tried before ending the word here
+        return "(?:" + "|".join(branches) + ")" + ("?" if optional else "")
+
+    return render(trie)
+
+
+class PatternMatcher:
+    """
+    A set of id-tagged patterns matched against a text in one call.
+
+    Matching is case-insensitive. Literal keywords behave like `keyword in
+    text.lower()`; regex patterns are searched as written.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, str]] = (), regex_patterns: Iterable[Tuple[str, str]] = ()):
+        """
+        Args:
+            patterns: (pattern_id, literal keyword) pairs; an id may appear many times
+            regex_patterns: (pattern_id, regular expression) pairs
+        """
+        keyword_ids: Dict[str, Set[str]] = {}
+        for pattern_id, keyword in patterns:
+            keyword = keyword.lower()
+            if not keyword:
+                raise ValueError(f"Empty keyword for pattern '{pattern_id}'")
+            keyword_ids.setdefault(keyword, set()).add(pattern_id)
+
+        # Keywords grouped by id, shortest first (cheapest to find)
+        self._keywords: Dict[str, List[str]] = {}
+        for keyword in sorted(keyword_ids, key=len):
+            for pattern_id in keyword_ids[keyword]:
+                self._keywords.setdefault(pattern_id, []).append(keyword)
+        self._keyword_ids = keyword_ids
+        # Each distinct keyword once, shortest first, with every id it answers
+        self._keyword_order: List[Tuple[str, Set[str]]] = [
+            (keyword, keyword_ids[keyword]) for keyword in sorted(keyword_ids, key=len)
+        ]
+
+        self._regexes: List[Tuple[str, "re.Pattern"]] = [
+            (pattern_id, re.compile(source, re.IGNORECASE)) for pattern_id, source in regex_patterns
+        ]
+
+        self._scanner = None
+        self._longest_keyword = max((len(keyword) for keyword in keyword_ids), default=0)
+        if len(keyword_ids) > LARGE_PATTERN_SET:
+            self._scanner = re.compile(_trie_regex(keyword_ids))
+
+        self.ids: Set[str] = set(self._keywords) | {pattern_id for pattern_id, _ in self._regexes}
+
+    def __len__(self) -> int:
+        return len(self._keyword_ids) + len(self._regexes)
+
+    def _ids_at(self, lowered: str, start: int) -> Set[str]:
+        """Ids of every keyword starting at start, not just the one the scanner chose."""
+        ids: Set[str] = set()
+        window = lowered[start:start + self._longest_keyword]
+        for end in range(1, len(window) + 1):
+            ids.update(self._keyword_ids.get(window[:end], ()))
+        return ids
+
+    def _scan_keywords(self, lowered: str, found: Set[str]) -> None:
+        """Add the ids of keywords in lowered text to found."""
+        if self._scanner is None:
+            # A keyword shared by several ids is searched once; one whose ids are all found is skipped
+            for keyword, ids in self._keyword_order:
+                if not ids <= found and keyword in lowered:
+                    found |= ids
+            return
+
+        position = 0
+        while True:
+            match = self._scanner.search(lowered, position)
+            if match is None:
+                return
+            found.update(self._ids_at(lowered, match.start()))
+            position = match.start() + 1
+
+    def find_all(self, text: Optional[str]) -> Set[str]:
+        """
+        Return the ids of all patterns occurring in text.
+
+        Args:
+            text: Text to scan (None or empty matches nothing)
+
+        Returns:
+            Set of matched pattern ids
+        """
+        found: Set[str] = set()
+        if not text:
+            return found
+        if self._keyword_ids:
+            self._scan_keywords(text.lower(), found)
+        for pattern_id, pattern in self._regexes:
+            if pattern_id not in found and pattern.search(text):
+                found.add(pattern_id)
+        return found
+
+    def search(self, text: Optional[str]) -> Optional[str]:
+        """
+        Return the id of some matching pattern, or None.
+
+        Stops at the first match, so it is cheaper than find_all() when only
+        the presence of a match matters.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            A matched pattern id, or None if nothing matches
+        """
+        if not text:
+            return None
+        if self._keyword_ids:
+            lowered = text.lower()
+            if self._scanner is None:
+                for pattern_id, keywords in self._keywords.items():
+                    if any(keyword in lowered for keyword in keywords):
+                        return pattern_id
+            else:
+                match = self._scanner.search(lowered)
+                if match is not None:
+                    return min(self._ids_at(lowered, match.start()))
+        for pattern_id, pattern in self._regexes:
+            if pattern.search(text):
+                return pattern_id
+        return None
@@ -0,0 +1,269 @@
+"""
+Proactive OpenAI rate limiting for EisenhowerTriageAgent.
+
+OpenAI enforces two budgets per model: requests per minute (RPM) and tokens
+per minute (TPM). Rather than firing requests and backing off after a 429,
+every chat and embedding call reserves capacity from its model's shared pair
+of token buckets first. Reservations are granted in arrival order and may put a bucket
+into debt, so concurrent callers are spaced out instead of all waking up at
+the same moment and retrying together.
+
+The buckets also adapt to the x-ratelimit-* headers OpenAI returns, so the
+local view never drifts far from the server's.
+"""
+
+import asyncio
+import re
+import threading
+import time
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+
+class TokenBucket:
+    """
+    A continuously refilling token bucket that supports reservations.
+
+    Not thread-safe on its own; RateLimiter serialises access with a lock.
+    """
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            per_minute: Bucket capacity, refilled evenly over one minute
+            clock: Monotonic clock returning seconds (injectable for tests)
+        """
+        self._clock = clock
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.blocked_until = 0.0
+        self._updated = clock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._updated)
+        self.level = min(self.capacity, self.level + elapsed * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take amount from the bucket, going into debt if needed.
+
+        Args:
+            amount: Units to take (capped at the bucket capacity)
+
+        Returns:
+            Seconds the caller must wait before using the reservation
+        """
+        now = self._clock()
+        self._refill(now)
+        amount = min(float(amount), self.capacity)
+        self.level -= amount
+        wait = 0.0 if self.level >= 0 else -self.level / self.rate
+        return max(wait, self.blocked_until - now)
+
+    def resize(self, per_minute: float) -> None:
+        """Change the per-minute budget, keeping the current level within bounds."""
+        self._refill(self._clock())
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = min(self.level, self.capacity)
+
+    def observe(self, remaining: Optional[float], reset_seconds: Optional[float]) -> None:
+        """
+        Reconcile the local level with the server's view.
+
+        Args:
+            remaining: Units the server says are left (None if unknown)
+            reset_seconds: Seconds until the server's budget resets (None if unknown)
+        """
+        now = self._clock()
+        self._refill(now)
+        if remaining is not None:
+            self.level = min(self.level, float(remaining))
+            # The server is out of budget: hold off until it says the window resets
+            if remaining <= 0 and reset_seconds:
+                self.blocked_until = max(self.blocked_until, now + reset_seconds)
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse an x-ratelimit-reset-* header value such as "1s", "6m0s" or "20ms".
+
+    Args:
+        value: Header value
+
+    Returns:
+        Duration in seconds, or None if the value is missing or malformed
+    """
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value.strip())
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class RateLimiter:
+    """
+    Paired requests-per-minute and tokens-per-minute buckets for one API family.
+
+    A limit of 0 disables that bucket.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            requests_per_minute: RPM budget (0 disables request limiting)
+            tokens_per_minute: TPM budget (0 disables token limiting)
+            clock: Monotonic clock returning seconds (injectable for tests)
+            sleep: Blocking sleep used by acquire() (injectable for tests)
+        """
+        self._lock = threading.Lock()
+        self._sleep = sleep
+        self.requests = TokenBucket(requests_per_minute, clock) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute, clock) if tokens_per_minute > 0 else None
+        self.total_wait_seconds = 0.0
+        self.throttled_calls = 0
+
+    def reserve(self, tokens: int) -> float:
+        """
+        Reserve one request and the given number of tokens.
+
+        Args:
+            tokens: Estimated tokens the request will consume (prompt + completion)
+
+        Returns:
+            Seconds to wait before sending the request
+        """
+        with self._lock:
+            wait = 0.0
+            if self.requests is not None:
+                wait = max(wait, self.requests.reserve(1))
+            if self.tokens is not None:
+                wait = max(wait, self.tokens.reserve(tokens))
+            if wait > 0:
+                self.throttled_calls += 1
+                self.total_wait_seconds += wait
+            return wait
+
+    def acquire(self, tokens: int) -> float:
+        """
+        Block until a request of the given size may be sent.
+
+        Args:
+            tokens: Estimated tokens the request will consume
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: int) -> float:
+        """
+        Awaitable variant of acquire() that yields to the event loop while waiting.
+
+        Args:
+            tokens: Estimated tokens the request will consume
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def update_from_headers(self, headers: Optional[Mapping[str, str]]) -> None:
+        """
+        Adapt the buckets to the x-ratelimit-* headers of an OpenAI response.
+
+        Args:
+            headers: Response headers (case-insensitive mapping, e.g. httpx.Headers)
+        """
+        if not headers:
+            return
+        with self._lock:
+            for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+                if bucket is None:
+                    continue
+                limit = _header_number(headers, f"x-ratelimit-limit-{kind}")
+                if limit and limit != bucket.capacity:
+                    bucket.resize(limit)
+                bucket.observe(
+                    _header_number(headers, f"x-ratelimit-remaining-{kind}"),
+                    parse_reset_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                )
+
+    def stats(self) -> Dict[str, float]:
+        """Return throttling counters for monitoring."""
+        with self._lock:
+            return {
+                "throttled_calls": self.throttled_calls,
+                "total_wait_seconds": round(self.total_wait_seconds, 3),
+                "requests_per_minute": self.requests.capacity if self.requests else 0,
+                "tokens_per_minute": self.tokens.capacity if self.tokens else 0,
+            }
+
+
+_limiters: Dict[Tuple[str, Optional[str]], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(kind: str, model: Optional[str] = None) -> RateLimiter:
+    """
+    Return the process-wide limiter for "chat" or "embedding" calls to a model.
+
+    OpenAI limits each model separately, so every model gets its own buckets:
+    the cheap and strong models of the cascade would otherwise resize one
+    shared bucket from each other's x-ratelimit-* headers. Limits start from
+    Config (OPENAI_REQUESTS_PER_MINUTE / OPENAI_TOKENS_PER_MINUTE for chat,
+    EMBEDDING_REQUESTS_PER_MINUTE / EMBEDDING_TOKENS_PER_MINUTE for embeddings)
+    and then follow the model's own headers.
+
+    Args:
+        kind: "chat" or "embedding"
+        model: Model the requests go to (None: the kind's default model)
+
+    Returns:
+        Shared RateLimiter instance
+    """
+    from backend.config import Config
+
+    if kind == "chat":
+        model = model or Config.OPENAI_MODEL
+    elif kind == "embedding":
+        model = model or Config.EMBEDDING_MODEL
+    else:
+        raise ValueError(f"Unknown rate limiter kind: {kind}")
+
+    with _limiters_lock:
+        limiter = _limiters.get((kind, model))
+        if limiter is None:
+            if kind == "chat":
+                limiter = RateLimiter(Config.OPENAI_REQUESTS_PER_MINUTE, Config.OPENAI_TOKENS_PER_MINUTE)
+            else:
+                limiter = RateLimiter(Config.EMBEDDING_REQUESTS_PER_MINUTE, Config.EMBEDDING_TOKENS_PER_MINUTE)
+            _limiters[(kind, model)] = limiter
+        return limiter
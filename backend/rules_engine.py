@@ -0,0 +1,415 @@
+"""
+Rule-based pre-classification for EisenhowerTriageAgent.
+
+Much of a mailbox never needs GPT-4: automatic replies, meeting responses,
+achievement notices, expense status changes. RulesEngine loads declarative
+rules from a JSON (or, with PyYAML installed, YAML) file and classifies such
+emails before any strategy runs.
+
+A rule lists predicates and the classification to return:
+
+    {
+        "id": "automatic_reply",
+        "subject": ["automatic reply:", "out of office"],
+        "quadrant": "delete",
+        "confidence": 0.95,
+        "reasoning": "Automatic reply - no action required"
+    }
+
+Supported predicates are subject, body, sender (case-insensitive substrings),
+subject_regex, body_regex, sender_domain (the domain or any parent domain)
+and headers ({"Header-Name": [substrings]}); body_max_chars limits the body
+predicates to short bodies. A rule matches when every predicate it lists
+matches (any one pattern per predicate), and the first matching rule in file
+order wins. All rules' patterns for a field are compiled into one
+PatternMatcher, so each field is scanned once per email however many rules
+there are, and the body only when a rule still in the running needs it.
+Per-rule hit counters show how many LLM calls the rules saved.
+match_envelope answers from the headers alone when no body rule could take
+precedence, so batch runs can classify a message before decoding its body.
+"""
+
+import json
+import logging
+import threading
+from email.utils import parseaddr
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple, Union
+
+from backend.config import EISENHOWER_QUADRANTS
+from backend.pattern_matcher import PatternMatcher
+
+# PyYAML is optional; JSON rule files work without it
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+PREDICATES = ("subject", "subject_regex", "body", "body_regex", "sender", "sender_domain", "headers")
+
+
+class Rule:
+    """
+    One validated rule: its predicates and the classification it produces.
+    """
+
+    def __init__(self, spec: Dict[str, Any]):
+        """
+        Args:
+            spec: Rule definition as loaded from the rules file
+
+        Raises:
+            ValueError: If the id, classification or predicates are missing or invalid
+        """
+        self.id = spec.get("id")
+        if not self.id:
+            raise ValueError(f"Rule without an id: {spec}")
+
+        self.quadrant = spec.get("quadrant")
+        if self.quadrant not in EISENHOWER_QUADRANTS:
+            raise ValueError(f"Rule '{self.id}' has invalid quadrant: {self.quadrant}")
+        self.confidence = float(spec.get("confidence", 0.9))
+        if not 0.0 <= self.confidence <= 1.0:
+            raise ValueError(f"Rule '{self.id}' confidence must be between 0.0 and 1.0, got: {self.confidence}")
+        self.reasoning = spec.get("reasoning") or spec.get("description") or f"Matched triage rule {self.id}"
+
+        unknown = set(spec) - set(PREDICATES) - {"id", "description", "quadrant", "confidence", "reasoning", "body_max_chars"}
+        if unknown:
+            raise ValueError(f"Rule '{self.id}' has unknown fields: {', '.join(sorted(unknown))}")
+
+        self.predicates: Dict[str, Any] = {}
+        for name in PREDICATES:
+            value = spec.get(name)
+            if value is None:
+                continue
+            if name == "headers":
+                value = {header.lower(): _as_list(patterns) for header, patterns in value.items()}
+            elif name == "sender_domain":
+                value = [domain.lower().lstrip("@.") for domain in _as_list(value)]
+            else:
+                value = _as_list(value)
+            if not value:
+                raise ValueError(f"Rule '{self.id}' has an empty {name} predicate")
+            self.predicates[name] = value
+        if not self.predicates:
+            raise ValueError(f"Rule '{self.id}' has no predicates")
+
+        self.body_max_chars: Optional[int] = spec.get("body_max_chars")
+
+    @property
+    def uses_body(self) -> bool:
+        """Whether the rule needs the (expensive) body scan."""
+        return "body" in self.predicates or "body_regex" in self.predicates
+
+    def result(self) -> Dict[str, Any]:
+        """Classification produced when the rule matches."""
+        return {
+            "quadrant": self.quadrant,
+            "confidence": self.confidence,
+            "reasoning": f"{self.reasoning} (rule: {self.id})",
+            "source": "rule"
+        }
+
+
+def _as_list(value: Union[str, List[str]]) -> List[str]:
+    """Accept a single pattern or a list of patterns."""
+    return [value] if isinstance(value, str) else list(value)
+
+
+def load_rules_file(path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """
+    Read rule definitions from a JSON or YAML file.
+
+    The file holds either a list of rules or an object with a "rules" list.
+
+    Args:
+        path: Path to a .json, .yaml or .yml file
+
+    Returns:
+        List of rule definitions
+
+    Raises:
+        ValueError: If the file is YAML and PyYAML is not installed, or has no rules list
+    """
+    path = Path(path)
+    text = path.read_text(encoding="utf-8")
+    if path.suffix.lower() in (".yaml", ".yml"):
+        if not YAML_AVAILABLE:
+            raise ValueError(f"PyYAML is required to load {path}; install it or use a JSON rules file")
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+
+    rules = data.get("rules") if isinstance(data, dict) else data
+    if not isinstance(rules, list):
+        raise ValueError(f"{path} must contain a list of rules")
+    return rules
+
+
+class RulesEngine:
+    """
+    Ordered triage rules compiled into one matcher per email field.
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        """
+        Args:
+            rules: Rule definitions, in priority order
+
+        Raises:
+            ValueError: If a rule is invalid or two rules share an id
+        """
+        self.rules = [Rule(spec) for spec in rules]
+        ids = [rule.id for rule in self.rules]
+        duplicates = {rule_id for rule_id in ids if ids.count(rule_id) > 1}
+        if duplicates:
+            raise ValueError(f"Duplicate rule ids: {', '.join(sorted(duplicates))}")
+
+        # Matched pattern ids are "<predicate>:<rule id>", so one scan serves every rule
+        def matcher(*predicates: str) -> PatternMatcher:
+            literals, regexes = [], []
+            for rule in self.rules:
+                for name in predicates:
+                    for pattern in rule.predicates.get(name, ()):
+                        (regexes if name.endswith("_regex") else literals).append((f"{name}:{rule.id}", pattern))
+            return PatternMatcher(literals, regexes)
+
+        self._subject = matcher("subject", "subject_regex")
+        self._body = matcher("body", "body_regex")
+        self._sender = matcher("sender")
+
+        self._header_matchers: Dict[str, PatternMatcher] = {}
+        for header in {header for rule in self.rules for header in rule.predicates.get("headers", {})}:
+            self._header_matchers[header] = PatternMatcher(
+                (f"headers.{header}:{rule.id}", pattern)
+                for rule in self.rules
+                for pattern in rule.predicates.get("headers", {}).get(header, ())
+            )
+
+        self._domains: Dict[str, Set[str]] = {}
+        for rule in self.rules:
+            for domain in rule.predicates.get("sender_domain", ()):
+                self._domains.setdefault(domain, set()).add(f"sender_domain:{rule.id}")
+
+        self._lock = threading.Lock()
+        self._evaluated = 0
+        self._hits: Dict[str, int] = {rule.id: 0 for rule in self.rules}
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "RulesEngine":
+        """Build an engine from a JSON or YAML rules file."""
+        return cls(load_rules_file(path))
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def _domain_ids(self, sender: str) -> Set[str]:
+        """Pattern ids of sender_domain predicates covering the sender's address."""
+        address = parseaddr(sender)[1].lower()
+        if "@" not in address:
+            return set()
+        labels = address.rsplit("@", 1)[1].split(".")
+        found: Set[str] = set()
+        for start in range(len(labels)):
+            found.update(self._domains.get(".".join(labels[start:]), ()))
+        return found
+
+    @staticmethod
+    def _passes(rule: Rule, matched: Set[str], predicates) -> bool:
+        """Whether every one of the given predicates the rule uses has matched."""
+        for name in predicates:
+            if name not in rule.predicates:
+                continue
+            if name == "headers":
+                if not all(f"headers.{header}:{rule.id}" in matched for header in rule.predicates["headers"]):
+                    return False
+            elif f"{name}:{rule.id}" not in matched:
+                return False
+        return True
+
+    def _envelope_candidates(self, subject: str, sender: Optional[str],
+                             headers: Optional[Mapping[str, Any]]) -> Tuple[Set[str], List[Rule]]:
+        """Pattern ids matched outside the body, and the rules those leave in the running."""
+        matched = self._subject.find_all(subject) | self._sender.find_all(sender)
+        if sender and self._domains:
+            matched |= self._domain_ids(sender)
+        if headers and self._header_matchers:
+            for name, value in headers.items():
+                header_matcher = self._header_matchers.get(name.lower())
+                if header_matcher is not None:
+                    matched |= header_matcher.find_all(str(value))
+
+        envelope = ("subject", "subject_regex", "sender", "sender_domain", "headers")
+        return matched, [rule for rule in self.rules if self._passes(rule, matched, envelope)]
+
+    def _body_applies(self, rule: Rule, body: str) -> bool:
+        """Whether the rule's body predicates may be evaluated for this body."""
+        return rule.body_max_chars is None or len(body or "") <= rule.body_max_chars
+
+    def match(self, subject: str, body: str, sender: Optional[str] = None,
+              headers: Optional[Mapping[str, Any]] = None) -> Optional[Rule]:
+        """
+        Find the first rule matching an email.
+
+        Args:
+            subject: Email subject line
+            body: Email body content
+            sender: From header value (e.g. 'Name <user@example.com>')
+            headers: Email headers (a dict or email.message.Message)
+
+        Returns:
+            The matching Rule, or None
+        """
+        matched, candidates = self._envelope_candidates(subject, sender, headers)
+
+        # The body is scanned once, and only when a rule that could still match needs it
+        if any(rule.uses_body and self._body_applies(rule, body) for rule in candidates):
+            matched |= self._body.find_all(body)
+
+        result = None
+        for rule in candidates:
+            if rule.uses_body and not self._body_applies(rule, body):
+                continue
+            if self._passes(rule, matched, ("body", "body_regex")):
+                result = rule
+                break
+
+        self.record(result.id if result is not None else None)
+        return result
+
+    def match_envelope(self, subject: str, sender: Optional[str] = None,
+                       headers: Optional[Mapping[str, Any]] = None) -> Optional[Rule]:
+        """
+        Find the rule an email matches, judging from its headers alone.
+
+        Lets callers classify a message before decoding its body. A rule is
+        returned only when no earlier rule still in the running needs the
+        body, so the answer is always the one match() would give. Counters
+        are not updated; call record() once the outcome is used.
+
+        Args:
+            subject: Email subject line
+            sender: From header value
+            headers: Email headers (a dict or email.message.Message)
+
+        Returns:
+            The matching Rule, or None if there is none or the body is needed to decide
+        """
+        for rule in self._envelope_candidates(subject, sender, headers)[1]:
+            return None if rule.uses_body else rule
+        return None
+
+    def record(self, rule_id: Optional[str]) -> None:
+        """
+        Count one evaluated email and the rule that matched it, if any.
+
+        Args:
+            rule_id: Id of the matching rule, or None when no rule matched
+        """
+        with self._lock:
+            self._evaluated += 1
+            if rule_id is not None:
+                self._hits[rule_id] += 1
+
+    def classify(self, subject: str, body: str, sender: Optional[str] = None,
+                 headers: Optional[Mapping[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Classify an email by rule, if one matches.
+
+        Args:
+            subject: Email subject line
+            body: Email body content
+            sender: From header value
+            headers: Email headers
+
+        Returns:
+            {"quadrant": ..., "confidence": ..., "reasoning": ...} or None
+        """
+        rule = self.match(subject, body, sender, headers)
+        if rule is None:
+            return None
+        logger.info(f"Triage rule '{rule.id}' matched: {rule.quadrant}")
+        return rule.result()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Evaluation and per-rule hit counters.
+
+        Returns:
+            Dictionary with evaluated, matched, hit_rate and hits (rule id -> count)
+        """
+        with self._lock:
+            matched = sum(self._hits.values())
+            return {
+                "evaluated": self._evaluated,
+                "matched": matched,
+                "hit_rate": matched / self._evaluated if self._evaluated else 0.0,
+                "hits": dict(self._hits),
+            }
+
+    def reset_stats(self) -> None:
+        """Zero the counters."""
+        with self._lock:
+            self._evaluated = 0
+            self._hits = {rule.id: 0 for rule in self.rules}
+
+
+_engine: Optional[RulesEngine] = None
+_engine_loaded = False
+_engine_lock = threading.Lock()
+
+
+def get_rules_engine() -> Optional[RulesEngine]:
+    """
+    Return the shared rules engine, loading Config.TRIAGE_RULES_PATH on first use.
+
+    Returns:
+        RulesEngine, or None when rules are disabled or the file cannot be loaded
+    """
+    global _engine, _engine_loaded
+    from backend.config import Config
+
+    if not Config.TRIAGE_RULES_ENABLED:
+        return None
+    with _engine_lock:
+        if not _engine_loaded:
+            _engine_loaded = True
+            try:
+                _engine = RulesEngine.from_file(Config.TRIAGE_RULES_PATH)
+                logger.info(f"Loaded {len(_engine)} triage rules from {Config.TRIAGE_RULES_PATH}")
+            except Exception as e:
+                # A broken rules file must not stop triage; every email goes to the strategies
+                print(f"⚠️  Could not load triage rules from {Config.TRIAGE_RULES_PATH}: {str(e)}")
+                logger.error(f"Could not load triage rules from {Config.TRIAGE_RULES_PATH}: {str(e)}")
+                _engine = None
+    return _engine
+
+
+def classify_with_rules(subject: str, body: str, sender: Optional[str] = None,
+                        headers: Optional[Mapping[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Classify an email with the shared rules engine.
+
+    Args:
+        subject: Email subject line
+        body: Email body content
+        sender: From header value
+        headers: Email headers
+
+    Returns:
+        Classification from the first matching rule, or None (no match or rules disabled)
+    """
+    engine = get_rules_engine()
+    if engine is None:
+        return None
+    return engine.classify(subject, body, sender, headers)
+
+
+def get_rules_stats() -> Optional[Dict[str, Any]]:
+    """Hit counters of the shared rules engine, or None when it is not loaded."""
+    engine = get_rules_engine()
+    return engine.stats() if engine is not None else None
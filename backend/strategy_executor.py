@@ -0,0 +1,379 @@
+"""
+Per-email strategy executor for EisenhowerTriageAgent.
+
+The four triage strategies only partly depend on each other: email-only and
+contextual triage need nothing but the email, while the embedding and outcome
+strategies share one chain (embedding -> similarity lookup -> prompts). This
+module expresses that as a small dependency graph and runs independent
+branches concurrently, so per-email latency is the critical path rather than
+the sum of every round trip.
+
+With Config.TRIAGE_MODE = "fused" the four classifications are instead
+requested together in one chat completion once the neighbours are known.
+
+Emails matched by a triage rule (backend/rules_engine.py) skip every model
+call: all four strategies take the rule's classification. With
+Config.LOCAL_CLASSIFIER_ENABLED the chat requests also wait for the local
+embedding classifier (backend/local_classifier.py) and are skipped when it
+is confident.
+"""
+
+import asyncio
+import inspect
+import logging
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from backend.config import Config
+from backend.embedding_service import get_embedding_async
+from backend.local_classifier import confident_local_result
+from backend.rules_engine import classify_with_rules
+from backend.triage_core import (
+    FUSED_STRATEGIES,
+    prepare_embedding_text,
+    run_coroutine_sync,
+    summarize_similar_emails,
+    vote_neighbor_labels,
+    triage_email_only_async,
+    triage_fused_async,
+    triage_with_context_async,
+    triage_with_embedding_async,
+    triage_with_outcomes_async,
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class StrategyGraph:
+    """
+    A dependency graph of named steps executed with maximal concurrency.
+
+    Each step receives the results of its dependencies as positional arguments,
+    in the order they were declared. Coroutine functions are awaited on the
+    event loop; plain functions run in a worker thread so blocking I/O (the
+    Supabase client, the sync OpenAI client) does not stall other branches.
+    """
+
+    def __init__(self):
+        self._steps: Dict[str, Tuple[Callable, Tuple[str, ...]]] = {}
+
+    def add(self, name: str, func: Callable, depends_on: Sequence[str] = ()) -> "StrategyGraph":
+        """
+        Register a step.
+
+        Args:
+            name: Unique step name, also the key of its result
+            func: Callable (sync or async) taking the dependency results
+            depends_on: Names of steps that must finish first (already registered)
+
+        Returns:
+            The graph, so calls can be chained
+        """
+        if name in self._steps:
+            raise ValueError(f"Duplicate step name: {name}")
+        missing = [dep for dep in depends_on if dep not in self._steps]
+        if missing:
+            raise ValueError(f"Step '{name}' depends on unknown steps: {', '.join(missing)}")
+        self._steps[name] = (func, tuple(depends_on))
+        return self
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Execute every step as soon as its dependencies are available.
+
+        Returns:
+            Dictionary mapping step name to result
+
+        Raises:
+            The first exception (in registration order) raised by any step, after
+            all independent steps have finished
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_step(name: str) -> Any:
+            func, depends_on = self._steps[name]
+            inputs = [await tasks[dep] for dep in depends_on]
+            if inspect.iscoroutinefunction(func):
+                return await func(*inputs)
+            return await asyncio.to_thread(func, *inputs)
+
+        # Steps are registered after their dependencies, so insertion order is topological
+        for name in self._steps:
+            tasks[name] = asyncio.ensure_future(run_step(name))
+
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        results = dict(zip(tasks.keys(), outcomes))
+
+        for name, outcome in results.items():
+            if isinstance(outcome, BaseException):
+                logger.error(f"Strategy step '{name}' failed: {str(outcome)}")
+                raise outcome
+
+        return results
+
+    def run_sync(self) -> Dict[str, Any]:
+        """Blocking wrapper around run(), on the process-wide event loop."""
+        return run_coroutine_sync(self.run())
+
+
+def _neighbor_context(email_id: str, neighbor_rows: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Build everything the embedding and outcome prompts need about the neighbours.
+
+    Args:
+        email_id: Unique email identifier (used in log messages)
+        neighbor_rows: Rows returned by find_similar_emails_with_labels, or None
+            when no embedding could be generated
+
+    Returns:
+        Dictionary with embedding_contexts, embedding_fallback, outcome_contexts,
+        outcome_fallback and past_triage_results. embedding_fallback also holds a
+        decisive neighbour vote, which settles the embedding strategy without GPT-4
+    """
+    from backend.supabase_client import split_neighbor_rows
+
+    if neighbor_rows is None:
+        return {
+            "embedding_contexts": None,
+            "embedding_fallback": {
+                "quadrant": "schedule",
+                "confidence": 0.3,
+                "reasoning": "Fallback due to embedding triage error: embedding generation failed",
+                "source": "fallback"
+            },
+            "outcome_contexts": "",
+            "outcome_fallback": {
+                "quadrant": "schedule",
+                "confidence": 0.3,
+                "reasoning": "Skipped due to embedding generation failure",
+                "source": "fallback"
+            },
+            "past_triage_results": [],
+        }
+
+    # Labels and summaries arrived with the similarity search; no further lookups
+    similar_emails, triage_results, email_summaries = split_neighbor_rows(neighbor_rows)
+    embedding_contexts, embedding_fallback = summarize_similar_emails(email_id, similar_emails, triage_results)
+    # The contexts text is still needed by the fused prompt for the outcomes judgment
+    embedding_fallback = vote_neighbor_labels(similar_emails, triage_results, email_id) or embedding_fallback
+
+    # Build similar_contexts using real summaries
+    summaries = []
+    for match in similar_emails:
+        summary = email_summaries.get(match["email_id"], "")
+        summaries.append(f"- Similar email (score: {match.get('score', 0.0):.2f}):\n{summary.strip()}")
+
+    # Collect past triage results from similar emails for outcomes triage
+    past_triage_results = [triage_results[match["email_id"]] for match in similar_emails
+                           if match["email_id"] in triage_results]
+
+    return {
+        "embedding_contexts": embedding_contexts,
+        "embedding_fallback": embedding_fallback,
+        "outcome_contexts": "\n\n".join(summaries),
+        "outcome_fallback": None,
+        "past_triage_results": past_triage_results,
+    }
+
+
+def build_email_strategy_graph(subject: str, body: str, email_id: str, sender_profile: Optional[Dict] = None,
+                               embedding: Optional[List[float]] = None,
+                               embedding_stored: Optional[bool] = None,
+                               mode: Optional[str] = None, sender: Optional[str] = None,
+                               headers: Optional[Mapping[str, Any]] = None) -> StrategyGraph:
+    """
+    Build the dependency graph for all four strategies on one email.
+
+    Graph ("separate" mode):
+        email_only                       (independent)
+        with_context                     (independent)
+        embedding -> store_embedding
+        embedding -> similar -> neighbors -> with_embedding
+                                          -> with_outcomes
+
+    Graph ("fused" mode):
+        embedding -> store_embedding
+        embedding -> similar -> neighbors -> fused -> email_only, with_context,
+                                                      with_embedding, with_outcomes
+
+    Graph (a triage rule matched, either mode):
+        rule -> email_only, with_context, with_embedding, with_outcomes
+        embedding -> store_embedding
+
+    With the local classifier cascade enabled, every step that sends a chat
+    request (and the similarity lookup) also depends on embedding -> local,
+    and returns the local classification instead when it is confident.
+
+    Args:
+        subject: Email subject line
+        body: Email body content
+        email_id: Unique email identifier
+        sender_profile: Sender context for contextual triage ({} if unknown)
+        embedding: Precomputed embedding; skips the embeddings request when given
+        embedding_stored: Whether email_embeddings already holds this email's vector;
+            None checks the table before storing
+        mode: "separate" or "fused" (default: Config.TRIAGE_MODE)
+        sender: From header value, for sender and sender_domain rules
+        headers: Email headers, for header rules
+
+    Returns:
+        StrategyGraph whose results include email_only, with_context,
+        with_embedding, with_outcomes, rule (the rule classification or None)
+        and local (the accepted local classification or None)
+    """
+    from backend.supabase_client import embedding_exists, find_similar_emails_with_labels, store_embedding
+
+    graph = StrategyGraph()
+
+    async def email_only():
+        return await triage_email_only_async(subject, body)
+
+    async def with_context():
+        return await triage_with_context_async(subject, body, sender_profile or {})
+
+    async def compute_embedding():
+        if embedding is not None:
+            return embedding
+        try:
+            return await get_embedding_async(prepare_embedding_text(subject, body))
+        except Exception as e:
+            # Only the similarity branch depends on this; the other strategies carry on
+            logger.error(f"Error generating embedding for {email_id}: {str(e)}")
+            return None
+
+    def persist_embedding(vector):
+        if vector is None:
+            return False
+        stored = embedding_exists(email_id) if embedding_stored is None else embedding_stored
+        if stored:
+            return True
+        return store_embedding(email_id, vector)
+
+    def local(vector):
+        if not cascade or vector is None:
+            return None
+        return confident_local_result(vector)
+
+    def similar(vector, local_result=None):
+        if vector is None or local_result is not None:
+            return None
+        return find_similar_emails_with_labels(vector, top_k=5)
+
+    def neighbors(neighbor_rows):
+        return _neighbor_context(email_id, neighbor_rows)
+
+    async def with_embedding(context):
+        if context["embedding_fallback"]:
+            return context["embedding_fallback"]
+        return await triage_with_embedding_async(subject, body, context["embedding_contexts"])
+
+    async def with_outcomes(context):
+        if context["outcome_fallback"]:
+            return context["outcome_fallback"]
+        return await triage_with_outcomes_async(subject, body, context["outcome_contexts"], context["past_triage_results"])
+
+    async def fused(context):
+        # Strategies already settled by a fallback are not asked of the model
+        fallbacks = {"with_embedding": context["embedding_fallback"], "with_outcomes": context["outcome_fallback"]}
+        strategies = [name for name in FUSED_STRATEGIES if not fallbacks.get(name)]
+        results = await triage_fused_async(
+            subject, body, sender_profile or {}, context["embedding_contexts"],
+            context["past_triage_results"], strategies
+        )
+        for name, fallback in fallbacks.items():
+            if fallback:
+                results[name] = fallback
+        return results
+
+    def gated(func, fan_out=False):
+        # Cascade: the chat request is only sent when the local classifier is unsure
+        async def step(local_result, *inputs):
+            if local_result is not None:
+                if fan_out:
+                    return {name: dict(local_result) for name in FUSED_STRATEGIES}
+                return dict(local_result)
+            return await func(*inputs)
+        return step
+
+    def add_llm_step(name, func, depends_on=(), fan_out=False):
+        if cascade:
+            graph.add(name, gated(func, fan_out), depends_on=["local", *depends_on])
+        else:
+            graph.add(name, func, depends_on=depends_on)
+
+    def pick(name):
+        async def step(results):
+            return results[name]
+        return step
+
+    # Rules are evaluated up front; a match settles every strategy without a model call.
+    # The embedding is still stored so the email can serve as a neighbour later.
+    rule_result = classify_with_rules(subject, body, sender, headers)
+    cascade = Config.LOCAL_CLASSIFIER_ENABLED and rule_result is None
+
+    async def rule():
+        return rule_result
+
+    async def from_rule(result):
+        return dict(result)
+
+    graph.add("rule", rule)
+    graph.add("embedding", compute_embedding)
+    graph.add("store_embedding", persist_embedding, depends_on=["embedding"])
+    graph.add("local", local, depends_on=["embedding"])
+    if rule_result is not None:
+        for name in FUSED_STRATEGIES:
+            graph.add(name, from_rule, depends_on=["rule"])
+        return graph
+
+    graph.add("similar", similar, depends_on=["embedding", "local"] if cascade else ["embedding"])
+    graph.add("neighbors", neighbors, depends_on=["similar"])
+
+    if (mode or Config.TRIAGE_MODE) == "fused":
+        add_llm_step("fused", fused, depends_on=["neighbors"], fan_out=True)
+        for name in FUSED_STRATEGIES:
+            graph.add(name, pick(name), depends_on=["fused"])
+        return graph
+
+    add_llm_step("email_only", email_only)
+    add_llm_step("with_context", with_context)
+    add_llm_step("with_embedding", with_embedding, depends_on=["neighbors"])
+    add_llm_step("with_outcomes", with_outcomes, depends_on=["neighbors"])
+    return graph
+
+
+async def run_email_strategies(subject: str, body: str, email_id: str, sender_profile: Optional[Dict] = None,
+                               embedding: Optional[List[float]] = None,
+                               embedding_stored: Optional[bool] = None, sender: Optional[str] = None,
+                               headers: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Run all four triage strategies for one email with independent branches in parallel.
+
+    Args:
+        subject: Email subject line
+        body: Email body content
+        email_id: Unique email identifier
+        sender_profile: Sender context for contextual triage
+        embedding: Precomputed embedding, if already available
+        embedding_stored: Whether email_embeddings already holds this email's vector
+        sender: From header value, for sender and sender_domain rules
+        headers: Email headers, for header rules
+
+    Returns:
+        Dictionary with email_only, with_context, with_embedding, with_outcomes,
+        plus the intermediate embedding and store_embedding status, the
+        matching rule's classification (None if no rule matched) and the
+        accepted local classification (None unless the cascade skipped the LLM)
+    """
+    graph = build_email_strategy_graph(subject, body, email_id, sender_profile, embedding, embedding_stored,
+                                       sender=sender, headers=headers)
+    return await graph.run()
+
+
+def run_email_strategies_sync(subject: str, body: str, email_id: str, sender_profile: Optional[Dict] = None,
+                              embedding: Optional[List[float]] = None,
+                              embedding_stored: Optional[bool] = None, sender: Optional[str] = None,
+                              headers: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+    """Blocking wrapper around run_email_strategies(), on the process-wide event loop."""
+    return run_coroutine_sync(run_email_strategies(subject, body, email_id, sender_profile, embedding, embedding_stored,
+                                            sender, headers))
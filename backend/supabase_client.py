@@ -7,12 +7,15 @@ for storing and retrieving email triage data, sender profiles, and embeddings.
 
 import os
 import json
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any
 from datetime import datetime
 from dotenv import load_dotenv
 from supabase import create_client, Client
 from supabase.lib.client_options import ClientOptions
 
+from backend.config import Config
+from backend.cache import MemoryLRUCache
+
 # Load environment variables
 load_dotenv()
 
@@ -34,11 +37,27 @@ client_options = ClientOptions(
 
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY, options=client_options)
 
+# Cleared once PostgREST reports match_embeddings_with_labels missing, so an
+# old schema costs one failed request per process, not one per email
+_labelled_rpc_available = True
+
+# Sender profiles repeat heavily across a mailbox; cache hits and "no profile" misses.
+# Negative entries get their own (shorter) TTL so new profiles show up promptly.
+_sender_profile_cache = MemoryLRUCache(
+    max_entries=Config.SENDER_PROFILE_CACHE_SIZE,
+    ttl_seconds=Config.SENDER_PROFILE_CACHE_TTL_SECONDS
+)
+_NOT_CACHED = object()
+
 
 def get_sender_profile(email: str) -> Dict[str, Any]:
     """
     Query the 'sender_profiles' table for a row matching the email.
     
+    Results, including "no profile", are cached for
+    Config.SENDER_PROFILE_CACHE_TTL_SECONDS (SENDER_PROFILE_NEGATIVE_TTL_SECONDS
+    for misses); query errors are not cached.
+    
     Args:
         email: Email address to search for
         
@@ -46,14 +65,21 @@ def get_sender_profile(email: str) -> Dict[str, Any]:
         Dictionary with profile fields (email, name, role_guess, tone, typical_topics, account, etc.)
         Empty dict if not found
     """
+    cached = _sender_profile_cache.get(email, _NOT_CACHED)
+    if cached is not _NOT_CACHED:
+        # None marks a cached miss; copy hits so callers can't mutate the cache
+        return dict(cached) if cached else {}
+    
     try:
         # Query the sender_profiles table
         response = supabase.table("sender_profiles").select("*").eq("email", email).execute()
         
         if response.data and len(response.data) > 0:
             profile = response.data[0]
+            _sender_profile_cache.set(email, dict(profile))
             return profile
         else:
+            _sender_profile_cache.set(email, None, ttl_seconds=Config.SENDER_PROFILE_NEGATIVE_TTL_SECONDS)
             return {}
             
     except Exception as e:
@@ -61,6 +87,21 @@ def get_sender_profile(email: str) -> Dict[str, Any]:
         return {}
 
 
+def invalidate_sender_profile(email: str) -> None:
+    """Drop a cached sender profile (or cached miss) so the next lookup hits the database."""
+    _sender_profile_cache.delete(email)
+
+
+def clear_sender_profile_cache() -> None:
+    """Drop every cached sender profile."""
+    _sender_profile_cache.clear()
+
+
+def get_sender_profile_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss counters for the sender profile cache."""
+    return _sender_profile_cache.stats()
+
+
 def embedding_exists(email_id: str) -> bool:
     """
     Check the 'email_embeddings' table for an existing embedding by email_id.
@@ -117,6 +158,9 @@ def store_embedding(email_id: str, embedding: List[float]) -> bool:
         if response.data:
             print(f"✅ Successfully stored/updated embedding for email_id: {email_id}")
             print(f"   Embedding vector length: {len(embedding)} dimensions")
+            if Config.VECTOR_SEARCH_BACKEND == "local":
+                from backend.vector_index import add_to_vector_index
+                add_to_vector_index(email_id, embedding)
             return True
         else:
             print(f"❌ Failed to store embedding for email_id: {email_id}")
@@ -185,8 +229,9 @@ def create_sender_profile(email: str, profile_data: Dict[str, Any]) -> bool:
             **profile_data
         }
         
-        # Insert the profile
+        # Insert the profile, then drop any cached copy (or cached "no profile")
         response = supabase.table("sender_profiles").insert(profile).execute()
+        invalidate_sender_profile(email)
         
         if response.data:
             print(f"Successfully created sender profile for: {email}")
@@ -196,6 +241,7 @@ def create_sender_profile(email: str, profile_data: Dict[str, Any]) -> bool:
             return False
             
     except Exception as e:
+        invalidate_sender_profile(email)
         print(f"Error creating sender profile for {email}: {str(e)}")
         return False
 
@@ -212,8 +258,9 @@ def update_sender_profile(email: str, profile_data: Dict[str, Any]) -> bool:
         True if successful, False otherwise
     """
     try:
-        # Update the profile
+        # Update the profile, then drop any cached copy (or cached "no profile")
         response = supabase.table("sender_profiles").update(profile_data).eq("email", email).execute()
+        invalidate_sender_profile(email)
         
         if response.data:
             print(f"Successfully updated sender profile for: {email}")
@@ -223,6 +270,7 @@ def update_sender_profile(email: str, profile_data: Dict[str, Any]) -> bool:
             return False
             
     except Exception as e:
+        invalidate_sender_profile(email)
         print(f"Error updating sender profile for {email}: {str(e)}")
         return False
 
@@ -250,6 +298,30 @@ def get_triage_result(message_id: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+def get_triage_results_many(message_ids: List[str], columns: str = "message_id, triage_email_only") -> Dict[str, Dict[str, Any]]:
+    """
+    Retrieve triage results for several message_ids in one request.
+    
+    Args:
+        message_ids: Unique identifiers of the email messages
+        columns: Columns to select (must include message_id)
+        
+    Returns:
+        Dictionary mapping message_id to its triage row; ids without results are absent
+    """
+    ids = list(dict.fromkeys(message_ids))
+    if not ids:
+        return {}
+    
+    try:
+        response = supabase.table("triage_results").select(columns).in_("message_id", ids).execute()
+        return {row["message_id"]: row for row in response.data or []}
+        
+    except Exception as e:
+        print(f"Error retrieving triage results for {len(ids)} messages: {str(e)}")
+        return {}
+
+
 def get_recent_triage_results(limit: int = 10) -> List[Dict[str, Any]]:
     """
     Get recent triage results ordered by created_at.
@@ -290,7 +362,10 @@ def test_connection() -> bool:
 
 def find_similar_emails(embedding: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
     """
-    Calls match_embeddings RPC function in Supabase to find top-K similar emails.
+    Find the top-K emails most similar to an embedding.
+    
+    Uses the in-process vector index when Config.VECTOR_SEARCH_BACKEND is "local",
+    otherwise calls the match_embeddings RPC function in Supabase.
     
     Args:
         embedding: Query embedding vector (1536 dimensions)
@@ -299,11 +374,18 @@ def find_similar_emails(embedding: List[float], top_k: int = 5) -> List[Dict[str
     Returns:
         List of dictionaries with email_id and similarity score
     """
+    if Config.VECTOR_SEARCH_BACKEND == "local":
+        try:
+            from backend.vector_index import search_vector_index
+            return search_vector_index(embedding, top_k=top_k)
+        except Exception as e:
+            print(f"Error in local vector search, falling back to match_embeddings RPC: {str(e)}")
+    
     try:
         response = supabase.rpc("match_embeddings", {
             "query_embedding": embedding,
             "match_count": top_k,
-            "match_threshold": 0.5
+            "match_threshold": Config.SIMILARITY_THRESHOLD
         }).execute()
         
         if response.data:
@@ -313,10 +395,123 @@ def find_similar_emails(embedding: List[float], top_k: int = 5) -> List[Dict[str
             
     except Exception as e:
         print(f"Error in vector similarity search: {str(e)}")
+        print("   Is the match_embeddings function installed? Set VECTOR_SEARCH_BACKEND=local to search in-process.")
         # Simple fallback: return empty list if RPC function doesn't exist
         return []
 
 
+def _is_missing_function(error: Exception) -> bool:
+    """Whether an RPC failed because the database function is not installed."""
+    if getattr(error, "code", None) in ("PGRST202", "42883"):
+        return True
+    message = str(error)
+    return "PGRST202" in message or ("function" in message and "does not exist" in message)
+
+
+def find_similar_emails_with_labels(embedding: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
+    """
+    Find the top-K similar emails together with their triage labels and summaries.
+    
+    Calls the match_embeddings_with_labels RPC (docs/database_schema_jsonb.sql) so
+    everything arrives in one round trip. With the local vector index, or if the
+    function is not installed, falls back to find_similar_emails plus bulk lookups.
+    
+    Args:
+        embedding: Query embedding vector (1536 dimensions)
+        top_k: Number of similar emails to return
+        
+    Returns:
+        List of dictionaries with email_id, score, quadrant, confidence, reasoning,
+        triage_email_only (None if never triaged), subject, body_excerpt and summary
+    """
+    global _labelled_rpc_available
+    if Config.VECTOR_SEARCH_BACKEND != "local" and _labelled_rpc_available:
+        try:
+            response = supabase.rpc("match_embeddings_with_labels", {
+                "query_embedding": embedding,
+                "match_count": top_k,
+                "match_threshold": Config.SIMILARITY_THRESHOLD
+            }).execute()
+            return response.data or []
+            
+        except Exception as e:
+            print(f"Error in labelled similarity search, using separate lookups: {str(e)}")
+            if _is_missing_function(e):
+                print("   Install match_embeddings_with_labels from docs/database_schema_jsonb.sql to save round trips.")
+                _labelled_rpc_available = False
+    
+    similar_emails = find_similar_emails(embedding, top_k)
+    neighbor_ids = [match["email_id"] for match in similar_emails]
+    triage_results = get_triage_results_many(neighbor_ids)
+    summaries = get_email_summaries_many(neighbor_ids, triage_results)
+    
+    rows = []
+    for match in similar_emails:
+        email_only = (triage_results.get(match["email_id"]) or {}).get("triage_email_only")
+        rows.append({
+            "email_id": match["email_id"],
+            "score": match.get("score", 0.0),
+            "quadrant": email_only.get("quadrant") if email_only else None,
+            "confidence": email_only.get("confidence") if email_only else None,
+            "reasoning": email_only.get("reasoning") if email_only else None,
+            "triage_email_only": email_only,
+            "subject": None,
+            "body_excerpt": None,
+            "summary": summaries.get(match["email_id"], "")
+        })
+    return rows
+
+
+def split_neighbor_rows(rows: List[Dict[str, Any]]):
+    """
+    Split find_similar_emails_with_labels rows into the shapes the triage prompts use.
+    
+    Args:
+        rows: Rows returned by find_similar_emails_with_labels
+        
+    Returns:
+        Tuple of (similar_emails, triage_results, summaries): the {email_id, score}
+        matches, triage rows keyed by message_id (triaged neighbours only) and
+        summaries keyed by email_id
+    """
+    similar_emails = [{"email_id": row["email_id"], "score": row.get("score", 0.0)} for row in rows]
+    triage_results = {
+        row["email_id"]: {"message_id": row["email_id"], "triage_email_only": row["triage_email_only"]}
+        for row in rows if row.get("triage_email_only")
+    }
+    summaries = {row["email_id"]: row.get("summary") or "" for row in rows}
+    return similar_emails, triage_results, summaries
+
+
+def fetch_embeddings(since: Optional[str] = None, page_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Page through the 'email_embeddings' table in creation order.
+    
+    Args:
+        since: Only return rows created after this ISO timestamp (None for all rows)
+        page_size: Rows per request
+        
+    Yields:
+        Lists of {"email_id", "embedding", "created_at"} rows, embedding as a list of floats
+    """
+    offset = 0
+    while True:
+        query = supabase.table("email_embeddings").select("email_id, embedding, created_at")
+        if since:
+            query = query.gt("created_at", since)
+        response = query.order("created_at").range(offset, offset + page_size - 1).execute()
+        rows = response.data or []
+        for row in rows:
+            # PostgREST returns pgvector columns as "[0.1,0.2,...]" strings
+            if isinstance(row["embedding"], str):
+                row["embedding"] = json.loads(row["embedding"])
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        offset += page_size
+
+
 def get_triage_result_for_embedding(email_id: str) -> Optional[Dict[str, Any]]:
     """
     Get triage result with proper field access for embedding-based classification.
@@ -363,7 +558,7 @@ def get_email_summary(email_id: str) -> str:
 
     # Else fallback to raw subject + body
     try:
-        raw = supabase.table("emails_raw").select("subject, body").eq("id", email_id).execute()
+        raw = supabase.table("emails_raw").select("subject, body").eq("message_id", email_id).execute()
         if raw.data:
             subject = raw.data[0].get("subject", "")
             body = raw.data[0].get("body", "")[:1000]  # truncate
@@ -374,6 +569,46 @@ def get_email_summary(email_id: str) -> str:
     return ""
 
 
+def get_email_summaries_many(email_ids: List[str], triage_results: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, str]:
+    """
+    Bulk version of get_email_summary: prior reasoning, else subject + truncated body.
+    
+    Args:
+        email_ids: Email identifiers
+        triage_results: Rows already fetched with get_triage_results_many (saves a request)
+        
+    Returns:
+        Dictionary mapping every email_id to its summary ("" if nothing is known)
+    """
+    ids = list(dict.fromkeys(email_ids))
+    if triage_results is None:
+        triage_results = get_triage_results_many(ids)
+    
+    # Prior reasoning from triage_results first
+    summaries = {}
+    missing = []
+    for email_id in ids:
+        email_only = (triage_results.get(email_id) or {}).get("triage_email_only")
+        if email_only:
+            summaries[email_id] = email_only.get("reasoning", "")
+        else:
+            summaries[email_id] = ""
+            missing.append(email_id)
+    
+    # Else fallback to raw subject + body, in one request for all remaining ids
+    if missing:
+        try:
+            raw = supabase.table("emails_raw").select("message_id, subject, body").in_("message_id", missing).execute()
+            for row in raw.data or []:
+                subject = row.get("subject", "")
+                body = (row.get("body") or "")[:1000]  # truncate
+                summaries[row["message_id"]] = f"{subject}\n{body}"
+        except Exception:
+            pass
+    
+    return summaries
+
+
 # Example usage and testing
 if __name__ == "__main__":
     print("Testing Supabase client...")
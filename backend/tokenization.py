@@ -0,0 +1,200 @@
+"""
+Shared tokenization for EisenhowerTriageAgent.
+
+Counting, prompt truncation and embedding truncation all need the cl100k_base
+tokens of the same email body, often several times per email and at several
+budgets. TokenizedText encodes a text once and serves every count, prefix
+truncation and decode from that single token array; tokenize() memoizes
+recent texts so independent call sites share the work.
+
+When tiktoken (or its encoding file) is unavailable, everything falls back
+to the usual estimate of four characters per token.
+"""
+
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from backend.cache import MemoryLRUCache
+
+# Try to import tiktoken for token counting, fallback to character-based truncation
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+    print("⚠️  tiktoken not available, using character-based truncation fallback")
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+ENCODING_NAME = "cl100k_base"  # GPT-4 / ada-002 tokenizer
+CHARS_PER_TOKEN = 4  # Rough estimate used without tiktoken
+
+_encoding = None
+_encoding_failed = False
+_encoding_lock = threading.Lock()
+
+# Recently tokenized texts; an email body is typically counted and truncated
+# by several strategies within moments of each other
+_memo = MemoryLRUCache(max_entries=256)
+
+
+def get_encoding():
+    """
+    Return the shared cl100k_base encoding, loading it once.
+
+    Returns:
+        tiktoken Encoding, or None if tiktoken or its encoding file is unavailable
+    """
+    global _encoding, _encoding_failed
+    if not TIKTOKEN_AVAILABLE or _encoding_failed:
+        return None
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None and not _encoding_failed:
+                try:
+                    _encoding = tiktoken.get_encoding(ENCODING_NAME)
+                except Exception as e:
+                    # Don't retry (and re-download) on every call
+                    logger.warning(f"Error loading tiktoken encoding, using character estimates: {str(e)}")
+                    _encoding_failed = True
+    return _encoding
+
+
+class TokenizedText:
+    """
+    A text plus its lazily computed, memoized token array.
+    """
+
+    __slots__ = ("text", "_tokens", "_encoding", "_truncations")
+
+    def __init__(self, text: str, tokens: Optional[List[int]] = None, encoding=None):
+        """
+        Args:
+            text: The text
+            tokens: Known token array for text (skips encoding)
+            encoding: tiktoken Encoding to use (default: the shared cl100k_base, or
+                character estimates when unavailable)
+        """
+        self.text = text
+        self._tokens = tokens
+        self._encoding = encoding if encoding is not None else get_encoding()
+        self._truncations: Dict[int, "TokenizedText"] = {}
+
+    @property
+    def tokens(self) -> Optional[List[int]]:
+        """Token array (encoded on first access), or None in character-estimate mode."""
+        if self._tokens is None and self._encoding is not None:
+            try:
+                self._tokens = self._encoding.encode(self.text, disallowed_special=())
+            except Exception as e:
+                logger.warning(f"Error encoding text with tiktoken, using character estimates: {str(e)}")
+                self._encoding = None
+        return self._tokens
+
+    def count(self) -> int:
+        """Number of tokens in the text."""
+        tokens = self.tokens
+        if tokens is None:
+            return len(self.text) // CHARS_PER_TOKEN
+        return len(tokens)
+
+    def fits(self, max_tokens: int) -> bool:
+        """Whether the text is within max_tokens."""
+        tokens = self.tokens
+        if tokens is None:
+            return len(self.text) <= max_tokens * CHARS_PER_TOKEN
+        return len(tokens) <= max_tokens
+
+    def truncated(self, max_tokens: int) -> "TokenizedText":
+        """
+        Prefix of the text that fits in max_tokens, as a TokenizedText.
+
+        The result reuses the token prefix, so counting it costs nothing.
+
+        Args:
+            max_tokens: Token budget
+
+        Returns:
+            self if the text already fits, otherwise the truncated text
+        """
+        if self.fits(max_tokens):
+            return self
+        result = self._truncations.get(max_tokens)
+        if result is None:
+            tokens = self.tokens
+            if tokens is None:
+                result = TokenizedText(self.text[:max_tokens * CHARS_PER_TOKEN], encoding=None)
+                result._encoding = None
+            else:
+                prefix = tokens[:max_tokens]
+                result = TokenizedText(self._encoding.decode(prefix), tokens=prefix, encoding=self._encoding)
+            self._truncations[max_tokens] = result
+            _memo.set(result.text, result)
+        return result
+
+    def truncate(self, max_tokens: int) -> str:
+        """Prefix of the text that fits in max_tokens."""
+        return self.truncated(max_tokens).text
+
+    def decode(self, start: int = 0, end: Optional[int] = None) -> str:
+        """
+        Decode a slice of the token array back to text.
+
+        Args:
+            start: First token index
+            end: End token index (exclusive; None for the end of the text)
+
+        Returns:
+            Text of the token slice (a character slice in estimate mode)
+        """
+        tokens = self.tokens
+        if tokens is None:
+            stop = None if end is None else end * CHARS_PER_TOKEN
+            return self.text[start * CHARS_PER_TOKEN:stop]
+        return self._encoding.decode(tokens[start:end])
+
+
+def tokenize(text: str) -> TokenizedText:
+    """
+    Return the memoized TokenizedText for text, creating it if needed.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        Shared TokenizedText instance
+    """
+    tokenized = _memo.get(text)
+    if tokenized is None:
+        tokenized = TokenizedText(text)
+        _memo.set(text, tokenized)
+    return tokenized
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the cl100k_base tokens in text (memoized).
+
+    Args:
+        text: Text to count tokens for
+
+    Returns:
+        Number of tokens
+    """
+    return tokenize(text).count()
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    Truncate text to at most max_tokens tokens (memoized).
+
+    Args:
+        text: Text to truncate
+        max_tokens: Token budget
+
+    Returns:
+        Text unchanged if it fits, otherwise its longest token prefix within budget
+    """
+    return tokenize(text).truncate(max_tokens)
@@ -7,30 +7,45 @@ of the Eisenhower Matrix using OpenAI's GPT-4 model.
 
 import os
 import json
+import atexit
+import hashlib
 import time
+import asyncio
 import logging
-from typing import Dict, Optional, List
+import threading
+import weakref
+from collections import deque
+from typing import Callable, Dict, Optional, List
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+from openai.types.chat import ChatCompletion
 import openai
 
-# Try to import tiktoken for token counting, fallback to character-based truncation
-try:
-    import tiktoken
-    TIKTOKEN_AVAILABLE = True
-except ImportError:
-    TIKTOKEN_AVAILABLE = False
-    print("⚠️  tiktoken not available, using character-based truncation fallback")
-
 # Load environment variables
 load_dotenv()
 
 # Import configuration
-from backend.config import Config
+from backend.config import Config, is_llm_label
+from backend.rate_limiter import get_rate_limiter
+from backend.cache import DiskLRUCache, content_hash
+from backend.tokenization import TIKTOKEN_AVAILABLE, CHARS_PER_TOKEN, tokenize
+from backend.pattern_matcher import PatternMatcher
 
 # Configure OpenAI
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# Event loop shared by every blocking caller of the async strategies (see run_coroutine_sync)
+_shared_loop: Optional[asyncio.AbstractEventLoop] = None
+_shared_loop_lock = threading.Lock()
+
+# Async clients and in-flight limits are created lazily per event loop
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+_openai_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+# Persistent response cache, opened on first use
+_llm_cache: Optional[DiskLRUCache] = None
+_llm_cache_lock = threading.Lock()
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -47,6 +62,10 @@ def count_tokens(text: str) -> int:
     """
     Count the number of tokens in a text string using tiktoken.
     
+    The encoding is shared and recent texts are memoized (see
+    backend.tokenization), so counting and then truncating the same body
+    encodes it only once.
+    
     Args:
         text: Text to count tokens for
         
@@ -54,17 +73,10 @@ def count_tokens(text: str) -> int:
         Number of tokens
     """
     if TIKTOKEN_AVAILABLE:
-        try:
-            # Use cl100k_base encoding (GPT-4 tokenizer)
-            encoding = tiktoken.get_encoding("cl100k_base")
-            return len(encoding.encode(text))
-        except Exception as e:
-            logger.warning(f"Error counting tokens with tiktoken: {str(e)}")
-            # Fallback to character-based estimation
-            return len(text) // 4  # Rough estimate: 4 characters per token
+        return tokenize(text).count()
     
     # Fallback when tiktoken is not available
-    return len(text) // 4  # Rough estimate: 4 characters per token
+    return len(text) // CHARS_PER_TOKEN  # Rough estimate: 4 characters per token
 
 
 def truncate_for_prompt(text: str, max_tokens: int = 3000) -> str:
@@ -79,29 +91,15 @@ def truncate_for_prompt(text: str, max_tokens: int = 3000) -> str:
         Truncated text that fits within token limits
     """
     if TIKTOKEN_AVAILABLE:
-        try:
-            # Use cl100k_base encoding (GPT-4 tokenizer)
-            encoding = tiktoken.get_encoding("cl100k_base")
-            tokens = encoding.encode(text)
-            
-            if len(tokens) <= max_tokens:
-                return text
-            
-            # Truncate to max_tokens and decode back to text
-            truncated_tokens = tokens[:max_tokens]
-            truncated_text = encoding.decode(truncated_tokens)
-            
-            logger.info(f"Text truncated from {len(tokens)} to {len(truncated_tokens)} tokens")
-            return truncated_text
-            
-        except Exception as e:
-            logger.warning(f"Error truncating with tiktoken: {str(e)}")
-            # Fallback to character-based truncation
-            return text[:8000]
+        tokenized = tokenize(text)
+        truncated = tokenized.truncated(max_tokens)
+        if truncated is not tokenized:
+            logger.info(f"Text truncated from {tokenized.count()} to {truncated.count()} tokens")
+        return truncated.text
     
     # Fallback when tiktoken is not available
     # Conservative estimate: 4 characters per token
-    max_chars = max_tokens * 4
+    max_chars = max_tokens * CHARS_PER_TOKEN
     if len(text) <= max_chars:
         return text
     
@@ -110,98 +108,435 @@ def truncate_for_prompt(text: str, max_tokens: int = 3000) -> str:
     return truncated_text
 
 
-def safe_openai_chat_completion(messages: List[Dict], model="gpt-4", max_retries=5) -> Optional[Dict]:
+def _retry_wait_time(error: Exception, attempt: int, max_retries: int) -> Optional[float]:
+    """
+    Decide whether a failed OpenAI call should be retried.
+    
+    Shared by the sync and async call paths so both back off identically.
+    
+    Args:
+        error: Exception raised by the OpenAI client
+        attempt: Zero-based attempt number that just failed
+        max_retries: Maximum number of retry attempts
+        
+    Returns:
+        Seconds to wait before the next attempt, or None to give up
+    """
+    # Handle different types of OpenAI errors
+    error_str = str(error).lower()
+    
+    # Rate limit errors
+    if "rate limit" in error_str or "too many requests" in error_str:
+        wait_time = (2 ** attempt) * 1  # Exponential backoff: 1, 2, 4, 8, 16 seconds
+        label = "Rate limit"
+        print(f"⚠️  Rate limit hit on attempt {attempt + 1}. Waiting {wait_time} seconds...")
+        logger.warning(f"OpenAI rate limit error on attempt {attempt + 1}: {str(error)}")
+        
+    # Timeout errors
+    elif "timeout" in error_str:
+        wait_time = (2 ** attempt) * 0.5  # Shorter backoff for timeouts: 0.5, 1, 2, 4, 8 seconds
+        label = "Timeout"
+        print(f"⚠️  Timeout on attempt {attempt + 1}. Waiting {wait_time} seconds...")
+        logger.warning(f"OpenAI timeout error on attempt {attempt + 1}: {str(error)}")
+        
+    # Connection errors
+    elif "connection" in error_str or "network" in error_str:
+        wait_time = (2 ** attempt) * 1  # Exponential backoff for connection errors
+        label = "Connection"
+        print(f"⚠️  API connection error on attempt {attempt + 1}. Waiting {wait_time} seconds...")
+        logger.warning(f"OpenAI connection error on attempt {attempt + 1}: {str(error)}")
+        
+    # Billing/quota errors
+    elif "quota" in error_str or "billing" in error_str:
+        print(f"❌ Billing/quota error on attempt {attempt + 1}. No retry.")
+        logger.error(f"OpenAI billing/quota error: {str(error)}")
+        return None
+        
+    # Other API errors
+    else:
+        wait_time = (2 ** attempt) * 1
+        label = "API"
+        print(f"⚠️  API error on attempt {attempt + 1}. Waiting {wait_time} seconds...")
+        logger.warning(f"OpenAI API error on attempt {attempt + 1}: {str(error)}")
+    
+    if attempt < max_retries:
+        return wait_time
+    
+    print(f"❌ {label} error after {max_retries + 1} attempts. Giving up.")
+    logger.error(f"OpenAI {label.lower()} error after {max_retries + 1} attempts")
+    return None
+
+
+def estimate_chat_tokens(messages: List[Dict], max_tokens: int = None) -> int:
+    """
+    Estimate the tokens a chat request counts against the TPM budget.
+    
+    Args:
+        messages: List of message dictionaries for the chat completion
+        max_tokens: Completion budget (default: Config.OPENAI_MAX_TOKENS)
+        
+    Returns:
+        Prompt tokens plus the completion budget
+    """
+    # ~4 tokens of per-message framing on top of the content
+    prompt_tokens = sum(count_tokens(message.get("content") or "") + 4 for message in messages)
+    return prompt_tokens + (Config.OPENAI_MAX_TOKENS if max_tokens is None else max_tokens)
+
+
+def _response_headers(obj) -> Optional[Dict]:
+    """Return HTTP headers from a raw response or an OpenAI API error, if any."""
+    headers = getattr(obj, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(obj, "response", None), "headers", None)
+    return headers
+
+
+def get_llm_cache() -> Optional[DiskLRUCache]:
+    """
+    Return the on-disk chat response cache, or None when disabled.
+    
+    Configured by Config.LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_MAX_MB
+    and LLM_CACHE_TTL_SECONDS.
+    """
+    global _llm_cache
+    if not Config.LLM_CACHE_ENABLED:
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = DiskLRUCache(
+                Config.LLM_CACHE_PATH,
+                max_bytes=Config.LLM_CACHE_MAX_MB * 1024 * 1024,
+                ttl_seconds=Config.LLM_CACHE_TTL_SECONDS
+            )
+        return _llm_cache
+
+
+def get_llm_cache_stats() -> Dict:
+    """Return hit/miss counters for the chat response cache ({} when disabled)."""
+    cache = get_llm_cache()
+    return cache.stats() if cache else {}
+
+
+def _chat_cache_key(messages: List[Dict], model: str, temperature: float, max_tokens: int) -> str:
+    """Content address of a chat request: everything that determines the response."""
+    return content_hash({
+        "model": model,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "messages": messages
+    })
+
+
+def _cached_chat_completion(key: str, validate: Optional[Callable] = None) -> Optional[ChatCompletion]:
+    """Return a cached chat response, or None on a miss, unreadable entry or one validate rejects."""
+    cache = get_llm_cache()
+    if cache is None:
+        return None
+    try:
+        value = cache.get(key)
+        if value is None:
+            return None
+        response = ChatCompletion.model_validate_json(value)
+        if not (validate or _response_is_json)(response):
+            logger.warning(f"Ignoring cached OpenAI response {key[:12]} that does not validate")
+            return None
+        print("✅ OpenAI response served from cache")
+        return response
+    except Exception as e:
+        logger.warning(f"Error reading LLM cache entry {key[:12]}: {str(e)}")
+        return None
+
+
+def _store_chat_completion(key: str, response, validate: Optional[Callable] = None) -> None:
+    """Cache a chat response that validate accepts (by default: content is well-formed JSON)."""
+    cache = get_llm_cache()
+    if cache is None:
+        return
+    try:
+        # Don't pin rejected replies; a rerun should get another chance
+        if not (validate or _response_is_json)(response):
+            logger.info(f"Not caching OpenAI response {key[:12]}: rejected by validation")
+            return
+        cache.set(key, response.model_dump_json().encode("utf-8"))
+    except Exception as e:
+        logger.warning(f"Not caching OpenAI response {key[:12]}: {str(e)}")
+
+
+def _response_is_json(response) -> bool:
+    """Default cache check: the reply's content is well-formed JSON."""
+    return _response_json(response) is not None
+
+
+def safe_openai_chat_completion(messages: List[Dict], model: Optional[str] = None, max_retries=5, max_tokens=400,
+                                validate: Optional[Callable] = None) -> Optional[Dict]:
     """
     Safely call OpenAI ChatCompletion API with retry logic and error handling.
     
     Args:
         messages: List of message dictionaries for the chat completion
-        model: OpenAI model to use (default: gpt-4)
+        model: OpenAI model to use (default: Config.OPENAI_MODEL)
         max_retries: Maximum number of retry attempts (default: 5)
+        max_tokens: Completion token budget (default: 400, one classification)
+        validate: Predicate on the response; only accepted replies are cached or
+            served from the cache (default: content is well-formed JSON)
         
     Returns:
         OpenAI response dictionary or None if all retries failed
     """
     
+    model = model or Config.OPENAI_MODEL
+    
+    # Identical requests are answered from the local cache
+    cache_key = _chat_cache_key(messages, model, 0.1, max_tokens)
+    cached = _cached_chat_completion(cache_key, validate)
+    if cached is not None:
+        return cached
+    
+    limiter = get_rate_limiter("chat", model)
+    estimated_tokens = estimate_chat_tokens(messages, max_tokens=max_tokens)
+    
     for attempt in range(max_retries + 1):
         try:
             print(f"OpenAI API call attempt {attempt + 1}/{max_retries + 1}")
             
-            response = client.chat.completions.create(
+            # Wait for RPM/TPM budget before sending rather than after a 429
+            limiter.acquire(estimated_tokens)
+            raw_response = client.chat.completions.with_raw_response.create(
                 model=model,
                 messages=messages,
                 temperature=0.1,  # Low temperature for consistent classification
-                max_tokens=400
+                max_tokens=max_tokens
             )
+            limiter.update_from_headers(_response_headers(raw_response))
+            response = raw_response.parse()
+            _store_chat_completion(cache_key, response, validate)
             
             print(f"✅ OpenAI API call successful on attempt {attempt + 1}")
             return response
             
         except Exception as e:
-            # Handle different types of OpenAI errors
-            error_str = str(e).lower()
+            limiter.update_from_headers(_response_headers(e))
+            wait_time = _retry_wait_time(e, attempt, max_retries)
+            if wait_time is None:
+                return None
+            time.sleep(wait_time)
+    
+    return None
+
+
+def _get_shared_loop() -> asyncio.AbstractEventLoop:
+    """Return the process-wide event loop, starting its thread on first use."""
+    global _shared_loop
+    with _shared_loop_lock:
+        if _shared_loop is None:
+            _shared_loop = asyncio.new_event_loop()
+            threading.Thread(target=_shared_loop.run_forever, name="openai-event-loop", daemon=True).start()
+            atexit.register(_close_shared_loop_clients)
+        return _shared_loop
+
+
+def _close_shared_loop_clients() -> None:
+    """Close the shared loop's AsyncOpenAI client (its connection pool) at interpreter exit."""
+    async_client = _async_clients.get(_shared_loop)
+    if async_client is not None:
+        try:
+            asyncio.run_coroutine_threadsafe(async_client.close(), _shared_loop).result(timeout=5)
+        except Exception as e:
+            logger.debug(f"Error closing AsyncOpenAI client: {str(e)}")
+
+
+def run_coroutine_sync(coro):
+    """
+    Run a coroutine on the process-wide event loop and wait for its result.
+    
+    Blocking callers (the batch --llm-workers threads, the Streamlit app) all
+    share one loop, hence one AsyncOpenAI client and connection pool and one
+    Config.OPENAI_MAX_CONCURRENCY bound on requests in flight, instead of a
+    new client, TLS handshake and limit per asyncio.run() call.
+    
+    Args:
+        coro: Coroutine to run
+        
+    Returns:
+        The coroutine's result
+        
+    Raises:
+        RuntimeError: If called from the shared loop itself (it would deadlock)
+    """
+    loop = _get_shared_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_coroutine_sync() cannot be called from the shared event loop")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+def _get_async_client() -> AsyncOpenAI:
+    """
+    Return the AsyncOpenAI client bound to the running event loop.
+    
+    The underlying HTTP connection pool belongs to the loop it was created on,
+    so each loop gets its own client; blocking callers share one long-lived
+    loop (run_coroutine_sync) and therefore one client.
+    """
+    loop = asyncio.get_running_loop()
+    async_client = _async_clients.get(loop)
+    if async_client is None:
+        async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        _async_clients[loop] = async_client
+    return async_client
+
+
+def _get_openai_semaphore() -> asyncio.Semaphore:
+    """
+    Return the semaphore limiting in-flight OpenAI requests on the running loop.
+    
+    The limit is Config.OPENAI_MAX_CONCURRENCY and is shared by every chat and
+    embedding call issued from the same event loop; with run_coroutine_sync
+    that is every call in the process.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _openai_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max(1, Config.OPENAI_MAX_CONCURRENCY))
+        _openai_semaphores[loop] = semaphore
+    return semaphore
+
+
+async def safe_openai_chat_completion_async(messages: List[Dict], model: Optional[str] = None, max_retries=5, max_tokens=400,
+                                            validate: Optional[Callable] = None) -> Optional[Dict]:
+    """
+    Async counterpart of safe_openai_chat_completion.
+    
+    Backoff uses asyncio.sleep so other classifications keep running, and the
+    number of requests in flight is bounded by Config.OPENAI_MAX_CONCURRENCY.
+    
+    Args:
+        messages: List of message dictionaries for the chat completion
+        model: OpenAI model to use (default: Config.OPENAI_MODEL)
+        max_retries: Maximum number of retry attempts (default: 5)
+        max_tokens: Completion token budget (default: 400, one classification)
+        validate: Predicate on the response; only accepted replies are cached or
+            served from the cache (default: content is well-formed JSON)
+        
+    Returns:
+        OpenAI response object or None if all retries failed
+    """
+    
+    model = model or Config.OPENAI_MODEL
+    
+    # Identical requests are answered from the local cache
+    cache_key = _chat_cache_key(messages, model, 0.1, max_tokens)
+    cached = _cached_chat_completion(cache_key, validate)
+    if cached is not None:
+        return cached
+    
+    limiter = get_rate_limiter("chat", model)
+    estimated_tokens = estimate_chat_tokens(messages, max_tokens=max_tokens)
+    
+    for attempt in range(max_retries + 1):
+        try:
+            print(f"OpenAI API call attempt {attempt + 1}/{max_retries + 1}")
             
-            # Rate limit errors
-            if "rate limit" in error_str or "too many requests" in error_str:
-                wait_time = (2 ** attempt) * 1  # Exponential backoff: 1, 2, 4, 8, 16 seconds
-                print(f"⚠️  Rate limit hit on attempt {attempt + 1}. Waiting {wait_time} seconds...")
-                logger.warning(f"OpenAI rate limit error on attempt {attempt + 1}: {str(e)}")
-                
-                if attempt < max_retries:
-                    time.sleep(wait_time)
-                else:
-                    print(f"❌ Rate limit error after {max_retries + 1} attempts. Giving up.")
-                    logger.error(f"OpenAI rate limit error after {max_retries + 1} attempts")
-                    return None
-                    
-            # Timeout errors
-            elif "timeout" in error_str:
-                wait_time = (2 ** attempt) * 0.5  # Shorter backoff for timeouts: 0.5, 1, 2, 4, 8 seconds
-                print(f"⚠️  Timeout on attempt {attempt + 1}. Waiting {wait_time} seconds...")
-                logger.warning(f"OpenAI timeout error on attempt {attempt + 1}: {str(e)}")
-                
-                if attempt < max_retries:
-                    time.sleep(wait_time)
-                else:
-                    print(f"❌ Timeout error after {max_retries + 1} attempts. Giving up.")
-                    logger.error(f"OpenAI timeout error after {max_retries + 1} attempts")
-                    return None
-                    
-            # Connection errors
-            elif "connection" in error_str or "network" in error_str:
-                wait_time = (2 ** attempt) * 1  # Exponential backoff for connection errors
-                print(f"⚠️  API connection error on attempt {attempt + 1}. Waiting {wait_time} seconds...")
-                logger.warning(f"OpenAI connection error on attempt {attempt + 1}: {str(e)}")
-                
-                if attempt < max_retries:
-                    time.sleep(wait_time)
-                else:
-                    print(f"❌ Connection error after {max_retries + 1} attempts. Giving up.")
-                    logger.error(f"OpenAI connection error after {max_retries + 1} attempts")
-                    return None
-                    
-            # Billing/quota errors
-            elif "quota" in error_str or "billing" in error_str:
-                print(f"❌ Billing/quota error on attempt {attempt + 1}. No retry.")
-                logger.error(f"OpenAI billing/quota error: {str(e)}")
+            # Wait for RPM/TPM budget before sending rather than after a 429
+            await limiter.acquire_async(estimated_tokens)
+            
+            # Hold a slot only for the request itself, never while backing off
+            async with _get_openai_semaphore():
+                raw_response = await _get_async_client().chat.completions.with_raw_response.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0.1,  # Low temperature for consistent classification
+                    max_tokens=max_tokens
+                )
+            limiter.update_from_headers(_response_headers(raw_response))
+            response = raw_response.parse()
+            _store_chat_completion(cache_key, response, validate)
+            
+            print(f"✅ OpenAI API call successful on attempt {attempt + 1}")
+            return response
+            
+        except Exception as e:
+            limiter.update_from_headers(_response_headers(e))
+            wait_time = _retry_wait_time(e, attempt, max_retries)
+            if wait_time is None:
                 return None
-                
-            # Other API errors
-            else:
-                wait_time = (2 ** attempt) * 1
-                print(f"⚠️  API error on attempt {attempt + 1}. Waiting {wait_time} seconds...")
-                logger.warning(f"OpenAI API error on attempt {attempt + 1}: {str(e)}")
-                
-                if attempt < max_retries:
-                    time.sleep(wait_time)
-                else:
-                    print(f"❌ API error after {max_retries + 1} attempts. Giving up.")
-                    logger.error(f"OpenAI API error after {max_retries + 1} attempts")
-                    return None
+            await asyncio.sleep(wait_time)
     
     return None
 
 
+async def create_embedding_async(text: str, model: Optional[str] = None) -> List[float]:
+    """
+    Create an embedding with the async client under the shared concurrency limit.
+    
+    Args:
+        text: Text to embed (already truncated to the embedding token limit)
+        model: Embedding model (default: Config.EMBEDDING_MODEL)
+        
+    Returns:
+        Embedding vector as a list of floats
+    """
+    limiter = get_rate_limiter("embedding", model)
+    await limiter.acquire_async(count_tokens(text))
+    async with _get_openai_semaphore():
+        raw_response = await _get_async_client().embeddings.with_raw_response.create(
+            input=text,
+            model=model or Config.EMBEDDING_MODEL
+        )
+    limiter.update_from_headers(_response_headers(raw_response))
+    return raw_response.parse().data[0].embedding
+
+
+def create_embedding(text: str, model: Optional[str] = None) -> List[float]:
+    """
+    Create an embedding with the sync client, respecting the shared rate limiter.
+    
+    Args:
+        text: Text to embed (already truncated to the embedding token limit)
+        model: Embedding model (default: Config.EMBEDDING_MODEL)
+        
+    Returns:
+        Embedding vector as a list of floats
+    """
+    limiter = get_rate_limiter("embedding", model)
+    limiter.acquire(count_tokens(text))
+    raw_response = client.embeddings.with_raw_response.create(
+        input=text,
+        model=model or Config.EMBEDDING_MODEL
+    )
+    limiter.update_from_headers(_response_headers(raw_response))
+    return raw_response.parse().data[0].embedding
+
+
+def create_embeddings(texts: List[str], model: Optional[str] = None) -> List[List[float]]:
+    """
+    Embed several texts in one request, respecting the shared rate limiter.
+    
+    Args:
+        texts: Texts to embed (each already truncated to the embedding token limit)
+        model: Embedding model (default: Config.EMBEDDING_MODEL)
+        
+    Returns:
+        Embedding vectors in the same order as texts
+    """
+    if not texts:
+        return []
+    limiter = get_rate_limiter("embedding", model)
+    limiter.acquire(sum(count_tokens(text) for text in texts))
+    raw_response = client.embeddings.with_raw_response.create(
+        input=texts,
+        model=model or Config.EMBEDDING_MODEL
+    )
+    limiter.update_from_headers(_response_headers(raw_response))
+    # The API tags each vector with its input index; don't rely on response order
+    data = sorted(raw_response.parse().data, key=lambda item: item.index)
+    return [item.embedding for item in data]
+
+
 def format_eisenhower_prompt(subject: str, body: str, sender_profile: Optional[Dict] = None) -> str:
     """
     Format the complete prompt for OpenAI classification.
@@ -256,129 +591,43 @@ Respond with only the JSON object, no additional text."""
     return prompt
 
 
-def triage_email_only(subject: str, body: str) -> Dict:
+def _truncate_body(body: str, max_tokens: int, purpose: str) -> str:
     """
-    Classifies the email using only the subject and body.
+    Truncate an email body for a prompt and log when truncation happened.
     
     Args:
-        subject: Email subject line
         body: Email body content
+        max_tokens: Token budget for the body
+        purpose: Short label used in the log message (e.g. "triage")
         
     Returns:
-        Dictionary with classification results:
-        {"quadrant": ..., "confidence": ..., "reasoning": ...}
+        Body text that fits within max_tokens
     """
-    
-    if not client.api_key:
-        raise ValueError("OPENAI_API_KEY not found in environment variables")
-    
-    # Validate email content before processing
-    if not validate_email_content(subject, body):
-        return {
-            "quadrant": "delete",
-            "confidence": 0.9,
-            "reasoning": "Email has insufficient content for meaningful triage - likely spam or empty message"
-        }
-    
-    # Check for meeting notifications
-    if is_meeting_notification(subject, body):
-        return {
-            "quadrant": "delete",
-            "confidence": 0.95,
-            "reasoning": "Meeting acceptance/rejection notification - no action required"
-        }
-    
-    try:
-        # Truncate body to prevent GPT-4 context overflow
-        original_body_length = len(body)
-        body = truncate_for_prompt(body, max_tokens=3000)
-        if len(body) != original_body_length:
-            logger.info(f"Body truncated from {original_body_length} to {len(body)} characters for triage")
-        
-        # Format the prompt without sender context
-        prompt = format_eisenhower_prompt(subject, body)
-        
-        # Use safe OpenAI call with retry logic
-        response = safe_openai_chat_completion([
-            {"role": "system", "content": "You are an expert email triage assistant specializing in the Eisenhower Matrix."},
-            {"role": "user", "content": prompt}
-        ])
-        
-        # Handle API failure
-        if response is None:
-            print("❌ OpenAI API call failed, returning fallback response")
-            return {
-                "quadrant": "delegate",
-                "confidence": 0.1,
-                "reasoning": "Fallback due to OpenAI failure"
-            }
-        
-        # Extract and parse the response
-        content = response.choices[0].message.content.strip()
-        
-        # Try to parse JSON response
-        try:
-            result = json.loads(content)
-            
-            # Validate the response structure
-            required_keys = ["quadrant", "confidence", "reasoning"]
-            if not all(key in result for key in required_keys):
-                raise ValueError("Missing required keys in response")
-            
-            # Validate quadrant
-            if result["quadrant"] not in QUADRANTS:
-                raise ValueError(f"Invalid quadrant: {result['quadrant']}")
-            
-            # Validate confidence score
-            confidence = float(result["confidence"])
-            if not 0.0 <= confidence <= 1.0:
-                raise ValueError(f"Confidence must be between 0.0 and 1.0, got: {confidence}")
-            
-            return result
-            
-        except json.JSONDecodeError:
-            # Fallback: try to extract information from text response
-            print("⚠️  Failed to parse OpenAI JSON response, using fallback")
-            return {
-                "quadrant": "schedule",  # Default to schedule if parsing fails
-                "confidence": 0.5,
-                "reasoning": f"Failed to parse OpenAI response: {content[:100]}..."
-            }
-            
-    except Exception as e:
-        # Return a safe fallback in case of unexpected errors
-        print(f"❌ Unexpected error in triage_email_only: {str(e)}")
-        logger.error(f"Unexpected error in triage_email_only: {str(e)}")
-        return {
-            "quadrant": "delegate",
-            "confidence": 0.1,
-            "reasoning": f"Fallback due to error: {str(e)}"
-        }
+    original_body_length = len(body)
+    body = truncate_for_prompt(body, max_tokens=max_tokens)
+    if len(body) != original_body_length:
+        logger.info(f"Body truncated from {original_body_length} to {len(body)} characters for {purpose}")
+    return body
 
 
-def triage_with_context(subject: str, body: str, sender_profile: Dict) -> Dict:
+def _precheck_email(subject: str, body: str) -> Optional[Dict]:
     """
-    Classifies the email using subject, body, and sender profile context.
+    Run the cheap checks that let a strategy skip the OpenAI call entirely.
     
     Args:
         subject: Email subject line
         body: Email body content
-        sender_profile: Dictionary with sender context (tags, notes, linked_accounts, etc.)
         
     Returns:
-        Dictionary with classification results:
-        {"quadrant": ..., "confidence": ..., "reasoning": ...}
+        Classification result if the email can be classified without GPT-4, else None
     """
-    
-    if not client.api_key:
-        raise ValueError("OPENAI_API_KEY not found in environment variables")
-    
     # Validate email content before processing
     if not validate_email_content(subject, body):
         return {
             "quadrant": "delete",
             "confidence": 0.9,
-            "reasoning": "Email has insufficient content for meaningful triage - likely spam or empty message"
+            "reasoning": "Email has insufficient content for meaningful triage - likely spam or empty message",
+            "source": "rule"
         }
     
     # Check for meeting notifications
@@ -386,185 +635,759 @@ def triage_with_context(subject: str, body: str, sender_profile: Dict) -> Dict:
         return {
             "quadrant": "delete",
             "confidence": 0.95,
-            "reasoning": "Meeting acceptance/rejection notification - no action required"
+            "reasoning": "Meeting acceptance/rejection notification - no action required",
+            "source": "rule"
         }
     
-    try:
-        # Truncate body to prevent GPT-4 context overflow
-        original_body_length = len(body)
-        body = truncate_for_prompt(body, max_tokens=3000)
-        if len(body) != original_body_length:
-            logger.info(f"Body truncated from {original_body_length} to {len(body)} characters for triage")
-        
-        # Format the prompt with sender context
-        prompt = format_eisenhower_prompt(subject, body, sender_profile)
-        
-        # Use safe OpenAI call with retry logic
-        response = safe_openai_chat_completion([
-            {"role": "system", "content": "You are an expert email triage assistant specializing in the Eisenhower Matrix. Consider the sender's context when making your classification."},
-            {"role": "user", "content": prompt}
-        ])
-        
-        # Handle API failure
-        if response is None:
-            print("❌ OpenAI API call failed, returning fallback response")
-            return {
-                "quadrant": "delegate",
-                "confidence": 0.1,
-                "reasoning": "Fallback due to OpenAI failure"
-            }
-        
-        # Extract and parse the response
-        content = response.choices[0].message.content.strip()
-        
-        # Try to parse JSON response
-        try:
-            result = json.loads(content)
-            
-            # Validate the response structure
-            required_keys = ["quadrant", "confidence", "reasoning"]
-            if not all(key in result for key in required_keys):
-                raise ValueError("Missing required keys in response")
-            
-            # Validate quadrant
-            if result["quadrant"] not in QUADRANTS:
-                raise ValueError(f"Invalid quadrant: {result['quadrant']}")
-            
-            # Validate confidence score
-            confidence = float(result["confidence"])
-            if not 0.0 <= confidence <= 1.0:
-                raise ValueError(f"Confidence must be between 0.0 and 1.0, got: {confidence}")
-            
-            return result
-            
-        except json.JSONDecodeError:
-            # Fallback: try to extract information from text response
-            print("⚠️  Failed to parse OpenAI JSON response, using fallback")
-            return {
-                "quadrant": "schedule",  # Default to schedule if parsing fails
-                "confidence": 0.5,
-                "reasoning": f"Failed to parse OpenAI response: {content[:100]}..."
-            }
-            
-    except Exception as e:
-        # Return a safe fallback in case of unexpected errors
-        print(f"❌ Unexpected error in triage_with_context: {str(e)}")
-        logger.error(f"Unexpected error in triage_with_context: {str(e)}")
-        return {
-            "quadrant": "delegate",
-            "confidence": 0.1,
-            "reasoning": f"Fallback due to error: {str(e)}"
-        }
+    return None
 
 
-def get_quadrant_description(quadrant: str) -> str:
+def validate_triage_result(result: Dict) -> Dict:
     """
-    Get a human-readable description of a quadrant.
+    Validate a parsed classification returned by the model.
     
     Args:
-        quadrant: The quadrant key (do, schedule, delegate, delete)
+        result: Parsed JSON object from the model response
         
     Returns:
-        Description string
+        The same result if it is valid, with its source set to "llm"
+        
+    Raises:
+        ValueError: If keys are missing, the quadrant is unknown or confidence is out of range
     """
-    return QUADRANTS.get(quadrant, "Unknown quadrant")
+    # Validate the response structure
+    required_keys = ["quadrant", "confidence", "reasoning"]
+    if not all(key in result for key in required_keys):
+        raise ValueError("Missing required keys in response")
+    
+    # Validate quadrant
+    if result["quadrant"] not in QUADRANTS:
+        raise ValueError(f"Invalid quadrant: {result['quadrant']}")
+    
+    # Validate confidence score
+    confidence = float(result["confidence"])
+    if not 0.0 <= confidence <= 1.0:
+        raise ValueError(f"Confidence must be between 0.0 and 1.0, got: {confidence}")
+    
+    result["source"] = "llm"
+    return result
 
 
-def validate_email_content(subject: str, body: str) -> bool:
+# Fallback classification per strategy: (quadrant, confidence, label used in messages)
+_STRATEGY_FALLBACKS = {
+    "triage_email_only": ("delegate", 0.1, ""),
+    "triage_with_context": ("delegate", 0.1, ""),
+    "triage_with_embedding": ("schedule", 0.3, "embedding triage"),
+    "triage_with_outcomes": ("schedule", 0.3, "outcomes triage"),
+    "triage_with_local_model": ("schedule", 0.3, "local classifier"),
+}
+
+
+def _parse_triage_response(response, strategy: str) -> Dict:
     """
-    Validate that email has sufficient content for meaningful triage.
+    Turn an OpenAI chat response into a validated classification.
     
     Args:
-        subject: Email subject line
-        body: Email body content
+        response: Response from safe_openai_chat_completion (None on API failure)
+        strategy: Strategy name, a key of _STRATEGY_FALLBACKS
         
     Returns:
-        True if email has sufficient content, False otherwise
+        Dictionary with classification results
+        
+    Raises:
+        ValueError: If the response parses as JSON but fails validation
     """
-    # Check if body is empty or too short
-    if not body or not body.strip():
-        logger.warning("Email body is empty or contains only whitespace")
-        return False
+    quadrant, confidence, label = _STRATEGY_FALLBACKS[strategy]
     
-    # Check if body is too short (less than 10 characters)
-    if len(body.strip()) < 10:
-        logger.warning(f"Email body too short ({len(body.strip())} characters) for meaningful triage")
-        return False
+    # Handle API failure
+    if response is None:
+        print(f"❌ OpenAI API call failed{' for ' + label if label else ''}, returning fallback response")
+        return {
+            "quadrant": quadrant,
+            "confidence": confidence,
+            "reasoning": f"Fallback due to OpenAI failure{' in ' + label if label else ''}",
+            "source": "fallback"
+        }
     
-    # Check if subject is empty
-    if not subject or not subject.strip():
-        logger.warning("Email subject is empty")
-        return False
+    # Extract and parse the response
+    content = response.choices[0].message.content.strip()
     
-    return True
+    # Try to parse JSON response
+    try:
+        result = json.loads(content)
+    except json.JSONDecodeError:
+        # Fallback: try to extract information from text response
+        print(f"⚠️  Failed to parse OpenAI JSON response{' for ' + label if label else ''}, using fallback")
+        return {
+            "quadrant": "schedule",  # Default to schedule if parsing fails
+            "confidence": 0.5,
+            "reasoning": f"Failed to parse OpenAI response{' for ' + label if label else ''}: {content[:100]}...",
+            "source": "fallback"
+        }
+    
+    return validate_triage_result(result)
 
 
-def is_meeting_notification(subject: str, body: str) -> bool:
+def _triage_error_fallback(strategy: str, error: Exception) -> Dict:
     """
-    Detect if email is a meeting acceptance/rejection notification.
+    Build the safe fallback returned when a strategy raises unexpectedly.
     
     Args:
-        subject: Email subject line
+        strategy: Strategy name, a key of _STRATEGY_FALLBACKS
+        error: The exception that was raised
+        
+    Returns:
+        Dictionary with fallback classification results
+    """
+    quadrant, confidence, label = _STRATEGY_FALLBACKS[strategy]
+    print(f"❌ Unexpected error in {strategy}: {str(error)}")
+    logger.error(f"Unexpected error in {strategy}: {str(error)}")
+    return {
+        "quadrant": quadrant,
+        "confidence": confidence,
+        "reasoning": f"Fallback due to error{' in ' + label if label else ''}: {str(error)}",
+        "source": "fallback"
+    }
+
+
+# Model cascade state: judgments accepted from the cheap model vs escalated, and recent latencies per tier
+_cascade_counts = {"accepted": 0, "escalated": 0}
+_cascade_latencies = {"cheap": deque(maxlen=2048), "strong": deque(maxlen=2048)}
+_cascade_calls = {"cheap": 0, "strong": 0}
+_cascade_lock = threading.Lock()
+
+
+def _record_cascade_tier(tier: str, seconds: float, accepted: int = 0, escalated: int = 0) -> None:
+    """Count one request to a cascade tier and the judgments it accepted or escalated."""
+    with _cascade_lock:
+        _cascade_calls[tier] += 1
+        _cascade_latencies[tier].append(seconds)
+        _cascade_counts["accepted"] += accepted
+        _cascade_counts["escalated"] += escalated
+
+
+def get_model_cascade_stats() -> Dict:
+    """
+    Escalation rate and per-tier latency of the model cascade since startup.
+    
+    Returns:
+        Dictionary with the cheap and strong model names, accepted and escalated
+        judgment counts, escalation_rate, and per tier the number of requests and
+        the mean, p50 and p95 latency in seconds over recent requests
+    """
+    with _cascade_lock:
+        counts = dict(_cascade_counts)
+        tiers = {}
+        for tier, latencies in _cascade_latencies.items():
+            ordered = sorted(latencies)
+            tiers[tier] = {
+                "requests": _cascade_calls[tier],
+                "mean_seconds": sum(ordered) / len(ordered) if ordered else 0.0,
+                "p50_seconds": ordered[len(ordered) // 2] if ordered else 0.0,
+                "p95_seconds": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0,
+            }
+    judged = counts["accepted"] + counts["escalated"]
+    return {
+        "cheap_model": Config.OPENAI_CHEAP_MODEL,
+        "strong_model": Config.OPENAI_MODEL,
+        "accepted": counts["accepted"],
+        "escalated": counts["escalated"],
+        "escalation_rate": counts["escalated"] / judged if judged else 0.0,
+        "tiers": tiers,
+    }
+
+
+def _cascade_enabled() -> bool:
+    """Whether chat classifications go to the cheap model first."""
+    return Config.MODEL_CASCADE_ENABLED and bool(Config.OPENAI_CHEAP_MODEL)
+
+
+def _response_json(response):
+    """Parsed JSON content of a chat response, or None if missing or not JSON."""
+    if response is None:
+        return None
+    try:
+        return json.loads(response.choices[0].message.content.strip())
+    except (ValueError, AttributeError, IndexError):
+        return None
+
+
+def _cascade_accepts(result) -> bool:
+    """Whether a cheap-model classification is valid and confident enough to keep."""
+    if not isinstance(result, dict):
+        return False
+    try:
+        validate_triage_result(result)
+        return float(result["confidence"]) >= Config.MODEL_CASCADE_THRESHOLD
+    except (ValueError, TypeError):
+        return False
+
+
+def _cheap_label(result: Dict) -> Dict:
+    """
+    Mark a judgment the cascade accepted from the cheap model.
+    
+    Its source is "llm_cheap" rather than "llm", so is_llm_label keeps the
+    cheap model's mistakes out of the neighbour vote and the local classifier's
+    training data unless Config.CASCADE_CHEAP_LABELS_TRUSTED is set.
+    """
+    result["source"] = "llm_cheap"
+    result["model"] = Config.OPENAI_CHEAP_MODEL
+    return result
+
+
+def _valid_triage_response(response) -> bool:
+    """Whether _parse_triage_response accepts a chat response without falling back."""
+    return _valid_judgment(_response_json(response))
+
+
+def _valid_judgment(result) -> bool:
+    """Whether a parsed judgment passes validate_triage_result."""
+    if not isinstance(result, dict):
+        return False
+    try:
+        validate_triage_result(dict(result))
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+def _cascade_chat_triage(messages: List[Dict], strategy: str) -> Dict:
+    """
+    Classify with the model cascade: the cheap model first, Config.OPENAI_MODEL if it is unsure.
+    
+    Without a cascade this is a single request to Config.OPENAI_MODEL.
+    
+    Args:
+        messages: Chat messages asking for one classification
+        strategy: Strategy name, a key of _STRATEGY_FALLBACKS
+        
+    Returns:
+        Dictionary with classification results
+        
+    Raises:
+        ValueError: If the strong model's response parses as JSON but fails validation
+    """
+    if not _cascade_enabled():
+        response = safe_openai_chat_completion(messages, validate=_valid_triage_response)
+        return _parse_triage_response(response, strategy)
+    
+    start = time.perf_counter()
+    candidate = _response_json(safe_openai_chat_completion(messages, model=Config.OPENAI_CHEAP_MODEL,
+                                                           validate=_valid_triage_response))
+    accepted = _cascade_accepts(candidate)
+    _record_cascade_tier("cheap", time.perf_counter() - start, accepted=int(accepted), escalated=int(not accepted))
+    if accepted:
+        return _cheap_label(candidate)
+    
+    start = time.perf_counter()
+    response = safe_openai_chat_completion(messages, validate=_valid_triage_response)
+    _record_cascade_tier("strong", time.perf_counter() - start)
+    return _parse_triage_response(response, strategy)
+
+
+async def _cascade_chat_triage_async(messages: List[Dict], strategy: str) -> Dict:
+    """Awaitable variant of _cascade_chat_triage."""
+    if not _cascade_enabled():
+        response = await safe_openai_chat_completion_async(messages, validate=_valid_triage_response)
+        return _parse_triage_response(response, strategy)
+    
+    start = time.perf_counter()
+    candidate = _response_json(await safe_openai_chat_completion_async(messages, model=Config.OPENAI_CHEAP_MODEL,
+                                                                       validate=_valid_triage_response))
+    accepted = _cascade_accepts(candidate)
+    _record_cascade_tier("cheap", time.perf_counter() - start, accepted=int(accepted), escalated=int(not accepted))
+    if accepted:
+        return _cheap_label(candidate)
+    
+    start = time.perf_counter()
+    response = await safe_openai_chat_completion_async(messages, validate=_valid_triage_response)
+    _record_cascade_tier("strong", time.perf_counter() - start)
+    return _parse_triage_response(response, strategy)
+
+
+def build_email_only_messages(subject: str, body: str) -> List[Dict]:
+    """
+    Build the chat messages for email-only classification.
+    
+    Args:
+        subject: Email subject line
         body: Email body content
         
     Returns:
-        True if email is a meeting notification, False otherwise
+        List of message dictionaries for the chat completion
     """
-    # Convert to lowercase for case-insensitive matching
-    subject_lower = subject.lower()
-    body_lower = body.lower()
-    
-    # Common meeting notification patterns in subjects
-    meeting_subject_patterns = [
-        'accepted:', 'declined:', 'tentative:', 'proposed:',
-        'accepted -', 'declined -', 'tentative -', 'proposed -',
-        'meeting accepted', 'meeting declined', 'meeting tentative',
-        'calendar invitation', 'calendar update',
-        'outlook meeting', 'teams meeting',
-        'zoom meeting', 'webex meeting',
-        'meeting response', 'meeting reply',
-        'accepted meeting', 'declined meeting',
-        'tentative meeting', 'proposed meeting'
+    # Truncate body to prevent GPT-4 context overflow
+    body = _truncate_body(body, 3000, "triage")
+    
+    # Format the prompt without sender context
+    prompt = format_eisenhower_prompt(subject, body)
+    
+    return [
+        {"role": "system", "content": "You are an expert email triage assistant specializing in the Eisenhower Matrix."},
+        {"role": "user", "content": prompt}
     ]
+
+
+def build_context_messages(subject: str, body: str, sender_profile: Dict) -> List[Dict]:
+    """
+    Build the chat messages for classification with sender context.
+    
+    Args:
+        subject: Email subject line
+        body: Email body content
+        sender_profile: Dictionary with sender context
+        
+    Returns:
+        List of message dictionaries for the chat completion
+    """
+    # Truncate body to prevent GPT-4 context overflow
+    body = _truncate_body(body, 3000, "triage")
+    
+    # Format the prompt with sender context
+    prompt = format_eisenhower_prompt(subject, body, sender_profile)
     
-    # Common meeting notification patterns in body
-    meeting_body_patterns = [
-        'accepted this meeting',
-        'declined this meeting', 
-        'tentatively accepted this meeting',
-        'proposed a new time',
-        'meeting has been accepted',
-        'meeting has been declined',
-        'meeting has been tentatively accepted',
-        'calendar invitation',
-        'outlook meeting',
-        'teams meeting',
-        'zoom meeting',
-        'webex meeting',
-        'meeting response',
-        'meeting reply'
+    return [
+        {"role": "system", "content": "You are an expert email triage assistant specializing in the Eisenhower Matrix. Consider the sender's context when making your classification."},
+        {"role": "user", "content": prompt}
     ]
+
+
+def triage_email_only(subject: str, body: str) -> Dict:
+    """
+    Classifies the email using only the subject and body.
     
-    # Check subject patterns
-    for pattern in meeting_subject_patterns:
-        if pattern in subject_lower:
-            logger.info(f"Detected meeting notification in subject: '{pattern}'")
-            return True
+    Args:
+        subject: Email subject line
+        body: Email body content
+        
+    Returns:
+        Dictionary with classification results:
+        {"quadrant": ..., "confidence": ..., "reasoning": ...}
+    """
+    
+    if not client.api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
+    
+    precheck = _precheck_email(subject, body)
+    if precheck:
+        return precheck
+    
+    try:
+        # Cheap model first when the cascade is on; retries and caching happen per request
+        return _cascade_chat_triage(build_email_only_messages(subject, body), "triage_email_only")
+        
+    except Exception as e:
+        # Return a safe fallback in case of unexpected errors
+        return _triage_error_fallback("triage_email_only", e)
+
+
+async def triage_email_only_async(subject: str, body: str) -> Dict:
+    """
+    Awaitable variant of triage_email_only.
+    
+    Args:
+        subject: Email subject line
+        body: Email body content
+        
+    Returns:
+        Dictionary with classification results:
+        {"quadrant": ..., "confidence": ..., "reasoning": ...}
+    """
+    
+    if not client.api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
+    
+    precheck = _precheck_email(subject, body)
+    if precheck:
+        return precheck
+    
+    try:
+        return await _cascade_chat_triage_async(build_email_only_messages(subject, body), "triage_email_only")
+        
+    except Exception as e:
+        return _triage_error_fallback("triage_email_only", e)
+
+
+def triage_with_context(subject: str, body: str, sender_profile: Dict) -> Dict:
+    """
+    Classifies the email using subject, body, and sender profile context.
+    
+    Args:
+        subject: Email subject line
+        body: Email body content
+        sender_profile: Dictionary with sender context (tags, notes, linked_accounts, etc.)
+        
+    Returns:
+        Dictionary with classification results:
+        {"quadrant": ..., "confidence": ..., "reasoning": ...}
+    """
+    
+    if not client.api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
+    
+    precheck = _precheck_email(subject, body)
+    if precheck:
+        return precheck
+    
+    try:
+        # Cheap model first when the cascade is on; retries and caching happen per request
+        return _cascade_chat_triage(build_context_messages(subject, body, sender_profile), "triage_with_context")
+        
+    except Exception as e:
+        # Return a safe fallback in case of unexpected errors
+        return _triage_error_fallback("triage_with_context", e)
+
+
+async def triage_with_context_async(subject: str, body: str, sender_profile: Dict) -> Dict:
+    """
+    Awaitable variant of triage_with_context.
+    
+    Args:
+        subject: Email subject line
+        body: Email body content
+        sender_profile: Dictionary with sender context (tags, notes, linked_accounts, etc.)
+        
+    Returns:
+        Dictionary with classification results:
+        {"quadrant": ..., "confidence": ..., "reasoning": ...}
+    """
+    
+    if not client.api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
+    
+    precheck = _precheck_email(subject, body)
+    if precheck:
+        return precheck
+    
+    try:
+        return await _cascade_chat_triage_async(build_context_messages(subject, body, sender_profile), "triage_with_context")
+        
+    except Exception as e:
+        return _triage_error_fallback("triage_with_context", e)
+
+
+def get_quadrant_description(quadrant: str) -> str:
+    """
+    Get a human-readable description of a quadrant.
+    
+    Args:
+        quadrant: The quadrant key (do, schedule, delegate, delete)
+        
+    Returns:
+        Description string
+    """
+    return QUADRANTS.get(quadrant, "Unknown quadrant")
+
+
+def validate_email_content(subject: str, body: str) -> bool:
+    """
+    Validate that email has sufficient content for meaningful triage.
+    
+    Args:
+        subject: Email subject line
+        body: Email body content
+        
+    Returns:
+        True if email has sufficient content, False otherwise
+    """
+    # Check if body is empty or too short
+    if not body or not body.strip():
+        logger.warning("Email body is empty or contains only whitespace")
+        return False
+    
+    # Check if body is too short (less than 10 characters)
+    if len(body.strip()) < 10:
+        logger.warning(f"Email body too short ({len(body.strip())} characters) for meaningful triage")
+        return False
+    
+    # Check if subject is empty
+    if not subject or not subject.strip():
+        logger.warning("Email subject is empty")
+        return False
+    
+    return True
+
+
+# Common meeting notification patterns in subjects
+MEETING_SUBJECT_PATTERNS = [
+    'accepted:', 'declined:', 'tentative:', 'proposed:',
+    'accepted -', 'declined -', 'tentative -', 'proposed -',
+    'meeting accepted', 'meeting declined', 'meeting tentative',
+    'calendar invitation', 'calendar update',
+    'outlook meeting', 'teams meeting',
+    'zoom meeting', 'webex meeting',
+    'meeting response', 'meeting reply',
+    'accepted meeting', 'declined meeting',
+    'tentative meeting', 'proposed meeting'
+]
+
+# Common meeting notification patterns in body
+MEETING_BODY_PATTERNS = [
+    'accepted this meeting',
+    'declined this meeting', 
+    'tentatively accepted this meeting',
+    'proposed a new time',
+    'meeting has been accepted',
+    'meeting has been declined',
+    'meeting has been tentatively accepted',
+    'calendar invitation',
+    'outlook meeting',
+    'teams meeting',
+    'zoom meeting',
+    'webex meeting',
+    'meeting response',
+    'meeting reply'
+]
+
+# Built once at import; each pattern is its own id so the log can name it
+_meeting_subject_matcher = PatternMatcher((pattern, pattern) for pattern in MEETING_SUBJECT_PATTERNS)
+_meeting_body_matcher = PatternMatcher((pattern, pattern) for pattern in MEETING_BODY_PATTERNS)
+
+
+def is_meeting_notification(subject: str, body: str) -> bool:
+    """
+    Detect if email is a meeting acceptance/rejection notification.
+    
+    Args:
+        subject: Email subject line
+        body: Email body content
+        
+    Returns:
+        True if email is a meeting notification, False otherwise
+    """
+    # Check subject patterns (matching is case-insensitive)
+    pattern = _meeting_subject_matcher.search(subject)
+    if pattern:
+        logger.info(f"Detected meeting notification in subject: '{pattern}'")
+        return True
     
     # Check body patterns (only if body is not too long to avoid false positives)
-    if len(body_lower) < 500:  # Only check short bodies to avoid false positives
-        for pattern in meeting_body_patterns:
-            if pattern in body_lower:
-                logger.info(f"Detected meeting notification in body: '{pattern}'")
-                return True
+    if len(body) < 500:  # Only check short bodies to avoid false positives
+        pattern = _meeting_body_matcher.search(body)
+        if pattern:
+            logger.info(f"Detected meeting notification in body: '{pattern}'")
+            return True
     
     return False
 
 
+def truncate_embedding_text(text: str, max_tokens: int = 8000) -> str:
+    """
+    Truncate text to the embedding model's input limit.
+    
+    Args:
+        text: Text to embed
+        max_tokens: Maximum number of tokens to keep (default: 8000, OpenAI embedding limit)
+        
+    Returns:
+        Text that fits within the embeddings endpoint's token limit
+    """
+    if TIKTOKEN_AVAILABLE:
+        tokenized = tokenize(text)
+        truncated = tokenized.truncated(max_tokens)
+        if truncated is not tokenized:
+            logger.info(f"Text truncated from {tokenized.count()} to {truncated.count()} tokens for embedding")
+        return truncated.text
+    
+    # Fallback: conservative character-based truncation
+    return text[:max_tokens * CHARS_PER_TOKEN]
+
+
+def prepare_embedding_text(subject: str, body: str) -> str:
+    """
+    Build the text embedded for an email, truncated to the embedding token limit.
+    
+    Args:
+        subject: Email subject line
+        body: Email body content
+        
+    Returns:
+        Combined subject and body text ready for the embeddings endpoint
+    """
+    return truncate_embedding_text(f"Subject: {subject}\n\nBody: {body}")
+
+
+def summarize_similar_emails(email_id: str, similar_emails: List[Dict], triage_results: Optional[Dict[str, Dict]] = None):
+    """
+    Summarise the stored labels of an email's nearest neighbours for the embedding prompt.
+    
+    Args:
+        email_id: Unique email identifier (used in log messages)
+        similar_emails: Matches returned by find_similar_emails
+        triage_results: Neighbours' triage rows keyed by message_id, if already
+            fetched; otherwise they are fetched in a single request
+        
+    Returns:
+        Tuple of (similar_contexts_text, fallback_result); exactly one is None
+    """
+    # Import here to avoid circular imports
+    from backend.supabase_client import get_triage_results_many
+    
+    if not similar_emails:
+        logger.warning(f"No similar emails found for {email_id}, using fallback")
+        return None, {
+            "quadrant": "schedule",
+            "confidence": 0.3,
+            "reasoning": "No similar emails found in database for embedding-based classification",
+            "source": "fallback"
+        }
+    
+    if triage_results is None:
+        triage_results = get_triage_results_many([match.get('email_id') for match in similar_emails])
+    
+    # Build similar contexts string
+    similar_contexts = []
+    for similar_email in similar_emails:
+        similar_email_id = similar_email.get('email_id', 'unknown_id')
+        similarity_score = similar_email.get('score', 0.5)
+        
+        # Triage result for similar email
+        triage_result = triage_results.get(similar_email_id)
+        if triage_result:
+            email_only_data = triage_result.get('triage_email_only', {})
+            if isinstance(email_only_data, dict):
+                quadrant = email_only_data.get('quadrant', 'schedule')
+                reasoning = email_only_data.get('reasoning', 'No reasoning available')
+                similar_contexts.append(f"- {similar_email_id} (score: {similarity_score:.2f}): {quadrant} - {reasoning[:100]}...")
+    
+    if not similar_contexts:
+        logger.warning(f"No valid triage results found for similar emails to {email_id}")
+        return None, {
+            "quadrant": "schedule",
+            "confidence": 0.3,
+            "reasoning": "No valid triage results found for similar emails",
+            "source": "fallback"
+        }
+    
+    return "\n".join(similar_contexts), None
+
+
+_knn_vote_stats = {"decided": 0, "split": 0}
+_knn_vote_stats_lock = threading.Lock()
+
+
+def vote_neighbor_labels(similar_emails: List[Dict], triage_results: Dict[str, Dict],
+                         exclude_id: Optional[str] = None) -> Optional[Dict]:
+    """
+    Classify an email by a similarity-weighted vote of its neighbours' stored quadrants.
+    
+    Each neighbour labelled by the LLM votes for its email-only quadrant with
+    its cosine similarity as the weight. The confidence is the winner's share of the weight
+    with add-one-half smoothing per quadrant, so a unanimous vote of three
+    neighbours is less confident than one of ten.
+    
+    Args:
+        similar_emails: Matches returned by the similarity search ({email_id, score})
+        triage_results: Neighbours' triage rows keyed by message_id
+        exclude_id: Email being classified, ignored if it is among its own neighbours
+        
+    Returns:
+        Classification dict, or None when voting is disabled, too few neighbours
+        are labelled or the vote is split (the caller should ask GPT-4)
+    """
+    if not Config.KNN_VOTE_ENABLED:
+        return None
+    
+    weights: Dict[str, float] = {}
+    voters = 0
+    for match in similar_emails:
+        if match.get("email_id") == exclude_id:
+            continue
+        email_only = (triage_results.get(match.get("email_id")) or {}).get("triage_email_only")
+        # Only model judgments vote; rule, local and vote outputs would echo the system itself
+        quadrant = email_only.get("quadrant") if is_llm_label(email_only) else None
+        if quadrant not in QUADRANTS:
+            continue
+        weights[quadrant] = weights.get(quadrant, 0.0) + max(float(match.get("score") or 0.0), 0.0)
+        voters += 1
+    
+    total = sum(weights.values())
+    if voters < Config.KNN_VOTE_MIN_NEIGHBORS or total <= 0:
+        return None
+    
+    quadrant, weight = max(weights.items(), key=lambda item: item[1])
+    decided = weight / total >= Config.KNN_VOTE_MIN_SHARE
+    with _knn_vote_stats_lock:
+        _knn_vote_stats["decided" if decided else "split"] += 1
+    if not decided:
+        logger.info(f"Split neighbour vote ({weight / total:.0%} {quadrant}), asking GPT-4")
+        return None
+    
+    tally = ", ".join(f"{name} {value:.2f}" for name, value in sorted(weights.items(), key=lambda item: -item[1]))
+    return {
+        "quadrant": quadrant,
+        "confidence": round((weight + 0.5) / (total + 0.5 * len(QUADRANTS)), 3),
+        "reasoning": f"Similarity-weighted vote of {voters} labelled similar emails: {tally}",
+        "source": "knn"
+    }
+
+
+def get_knn_vote_stats() -> Dict:
+    """
+    Neighbour vote counters since startup.
+    
+    Returns:
+        Dictionary with decided (GPT-4 skipped) and split (sent to GPT-4) counts
+    """
+    with _knn_vote_stats_lock:
+        return dict(_knn_vote_stats)
+
+
+def _lookup_similar_contexts(email_id: str, current_embedding: List[float]):
+    """
+    Store the email's embedding and summarise the labels of its nearest neighbours.
+    
+    Args:
+        email_id: Unique email identifier
+        current_embedding: Embedding vector of the email being classified
+        
+    Returns:
+        Tuple of (similar_contexts_text, result); exactly one is None. result is a
+        fallback or the decisive neighbour vote, and needs no GPT-4 call
+    """
+    # Import here to avoid circular imports
+    from backend.supabase_client import (
+        embedding_exists,
+        find_similar_emails_with_labels,
+        split_neighbor_rows,
+        store_embedding,
+    )
+    
+    # Store the embedding if it doesn't exist
+    if not embedding_exists(email_id):
+        store_embedding(email_id, current_embedding)
+    
+    # Neighbours arrive already joined with their triage labels
+    similar_emails, triage_results, _ = split_neighbor_rows(
+        find_similar_emails_with_labels(current_embedding, top_k=5)
+    )
+    
+    vote = vote_neighbor_labels(similar_emails, triage_results, exclude_id=email_id)
+    if vote:
+        return None, vote
+    
+    return summarize_similar_emails(email_id, similar_emails, triage_results)
+
+
+def _embedding_triage_error(email_id: str, error: Exception) -> Dict:
+    """Fallback result when embedding-based triage raises."""
+    logger.error(f"Error in embedding-based triage for {email_id}: {str(error)}")
+    return {
+        "quadrant": "schedule",
+        "confidence": 0.3,
+        "reasoning": f"Fallback due to embedding triage error: {str(error)}",
+        "source": "fallback"
+    }
+
+
 def triage_with_embeddings(subject: str, body: str, email_id: str) -> Dict:
     """
     Classifies the email using embedding similarity to previously classified emails.
     
+    The neighbours' stored quadrants are put to a similarity-weighted vote
+    first; GPT-4 reads them only when the vote is split or too thin.
+    
     Args:
         subject: Email subject line
         body: Email body content
@@ -575,111 +1398,224 @@ def triage_with_embeddings(subject: str, body: str, email_id: str) -> Dict:
         {"quadrant": ..., "confidence": ..., "reasoning": ...}
     """
     
-    # Validate email content before processing
-    if not validate_email_content(subject, body):
-        return {
-            "quadrant": "delete",
-            "confidence": 0.9,
-            "reasoning": "Email has insufficient content for meaningful triage - likely spam or empty message"
-        }
+    precheck = _precheck_email(subject, body)
+    if precheck:
+        return precheck
     
-    # Check for meeting notifications
-    if is_meeting_notification(subject, body):
+    try:
+        # Import here to avoid circular imports
+        from backend.embedding_service import get_embedding
+        
+        # Generate (or reuse) the embedding for the current email
+        current_embedding = get_embedding(prepare_embedding_text(subject, body))
+        
+        # A decisive vote of labelled neighbours settles the email without GPT-4
+        similar_contexts_text, settled = _lookup_similar_contexts(email_id, current_embedding)
+        if settled:
+            return settled
+        
+        # Use GPT-4 to classify based on similar examples
+        return triage_with_embedding(subject, body, similar_contexts_text)
+        
+    except Exception as e:
+        return _embedding_triage_error(email_id, e)
+
+
+async def triage_with_embeddings_async(subject: str, body: str, email_id: str) -> Dict:
+    """
+    Awaitable variant of triage_with_embeddings.
+    
+    The embedding comes from the shared embedding cache or the async client; the Supabase lookups
+    run in a worker thread so they do not block the event loop.
+    
+    Args:
+        subject: Email subject line
+        body: Email body content
+        email_id: Unique email identifier
+        
+    Returns:
+        Dictionary with classification results:
+        {"quadrant": ..., "confidence": ..., "reasoning": ...}
+    """
+    
+    precheck = _precheck_email(subject, body)
+    if precheck:
+        return precheck
+    
+    try:
+        from backend.embedding_service import get_embedding_async
+        
+        current_embedding = await get_embedding_async(prepare_embedding_text(subject, body))
+        
+        similar_contexts_text, settled = await asyncio.to_thread(_lookup_similar_contexts, email_id, current_embedding)
+        if settled:
+            return settled
+        
+        return await triage_with_embedding_async(subject, body, similar_contexts_text)
+        
+    except Exception as e:
+        return _embedding_triage_error(email_id, e)
+
+
+def _local_model_result(embedding: List[float]) -> Dict:
+    """Local classifier result for an embedding, or a fallback when no model is trained."""
+    from backend.local_classifier import classify_local
+    
+    result = classify_local(embedding)
+    if result is None:
         return {
-            "quadrant": "delete",
-            "confidence": 0.95,
-            "reasoning": "Meeting acceptance/rejection notification - no action required"
+            "quadrant": "schedule",
+            "confidence": 0.3,
+            "reasoning": "No local classifier trained (run scripts/train_local_classifier.py)",
+            "source": "fallback"
         }
+    return result
+
+
+def triage_with_local_model(subject: str, body: str, embedding: Optional[List[float]] = None) -> Dict:
+    """
+    Classifies the email with the local embedding classifier, without any chat request.
+    
+    Args:
+        subject: Email subject line
+        body: Email body content
+        embedding: Precomputed embedding of the email (fetched from the embedding cache otherwise)
+        
+    Returns:
+        Dictionary with classification results:
+        {"quadrant": ..., "confidence": ..., "reasoning": ...}
+    """
+    
+    precheck = _precheck_email(subject, body)
+    if precheck:
+        return precheck
+    
+    try:
+        if embedding is None:
+            from backend.embedding_service import get_embedding
+            embedding = get_embedding(prepare_embedding_text(subject, body))
+        return _local_model_result(embedding)
+        
+    except Exception as e:
+        return _triage_error_fallback("triage_with_local_model", e)
+
+
+async def triage_with_local_model_async(subject: str, body: str, embedding: Optional[List[float]] = None) -> Dict:
+    """
+    Awaitable variant of triage_with_local_model.
+    
+    Args:
+        subject: Email subject line
+        body: Email body content
+        embedding: Precomputed embedding of the email
+        
+    Returns:
+        Dictionary with classification results:
+        {"quadrant": ..., "confidence": ..., "reasoning": ...}
+    """
+    
+    precheck = _precheck_email(subject, body)
+    if precheck:
+        return precheck
+    
+    try:
+        if embedding is None:
+            from backend.embedding_service import get_embedding_async
+            embedding = await get_embedding_async(prepare_embedding_text(subject, body))
+        return _local_model_result(embedding)
+        
+    except Exception as e:
+        return _triage_error_fallback("triage_with_local_model", e)
+
+
+def build_embedding_messages(subject: str, body: str, similar_contexts: str) -> List[Dict]:
+    """
+    Build the chat messages for classification informed by similar emails.
+    
+    Args:
+        subject: Email subject line
+        body: Email body content
+        similar_contexts: String containing summaries of similar past emails
+        
+    Returns:
+        List of message dictionaries for the chat completion
+    """
+    # Truncate body to prevent GPT-4 context overflow
+    body = _truncate_body(body, 2000, "embedding triage")  # Smaller limit to leave room for similar contexts
+    
+    # Create the prompt for embedding-based classification
+    prompt = f"""You are an expert email triage assistant. Classify this email based on its content and these similar examples from the database:
+
+{QUADRANTS['do']}
+{QUADRANTS['schedule']}
+{QUADRANTS['delegate']}
+{QUADRANTS['delete']}
+
+Similar examples from database:
+{similar_contexts}
+
+Email to classify:
+Subject: {subject}
+Body: {body}
+
+Please provide your classification in the following JSON format:
+{{
+    "quadrant": "do|schedule|delegate|delete",
+    "confidence": 0.85,
+    "reasoning": "Brief explanation of why this classification was chosen, considering the similar examples"
+}}
+
+Guidelines:
+- Consider how similar emails were classified
+- "do": Requires immediate attention, high priority, time-sensitive
+- "schedule": Important but can wait, plan for dedicated time
+- "delegate": Can be handled by someone else, not your core responsibility
+- "delete": Low value, can be ignored or archived
+
+Confidence should be between 0.0 and 1.0, where 1.0 is completely certain.
+Reasoning should explain how the similar examples influenced your decision.
+
+Respond with only the JSON object, no additional text."""
+
+    return [
+        {"role": "system", "content": "You are an expert email triage assistant specializing in the Eisenhower Matrix. Use similar examples to inform your classification."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def triage_with_embedding(subject: str, body: str, similar_contexts: str) -> Dict:
+    """
+    Use GPT-4 to classify an email based on its content and summaries of similar emails.
+    
+    Args:
+        subject: Email subject line
+        body: Email body content
+        similar_contexts: String containing summaries of similar past emails
+        
+    Returns:
+        Dictionary with classification results:
+        {"quadrant": ..., "confidence": ..., "reasoning": ...}
+    """
+    
+    if not client.api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
+    
+    precheck = _precheck_email(subject, body)
+    if precheck:
+        return precheck
     
     try:
-        # Import here to avoid circular imports
-        from supabase_client import find_similar_emails, get_triage_result, embedding_exists, store_embedding
-        
-        # Generate embedding for the current email
-        combined_text = f"Subject: {subject}\n\nBody: {body}"
-        
-        # Use tiktoken for precise truncation if available
-        if TIKTOKEN_AVAILABLE:
-            try:
-                encoding = tiktoken.get_encoding("cl100k_base")
-                tokens = encoding.encode(combined_text)
-                max_tokens = 8000  # OpenAI embedding limit
-                if len(tokens) > max_tokens:
-                    truncated_tokens = tokens[:max_tokens]
-                    combined_text = encoding.decode(truncated_tokens)
-                    logger.info(f"Text truncated from {len(tokens)} to {len(truncated_tokens)} tokens for embedding")
-            except Exception as e:
-                logger.warning(f"Error truncating with tiktoken: {str(e)}")
-                # Fallback to character-based truncation
-                combined_text = combined_text[:32000]  # Conservative limit
-        else:
-            # Fallback when tiktoken is not available
-            combined_text = combined_text[:32000]
-        
-        # Generate embedding
-        response = client.embeddings.create(
-            input=combined_text,
-            model=Config.EMBEDDING_MODEL
-        )
-        
-        current_embedding = response.data[0].embedding
-        
-        # Store the embedding if it doesn't exist
-        if not embedding_exists(email_id):
-            store_embedding(email_id, current_embedding)
-        
-        # Find similar emails using vector similarity search
-        similar_emails = find_similar_emails(current_embedding, top_k=5)
-        
-        if not similar_emails:
-            logger.warning(f"No similar emails found for {email_id}, using fallback")
-            return {
-                "quadrant": "schedule",
-                "confidence": 0.3,
-                "reasoning": "No similar emails found in database for embedding-based classification"
-            }
-        
-        # Build similar contexts string
-        similar_contexts = []
-        for similar_email in similar_emails:
-            similar_email_id = similar_email.get('email_id', 'unknown_id')
-            similarity_score = similar_email.get('score', 0.5)
-            
-            # Get triage result for similar email
-            triage_result = get_triage_result(similar_email_id)
-            if triage_result:
-                email_only_data = triage_result.get('triage_email_only', {})
-                if isinstance(email_only_data, dict):
-                    quadrant = email_only_data.get('quadrant', 'schedule')
-                    reasoning = email_only_data.get('reasoning', 'No reasoning available')
-                    similar_contexts.append(f"- {similar_email_id} (score: {similarity_score:.2f}): {quadrant} - {reasoning[:100]}...")
-        
-        if not similar_contexts:
-            logger.warning(f"No valid triage results found for similar emails to {email_id}")
-            return {
-                "quadrant": "schedule",
-                "confidence": 0.3,
-                "reasoning": "No valid triage results found for similar emails"
-            }
-        
-        # Use GPT-4 to classify based on similar examples
-        similar_contexts_text = "\n".join(similar_contexts)
-        embedding_result = triage_with_embedding(subject, body, similar_contexts_text)
-        
-        return embedding_result
+        # Cheap model first when the cascade is on; retries and caching happen per request
+        return _cascade_chat_triage(build_embedding_messages(subject, body, similar_contexts), "triage_with_embedding")
         
     except Exception as e:
-        logger.error(f"Error in embedding-based triage for {email_id}: {str(e)}")
-        return {
-            "quadrant": "schedule",
-            "confidence": 0.3,
-            "reasoning": f"Fallback due to embedding triage error: {str(e)}"
-        }
+        # Return a safe fallback in case of unexpected errors
+        return _triage_error_fallback("triage_with_embedding", e)
 
 
-def triage_with_embedding(subject: str, body: str, similar_contexts: str) -> Dict:
+async def triage_with_embedding_async(subject: str, body: str, similar_contexts: str) -> Dict:
     """
-    Use GPT-4 to classify an email based on its content and summaries of similar emails.
+    Awaitable variant of triage_with_embedding.
     
     Args:
         subject: Email subject line
@@ -694,31 +1630,45 @@ def triage_with_embedding(subject: str, body: str, similar_contexts: str) -> Dic
     if not client.api_key:
         raise ValueError("OPENAI_API_KEY not found in environment variables")
     
-    # Validate email content before processing
-    if not validate_email_content(subject, body):
-        return {
-            "quadrant": "delete",
-            "confidence": 0.9,
-            "reasoning": "Email has insufficient content for meaningful triage - likely spam or empty message"
-        }
-    
-    # Check for meeting notifications
-    if is_meeting_notification(subject, body):
-        return {
-            "quadrant": "delete",
-            "confidence": 0.95,
-            "reasoning": "Meeting acceptance/rejection notification - no action required"
-        }
+    precheck = _precheck_email(subject, body)
+    if precheck:
+        return precheck
     
     try:
-        # Truncate body to prevent GPT-4 context overflow
-        original_body_length = len(body)
-        body = truncate_for_prompt(body, max_tokens=2000)  # Smaller limit to leave room for similar contexts
-        if len(body) != original_body_length:
-            logger.info(f"Body truncated from {original_body_length} to {len(body)} characters for embedding triage")
+        return await _cascade_chat_triage_async(build_embedding_messages(subject, body, similar_contexts), "triage_with_embedding")
+        
+    except Exception as e:
+        return _triage_error_fallback("triage_with_embedding", e)
+
+
+def build_outcomes_messages(subject: str, body: str, similar_contexts: str, past_triage_results: List[Dict]) -> List[Dict]:
+    """
+    Build the chat messages for outcome-aware classification.
+    
+    Args:
+        subject: Email subject line
+        body: Email body content
+        similar_contexts: String containing summaries of similar past emails
+        past_triage_results: List of dictionaries with past triage results
         
-        # Create the prompt for embedding-based classification
-        prompt = f"""You are an expert email triage assistant. Classify this email based on its content and these similar examples from the database:
+    Returns:
+        List of message dictionaries for the chat completion
+    """
+    # Truncate body to prevent GPT-4 context overflow
+    body = _truncate_body(body, 2000, "outcomes triage")  # Smaller limit to leave room for outcomes
+    
+    # Build outcome summary from past triage results
+    outcome_summary = "\n".join([
+        f"- {res.get('message_id', 'unknown_id')}: labeled as {res.get('triage_email_only', {}).get('quadrant', 'unknown')} (conf: {res.get('triage_email_only', {}).get('confidence', 0.0)})"
+        for res in past_triage_results
+    ])
+    
+    # Handle empty outcome summary
+    if not outcome_summary:
+        outcome_summary = "No past triage results available for reference."
+    
+    # Create the prompt for outcome-aware classification
+    prompt = f"""You are an expert email triage assistant. Classify this email based on its content, similar examples, and the outcomes of past similar emails:
 
 {QUADRANTS['do']}
 {QUADRANTS['schedule']}
@@ -728,6 +1678,9 @@ def triage_with_embedding(subject: str, body: str, similar_contexts: str) -> Dic
 Similar examples from database:
 {similar_contexts}
 
+Past triage outcomes:
+{outcome_summary}
+
 Email to classify:
 Subject: {subject}
 Body: {body}
@@ -736,82 +1689,61 @@ Please provide your classification in the following JSON format:
 {{
     "quadrant": "do|schedule|delegate|delete",
     "confidence": 0.85,
-    "reasoning": "Brief explanation of why this classification was chosen, considering the similar examples"
+    "reasoning": "Brief explanation of why this classification was chosen, considering the similar examples and past outcomes"
 }}
 
 Guidelines:
-- Consider how similar emails were classified
+- Consider how similar emails were classified and their outcomes
 - "do": Requires immediate attention, high priority, time-sensitive
 - "schedule": Important but can wait, plan for dedicated time
 - "delegate": Can be handled by someone else, not your core responsibility
 - "delete": Low value, can be ignored or archived
 
 Confidence should be between 0.0 and 1.0, where 1.0 is completely certain.
-Reasoning should explain how the similar examples influenced your decision.
+Reasoning should explain how the similar examples and past outcomes influenced your decision.
 
 Respond with only the JSON object, no additional text."""
 
-        # Use safe OpenAI call with retry logic
-        response = safe_openai_chat_completion([
-            {"role": "system", "content": "You are an expert email triage assistant specializing in the Eisenhower Matrix. Use similar examples to inform your classification."},
-            {"role": "user", "content": prompt}
-        ])
-        
-        # Handle API failure
-        if response is None:
-            print("❌ OpenAI API call failed for embedding triage, returning fallback response")
-            return {
-                "quadrant": "schedule",
-                "confidence": 0.3,
-                "reasoning": "Fallback due to OpenAI failure in embedding triage"
-            }
+    return [
+        {"role": "system", "content": "You are an expert email triage assistant specializing in the Eisenhower Matrix. Use similar examples and past outcomes to inform your classification."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def triage_with_outcomes(subject: str, body: str, similar_contexts: str, past_triage_results: List[Dict]) -> Dict:
+    """
+    Classify the email using GPT-4, incorporating known outcomes of similar past emails.
+    
+    Args:
+        subject: Email subject line
+        body: Email body content
+        similar_contexts: String containing summaries of similar past emails
+        past_triage_results: List of dictionaries with past triage results
         
-        # Extract and parse the response
-        content = response.choices[0].message.content.strip()
+    Returns:
+        Dictionary with classification results:
+        {"quadrant": ..., "confidence": ..., "reasoning": ...}
+    """
+    
+    if not client.api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
+    
+    precheck = _precheck_email(subject, body)
+    if precheck:
+        return precheck
+    
+    try:
+        # Cheap model first when the cascade is on; retries and caching happen per request
+        return _cascade_chat_triage(build_outcomes_messages(subject, body, similar_contexts, past_triage_results), "triage_with_outcomes")
         
-        # Try to parse JSON response
-        try:
-            result = json.loads(content)
-            
-            # Validate the response structure
-            required_keys = ["quadrant", "confidence", "reasoning"]
-            if not all(key in result for key in required_keys):
-                raise ValueError("Missing required keys in response")
-            
-            # Validate quadrant
-            if result["quadrant"] not in QUADRANTS:
-                raise ValueError(f"Invalid quadrant: {result['quadrant']}")
-            
-            # Validate confidence score
-            confidence = float(result["confidence"])
-            if not 0.0 <= confidence <= 1.0:
-                raise ValueError(f"Confidence must be between 0.0 and 1.0, got: {confidence}")
-            
-            return result
-            
-        except json.JSONDecodeError:
-            # Fallback: try to extract information from text response
-            print("⚠️  Failed to parse OpenAI JSON response for embedding triage, using fallback")
-            return {
-                "quadrant": "schedule",  # Default to schedule if parsing fails
-                "confidence": 0.5,
-                "reasoning": f"Failed to parse OpenAI response for embedding triage: {content[:100]}..."
-            }
-            
     except Exception as e:
         # Return a safe fallback in case of unexpected errors
-        print(f"❌ Unexpected error in triage_with_embedding: {str(e)}")
-        logger.error(f"Unexpected error in triage_with_embedding: {str(e)}")
-        return {
-            "quadrant": "schedule",
-            "confidence": 0.3,
-            "reasoning": f"Fallback due to error in embedding triage: {str(e)}"
-        }
+        return _triage_error_fallback("triage_with_outcomes", e)
 
 
-def triage_with_outcomes(subject: str, body: str, similar_contexts: str, past_triage_results: List[Dict]) -> Dict:
+async def triage_with_outcomes_async(subject: str, body: str, similar_contexts: str, past_triage_results: List[Dict]) -> Dict:
     """
-    Classify the email using GPT-4, incorporating known outcomes of similar past emails.
+    Awaitable variant of triage_with_outcomes.
     
     Args:
         subject: Email subject line
@@ -827,132 +1759,356 @@ def triage_with_outcomes(subject: str, body: str, similar_contexts: str, past_tr
     if not client.api_key:
         raise ValueError("OPENAI_API_KEY not found in environment variables")
     
-    # Validate email content before processing
-    if not validate_email_content(subject, body):
-        return {
-            "quadrant": "delete",
-            "confidence": 0.9,
-            "reasoning": "Email has insufficient content for meaningful triage - likely spam or empty message"
-        }
-    
-    # Check for meeting notifications
-    if is_meeting_notification(subject, body):
-        return {
-            "quadrant": "delete",
-            "confidence": 0.95,
-            "reasoning": "Meeting acceptance/rejection notification - no action required"
-        }
+    precheck = _precheck_email(subject, body)
+    if precheck:
+        return precheck
     
     try:
-        # Truncate body to prevent GPT-4 context overflow
-        original_body_length = len(body)
-        body = truncate_for_prompt(body, max_tokens=2000)  # Smaller limit to leave room for outcomes
-        if len(body) != original_body_length:
-            logger.info(f"Body truncated from {original_body_length} to {len(body)} characters for outcomes triage")
-        
-        # Build outcome summary from past triage results
-        outcome_summary = "\n".join([
-            f"- {res.get('message_id', 'unknown_id')}: labeled as {res.get('triage_email_only', {}).get('quadrant', 'unknown')} (conf: {res.get('triage_email_only', {}).get('confidence', 0.0)})"
-            for res in past_triage_results
-        ])
+        return await _cascade_chat_triage_async(build_outcomes_messages(subject, body, similar_contexts, past_triage_results), "triage_with_outcomes")
         
-        # Handle empty outcome summary
-        if not outcome_summary:
-            outcome_summary = "No past triage results available for reference."
+    except Exception as e:
+        return _triage_error_fallback("triage_with_outcomes", e)
+
+
+# Strategies a fused request can answer, in prompt order, with what each judgment may use
+FUSED_STRATEGIES = {
+    "email_only": "the email's subject and body only",
+    "with_context": "the email plus the sender context",
+    "with_embedding": "the email plus the similar examples from the database",
+    "with_outcomes": "the email plus the similar examples and the past triage outcomes",
+}
+
+
+def build_fused_messages(subject: str, body: str, sender_profile: Optional[Dict] = None,
+                         similar_contexts: Optional[str] = None,
+                         past_triage_results: Optional[List[Dict]] = None,
+                         strategies: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Build one chat request that returns a classification for several strategies.
+    
+    The Eisenhower preamble and the truncated body are sent once; each strategy
+    is asked to judge from its own subset of the evidence.
+    
+    Args:
+        subject: Email subject line
+        body: Email body content
+        sender_profile: Dictionary with sender context (used by with_context)
+        similar_contexts: Summaries of similar past emails (used by with_embedding and with_outcomes)
+        past_triage_results: Past triage results of similar emails (used by with_outcomes)
+        strategies: Keys of FUSED_STRATEGIES to request (default: all four)
         
-        # Create the prompt for outcome-aware classification
-        prompt = f"""You are an expert email triage assistant. Classify this email based on its content, similar examples, and the outcomes of past similar emails:
+    Returns:
+        List of message dictionaries for the chat completion
+    """
+    strategies = list(strategies or FUSED_STRATEGIES)
+    
+    # Truncate body to prevent GPT-4 context overflow
+    body = _truncate_body(body, 3000, "fused triage")
+    
+    prompt = f"""You are an expert email triage assistant. Classify this email using the Eisenhower Matrix, which divides tasks into four quadrants:
 
 {QUADRANTS['do']}
 {QUADRANTS['schedule']}
 {QUADRANTS['delegate']}
 {QUADRANTS['delete']}
 
-Similar examples from database:
-{similar_contexts}
-
-Past triage outcomes:
-{outcome_summary}
-
 Email to classify:
 Subject: {subject}
-Body: {body}
+Body: {body}"""
+    
+    if "with_context" in strategies:
+        prompt += f"\n\nSender Context: {json.dumps(sender_profile or {}, indent=2)}"
+    
+    if "with_embedding" in strategies or "with_outcomes" in strategies:
+        prompt += f"\n\nSimilar examples from database:\n{similar_contexts or 'No similar examples available.'}"
+    
+    if "with_outcomes" in strategies:
+        outcome_summary = "\n".join([
+            f"- {res.get('message_id', 'unknown_id')}: labeled as {res.get('triage_email_only', {}).get('quadrant', 'unknown')} (conf: {res.get('triage_email_only', {}).get('confidence', 0.0)})"
+            for res in past_triage_results or []
+        ])
+        prompt += f"\n\nPast triage outcomes:\n{outcome_summary or 'No past triage results available for reference.'}"
+    
+    judgments = "\n".join(f'- "{name}": judge from {FUSED_STRATEGIES[name]}' for name in strategies)
+    example = ",\n".join(
+        f'    "{name}": {{"quadrant": "do|schedule|delegate|delete", "confidence": 0.85, "reasoning": "Brief explanation"}}'
+        for name in strategies
+    )
+    prompt += f"""
 
-Please provide your classification in the following JSON format:
+Give {len(strategies)} independent classifications, each using only the evidence named here:
+{judgments}
+
+Please provide your classifications in the following JSON format:
 {{
-    "quadrant": "do|schedule|delegate|delete",
-    "confidence": 0.85,
-    "reasoning": "Brief explanation of why this classification was chosen, considering the similar examples and past outcomes"
+{example}
 }}
 
 Guidelines:
-- Consider how similar emails were classified and their outcomes
 - "do": Requires immediate attention, high priority, time-sensitive
 - "schedule": Important but can wait, plan for dedicated time
 - "delegate": Can be handled by someone else, not your core responsibility
 - "delete": Low value, can be ignored or archived
 
 Confidence should be between 0.0 and 1.0, where 1.0 is completely certain.
-Reasoning should explain how the similar examples and past outcomes influenced your decision.
+Reasoning should be concise but explain the key factors behind each classification.
 
 Respond with only the JSON object, no additional text."""
 
-        # Use safe OpenAI call with retry logic
-        response = safe_openai_chat_completion([
-            {"role": "system", "content": "You are an expert email triage assistant specializing in the Eisenhower Matrix. Use similar examples and past outcomes to inform your classification."},
-            {"role": "user", "content": prompt}
-        ])
-        
-        # Handle API failure
-        if response is None:
-            print("❌ OpenAI API call failed for outcomes triage, returning fallback response")
-            return {
-                "quadrant": "schedule",
-                "confidence": 0.3,
-                "reasoning": "Fallback due to OpenAI failure in outcomes triage"
-            }
-        
-        # Extract and parse the response
-        content = response.choices[0].message.content.strip()
+    return [
+        {"role": "system", "content": "You are an expert email triage assistant specializing in the Eisenhower Matrix. Keep each requested classification independent of the others."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _parse_fused_response(response, strategies: List[str]) -> Dict[str, Dict]:
+    """
+    Split a fused chat response into one validated classification per strategy.
+    
+    A strategy whose entry is missing or invalid gets its usual fallback; the
+    others are kept.
+    
+    Args:
+        response: Response from safe_openai_chat_completion (None on API failure)
+        strategies: Keys of FUSED_STRATEGIES that were requested
         
-        # Try to parse JSON response
-        try:
-            result = json.loads(content)
-            
-            # Validate the response structure
-            required_keys = ["quadrant", "confidence", "reasoning"]
-            if not all(key in result for key in required_keys):
-                raise ValueError("Missing required keys in response")
-            
-            # Validate quadrant
-            if result["quadrant"] not in QUADRANTS:
-                raise ValueError(f"Invalid quadrant: {result['quadrant']}")
-            
-            # Validate confidence score
-            confidence = float(result["confidence"])
-            if not 0.0 <= confidence <= 1.0:
-                raise ValueError(f"Confidence must be between 0.0 and 1.0, got: {confidence}")
-            
-            return result
-            
-        except json.JSONDecodeError:
-            # Fallback: try to extract information from text response
-            print("⚠️  Failed to parse OpenAI JSON response for outcomes triage, using fallback")
-            return {
+    Returns:
+        Dictionary mapping strategy to classification results
+    """
+    if response is None:
+        return {name: _parse_triage_response(None, f"triage_{name}") for name in strategies}
+    
+    content = response.choices[0].message.content.strip()
+    try:
+        combined = json.loads(content)
+        if not isinstance(combined, dict):
+            raise ValueError("Fused response is not a JSON object")
+    except ValueError:
+        print("⚠️  Failed to parse fused OpenAI JSON response, using fallback")
+        return {
+            name: {
                 "quadrant": "schedule",  # Default to schedule if parsing fails
                 "confidence": 0.5,
-                "reasoning": f"Failed to parse OpenAI response for outcomes triage: {content[:100]}..."
+                "reasoning": f"Failed to parse fused OpenAI response: {content[:100]}...",
+                "source": "fallback"
             }
-            
-    except Exception as e:
-        # Return a safe fallback in case of unexpected errors
-        print(f"❌ Unexpected error in triage_with_outcomes: {str(e)}")
-        logger.error(f"Unexpected error in triage_with_outcomes: {str(e)}")
-        return {
-            "quadrant": "schedule",
-            "confidence": 0.3,
-            "reasoning": f"Fallback due to error in outcomes triage: {str(e)}"
+            for name in strategies
         }
+    
+    results = {}
+    for name in strategies:
+        try:
+            result = combined.get(name)
+            if not isinstance(result, dict):
+                raise ValueError(f"Missing {name} classification in fused response")
+            results[name] = validate_triage_result(result)
+        except (ValueError, TypeError) as e:
+            results[name] = _triage_error_fallback(f"triage_{name}", e)
+    return results
+
+
+def _fused_validator(strategies: List[str]) -> Callable:
+    """Predicate accepting a fused chat response only if _parse_fused_response keeps every judgment."""
+    def validate(response) -> bool:
+        combined = _response_json(response)
+        return isinstance(combined, dict) and all(_valid_judgment(combined.get(name)) for name in strategies)
+    return validate
+
+
+def _cheap_fused_results(response, strategies: List[str]) -> Dict[str, Dict]:
+    """Judgments of a cheap-model fused response that the cascade keeps."""
+    combined = _response_json(response)
+    if not isinstance(combined, dict):
+        return {}
+    return {name: _cheap_label(combined[name]) for name in strategies if _cascade_accepts(combined.get(name))}
+
+
+def _cascade_fused_triage(build_messages, strategies: List[str]) -> Dict[str, Dict]:
+    """
+    Fused classification through the model cascade.
+    
+    Judgments the cheap model is confident about are kept; only the rest are
+    re-requested from Config.OPENAI_MODEL, in one fused request.
+    
+    Args:
+        build_messages: Callable returning the fused chat messages for a list of strategies
+        strategies: Keys of FUSED_STRATEGIES to classify
+        
+    Returns:
+        Dictionary mapping strategy to classification results
+    """
+    if not _cascade_enabled():
+        response = safe_openai_chat_completion(build_messages(strategies), max_tokens=Config.TRIAGE_FUSED_MAX_TOKENS,
+                                               validate=_fused_validator(strategies))
+        return _parse_fused_response(response, strategies)
+    
+    start = time.perf_counter()
+    response = safe_openai_chat_completion(build_messages(strategies), model=Config.OPENAI_CHEAP_MODEL,
+                                           max_tokens=Config.TRIAGE_FUSED_MAX_TOKENS, validate=_fused_validator(strategies))
+    results = _cheap_fused_results(response, strategies)
+    remaining = [name for name in strategies if name not in results]
+    _record_cascade_tier("cheap", time.perf_counter() - start, accepted=len(results), escalated=len(remaining))
+    
+    if remaining:
+        start = time.perf_counter()
+        response = safe_openai_chat_completion(build_messages(remaining), max_tokens=Config.TRIAGE_FUSED_MAX_TOKENS,
+                                               validate=_fused_validator(remaining))
+        _record_cascade_tier("strong", time.perf_counter() - start)
+        results.update(_parse_fused_response(response, remaining))
+    return {name: results[name] for name in strategies}
+
+
+async def _cascade_fused_triage_async(build_messages, strategies: List[str]) -> Dict[str, Dict]:
+    """Awaitable variant of _cascade_fused_triage."""
+    if not _cascade_enabled():
+        response = await safe_openai_chat_completion_async(build_messages(strategies), max_tokens=Config.TRIAGE_FUSED_MAX_TOKENS,
+                                                           validate=_fused_validator(strategies))
+        return _parse_fused_response(response, strategies)
+    
+    start = time.perf_counter()
+    response = await safe_openai_chat_completion_async(build_messages(strategies), model=Config.OPENAI_CHEAP_MODEL,
+                                                       max_tokens=Config.TRIAGE_FUSED_MAX_TOKENS, validate=_fused_validator(strategies))
+    results = _cheap_fused_results(response, strategies)
+    remaining = [name for name in strategies if name not in results]
+    _record_cascade_tier("cheap", time.perf_counter() - start, accepted=len(results), escalated=len(remaining))
+    
+    if remaining:
+        start = time.perf_counter()
+        response = await safe_openai_chat_completion_async(build_messages(remaining), max_tokens=Config.TRIAGE_FUSED_MAX_TOKENS,
+                                                           validate=_fused_validator(remaining))
+        _record_cascade_tier("strong", time.perf_counter() - start)
+        results.update(_parse_fused_response(response, remaining))
+    return {name: results[name] for name in strategies}
+
+
+def triage_fused(subject: str, body: str, sender_profile: Optional[Dict] = None,
+                 similar_contexts: Optional[str] = None,
+                 past_triage_results: Optional[List[Dict]] = None,
+                 strategies: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """
+    Classify the email for several strategies with a single chat request.
+    
+    Used when Config.TRIAGE_MODE is "fused". Each judgment is validated like a
+    separate strategy's result and falls back independently.
+    
+    Args:
+        subject: Email subject line
+        body: Email body content
+        sender_profile: Dictionary with sender context
+        similar_contexts: Summaries of similar past emails
+        past_triage_results: Past triage results of similar emails
+        strategies: Keys of FUSED_STRATEGIES to request (default: all four)
+        
+    Returns:
+        Dictionary mapping each strategy to {"quadrant": ..., "confidence": ..., "reasoning": ...}
+    """
+    strategies = list(strategies or FUSED_STRATEGIES)
+    
+    if not client.api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
+    
+    precheck = _precheck_email(subject, body)
+    if precheck:
+        return {name: dict(precheck) for name in strategies}
+    
+    try:
+        def build(requested):
+            return build_fused_messages(subject, body, sender_profile, similar_contexts, past_triage_results, requested)
+        
+        return _cascade_fused_triage(build, strategies)
+        
+    except Exception as e:
+        return {name: _triage_error_fallback(f"triage_{name}", e) for name in strategies}
+
+
+async def triage_fused_async(subject: str, body: str, sender_profile: Optional[Dict] = None,
+                             similar_contexts: Optional[str] = None,
+                             past_triage_results: Optional[List[Dict]] = None,
+                             strategies: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """
+    Awaitable variant of triage_fused.
+    
+    Args:
+        subject: Email subject line
+        body: Email body content
+        sender_profile: Dictionary with sender context
+        similar_contexts: Summaries of similar past emails
+        past_triage_results: Past triage results of similar emails
+        strategies: Keys of FUSED_STRATEGIES to request (default: all four)
+        
+    Returns:
+        Dictionary mapping each strategy to {"quadrant": ..., "confidence": ..., "reasoning": ...}
+    """
+    strategies = list(strategies or FUSED_STRATEGIES)
+    
+    if not client.api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
+    
+    precheck = _precheck_email(subject, body)
+    if precheck:
+        return {name: dict(precheck) for name in strategies}
+    
+    try:
+        def build(requested):
+            return build_fused_messages(subject, body, sender_profile, similar_contexts, past_triage_results, requested)
+        
+        return await _cascade_fused_triage_async(build, strategies)
+        
+    except Exception as e:
+        return {name: _triage_error_fallback(f"triage_{name}", e) for name in strategies}
+
+
+# Bump when classification changes in a way the prompt templates and model settings do not show
+PROMPT_VERSION = 2  # 2: header-only newsletter rules deleted actionable ticket and travel mail
+
+
+def _file_digest(path: str) -> Optional[str]:
+    """SHA-256 of a file's contents, or None if it cannot be read."""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def prompt_fingerprint() -> str:
+    """
+    Identify the prompts, models and settings behind stored classifications.
+    
+    Hashes PROMPT_VERSION, the chat model settings, the messages each strategy
+    builds for a fixed probe email, and everything else that can settle or
+    change a classification: the triage rules file, the local classifier model
+    and threshold, the neighbour vote settings, the header prefilter and the
+    HTML text budget. Editing a prompt template or a rule, or retraining the
+    classifier, changes the fingerprint without a manual version bump.
+    
+    Returns:
+        16-character hex digest; batch runs re-process emails classified under another one
+    """
+    subject, body = "Probe subject", "Probe body"
+    profile = {"tags": ["probe"]}
+    contexts = "- probe (score: 0.90): schedule - Probe reasoning..."
+    past = [{"message_id": "probe", "triage_email_only": {"quadrant": "schedule", "confidence": 0.9}}]
+    return content_hash({
+        "version": PROMPT_VERSION,
+        "model": Config.OPENAI_MODEL,
+        "mode": Config.TRIAGE_MODE,
+        "cascade": [Config.OPENAI_CHEAP_MODEL, Config.MODEL_CASCADE_THRESHOLD] if _cascade_enabled() else None,
+        "prompts": [
+            build_email_only_messages(subject, body),
+            build_context_messages(subject, body, profile),
+            build_embedding_messages(subject, body, contexts),
+            build_outcomes_messages(subject, body, contexts, past),
+            build_fused_messages(subject, body, profile, contexts, past),
+        ],
+        "rules": _file_digest(Config.TRIAGE_RULES_PATH) if Config.TRIAGE_RULES_ENABLED else None,
+        "local_classifier": [_file_digest(Config.LOCAL_CLASSIFIER_PATH), Config.LOCAL_CLASSIFIER_THRESHOLD]
+        if Config.LOCAL_CLASSIFIER_ENABLED else None,
+        "knn_vote": ([Config.KNN_VOTE_MIN_NEIGHBORS, Config.KNN_VOTE_MIN_SHARE, Config.CASCADE_CHEAP_LABELS_TRUSTED]
+                     if Config.KNN_VOTE_ENABLED else None),
+        "header_prefilter": Config.HEADER_PREFILTER_ENABLED,
+        "html_text_max_chars": Config.HTML_TEXT_MAX_CHARS,
+    })[:16]
 
 
 # Example usage and testing
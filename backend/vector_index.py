@@ -0,0 +1,363 @@
+"""
+In-process vector index for EisenhowerTriageAgent.
+
+An alternative to the match_embeddings RPC for similarity search. Embeddings
+are kept as a float32 matrix with L2-normalised rows, so cosine similarity is
+a single matrix-vector product and exact top-k is an argpartition over the
+scores. For large corpora an optional IVF mode clusters the rows with
+spherical k-means and only scans the lists closest to the query.
+
+The index is built from the email_embeddings table, persisted to a .npz file,
+kept up to date by store_embedding and selected with
+Config.VECTOR_SEARCH_BACKEND = "local".
+"""
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalise each row; zero rows stay zero."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class VectorIndex:
+    """
+    Cosine-similarity index over email embeddings with exact and IVF search.
+
+    Thread-safe: reads and writes are serialised with a lock.
+    """
+
+    def __init__(self, dim: int = 1536):
+        """
+        Args:
+            dim: Embedding dimension
+        """
+        self.dim = dim
+        self.ids: List[str] = []
+        self.synced_at: Optional[str] = None
+
+        self._rows: Dict[str, int] = {}
+        self._vectors = np.empty((0, dim), dtype=np.float32)
+        self._lock = threading.RLock()
+
+        # IVF state (None until build_ivf is called)
+        self.centroids: Optional[np.ndarray] = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._lists: List[List[int]] = []
+        self._list_arrays: Dict[int, np.ndarray] = {}
+        self.ivf_built_size = 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, email_id: str) -> bool:
+        return email_id in self._rows
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Normalised rows currently in the index (a view, not a copy)."""
+        return self._vectors[:len(self.ids)]
+
+    def _reserve(self, rows: int) -> None:
+        """Grow the backing matrix geometrically so appends are amortised O(dim)."""
+        capacity = self._vectors.shape[0]
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2, 1024)
+        grown = np.empty((new_capacity, self.dim), dtype=np.float32)
+        grown[:len(self.ids)] = self._vectors[:len(self.ids)]
+        self._vectors = grown
+        assignments = np.full(new_capacity, -1, dtype=np.int32)
+        assignments[:len(self.ids)] = self._assignments[:len(self.ids)]
+        self._assignments = assignments
+
+    def add_many(self, email_ids: Sequence[str], vectors: Union[Sequence[Sequence[float]], np.ndarray]) -> None:
+        """
+        Insert or replace embeddings.
+
+        Args:
+            email_ids: Email identifiers, one per vector
+            vectors: Embedding vectors (any float dtype)
+        """
+        if len(email_ids) == 0:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(email_ids), -1)
+        if matrix.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional vectors, got {matrix.shape[1]}")
+        matrix = _normalize_rows(matrix)
+
+        with self._lock:
+            self._reserve(len(self.ids) + len(email_ids))
+            for email_id, vector in zip(email_ids, matrix):
+                row = self._rows.get(email_id)
+                if row is None:
+                    row = len(self.ids)
+                    self.ids.append(email_id)
+                    self._rows[email_id] = row
+                elif self.centroids is not None:
+                    old_cluster = int(self._assignments[row])
+                    self._lists[old_cluster].remove(row)
+                    self._list_arrays.pop(old_cluster, None)
+                self._vectors[row] = vector
+                if self.centroids is not None:
+                    cluster = int(np.argmax(self.centroids @ vector))
+                    self._assignments[row] = cluster
+                    self._lists[cluster].append(row)
+                    self._list_arrays.pop(cluster, None)
+
+    def add(self, email_id: str, vector: Sequence[float]) -> None:
+        """Insert or replace a single embedding."""
+        self.add_many([email_id], [vector])
+
+    def build_ivf(self, n_lists: Optional[int] = None, n_iter: int = 10, seed: int = 0) -> None:
+        """
+        Cluster the rows with spherical k-means for approximate search.
+
+        Args:
+            n_lists: Number of inverted lists (default: sqrt of the index size)
+            n_iter: k-means iterations
+            seed: Random seed for centroid initialisation and sampling
+        """
+        with self._lock:
+            count = len(self.ids)
+            if count == 0:
+                return
+            n_lists = max(1, min(n_lists or int(np.sqrt(count)), count))
+            rng = np.random.default_rng(seed)
+
+            # Train on a sample; assignment quality saturates well before the full corpus
+            sample_size = min(count, n_lists * 64)
+            sample = self.vectors[rng.choice(count, size=sample_size, replace=False)]
+            centroids = sample[rng.choice(sample_size, size=n_lists, replace=False)].copy()
+            for _ in range(n_iter):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                # Sum each cluster's members in one pass; empty clusters keep their centroid
+                order = np.argsort(labels, kind="stable")
+                clusters, starts = np.unique(labels[order], return_index=True)
+                centroids[clusters] = np.add.reduceat(sample[order], starts, axis=0)
+                centroids = _normalize_rows(centroids).astype(np.float32)
+
+            self.centroids = centroids
+            self._assignments[:count] = np.argmax(self.vectors @ centroids.T, axis=1)
+            self._lists = [[] for _ in range(n_lists)]
+            self._list_arrays = {}
+            for row, cluster in enumerate(self._assignments[:count]):
+                self._lists[cluster].append(row)
+            self.ivf_built_size = count
+            logger.info(f"Built IVF index: {count} vectors in {n_lists} lists")
+
+    def _list_rows(self, cluster: int) -> np.ndarray:
+        """Row indices of one inverted list as an array (cached until the list changes)."""
+        rows = self._list_arrays.get(cluster)
+        if rows is None:
+            rows = np.asarray(self._lists[cluster], dtype=np.int64)
+            self._list_arrays[cluster] = rows
+        return rows
+
+    def search(self, query: Sequence[float], top_k: int = 5, threshold: float = 0.5,
+               n_probe: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Find the stored embeddings most similar to query.
+
+        Args:
+            query: Query embedding
+            top_k: Number of matches to return
+            threshold: Minimum cosine similarity
+            n_probe: IVF lists to scan (None or no IVF: exact search over every row)
+
+        Returns:
+            List of {"email_id", "score"} dicts, best first (same shape as match_embeddings)
+        """
+        q = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        if norm == 0 or top_k <= 0:
+            return []
+        q = q / norm
+
+        with self._lock:
+            if not self.ids:
+                return []
+            if self.centroids is not None and n_probe and n_probe < len(self.centroids):
+                probes = np.argpartition(self.centroids @ q, -n_probe)[-n_probe:]
+                rows = np.concatenate([self._list_rows(int(cluster)) for cluster in probes])
+                if rows.size == 0:
+                    return []
+                scores = self._vectors[rows] @ q
+            else:
+                rows = None
+                scores = self.vectors @ q
+
+            k = min(top_k, scores.size)
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            matches = []
+            for position in best:
+                score = min(float(scores[position]), 1.0)
+                if score < threshold:
+                    break
+                row = int(rows[position]) if rows is not None else int(position)
+                matches.append({"email_id": self.ids[row], "score": score})
+            return matches
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        Persist the index to a .npz file (written atomically).
+
+        Args:
+            path: Destination file
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            count = len(self.ids)
+            arrays = {
+                "ids": np.array(self.ids, dtype=str),
+                "vectors": self.vectors,
+                "synced_at": np.array(self.synced_at or "", dtype=str),
+            }
+            if self.centroids is not None:
+                arrays["centroids"] = self.centroids
+                arrays["assignments"] = self._assignments[:count]
+                arrays["ivf_built_size"] = np.array(self.ivf_built_size)
+            tmp_path = path.with_name(path.name + ".tmp.npz")
+            np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "VectorIndex":
+        """
+        Load an index written by save().
+
+        Args:
+            path: .npz file
+
+        Returns:
+            VectorIndex instance
+        """
+        with np.load(path) as data:
+            vectors = data["vectors"].astype(np.float32)
+            index = cls(dim=vectors.shape[1])
+            ids = [str(email_id) for email_id in data["ids"]]
+            index._reserve(len(ids))
+            index._vectors[:len(ids)] = vectors
+            index.ids = ids
+            index._rows = {email_id: row for row, email_id in enumerate(ids)}
+            index.synced_at = str(data["synced_at"]) or None
+            if "centroids" in data:
+                index.centroids = data["centroids"].astype(np.float32)
+                index._assignments[:len(ids)] = data["assignments"]
+                index._lists = [[] for _ in range(len(index.centroids))]
+                for row, cluster in enumerate(index._assignments[:len(ids)]):
+                    index._lists[cluster].append(row)
+                index.ivf_built_size = int(data["ivf_built_size"])
+        return index
+
+
+_index: Optional[VectorIndex] = None
+_index_lock = threading.Lock()
+
+
+def sync_from_supabase(index: VectorIndex) -> int:
+    """
+    Add embeddings stored in email_embeddings since the index was last synced.
+
+    Args:
+        index: Index to update in place
+
+    Returns:
+        Number of embeddings added or replaced
+    """
+    from backend.supabase_client import fetch_embeddings
+
+    added = 0
+    for rows in fetch_embeddings(since=index.synced_at):
+        index.add_many([row["email_id"] for row in rows], [row["embedding"] for row in rows])
+        index.synced_at = max(index.synced_at or "", *(row["created_at"] for row in rows))
+        added += len(rows)
+    return added
+
+
+def get_vector_index() -> VectorIndex:
+    """
+    Return the process-wide index, loading or building it on first use.
+
+    The index is loaded from Config.VECTOR_INDEX_PATH when present, topped up
+    with rows added to email_embeddings since it was saved, (re)clustered when
+    VECTOR_INDEX_MODE is "ivf" and it has doubled in size, then saved.
+
+    Returns:
+        Shared VectorIndex instance
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            from backend.config import Config
+
+            path = Path(Config.VECTOR_INDEX_PATH)
+            index = VectorIndex()
+            if path.exists():
+                try:
+                    index = VectorIndex.load(path)
+                    print(f"📂 Loaded vector index with {len(index)} embeddings from {path}")
+                except Exception as e:
+                    logger.warning(f"Could not load vector index from {path}, rebuilding: {str(e)}")
+                    index = VectorIndex()
+
+            added = sync_from_supabase(index)
+            if added:
+                print(f"🔄 Added {added} embeddings from Supabase to the vector index")
+
+            if Config.VECTOR_INDEX_MODE == "ivf" and len(index) >= 2 * max(index.ivf_built_size, 1):
+                index.build_ivf(Config.VECTOR_INDEX_IVF_LISTS or None)
+
+            if added or not path.exists():
+                index.save(path)
+            _index = index
+        return _index
+
+
+def search_vector_index(embedding: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
+    """
+    Query the shared index with the configured threshold and probe count.
+
+    Args:
+        embedding: Query embedding vector
+        top_k: Number of similar emails to return
+
+    Returns:
+        List of dictionaries with email_id and similarity score
+    """
+    from backend.config import Config
+
+    n_probe = Config.VECTOR_INDEX_IVF_PROBES if Config.VECTOR_INDEX_MODE == "ivf" else None
+    return get_vector_index().search(embedding, top_k=top_k, threshold=Config.SIMILARITY_THRESHOLD, n_probe=n_probe)
+
+
+def add_to_vector_index(email_id: str, embedding: List[float]) -> None:
+    """
+    Keep an already-loaded index in step with store_embedding.
+
+    Does nothing if the index has not been loaded yet; the next load syncs
+    the new row from Supabase instead.
+    """
+    if _index is not None:
+        _index.add(email_id, embedding)
+
+
+def save_vector_index() -> None:
+    """Persist the shared index if it has been loaded."""
+    if _index is not None:
+        from backend.config import Config
+
+        _index.save(Config.VECTOR_INDEX_PATH)
@@ -3,6 +3,7 @@
 
 -- Enable necessary extensions
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+CREATE EXTENSION IF NOT EXISTS vector;
 
 -- Sender profiles table
 CREATE TABLE IF NOT EXISTS sender_profiles (
@@ -31,8 +32,8 @@ CREATE TABLE IF NOT EXISTS email_embeddings (
 CREATE TABLE IF NOT EXISTS triage_results (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     message_id TEXT UNIQUE NOT NULL,
-    triage_email_only JSONB, -- Contains: quadrant, confidence, reasoning
-    triage_with_context JSONB, -- Contains: quadrant, confidence, reasoning
+    triage_email_only JSONB, -- Contains: quadrant, confidence, reasoning, source (llm/llm_cheap/rule/local/knn/fallback)
+    triage_with_context JSONB, -- Contains: quadrant, confidence, reasoning, source
     processed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -145,6 +146,55 @@ CREATE TRIGGER update_emails_raw_updated_at
     BEFORE UPDATE ON emails_raw 
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- Similarity search joined with each neighbour's triage label and summary, so
+-- embedding/outcome triage needs a single round trip (see find_similar_emails_with_labels).
+-- The inner ORDER BY ... LIMIT can use an ivfflat/hnsw index; the threshold is applied afterwards.
+-- summary mirrors get_email_summary: prior reasoning if the email was triaged, else subject + body excerpt.
+CREATE OR REPLACE FUNCTION match_embeddings_with_labels(
+    query_embedding VECTOR(1536),
+    match_count INT DEFAULT 5,
+    match_threshold FLOAT DEFAULT 0.5,
+    summary_chars INT DEFAULT 1000
+)
+RETURNS TABLE (
+    email_id TEXT,
+    score FLOAT,
+    quadrant TEXT,
+    confidence FLOAT,
+    reasoning TEXT,
+    triage_email_only JSONB,
+    subject TEXT,
+    body_excerpt TEXT,
+    summary TEXT
+)
+LANGUAGE sql STABLE
+AS $$
+    WITH neighbors AS (
+        SELECT ee.email_id, 1 - (ee.embedding <=> query_embedding) AS score
+        FROM email_embeddings ee
+        ORDER BY ee.embedding <=> query_embedding
+        LIMIT match_count
+    )
+    SELECT
+        n.email_id,
+        n.score::FLOAT,
+        tr.triage_email_only->>'quadrant',
+        (tr.triage_email_only->>'confidence')::FLOAT,
+        tr.triage_email_only->>'reasoning',
+        tr.triage_email_only,
+        er.subject,
+        LEFT(er.body, summary_chars),
+        CASE
+            WHEN tr.triage_email_only IS NOT NULL THEN COALESCE(tr.triage_email_only->>'reasoning', '')
+            ELSE COALESCE(er.subject || E'\n' || LEFT(COALESCE(er.body, ''), summary_chars), '')
+        END
+    FROM neighbors n
+    LEFT JOIN triage_results tr ON tr.message_id = n.email_id
+    LEFT JOIN emails_raw er ON er.message_id = n.email_id
+    WHERE n.score > match_threshold
+    ORDER BY n.score DESC;
+$$;
+
 -- Insert some sample data for testing
 INSERT INTO sender_profiles (email, name, tags, notes, relationship, priority) VALUES
     ('boss@company.com', 'John Manager', '["management", "urgent"]', 'Direct supervisor, high priority contact', 'supervisor', 1),
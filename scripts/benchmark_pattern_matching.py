@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for keyword detection on the sample email corpus.
+
+Times is_meeting_notification and the keyword scans of the agent_logic
+fallback heuristics against the per-keyword `in` loops they replaced (kept below as reference
+implementations), checks both give the same answers, and prints the speedup.
+tests/test_keyword_fallbacks.py runs the same comparison against the full fallbacks.
+
+Usage:
+    python scripts/benchmark_pattern_matching.py [--repeat 20] [--dir data/sample_emails/eml_files]
+"""
+
+import sys
+import time
+import logging
+import argparse
+from email import message_from_file
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import agent_logic
+from backend.triage_core import MEETING_BODY_PATTERNS, MEETING_SUBJECT_PATTERNS, is_meeting_notification
+
+
+def legacy_is_meeting_notification(subject: str, body: str) -> bool:
+    """is_meeting_notification as it was: lowercase everything, loop the patterns."""
+    subject_lower = subject.lower()
+    body_lower = body.lower()
+    for pattern in MEETING_SUBJECT_PATTERNS:
+        if pattern in subject_lower:
+            return True
+    if len(body_lower) < 500:
+        for pattern in MEETING_BODY_PATTERNS:
+            if pattern in body_lower:
+                return True
+    return False
+
+
+def legacy_email_only_keywords(subject: str, body: str):
+    """fallback_email_only_triage's keyword scan as it was (any() checks, then the lists)."""
+    subject_lower = subject.lower()
+    body_lower = body.lower()
+    is_urgent = any(kw in subject_lower or kw in body_lower for kw in agent_logic.URGENT_KEYWORDS)
+    is_important = any(kw in subject_lower or kw in body_lower for kw in agent_logic.IMPORTANT_KEYWORDS)
+    urgent = [kw for kw in agent_logic.URGENT_KEYWORDS if kw in subject_lower or kw in body_lower]
+    important = [kw for kw in agent_logic.IMPORTANT_KEYWORDS if kw in subject_lower or kw in body_lower]
+    return is_urgent, is_important, urgent, important
+
+
+def email_only_keywords(subject: str, body: str):
+    """fallback_email_only_triage's keyword scan now."""
+    matched = agent_logic._PRIORITY_MATCHER.find_all(f"{subject}\n{body}")
+    urgent = agent_logic._keywords_found(matched, 'urgent', agent_logic.URGENT_KEYWORDS)
+    important = agent_logic._keywords_found(matched, 'important', agent_logic.IMPORTANT_KEYWORDS)
+    return bool(urgent), bool(important), urgent, important
+
+
+def legacy_contextual_flags(subject: str, sender: str, body: str):
+    """fallback_contextual_triage's sender-domain and deadline checks as they were."""
+    sender_domain = sender.split('@')[-1] if '@' in sender else ''
+    is_important_sender = any(domain in sender_domain.lower() for domain in agent_logic.IMPORTANT_DOMAINS)
+    has_time_constraint = any(pattern in body.lower() for pattern in agent_logic.TIME_PATTERNS)
+    return is_important_sender, has_time_constraint
+
+
+def contextual_flags(subject: str, sender: str, body: str):
+    """fallback_contextual_triage's sender-domain and deadline checks now."""
+    sender_domain = sender.split('@')[-1] if '@' in sender else ''
+    return (agent_logic._DOMAIN_MATCHER.search(sender_domain) is not None,
+            agent_logic._TIME_MATCHER.search(body) is not None)
+
+
+def legacy_outcome_scores(subject: str, body: str):
+    """fallback_outcomes_triage's keyword scoring as it was."""
+    full_text = f"{subject} {body}".lower()
+    return {level: sum(1 for keyword in keywords if keyword in full_text)
+            for level, keywords in agent_logic.OUTCOME_KEYWORDS.items()}
+
+
+def outcome_scores(subject: str, body: str):
+    """fallback_outcomes_triage's keyword scoring now."""
+    matched = agent_logic._OUTCOME_MATCHER.find_all(f"{subject} {body}")
+    return {level: len(agent_logic._keywords_found(matched, level, keywords))
+            for level, keywords in agent_logic.OUTCOME_KEYWORDS.items()}
+
+
+def load_corpus(eml_dir: Path):
+    """(subject, sender, body) for every .eml file, body as the first text payload."""
+    emails = []
+    for path in sorted(eml_dir.glob("*.eml")):
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            msg = message_from_file(f)
+        body = ""
+        for part in msg.walk():
+            if part.get_content_type() in ("text/plain", "text/html"):
+                payload = part.get_payload(decode=True)
+                if payload:
+                    body = payload.decode(part.get_content_charset() or "utf-8", errors="ignore")
+                    break
+        emails.append((str(msg.get("subject", "")), str(msg.get("from", "")), body))
+    return emails
+
+
+def subject_body(func):
+    """Adapt a (subject, body) function to the corpus' (subject, sender, body) tuples."""
+    return lambda subject, sender, body: func(subject, body)
+
+
+def bench(func, emails, repeat: int) -> float:
+    """Best-of-repeat seconds for one pass of func over the corpus."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for email in emails:
+            func(*email)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    """Run the benchmark and print a comparison table."""
+    parser = argparse.ArgumentParser(description="Benchmark compiled keyword matching against per-keyword loops")
+    parser.add_argument("--dir", default=str(project_root / "data" / "sample_emails" / "eml_files"),
+                        help="Directory of .eml files")
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the corpus (best is reported)")
+    args = parser.parse_args()
+
+    emails = load_corpus(Path(args.dir))
+    total_mb = sum(len(subject) + len(body) for subject, _, body in emails) / 1e6
+    print(f"📧 Loaded {len(emails)} emails ({total_mb:.1f} MB of text)")
+
+    cases = [
+        ("is_meeting_notification", subject_body(legacy_is_meeting_notification),
+         subject_body(is_meeting_notification)),
+        ("fallback_email_only_triage", subject_body(legacy_email_only_keywords), subject_body(email_only_keywords)),
+        ("fallback_contextual_triage", legacy_contextual_flags, contextual_flags),
+        ("fallback_outcomes_triage", subject_body(legacy_outcome_scores), subject_body(outcome_scores)),
+    ]
+
+    # Meeting detection logs every hit; keep the timing about matching
+    logging.getLogger("backend.triage_core").setLevel(logging.WARNING)
+
+    print(f"\n{'Function':<28} {'Before':>10} {'After':>10} {'Speedup':>8}")
+    for name, before, after in cases:
+        mismatches = sum(1 for email in emails if before(*email) != after(*email))
+        if mismatches:
+            print(f"❌ {name}: {mismatches} emails classified differently")
+        old_seconds = bench(before, emails, args.repeat)
+        new_seconds = bench(after, emails, args.repeat)
+        print(f"{name:<28} {old_seconds * 1000:>8.1f}ms {new_seconds * 1000:>8.1f}ms {old_seconds / new_seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Build the in-process vector index for EisenhowerTriageAgent.
+
+Loads every row of email_embeddings into a VectorIndex, optionally clusters
+it for IVF search, and saves it to Config.VECTOR_INDEX_PATH. Set
+VECTOR_SEARCH_BACKEND=local to have find_similar_emails use it.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.config import Config
+from backend.vector_index import VectorIndex, sync_from_supabase
+
+
+def main():
+    """Build and save the vector index from Supabase."""
+    parser = argparse.ArgumentParser(description="Build the local vector index from email_embeddings")
+    parser.add_argument("--mode", choices=["exact", "ivf"], default=Config.VECTOR_INDEX_MODE,
+                        help="Search mode to prepare the index for")
+    parser.add_argument("--lists", type=int, default=Config.VECTOR_INDEX_IVF_LISTS,
+                        help="IVF lists (0 = sqrt of the number of embeddings)")
+    parser.add_argument("--output", default=Config.VECTOR_INDEX_PATH, help="Destination .npz file")
+    args = parser.parse_args()
+    
+    print("🧮 Building vector index from email_embeddings...")
+    start = time.perf_counter()
+    index = VectorIndex()
+    count = sync_from_supabase(index)
+    print(f"📥 Loaded {count} embeddings in {time.perf_counter() - start:.1f}s")
+    
+    if args.mode == "ivf" and count:
+        start = time.perf_counter()
+        index.build_ivf(args.lists or None)
+        print(f"🗂️  Clustered into {len(index.centroids)} lists in {time.perf_counter() - start:.1f}s")
+    
+    index.save(args.output)
+    print(f"✅ Saved vector index to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
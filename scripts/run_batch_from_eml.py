@@ -4,17 +4,39 @@ Batch email processing script for EisenhowerTriageAgent.
 
 This script processes .eml files from the ../eml_files/ directory,
 extracts email content, runs dual triage classification, generates
-embeddings, and stores results in Supabase.
+embeddings, and stores results in Supabase. --source also accepts a Maildir
+tree or an mbox file (utils/mailbox_readers.py), streamed message by message
+in constant memory.
+
+Messages are parsed on a process pool (utils/parallel_parse.py) and stream
+through a staged pipeline (parse -> prefilter -> embed -> triage -> store,
+see backend/batch_pipeline.py) with its own workers per stage, so parsing,
+lookups, embedding batches, chat requests and writes overlap; worker counts
+are set with --parse-workers, --prefilter-workers, --embed-batch,
+--llm-workers and --db-writers. Only the headers are read first
+(utils/header_parser.py): messages a triage rule settles from them skip body
+decoding, embedding and every model call.
+
+With --watch DIR the script keeps running and triages files as they land in
+DIR (utils/inbox_watcher.py: inotify, or polling where unavailable),
+reporting arrival-to-result latency percentiles.
+
+Progress is recorded per file in a manifest (Config.BATCH_MANIFEST_PATH), so
+a run resumes where the last one stopped and skips files that are unchanged
+and were classified under the current prompts.
 """
 
 import os
 import sys
 import json
-import uuid
+import hashlib
 import logging
+import argparse
+import itertools
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Optional, Tuple
-from email import message_from_file
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
@@ -22,33 +44,47 @@ from email import encoders
 from openai import OpenAI
 import openai
 
-# Try to import tiktoken for token counting
-try:
-    import tiktoken
-    TIKTOKEN_AVAILABLE = True
-except ImportError:
-    TIKTOKEN_AVAILABLE = False
-    print("⚠️  tiktoken not available, token counting disabled")
-
 # Processing limit
 MAX_EMAILS_TO_PROCESS = 5
 
+# Files per task sent to a parse worker process
+PARSE_CHUNK_SIZE = 16
+
 # Add backend to path
 project_root = Path(__file__).parent.parent
 backend_path = project_root / "backend"
 sys.path.insert(0, str(backend_path))
+# Project root too, so backend modules can import `backend.config` and friends
+sys.path.insert(1, str(project_root))
 
-from triage_core import triage_email_only, triage_with_context, triage_with_embeddings, triage_with_outcomes
-from supabase_client import (
+from backend.strategy_executor import run_email_strategies_sync
+from backend.tokenization import CHARS_PER_TOKEN
+from backend.triage_core import (
+    count_tokens,
+    get_knn_vote_stats,
+    get_llm_cache_stats,
+    get_model_cascade_stats,
+    prepare_embedding_text,
+    prompt_fingerprint,
+)
+from backend.embedding_service import embed_many, get_embedding, get_embedding_cache_stats
+from backend.supabase_client import (
     embedding_exists, 
-    store_embedding, 
+    get_sender_profile_cache_stats,
     upsert_triage_result,
-    get_sender_profile,
-    get_email_summary,
-    get_triage_result,
-    find_similar_emails
+    get_sender_profile
 )
-from config import Config
+from backend.config import Config
+from backend.batch_manifest import BatchManifest
+from backend.batch_pipeline import LatencyTracker, Stage, StagedPipeline
+from utils.email_record import EmailRecord, decode_header_value, extract_body
+from utils.header_parser import parse_header_block, read_header_block
+from utils.inbox_watcher import InboxWatcher
+from utils.mailbox_readers import MboxMessage, iter_mailbox, read_mbox_message
+from utils.parallel_parse import ParallelParser
+from backend.vector_index import save_vector_index
+from backend.rules_engine import RulesEngine, get_rules_engine, get_rules_stats
+from backend.local_classifier import get_local_classifier_stats
 
 # OpenAI client
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
@@ -64,163 +100,212 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Body tokens each triage prompt carries (triage_core truncates to this)
+PROMPT_BODY_TOKENS = 3000
+
+# HTML bodies converted to text this run (tallied by record_html_savings)
+_html_savings = {'emails': 0, 'html_chars': 0, 'tokens_saved': 0}
+_html_savings_lock = threading.Lock()
+
 
-def count_tokens(text: str) -> int:
+def extract_email_content(eml_file_path: Path) -> Optional[Dict[str, str]]:
     """
-    Count the number of tokens in a text string using tiktoken.
+    Parse .eml file and extract email content.
     
     Args:
-        text: Text to count tokens for
+        eml_file_path: Path to the .eml file
         
     Returns:
-        Number of tokens
+        Dictionary with email content or None if parsing fails
     """
-    if TIKTOKEN_AVAILABLE:
-        try:
-            # Use cl100k_base encoding (GPT-4 tokenizer)
-            encoding = tiktoken.get_encoding("cl100k_base")
-            return len(encoding.encode(text))
-        except Exception as e:
-            logger.warning(f"Error counting tokens with tiktoken: {str(e)}")
-            # Fallback to character-based estimation
-            return len(text) // 4  # Rough estimate: 4 characters per token
-    
-    # Fallback when tiktoken is not available
-    return len(text) // 4  # Rough estimate: 4 characters per token
+    try:
+        with open(eml_file_path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        logger.error(f"Error reading {eml_file_path}: {str(e)}")
+        return None
+    return parse_message_bytes(data, eml_file_path)
 
 
-def extract_email_content(eml_file_path: Path) -> Optional[Dict[str, str]]:
+def extract_mailbox_message(message: Union[Path, MboxMessage]) -> Optional[Dict[str, str]]:
     """
-    Parse .eml file and extract email content.
+    Parse one message yielded by iter_mailbox (an mbox reference or a message file).
     
     Args:
-        eml_file_path: Path to the .eml file
+        message: MboxMessage, or path of a Maildir or .eml message file
         
     Returns:
         Dictionary with email content or None if parsing fails
     """
+    if not isinstance(message, MboxMessage):
+        return extract_email_content(message)
     try:
-        with open(eml_file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            msg = message_from_file(f)
-        
-        # Extract basic headers
-        subject = msg.get('subject', '')
-        from_address = msg.get('from', '')
-        message_id = msg.get('message-id', '')
-        
-        # Generate fallback message_id if not present
-        if not message_id:
-            message_id = f"generated_{uuid.uuid4().hex}"
+        data = read_mbox_message(message)
+    except OSError as e:
+        logger.error(f"Error reading {message.key}: {str(e)}")
+        return None
+    return parse_message_bytes(data, message.key)
+
+
+def parse_message(message: Union[Path, MboxMessage]) -> Optional[Dict[str, Any]]:
+    """
+    Parse a message, settling it from its headers alone when a triage rule allows.
+    
+    Runs in the parse worker processes. With Config.HEADER_PREFILTER_ENABLED
+    only the header block is read first and checked against the triage rules;
+    the rest of the message is read and decoded only if no header rule settles
+    it, continuing from the bytes already read.
+    
+    Args:
+        message: MboxMessage, or path of a Maildir or .eml message file
         
-        # Extract body content
-        body = extract_body_content(msg)
+    Returns:
+        Dictionary with email content (plus rule and rule_id, and an empty body,
+        when the headers settled it) or None if parsing fails
+    """
+    engine = get_rules_engine() if Config.HEADER_PREFILTER_ENABLED else None
+    if engine is None:
+        return extract_mailbox_message(message)
+    
+    is_mbox = isinstance(message, MboxMessage)
+    source = message.key if is_mbox else message
+    try:
+        with open(message.path if is_mbox else message, 'rb') as f:
+            if is_mbox:
+                f.seek(message.offset)
+            data, header_length = read_header_block(f, message.size if is_mbox else None)
+            if header_length is not None:
+                email_data = settle_from_headers(engine, data[:header_length])
+                if email_data:
+                    return email_data
+            data += f.read(message.size - len(data)) if is_mbox else f.read()
+    except OSError as e:
+        logger.error(f"Error reading {source}: {str(e)}")
+        return None
+    return parse_message_bytes(data, source)
+
+
+def settle_from_headers(engine: RulesEngine, header_block: bytes) -> Optional[Dict[str, Any]]:
+    """
+    Classify a message by triage rule from its headers, without its body.
+    
+    Args:
+        engine: Triage rules engine
+        header_block: Raw header block, up to and including the blank line
         
-        if not body:
-            logger.warning(f"No body content found in {eml_file_path}")
-            return None
+    Returns:
+        Email dictionary with an empty body, no content hash and the rule's
+        classification, or None if no rule settles the message from its headers
+    """
+    headers = parse_header_block(header_block)
+    # Decoded like full parses (EmailRecord), so rules see the same subject either way
+    subject = decode_header_value(headers.get('subject'))
+    from_address = decode_header_value(headers.get('from'))
+    rule = engine.match_envelope(subject, from_address, headers)
+    if rule is None:
+        return None
+    
+    # Without a Message-ID the id must still be stable across runs; the headers identify the message
+    message_id = (str(headers.get('message-id', '') or '').strip()
+                  or f"generated_{hashlib.sha256(header_block).hexdigest()[:32]}")
+    return {
+        'subject': subject,
+        'body': '',
+        'from': from_address,
+        'message_id': message_id,
+        'headers': {name: str(value) for name, value in headers.items()},
+        'content_hash': None,
+        'rule': rule.result(),
+        'rule_id': rule.id
+    }
+
+
+def parse_message_bytes(data: bytes, source) -> Optional[Dict[str, str]]:
+    """
+    Parse raw message bytes into the email dictionary.
+    
+    Extraction is the shared EmailRecord one (utils/email_record.py), so every
+    source - and the Streamlit app - gives an email the same subject and body.
+    
+    Args:
+        data: RFC 822 message bytes
+        source: File path or mailbox key, for log messages
         
-        return {
-            'subject': subject,
-            'body': body,
-            'from': from_address,
-            'message_id': message_id
-        }
+    Returns:
+        Dictionary with email content or None if parsing fails
+    """
+    try:
+        record = EmailRecord.from_bytes(data, max_html_chars=Config.HTML_TEXT_MAX_CHARS or None)
+        return email_record(record, source)
         
     except Exception as e:
-        logger.error(f"Error parsing {eml_file_path}: {str(e)}")
+        logger.error(f"Error parsing {source}: {str(e)}")
         return None
 
 
+def email_record(record: EmailRecord, source) -> Optional[Dict[str, str]]:
+    """
+    Build the email dictionary used by the pipeline from an extracted record.
+    
+    Args:
+        record: EmailRecord of the message
+        source: File path or mailbox key, for log messages
+        
+    Returns:
+        Dictionary with subject, body, from, message_id, headers, content_hash
+        and html_chars, or None if the message has no body content
+    """
+    if not record.body:
+        logger.warning(f"No body content found in {source}")
+        return None
+    
+    # Fallback message_id derived from the content, so it is the same on every run and entry point
+    message_id = record.message_id or f"generated_{record.content_hash[:32]}"
+    
+    return {
+        'subject': record.subject,
+        'body': record.body,
+        'from': record.sender,
+        'message_id': message_id,
+        'headers': record.headers,
+        'content_hash': record.content_hash,
+        'html_chars': record.html_chars
+    }
+
+
 def extract_body_content(msg) -> str:
     """
-    Extract text content from email message, preferring text/plain.
+    Extract text content from an email message.
+    
+    Same extraction as every other entry point (utils.email_record.extract_body):
+    charset-aware decoding, the fuller of the plain-text and HTML alternatives,
+    normalised whitespace.
     
     Args:
         msg: Email message object
         
     Returns:
-        Extracted text content
-    """
-    body = ""
-    
-    if msg.is_multipart():
-        # Handle multipart messages
-        for part in msg.walk():
-            content_type = part.get_content_type()
-            content_disposition = str(part.get('Content-Disposition', ''))
-            
-            # Skip attachments
-            if 'attachment' in content_disposition:
-                continue
-            
-            # Prefer text/plain, fallback to text/html
-            if content_type == 'text/plain':
-                try:
-                    body = part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                    break
-                except Exception as e:
-                    logger.warning(f"Error decoding text/plain part: {str(e)}")
-                    continue
-            elif content_type == 'text/html' and not body:
-                try:
-                    body = part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                except Exception as e:
-                    logger.warning(f"Error decoding text/html part: {str(e)}")
-                    continue
-    else:
-        # Handle simple text messages
-        content_type = msg.get_content_type()
-        if content_type in ['text/plain', 'text/html']:
-            try:
-                body = msg.get_payload(decode=True).decode('utf-8', errors='ignore')
-            except Exception as e:
-                logger.warning(f"Error decoding simple message: {str(e)}")
-    
-    return body.strip()
+        Extracted text content ("" if there is none)
+    """
+    return extract_body(msg)
 
 
 def generate_embedding(text: str) -> Optional[list]:
     """
     Generate text embedding using OpenAI.
     
+    Identical texts are served from the shared embedding cache instead of
+    calling the API again.
+    
     Args:
-        text: Text to embed (full text, not truncated for triage)
+        text: Text to embed (full text; normalised and truncated by the embedding service)
         
     Returns:
         List of float values representing the embedding vector
     """
     try:
-        # Truncate text if too long (OpenAI has limits)
-        max_tokens = 8000  # Conservative limit for embeddings
-        original_length = len(text)
-        original_tokens = count_tokens(text)
-        
-        if original_tokens > max_tokens:
-            # Use tiktoken for precise truncation if available
-            if TIKTOKEN_AVAILABLE:
-                try:
-                    encoding = tiktoken.get_encoding("cl100k_base")
-                    tokens = encoding.encode(text)
-                    truncated_tokens = tokens[:max_tokens]
-                    text = encoding.decode(truncated_tokens)
-                    print(f"📏 Text truncated from {original_tokens} to {len(truncated_tokens)} tokens for embedding")
-                except Exception as e:
-                    logger.warning(f"Error truncating with tiktoken: {str(e)}")
-                    # Fallback to character-based truncation
-                    text = text[:max_tokens * 4]
-                    print(f"📏 Text truncated from {original_length} to {len(text)} characters for embedding (fallback)")
-            else:
-                # Fallback when tiktoken is not available
-                text = text[:max_tokens * 4]
-                print(f"📏 Text truncated from {original_length} to {len(text)} characters for embedding")
-        
         print(f"🔍 Generating embedding for text ({len(text)} characters)...")
-        response = client.embeddings.create(
-            input=text,
-            model="text-embedding-ada-002"
-        )
-        
-        embedding = response.data[0].embedding
+        embedding = get_embedding(text)
         print(f"✅ Embedding generated successfully: {len(embedding)} dimensions")
         return embedding
         
@@ -229,177 +314,197 @@ def generate_embedding(text: str) -> Optional[list]:
         return None
 
 
-def process_single_email(email_data: Dict[str, str]) -> bool:
+def embed_all_emails(emails: List[Dict[str, str]]) -> List[Optional[list]]:
     """
-    Process a single email through the complete triage pipeline.
+    Embed every email up front in as few API requests as possible.
+    
+    Args:
+        emails: Email dictionaries from extract_email_content
+        
+    Returns:
+        Embedding per email, in the same order (all None if the batch request fails)
+    """
+    texts = [prepare_embedding_text(email['subject'], email['body']) for email in emails]
+    try:
+        print(f"🔍 Generating embeddings for {len(texts)} emails in batched requests...")
+        embeddings = embed_many(texts)
+        print(f"✅ Embeddings ready: {len(embeddings)} vectors")
+        return embeddings
+    except Exception as e:
+        # Each email falls back to embedding on its own during triage
+        logger.error(f"Error generating batched embeddings: {str(e)}")
+        return [None] * len(texts)
+
+
+def lookup_email_context(email_data: Dict[str, str]) -> Tuple[bool, Dict]:
+    """
+    Fetch what triage needs from the database before any model call.
     
     Args:
         email_data: Dictionary with email content
         
     Returns:
-        True if processing was successful, False otherwise
+        Tuple of (whether the email's embedding is already stored, sender profile or {})
     """
-    email_id = email_data['message_id']  # Keep message_id in email_data for compatibility
-    subject = email_data['subject']
-    body = email_data['body']
+    email_id = email_data['message_id']
     from_address = email_data['from']
     
-    logger.info(f"Processing email: {email_id}")
-    logger.info(f"Subject: {subject}")
-    logger.info(f"From: {from_address}")
-    
     # Log large emails for monitoring
-    body_token_count = count_tokens(body)
+    body_token_count = count_tokens(email_data['body'])
     if body_token_count > 12000:
         print(f"⚠️ Large email: {email_id} — {body_token_count} tokens")
         logger.warning(f"Large email detected: {email_id} with {body_token_count} tokens")
     
-    try:
-        # Check if already processed
-        print(f"🔍 Checking if embedding exists for email_id: {email_id}")
-        embedding_exists_flag = embedding_exists(email_id)
-        
-        if embedding_exists_flag:
-            print(f"📝 Existing embedding found for email_id: {email_id} - will use for one approach")
-        else:
-            print(f"📝 No existing embedding found - proceeding with processing")
-        
-        # Get sender profile
-        sender_profile = get_sender_profile(from_address)
-        if sender_profile:
-            logger.info(f"Found sender profile for {from_address}")
-        else:
-            logger.info(f"No sender profile found for {from_address}")
-            sender_profile = {}
-        
-        # Always run email-only triage to show results
-        logger.info("Running email-only triage...")
-        email_only_result = triage_email_only(subject, body)
-        logger.info(f"Email-only result: {email_only_result['quadrant']} (confidence: {email_only_result['confidence']:.2f})")
-        
-        # Display email-only triage results in console
-        print(f"📨 Email-only triage: {email_only_result['quadrant']} "
-              f"(confidence: {email_only_result['confidence']:.2f})")
-        print(f"   🧠 Reasoning: {email_only_result['reasoning'][:200]}...")
-        
-        # Always run contextual triage to show results
-        logger.info("Running contextual triage...")
-        contextual_result = triage_with_context(subject, body, sender_profile)
-        logger.info(f"Contextual result: {contextual_result['quadrant']} (confidence: {contextual_result['confidence']:.2f})")
-        
-        # Display contextual triage results in console
-        print(f"👤 Contextual triage: {contextual_result['quadrant']} "
-              f"(confidence: {contextual_result['confidence']:.2f})")
-        print(f"   🧠 Reasoning: {contextual_result['reasoning'][:200]}...")
-        
-        # Generate or retrieve embedding for similarity search
-        embedding = None
-        if not embedding_exists_flag:
-            # Generate embedding
-            print(f"🧠 Generating embedding for email_id: {email_id}")
-            combined_text = f"Subject: {subject}\n\nBody: {body}"
-            embedding = generate_embedding(combined_text)
-            
-            if not embedding:
-                logger.error(f"Failed to generate embedding for {email_id}")
-                return False
-            
-            # Store embedding
-            print(f"💾 Storing embedding in email_embeddings table...")
-            if not store_embedding(email_id, embedding):
-                logger.error(f"Failed to store embedding for {email_id}")
-                return False
-        else:
-            print(f"💾 Using existing embedding for email_id: {email_id}")
-            # For now, we'll use the triage_with_embeddings function which handles embedding retrieval
-            # This is a temporary workaround - in a full implementation, we'd retrieve the existing embedding
-        
-        # Use triage_with_embeddings to get embedding-based classification and similar emails
-        result_embedding = triage_with_embeddings(subject, body, email_id)
-        logger.info(f"Embedding-based result: {result_embedding['quadrant']} (confidence: {result_embedding['confidence']:.2f})")
-        
-        # Display embedding-based triage results in console
-        print(f"🔍 Embedding-based triage: {result_embedding['quadrant']} "
-              f"(confidence: {result_embedding['confidence']:.2f})")
-        print(f"   🧠 Reasoning: {result_embedding['reasoning'][:200]}...")
-        
-        # For outcomes triage, we need to get similar emails and their triage results
-        # Since triage_with_embeddings already does this internally, we'll need to do it again
-        # or modify the function to return both the result and the similar emails
-        # For now, let's use a simplified approach and get similar emails directly
+    # Report what converting an HTML body saved each prompt, compared to sending the markup
+    html_chars = email_data.get('html_chars', 0)
+    if html_chars:
+        saved = record_html_savings(html_chars, body_token_count)
+        logger.info(f"HTML body of {email_id}: {html_chars} chars of HTML -> {len(email_data['body'])} chars "
+                    f"of text, ~{saved} prompt tokens saved per strategy")
+    
+    embedding_exists_flag = embedding_exists(email_id)
+    
+    sender_profile = get_sender_profile(from_address)
+    if sender_profile:
+        logger.info(f"Found sender profile for {from_address}")
+    else:
+        logger.info(f"No sender profile found for {from_address}")
+        sender_profile = {}
+    return embedding_exists_flag, sender_profile
+
+
+def record_html_savings(html_chars: int, body_tokens: int) -> int:
+    """
+    Estimate and tally the prompt tokens an HTML body's conversion saved.
+    
+    Prompts carry at most PROMPT_BODY_TOKENS of the body, so the saving is
+    what the raw HTML (at the usual four characters per token) would have
+    filled of that budget minus what the converted text fills.
+    
+    Args:
+        html_chars: Length of the HTML part the body was converted from
+        body_tokens: Tokens in the converted body
         
-        # Generate embedding for similarity search if not already done
-        if embedding is None:
-            combined_text = f"Subject: {subject}\n\nBody: {body}"
-            embedding = generate_embedding(combined_text)
-            if not embedding:
-                logger.warning("Could not generate embedding for outcomes triage, skipping")
-                result_outcomes = {
-                    "quadrant": "schedule",
-                    "confidence": 0.3,
-                    "reasoning": "Skipped due to embedding generation failure"
-                }
-            else:
-                # Find similar emails using vector similarity search
-                similar_emails = find_similar_emails(embedding, top_k=5)
-                
-                # Build similar_contexts using real summaries
-                summaries = []
-                for e in similar_emails:
-                    summary = get_email_summary(e["email_id"])
-                    summaries.append(f"- Similar email (score: {e['score']:.2f}):\n{summary.strip()}")
-                similar_contexts = "\n\n".join(summaries)
-                
-                # Collect past triage results from similar emails for outcomes triage
-                past_triage_results = []
-                for match in similar_emails:
-                    result = get_triage_result(match["email_id"])
-                    if result and result.get("triage_email_only"):
-                        past_triage_results.append({
-                            "email_id": match["email_id"],
-                            "triage": result["triage_email_only"]
-                        })
-                
-                # Run outcomes triage with past triage results
-                result_outcomes = triage_with_outcomes(subject, body, similar_contexts, past_triage_results)
-        else:
-            # Find similar emails using vector similarity search
-            similar_emails = find_similar_emails(embedding, top_k=5)
-            
-            # Build similar_contexts using real summaries
-            summaries = []
-            for e in similar_emails:
-                summary = get_email_summary(e["email_id"])
-                summaries.append(f"- Similar email (score: {e['score']:.2f}):\n{summary.strip()}")
-            similar_contexts = "\n\n".join(summaries)
-            
-            # Collect past triage results from similar emails for outcomes triage
-            past_triage_results = []
-            for match in similar_emails:
-                result = get_triage_result(match["email_id"])
-                if result and result.get("triage_email_only"):
-                    past_triage_results.append({
-                        "email_id": match["email_id"],
-                        "triage": result["triage_email_only"]
-                    })
-            
-            # Run outcomes triage with past triage results
-            result_outcomes = triage_with_outcomes(subject, body, similar_contexts, past_triage_results)
+    Returns:
+        Estimated prompt tokens saved per strategy for this email
+    """
+    saved = max(0, min(html_chars // CHARS_PER_TOKEN, PROMPT_BODY_TOKENS) - min(body_tokens, PROMPT_BODY_TOKENS))
+    with _html_savings_lock:
+        _html_savings['emails'] += 1
+        _html_savings['html_chars'] += html_chars
+        _html_savings['tokens_saved'] += saved
+    return saved
+
+
+def triage_email(email_data: Dict[str, str], embedding: Optional[list], embedding_exists_flag: bool,
+                 sender_profile: Dict) -> Optional[Dict]:
+    """
+    Run the four triage strategies for one email and store its embedding.
+    
+    Args:
+        email_data: Dictionary with email content
+        embedding: Precomputed embedding; generated on demand if None
+        embedding_exists_flag: Whether email_embeddings already holds this email's vector
+        sender_profile: Sender context for contextual triage
         
-        logger.info(f"Outcomes-based result: {result_outcomes['quadrant']} (confidence: {result_outcomes['confidence']:.2f})")
+    Returns:
+        Strategy results from run_email_strategies_sync (or the header rule's
+        classification for every strategy), or None if the embedding could not
+        be generated or stored
+    """
+    email_id = email_data['message_id']
+    subject = email_data['subject']
+    
+    logger.info(f"Processing email: {email_id}")
+    logger.info(f"Subject: {subject}")
+    logger.info(f"From: {email_data['from']}")
+    
+    if email_data.get('rule'):
+        # Settled from the headers (see parse_message): no body, embedding or model call
+        results = {key: dict(email_data['rule']) for key in ("email_only", "with_context", "with_embedding", "with_outcomes")}
+        results.update(rule=email_data['rule'], local=None, embedding=None, store_embedding=None)
+        print(f"📧 {subject[:80]} ({email_id})\n   📏 Classified from headers by triage rule: {email_data['rule']['reasoning']}")
+        return results
+    
+    # Run all four strategies; email-only and contextual triage run in
+    # parallel with the embedding -> similarity -> prompt chain
+    logger.info("Running triage strategies...")
+    results = run_email_strategies_sync(subject, email_data['body'], email_id, sender_profile,
+                                        embedding=embedding, embedding_stored=embedding_exists_flag,
+                                        sender=email_data['from'], headers=email_data.get('headers'))
+    
+    if not embedding_exists_flag:
+        if results["embedding"] is None:
+            logger.error(f"Failed to generate embedding for {email_id}")
+            return None
+        if not results["store_embedding"]:
+            logger.error(f"Failed to store embedding for {email_id}")
+            return None
+    
+    # One print per email so output from concurrent workers does not interleave
+    lines = [f"📧 {subject[:80]} ({email_id})"]
+    if results["rule"]:
+        lines.append(f"   📏 Classified by triage rule: {results['rule']['reasoning']}")
+    elif results["local"]:
+        lines.append(f"   🧮 Classified by local classifier: {results['local']['quadrant']} "
+                     f"(confidence {results['local']['confidence']:.2f})")
+    for icon, label, key in (("📨", "Email-only triage", "email_only"), ("👤", "Contextual triage", "with_context"),
+                             ("🔍", "Embedding-based triage", "with_embedding"),
+                             ("📊", "Outcome-aware triage", "with_outcomes")):
+        result = results[key]
+        logger.info(f"{label} result: {result['quadrant']} (confidence: {result['confidence']:.2f})")
+        lines.append(f"   {icon} {label}: {result['quadrant']} (confidence: {result['confidence']:.2f})")
+        lines.append(f"      🧠 Reasoning: {result['reasoning'][:200]}...")
+    print("\n".join(lines))
+    return results
+
+
+def store_triage(email_id: str, results: Dict) -> bool:
+    """
+    Store the four classifications of one email (always overwriting earlier results).
+    
+    Args:
+        email_id: Unique email identifier
+        results: Strategy results from triage_email
         
-        # Display outcomes triage results in console
-        print(f"📊 Outcome-aware triage: {result_outcomes['quadrant']} "
-              f"(confidence: {result_outcomes['confidence']:.2f})")
-        print(f"   🧠 Reasoning: {result_outcomes['reasoning'][:200]}...")
+    Returns:
+        True if the results were stored
+    """
+    logger.info(f"Storing triage results for {email_id}...")
+    if not upsert_triage_result(email_id, results["email_only"], results["with_context"],
+                                results["with_embedding"], results["with_outcomes"]):
+        logger.error(f"Failed to store triage results for {email_id}")
+        return False
+    logger.info(f"✅ Successfully processed email: {email_id}")
+    return True
+
+
+def process_single_email(email_data: Dict[str, str], embedding: Optional[list] = None,
+                         on_stage: Optional[Callable[[str], None]] = None) -> bool:
+    """
+    Process a single email through the complete triage pipeline.
+    
+    Args:
+        email_data: Dictionary with email content
+        embedding: Precomputed embedding (e.g. from embed_all_emails); generated on demand if None
+        on_stage: Called with "triaged" and "stored" as those stages finish
         
-        # Store triage results (always update with latest results)
-        logger.info("Storing triage results...")
-        if not upsert_triage_result(email_id, email_only_result, contextual_result, result_embedding, result_outcomes):
-            logger.error(f"Failed to store triage results for {email_id}")
+    Returns:
+        True if processing was successful, False otherwise
+    """
+    email_id = email_data['message_id']
+    try:
+        embedding_exists_flag, sender_profile = lookup_email_context(email_data)
+        results = triage_email(email_data, embedding, embedding_exists_flag, sender_profile)
+        if results is None:
             return False
+        if on_stage:
+            on_stage("triaged")
         
-        logger.info(f"✅ Successfully processed email: {email_id}")
+        if not store_triage(email_id, results):
+            return False
+        if on_stage:
+            on_stage("stored")
         return True
         
     except Exception as e:
@@ -407,8 +512,313 @@ def process_single_email(email_data: Dict[str, str]) -> bool:
         return False
 
 
+def manifest_entry(source: Union[Path, MboxMessage]) -> Tuple[Union[Path, str], Optional[str]]:
+    """
+    Manifest key and content hash of a message source.
+    
+    Message files are tracked by path (the manifest stats and hashes them);
+    mbox messages by their "<mbox path>#<offset>" key and the hash computed
+    while scanning the mbox.
+    
+    Args:
+        source: Message file path or MboxMessage
+        
+    Returns:
+        Tuple of (key, content hash or None)
+    """
+    if isinstance(source, MboxMessage):
+        return source.key, source.content_hash
+    return source, None
+
+
+def build_pipeline(manifest: BatchManifest, prompt_version: str, args: argparse.Namespace,
+                   total: Optional[int] = None,
+                   on_finished: Optional[Callable[[Path, bool], None]] = None) -> StagedPipeline:
+    """
+    Build the staged pipeline: parse -> prefilter -> embed -> triage -> store.
+    
+    Every stage has its own workers and a bounded input queue, so parsing,
+    database lookups, embedding batches, chat requests and writes overlap.
+    The pipeline is fed (source, email_data) pairs from a ParallelParser, so
+    the parse stage only records the result. Messages settled from their
+    headers by parse_message skip the lookups, the embedding and the models. Each item is then a job
+    dictionary (path, name, email, embedding, ...) that stages fill in, path
+    being the manifest key; the manifest records each stage as it finishes.
+    
+    Args:
+        manifest: Batch manifest to record progress in
+        prompt_version: Current prompt fingerprint
+        args: Parsed command line arguments (worker counts, batch and queue sizes)
+        total: Number of files queued, for progress output (None when streaming)
+        on_finished: Called with (manifest key, stored) once a message is stored or has failed
+        
+    Returns:
+        StagedPipeline whose outputs are the jobs that were stored
+    """
+    progress = {"stored": 0}
+    progress_lock = threading.Lock()
+    rules_engine = get_rules_engine()
+    
+    def finish(path: Union[Path, str], stored: bool) -> None:
+        if on_finished:
+            on_finished(path, stored)
+    
+    def parse(parsed: Tuple[Union[Path, MboxMessage], Optional[Dict[str, str]]]) -> Optional[Dict]:
+        # The message itself was parsed in a worker process (see ParallelParser)
+        source, email_data = parsed
+        key, content_hash = manifest_entry(source)
+        previous = manifest.get(key)
+        try:
+            manifest.start(key, prompt_version, content_hash=content_hash)
+        except FileNotFoundError:
+            # Moved or deleted after it was queued (--watch); there is nothing left to triage
+            logger.warning(f"{key} disappeared before it could be processed, skipping")
+            finish(key, False)
+            return None
+        if not email_data:
+            logger.error(f"Failed to extract content from {key}")
+            print(f"❌ Failed to extract content from {source.name}")
+            # Parsing is deterministic, so this message is not retried until it changes
+            manifest.mark_unprocessable(key, "no content extracted")
+            finish(key, False)
+            return None
+        # Messages without a Message-ID keep the id generated on their first run
+        if email_data['message_id'].startswith("generated_") and previous and previous['message_id']:
+            email_data['message_id'] = previous['message_id']
+        manifest.record_stage(key, "parsed", message_id=email_data['message_id'])
+        if email_data.get('rule_id') and rules_engine is not None:
+            # The header rule matched in a parse worker process; count it here
+            rules_engine.record(email_data['rule_id'])
+        return {"path": key, "name": source.name, "email": email_data}
+    
+    def prefilter(job: Dict) -> Dict:
+        if job["email"].get("rule"):
+            job["embedding_stored"], job["sender_profile"] = False, {}
+        else:
+            job["embedding_stored"], job["sender_profile"] = lookup_email_context(job["email"])
+        return job
+    
+    def embed(jobs: List[Dict]) -> List[Dict]:
+        # Messages settled from their headers have no body to embed
+        pending = [job for job in jobs if not job["email"].get("rule")]
+        embeddings = embed_all_emails([job["email"] for job in pending]) if pending else []
+        for job, embedding in zip(pending, embeddings):
+            job["embedding"] = embedding
+            if embedding is not None:
+                manifest.record_stage(job["path"], "embedded")
+        for job in jobs:
+            job.setdefault("embedding", None)
+        return jobs
+    
+    def triage(job: Dict) -> Optional[Dict]:
+        job["results"] = triage_email(job["email"], job["embedding"], job["embedding_stored"], job["sender_profile"])
+        if job["results"] is None:
+            manifest.mark_failed(job["path"], "embedding could not be generated or stored")
+            print(f"❌ Failed to process {job['name']}")
+            finish(job["path"], False)
+            return None
+        manifest.record_stage(job["path"], "triaged")
+        return job
+    
+    def store(job: Dict) -> Optional[Dict]:
+        if not store_triage(job["email"]["message_id"], job["results"]):
+            manifest.mark_failed(job["path"], "storing triage results failed")
+            print(f"❌ Failed to process {job['name']}")
+            finish(job["path"], False)
+            return None
+        manifest.mark_done(job["path"])
+        with progress_lock:
+            progress["stored"] += 1
+            count = f"{progress['stored']}/{total}" if total else str(progress['stored'])
+            print(f"✅ [{count}] Successfully processed {job['name']}")
+        finish(job["path"], True)
+        return job
+    
+    def on_error(stage: str, item: Any, error: Exception) -> None:
+        # Parse stage items are (source, email_data) pairs, later ones are jobs
+        if isinstance(item, dict):
+            key, name = item["path"], item["name"]
+        else:
+            key, name = manifest_entry(item[0])[0], item[0].name
+        manifest.mark_failed(key, f"{stage}: {str(error)}")
+        print(f"❌ Failed to process {name} ({stage}: {str(error)})")
+        finish(key, False)
+    
+    return StagedPipeline([
+        Stage("parse", parse),
+        Stage("prefilter", prefilter, workers=args.prefilter_workers),
+        Stage("embed", embed, batch_size=args.embed_batch),
+        Stage("triage", triage, workers=args.llm_workers),
+        Stage("store", store, workers=args.db_writers),
+    ], queue_size=args.queue_size, on_error=on_error)
+
+
+def print_pipeline_stats(eml_parser: ParallelParser, pipeline: StagedPipeline) -> None:
+    """Print parsing throughput and the utilization of each pipeline stage."""
+    parse_stats = eml_parser.stats()
+    print(f"  Parsing: {parse_stats['files']} files, {parse_stats['megabytes']:.1f} MB on {parse_stats['workers']} "
+          f"process(es): {parse_stats['files_per_second']:.1f} files/s, {parse_stats['mb_per_second']:.1f} MB/s "
+          f"(capacity {parse_stats['capacity_files_per_second']:.1f} files/s, "
+          f"{parse_stats['capacity_mb_per_second']:.1f} MB/s)")
+    for stage, stage_stats in pipeline.stats().items():
+        print(f"    {stage}: {stage_stats['processed']} items by {stage_stats['workers']} worker(s), "
+              f"busy {stage_stats['utilization']*100:.0f}%, blocked on next stage {stage_stats['blocked_seconds']:.1f}s"
+              f"{', ' + str(stage_stats['failed']) + ' failed' if stage_stats['failed'] else ''}")
+
+
+def print_component_stats() -> None:
+    """Print cache, rule, vote, cascade, classifier and embedding statistics."""
+    cache_stats = get_llm_cache_stats()
+    if cache_stats:
+        print(f"  LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+              f"(hit rate {cache_stats['hit_rate']*100:.1f}%), {cache_stats['entries']} entries")
+    
+    requests_per_email = 1 if Config.TRIAGE_MODE == "fused" else 4
+    rules_stats = get_rules_stats()
+    if rules_stats:
+        rule_hits = ", ".join(f"{rule_id}: {count}" for rule_id, count in rules_stats['hits'].items() if count)
+        print(f"  Triage rules: {rules_stats['matched']}/{rules_stats['evaluated']} emails classified without GPT-4 "
+              f"({rules_stats['matched'] * requests_per_email} chat requests avoided)"
+              f"{' - ' + rule_hits if rule_hits else ''}")
+    
+    vote_stats = get_knn_vote_stats()
+    if vote_stats['decided'] or vote_stats['split']:
+        print(f"  Neighbour votes: {vote_stats['decided']} embedding classifications without GPT-4, "
+              f"{vote_stats['split']} split votes sent to GPT-4")
+    
+    if Config.MODEL_CASCADE_ENABLED:
+        cascade_stats = get_model_cascade_stats()
+        print(f"  Model cascade: {cascade_stats['escalated']}/{cascade_stats['accepted'] + cascade_stats['escalated']} "
+              f"judgments escalated to {cascade_stats['strong_model']} "
+              f"(escalation rate {cascade_stats['escalation_rate']*100:.1f}%)")
+        for tier, tier_stats in cascade_stats['tiers'].items():
+            print(f"    {tier}: {tier_stats['requests']} requests, mean {tier_stats['mean_seconds']:.2f}s, "
+                  f"p50 {tier_stats['p50_seconds']:.2f}s, p95 {tier_stats['p95_seconds']:.2f}s")
+    
+    if _html_savings['emails']:
+        print(f"  HTML bodies: {_html_savings['emails']} converted from {_html_savings['html_chars'] / 1e6:.1f}M chars "
+              f"of HTML, ~{_html_savings['tokens_saved']} prompt tokens saved per strategy "
+              f"(~{_html_savings['tokens_saved'] * requests_per_email} across all chat requests)")
+    
+    local_stats = get_local_classifier_stats()
+    if local_stats['evaluated']:
+        print(f"  Local classifier: {local_stats['accepted']}/{local_stats['evaluated']} emails confident enough "
+              f"to skip GPT-4 ({local_stats['acceptance_rate']*100:.1f}%, "
+              f"{local_stats['accepted'] * requests_per_email} chat requests avoided)")
+    
+    profile_stats = get_sender_profile_cache_stats()
+    print(f"  Sender profiles: {profile_stats['hits']} cache hits, {profile_stats['misses']} lookups "
+          f"(hit rate {profile_stats['hit_rate']*100:.1f}%)")
+    
+    embedding_stats = get_embedding_cache_stats()
+    print(f"  Embeddings: {embedding_stats['requests']} requests, {embedding_stats['embedded_texts']} embedded "
+          f"in {embedding_stats['api_calls']} API calls "
+          f"(hit rate {embedding_stats['hit_rate']*100:.1f}%)")
+
+
+def print_latency_stats(latency: LatencyTracker) -> None:
+    """Print arrival-to-result latency percentiles."""
+    stats = latency.stats()
+    print(f"⏱️  Arrival-to-result latency ({stats['count']} emails): p50 {stats['p50']:.1f}s, "
+          f"p90 {stats['p90']:.1f}s, p95 {stats['p95']:.1f}s, p99 {stats['p99']:.1f}s, max {stats['max']:.1f}s")
+
+
+def watch_inbox(inbox: Path, manifest: BatchManifest, prompt_version: str, args: argparse.Namespace) -> None:
+    """
+    Triage .eml files continuously as they land in a directory, until interrupted.
+    
+    Files already present are processed first (skipping those the manifest has
+    settled), then each new or rewritten file is queued as soon as the watcher
+    reports it. Files go through the same staged pipeline as a batch run, parsed
+    in-process so a lone arrival is not held back waiting for a full chunk.
+    The latency from arrival to stored result is reported every
+    --report-every seconds and on exit.
+    
+    Args:
+        inbox: Directory to watch
+        manifest: Batch manifest to record progress in
+        prompt_version: Current prompt fingerprint
+        args: Parsed command line arguments
+    """
+    watcher = InboxWatcher(inbox, poll_interval=args.poll_interval)
+    latency = LatencyTracker()
+    arrivals: Dict[Path, float] = {}
+    arrivals_lock = threading.Lock()
+    last_report = [time.monotonic()]
+    
+    def incoming():
+        for path, arrived in watcher.watch(include_existing=True):
+            try:
+                if not args.force and manifest.is_done(path, prompt_version):
+                    continue
+            except FileNotFoundError:
+                # Moved or deleted since the watcher reported it; one vanished file must not end the watch
+                logger.warning(f"{path} disappeared before it could be queued, skipping")
+                continue
+            with arrivals_lock:
+                arrivals[path] = arrived
+            yield path
+    
+    def on_finished(path: Path, stored: bool) -> None:
+        with arrivals_lock:
+            arrived = arrivals.pop(path, None)
+        if stored and arrived is not None:
+            latency.record(time.time() - arrived)
+        if time.monotonic() - last_report[0] >= args.report_every:
+            last_report[0] = time.monotonic()
+            print_latency_stats(latency)
+    
+    eml_parser = ParallelParser(parse_message, workers=1, chunk_size=1)
+    pipeline = build_pipeline(manifest, prompt_version, args, on_finished=on_finished)
+    print(f"👀 Watching {inbox} for new .eml files (Ctrl+C to stop)...")
+    try:
+        pipeline.run(eml_parser.parse(incoming()), collect=False)
+    except KeyboardInterrupt:
+        # pipeline.run() has already let the files in flight finish
+        print("\n🛑 Stopped watching")
+    finally:
+        watcher.stop()
+    
+    print(f"\n{'='*50}")
+    print(f"📊 Streaming Summary ({watcher.mode}):")
+    print_latency_stats(latency)
+    print_pipeline_stats(eml_parser, pipeline)
+    manifest_stats = manifest.stats()
+    print(f"  Manifest: {manifest_stats['done']} done, {manifest_stats['failed']} failed, "
+          f"{manifest_stats['unprocessable']} unprocessable")
+    save_vector_index()
+    print_component_stats()
+
+
 def main():
     """Main function to process batch of .eml files."""
+    parser = argparse.ArgumentParser(description="Triage a batch of .eml files and store the results")
+    parser.add_argument("--source", default="./data/sample_emails/eml_files",
+                        help="Directory of .eml files, Maildir tree, or mbox file to process")
+    parser.add_argument("--limit", type=int, default=MAX_EMAILS_TO_PROCESS,
+                        help="Maximum number of messages needing work to process this run (0: no limit)")
+    parser.add_argument("--manifest", default=Config.BATCH_MANIFEST_PATH, help="Manifest database path")
+    parser.add_argument("--force", action="store_true", help="Process files even if the manifest marks them done")
+    parser.add_argument("--parse-workers", type=int, default=Config.BATCH_PARSE_WORKERS,
+                        help="Processes parsing .eml files (0: one per CPU)")
+    parser.add_argument("--prefilter-workers", type=int, default=Config.BATCH_PREFILTER_WORKERS,
+                        help="Threads looking up stored embeddings and sender profiles")
+    parser.add_argument("--embed-batch", type=int, default=Config.BATCH_EMBED_BATCH_SIZE,
+                        help="Emails per embeddings request")
+    parser.add_argument("--llm-workers", type=int, default=Config.BATCH_LLM_WORKERS,
+                        help="Emails triaged concurrently (requests are still paced by the rate limiter)")
+    parser.add_argument("--db-writers", type=int, default=Config.BATCH_DB_WRITERS,
+                        help="Threads storing triage results")
+    parser.add_argument("--queue-size", type=int, default=Config.BATCH_QUEUE_SIZE,
+                        help="Capacity of each queue between stages")
+    parser.add_argument("--watch", metavar="DIR",
+                        help="Keep running and triage .eml files as they land in DIR (--limit is ignored)")
+    parser.add_argument("--poll-interval", type=float, default=1.0,
+                        help="Seconds between directory scans when inotify is unavailable")
+    parser.add_argument("--report-every", type=float, default=60.0,
+                        help="Seconds between latency reports in --watch mode")
+    args = parser.parse_args()
+    
     print("🚀 Starting batch email processing...")
     print("=" * 50)
     
@@ -418,58 +828,76 @@ def main():
         print("❌ Configuration validation failed. Please check your .env file.")
         return
     
-    # Check for eml_files directory
-    eml_dir = Path("./data/sample_emails/eml_files")
-    if not eml_dir.exists():
-        logger.error(f"Directory {eml_dir} does not exist")
-        print(f"❌ Directory {eml_dir} does not exist")
-        print("Please create the directory and add some .eml files for testing.")
+    if args.watch:
+        inbox = Path(args.watch)
+        if not inbox.is_dir():
+            print(f"❌ Directory {inbox} does not exist")
+            return
+        watch_inbox(inbox, BatchManifest(args.manifest), prompt_fingerprint(), args)
         return
     
-    # Find .eml files and limit processing
-    print(f"🔍 Processing up to {MAX_EMAILS_TO_PROCESS} .eml files for triage...")
-    eml_files = sorted(eml_dir.glob("*.eml"))[:MAX_EMAILS_TO_PROCESS]
-    
-    if not eml_files:
-        logger.warning(f"No .eml files found in {eml_dir}")
-        print(f"⚠️  No .eml files found in {eml_dir}")
-        print("Please add some .eml files for testing.")
+    source = Path(args.source)
+    if not source.exists():
+        logger.error(f"Source {source} does not exist")
+        print(f"❌ Source {source} does not exist")
+        print("Point --source at a directory of .eml files, a Maildir or an mbox file.")
         return
     
-    logger.info(f"Found {len(eml_files)} .eml files to process")
-    print(f"📧 Found {len(eml_files)} .eml files to process")
+    # Stream the messages, skip those already done under the current prompts, and limit processing
+    limit_text = f"up to {args.limit}" if args.limit > 0 else "all"
+    print(f"🔍 Streaming {limit_text} messages needing triage from {source}...")
+    manifest = BatchManifest(args.manifest)
+    prompt_version = prompt_fingerprint()
+    counts = {"queued": 0, "settled": 0}
     
-    # Process each file
-    successful = 0
-    failed = 0
+    def pending():
+        for message in iter_mailbox(source):
+            key, content_hash = manifest_entry(message)
+            if not args.force and manifest.is_done(key, prompt_version, content_hash=content_hash):
+                counts["settled"] += 1
+                continue
+            counts["queued"] += 1
+            yield message
     
-    for i, eml_file in enumerate(eml_files, 1):
-        print(f"\n{'='*20} Processing File {i}/{len(eml_files)} {'='*20}")
-        print(f"File: {eml_file.name}")
-        
-        # Extract email content
-        email_data = extract_email_content(eml_file)
-        if not email_data:
-            logger.error(f"Failed to extract content from {eml_file}")
-            print(f"❌ Failed to extract content from {eml_file.name}")
-            failed += 1
-            continue
-        
-        # Process the email
-        if process_single_email(email_data):
-            successful += 1
-            print(f"✅ Successfully processed {eml_file.name}")
+    messages = itertools.islice(pending(), args.limit) if args.limit > 0 else pending()
+    
+    # Parse on a process pool and stream the records through the staged pipeline;
+    # a handful of files is not worth starting worker processes for
+    parse_workers = args.parse_workers if args.limit <= 0 or args.limit > PARSE_CHUNK_SIZE else 1
+    eml_parser = ParallelParser(parse_message, workers=parse_workers, chunk_size=PARSE_CHUNK_SIZE)
+    pipeline = build_pipeline(manifest, prompt_version, args)
+    pipeline.run(eml_parser.parse(messages), collect=False)
+    total = counts["queued"]
+    print(f"📋 Manifest: {counts['settled']} messages already settled (prompt version {prompt_version})")
+    
+    if not total:
+        if counts["settled"]:
+            print("✅ Nothing to do: every message is unchanged and already classified")
         else:
-            failed += 1
-            print(f"❌ Failed to process {eml_file.name}")
+            logger.warning(f"No messages found in {source}")
+            print(f"⚠️  No messages found in {source}")
+        return
+    
+    store_stats = pipeline.stats()["store"]
+    successful = store_stats["processed"] - store_stats["dropped"]
+    failed = total - successful
     
     # Summary
     print(f"\n{'='*50}")
     print("📊 Processing Summary:")
-    print(f"  Total files: {len(eml_files)}")
+    print(f"  Total messages: {total}")
     print(f"  Successful: {successful}")
     print(f"  Failed: {failed}")
-    print(f"  Success rate: {successful/len(eml_files)*100:.1f}%")
+    print(f"  Success rate: {successful/total*100:.1f}%")
+    print(f"  Elapsed: {pipeline.elapsed_seconds:.1f}s ({total / max(pipeline.elapsed_seconds, 1e-9):.2f} messages/s)")
+    print_pipeline_stats(eml_parser, pipeline)
+    manifest_stats = manifest.stats()
+    print(f"  Manifest: {manifest_stats['done']} done, {manifest_stats['failed']} failed, "
+          f"{manifest_stats['unprocessable']} unprocessable, {manifest_stats['skipped']} skipped as unchanged this run")
+    
+    # Keep the local vector index's new rows for the next run
+    save_vector_index()
+    print_component_stats()
     
     if successful > 0:
         print("\n🎉 Batch processing completed!")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Train and evaluate the local embedding classifier for EisenhowerTriageAgent.
+
+Joins email_embeddings with the quadrants the LLM assigned in triage_results
+(results settled by rules, this classifier, neighbour votes or - unless
+CASCADE_CHEAP_LABELS_TRUSTED is set - the cascade's cheap model are not
+ground truth and are left out), holds out a test split, trains a LocalClassifier on the rest and reports, for a range
+of confidence thresholds, the fraction of LLM calls the cascade would save
+and the accuracy of the emails it would classify locally. The lowest
+threshold reaching --target-accuracy is stored with the model, which is
+saved to Config.LOCAL_CLASSIFIER_PATH. Set LOCAL_CLASSIFIER_ENABLED=true to
+use it in the batch pipeline.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.config import Config
+from backend.local_classifier import LocalClassifier, load_training_data
+
+THRESHOLDS = [0.5, 0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 0.98, 0.99]
+
+
+def main():
+    """Train, evaluate and save the local classifier."""
+    parser = argparse.ArgumentParser(description="Train the local quadrant classifier from stored labels")
+    parser.add_argument("--label-column", default="triage_email_only",
+                        help="triage_results column whose quadrant is the training label")
+    parser.add_argument("--test-fraction", type=float, default=0.2, help="Fraction of emails held out for evaluation")
+    parser.add_argument("--target-accuracy", type=float, default=0.95,
+                        help="Accuracy the cascade must keep on locally classified emails")
+    parser.add_argument("--epochs", type=int, default=300, help="Gradient descent epochs")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the train/test split")
+    parser.add_argument("--output", default=Config.LOCAL_CLASSIFIER_PATH, help="Destination .npz file")
+    parser.add_argument("--dry-run", action="store_true", help="Evaluate without saving the model")
+    args = parser.parse_args()
+    
+    tiers = "either cascade model" if Config.CASCADE_CHEAP_LABELS_TRUSTED else Config.OPENAI_MODEL
+    print(f"📥 Loading embeddings labelled by {tiers} in {args.label_column}...")
+    start = time.perf_counter()
+    email_ids, vectors, labels = load_training_data(args.label_column)
+    print(f"📊 {len(email_ids)} labelled emails in {time.perf_counter() - start:.1f}s")
+    if len(email_ids) < 20:
+        print("❌ Not enough labelled emails to train; triage more emails first")
+        return
+    
+    counts = {quadrant: labels.count(quadrant) for quadrant in sorted(set(labels))}
+    print("   " + ", ".join(f"{quadrant}: {count}" for quadrant, count in counts.items()))
+    
+    order = np.random.default_rng(args.seed).permutation(len(email_ids))
+    test_size = max(1, int(len(order) * args.test_fraction))
+    test_rows, train_rows = order[:test_size], order[test_size:]
+    train_labels = [labels[i] for i in train_rows]
+    test_labels = [labels[i] for i in test_rows]
+    
+    print(f"🧠 Training on {len(train_rows)} emails...")
+    start = time.perf_counter()
+    model = LocalClassifier(dim=vectors.shape[1])
+    losses = model.fit(vectors[train_rows], train_labels, epochs=args.epochs)
+    print(f"   Loss {losses[0]:.3f} -> {losses[-1]:.3f} in {time.perf_counter() - start:.1f}s")
+    
+    report = model.evaluate(vectors[test_rows], test_labels, thresholds=[0.0] + THRESHOLDS)
+    print(f"\n📈 Held-out evaluation ({len(test_rows)} emails, overall accuracy {report[0]['accuracy']:.1%})")
+    print(f"{'Threshold':>10} {'LLM calls saved':>16} {'Accuracy':>10}")
+    for row in report[1:]:
+        accuracy = f"{row['accuracy']:.1%}" if row['accuracy'] is not None else "-"
+        print(f"{row['threshold']:>10.2f} {row['coverage']:>16.1%} {accuracy:>10}")
+    
+    model.threshold = LocalClassifier.choose_threshold(report[1:], args.target_accuracy)
+    if model.threshold is None:
+        print(f"\n⚠️  No threshold reaches {args.target_accuracy:.0%} accuracy; the cascade will use 0.9 "
+              f"unless LOCAL_CLASSIFIER_THRESHOLD is set")
+    else:
+        saved = next(row for row in report[1:] if row["threshold"] == model.threshold)
+        print(f"\n🎯 Threshold {model.threshold:.2f} saves {saved['coverage']:.1%} of LLM calls "
+              f"at {saved['accuracy']:.1%} accuracy (target {args.target_accuracy:.0%})")
+    
+    if args.dry_run:
+        print("🔍 Dry run: model not saved")
+        return
+    model.save(args.output)
+    print(f"✅ Saved local classifier to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test script for the batch run manifest.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add backend to path
+project_root = Path(__file__).parent.parent
+backend_path = project_root / "backend"
+sys.path.insert(0, str(backend_path))
+
+from batch_manifest import BatchManifest
+
+
+def test_resume_and_skip():
+    """Test that only finished, unchanged files under the same prompt version are skipped."""
+    print("Testing resume and skip...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        done, crashed = tmp / "done.eml", tmp / "crashed.eml"
+        done.write_bytes(b"Subject: a\n\nbody a")
+        crashed.write_bytes(b"Subject: b\n\nbody b")
+        
+        manifest = BatchManifest(tmp / "manifest.sqlite3")
+        manifest.start(done, "v1")
+        manifest.record_stage(done, "parsed", message_id="<a@example.com>")
+        manifest.record_stage(done, "triaged")
+        manifest.mark_done(done)
+        manifest.start(crashed, "v1")
+        manifest.record_stage(crashed, "parsed")
+        manifest.close()
+        
+        # A new run (new connection) resumes: the crashed file is still pending
+        manifest = BatchManifest(tmp / "manifest.sqlite3")
+        assert manifest.is_done(done, "v1")
+        assert not manifest.is_done(crashed, "v1")
+        assert not manifest.is_done(tmp / "new.eml", "v1")
+        assert not manifest.is_done(done, "v2")  # prompts changed
+        
+        entry = manifest.get(done)
+        assert entry["message_id"] == "<a@example.com>"
+        assert set(entry["stages"]) == {"parsed", "triaged", "stored"}
+        assert manifest.stats()["done"] == 1 and manifest.stats()["pending"] == 1
+        print("✅ Finished files are skipped, interrupted ones resume")
+
+
+def test_content_changes():
+    """Test that a touched file stays done but an edited one is re-processed."""
+    print("\nTesting content change detection...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        eml = tmp / "mail.eml"
+        eml.write_bytes(b"Subject: a\n\nbody")
+        manifest = BatchManifest(tmp / "manifest.sqlite3")
+        manifest.start(eml, "v1")
+        manifest.mark_done(eml)
+        
+        # Same bytes, new mtime: re-hashed once, still done
+        stat = os.stat(eml)
+        os.utime(eml, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert manifest.is_done(eml, "v1")
+        assert manifest.rehashed == 1
+        assert manifest.is_done(eml, "v1")
+        assert manifest.rehashed == 1  # new mtime was recorded
+        
+        eml.write_bytes(b"Subject: a\n\nedited body")
+        assert not manifest.is_done(eml, "v1")
+        
+        manifest.start(eml, "v1")
+        manifest.mark_failed(eml, "triage failed")
+        assert not manifest.is_done(eml, "v1")
+        assert manifest.get(eml)["error"] == "triage failed"
+        
+        # Files that cannot be parsed are not retried until they change
+        manifest.start(eml, "v1")
+        manifest.mark_unprocessable(eml, "no content extracted")
+        assert manifest.is_done(eml, "v1")
+        print("✅ Only content changes trigger re-processing")
+
+
+def test_keyed_messages():
+    """Test messages tracked by key and content hash (e.g. inside an mbox file)."""
+    print("\nTesting keyed messages...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        key = str(Path(tmp) / "export.mbox") + "#120"
+        manifest = BatchManifest(Path(tmp) / "manifest.sqlite3")
+        assert not manifest.is_done(key, "v1", content_hash="aaa")
+        
+        manifest.start(key, "v1", content_hash="aaa")
+        manifest.mark_done(key)
+        assert manifest.is_done(key, "v1", content_hash="aaa")
+        assert not manifest.is_done(key, "v1", content_hash="bbb")
+        print("✅ Keyed messages are skipped only while their content is unchanged")
+
+
+def main():
+    """Main test function."""
+    print("🧪 Testing Batch Manifest")
+    print("=" * 50)
+    
+    test_resume_and_skip()
+    test_content_changes()
+    test_keyed_messages()
+    
+    print("\n" + "=" * 50)
+    print("🎉 All batch manifest tests passed!")
+
+
+if __name__ == "__main__":
+    main()
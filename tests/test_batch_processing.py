@@ -14,7 +14,8 @@ scripts_path = project_root / "scripts"
 sys.path.insert(0, str(backend_path))
 sys.path.insert(0, str(scripts_path))
 
-from run_batch_from_eml import extract_email_content, extract_body_content, generate_embedding
+from run_batch_from_eml import extract_email_content, extract_body_content, generate_embedding, settle_from_headers
+from rules_engine import RulesEngine
 from email import message_from_string
 
 
@@ -149,6 +150,25 @@ def test_configuration():
         return False
 
 
+def test_header_settled_id_parsing():
+    """Test that header-settled messages without a Message-ID get a stable id."""
+    print("\nTesting generated message ids for header-settled messages...")
+    
+    engine = RulesEngine([{"id": "bulk", "headers": {"Precedence": ["bulk"]}, "quadrant": "delete"}])
+    block = b"From: news@example.com\r\nSubject: Weekly\r\nPrecedence: bulk\r\n\r\n"
+    first, second = settle_from_headers(engine, block), settle_from_headers(engine, block)
+    assert first["rule_id"] == "bulk" and first["message_id"].startswith("generated_")
+    assert first["message_id"] == second["message_id"], "Reruns must not store the message under a new id"
+    
+    other = settle_from_headers(engine, block.replace(b"Weekly", b"Monthly"))
+    assert other["message_id"] != first["message_id"]
+    
+    with_id = settle_from_headers(engine, b"Message-ID: <a@b>\r\n" + block)
+    assert with_id["message_id"] == "<a@b>"
+    print("✅ Generated ids are derived from the header block")
+    return True
+
+
 def main():
     """Main test function."""
     print("🧪 Testing Batch Processing Module")
@@ -158,6 +178,7 @@ def main():
         ("Configuration", test_configuration),
         ("Email Parsing", test_email_parsing),
         ("EML File Parsing", test_eml_file_parsing),
+        ("Header-Settled Message IDs", test_header_settled_id_parsing),
         ("Embedding Generation", test_embedding_generation),
     ]
     
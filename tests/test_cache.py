@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script for the on-disk LRU cache used for OpenAI responses.
+"""
+
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+# Add backend to path
+project_root = Path(__file__).parent.parent
+backend_path = project_root / "backend"
+sys.path.insert(0, str(backend_path))
+
+from cache import DiskLRUCache, MemoryLRUCache, content_hash
+
+
+def test_content_hash_is_stable():
+    """Test that logically equal payloads share a key."""
+    print("Testing content hashing...")
+    
+    a = content_hash({"model": "gpt-4", "messages": [{"role": "user", "content": "hi"}], "temperature": 0.1})
+    b = content_hash({"temperature": 0.1, "messages": [{"role": "user", "content": "hi"}], "model": "gpt-4"})
+    c = content_hash({"model": "gpt-4", "messages": [{"role": "user", "content": "hi!"}], "temperature": 0.1})
+    
+    assert a == b
+    assert a != c
+    print("✅ Equal payloads hash identically")
+
+
+def test_hits_misses_and_persistence():
+    """Test basic get/set, counters and reopening the file."""
+    print("\nTesting hits, misses and persistence...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "cache.sqlite3"
+        cache = DiskLRUCache(path)
+        
+        assert cache.get("missing") is None
+        cache.set("key", b"value")
+        assert cache.get("key") == b"value"
+        
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["entries"] == 1 and stats["bytes"] == 5
+        cache.close()
+        
+        reopened = DiskLRUCache(path)
+        assert reopened.get("key") == b"value"
+        reopened.close()
+    print("✅ Entries survive reopening")
+
+
+def test_lru_eviction_by_size():
+    """Test that the least recently used entries are evicted first."""
+    print("\nTesting LRU eviction...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = DiskLRUCache(Path(tmp) / "cache.sqlite3", max_bytes=30)
+        
+        cache.set("a", b"x" * 10)
+        time.sleep(0.01)
+        cache.set("b", b"x" * 10)
+        time.sleep(0.01)
+        cache.set("c", b"x" * 10)
+        time.sleep(0.01)
+        
+        # Touch "a" so "b" becomes the least recently used
+        assert cache.get("a") is not None
+        time.sleep(0.01)
+        cache.set("d", b"x" * 10)
+        
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("d") is not None
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["bytes"] <= 30
+        cache.close()
+    print("✅ Least recently used entry evicted")
+
+
+def test_ttl_expiry():
+    """Test that entries older than the TTL are treated as misses."""
+    print("\nTesting TTL expiry...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = DiskLRUCache(Path(tmp) / "cache.sqlite3", ttl_seconds=0.05)
+        cache.set("key", b"value")
+        assert cache.get("key") == b"value"
+        
+        time.sleep(0.1)
+        assert cache.get("key") is None
+        assert cache.stats()["expirations"] == 1
+        assert cache.stats()["entries"] == 0
+        cache.close()
+    print("✅ Expired entries are dropped")
+
+
+def test_memory_lru_cache():
+    """Test the in-process tier: LRU order, TTL and sentinel defaults."""
+    print("\nTesting in-memory LRU cache...")
+    
+    now = [0.0]
+    cache = MemoryLRUCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+    
+    missing = object()
+    cache.set("none", None)
+    assert cache.get("none", missing) is None
+    assert cache.get("absent", missing) is missing
+    
+    now[0] = 11.0
+    assert cache.get("c") is None
+    assert cache.stats()["expirations"] == 1
+    print("✅ Memory tier evicts, expires and caches None values")
+
+
+def main():
+    """Main test function."""
+    print("🧪 Testing LRU Caches")
+    print("=" * 50)
+    
+    test_content_hash_is_stable()
+    test_hits_misses_and_persistence()
+    test_lru_eviction_by_size()
+    test_ttl_expiry()
+    test_memory_lru_cache()
+    
+    print("\n🎉 All cache tests completed!")
+
+
+if __name__ == "__main__":
+    main()
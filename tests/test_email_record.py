@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared EmailRecord extraction.
+"""
+
+import io
+import os
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.eml_parser import parse_eml
+from utils.email_record import EmailRecord, normalize_body
+
+MULTIPART = (
+    b"From: =?utf-8?Q?Ren=C3=A9e?= <renee@example.com>\n"
+    b"Subject: =?iso-8859-1?Q?R=E9union_budg=E9taire?=\n"
+    b"Message-ID: <budget@example.com>\n"
+    b"MIME-Version: 1.0\n"
+    b"Content-Type: multipart/mixed; boundary=\"outer\"\n\n"
+    b"--outer\n"
+    b"Content-Type: multipart/alternative; boundary=\"inner\"\n\n"
+    b"--inner\n"
+    b"Content-Type: text/plain; charset=iso-8859-1\n"
+    b"Content-Transfer-Encoding: quoted-printable\n\n"
+    b"Caf=E9 at 10:00,   bring   the figures.\n\n\n\nThanks\n"
+    b"--inner\n"
+    b"Content-Type: text/html; charset=utf-8\n\n"
+    b"<p>Caf\xc3\xa9</p>\n"
+    b"--inner--\n"
+    b"--outer\n"
+    b"Content-Type: text/plain\n"
+    b"Content-Disposition: attachment; filename=\"notes.txt\"\n\n"
+    b"attachment text that is much longer than the body and must be ignored\n"
+    b"--outer--\n"
+)
+
+
+def test_decoding():
+    """Test charset-aware decoding of headers and parts, and attachment skipping."""
+    print("Testing decoding...")
+    
+    record = EmailRecord.from_bytes(MULTIPART)
+    assert record.subject == "Réunion budgétaire"
+    assert record.sender == "Renée <renee@example.com>"
+    assert record.message_id == "<budget@example.com>"
+    assert record.body == "Café at 10:00, bring the figures.\n\nThanks"
+    assert "attachment" not in record.body
+    
+    # An HTML-only message is converted to text
+    html_only = b"Subject: Hi\nContent-Type: text/html; charset=utf-8\n\n<div>Hello&nbsp;<b>team</b></div>\n"
+    assert EmailRecord.from_bytes(html_only).body == "Hello team"
+    
+    # A stub text/plain loses to the fuller HTML alternative
+    stub = (b"Subject: x\nContent-Type: multipart/alternative; boundary=b\n\n--b\n"
+            b"Content-Type: text/plain\n\nSee HTML\n--b\nContent-Type: text/html\n\n"
+            b"<p>The whole message lives in the HTML part</p>\n--b--\n")
+    assert EmailRecord.from_bytes(stub).body == "The whole message lives in the HTML part"
+    print("✅ Headers and parts decoded with their charsets")
+
+
+def test_stable_hash():
+    """Test the same email hashes alike whatever its line endings or sender display name."""
+    print("\nTesting content hash stability...")
+    
+    lf = EmailRecord.from_bytes(MULTIPART)
+    crlf = EmailRecord.from_bytes(MULTIPART.replace(b"\n", b"\r\n"))
+    assert lf == crlf
+    
+    renamed = EmailRecord.from_bytes(MULTIPART.replace(b"=?utf-8?Q?Ren=C3=A9e?=", b"R. Dupont"))
+    assert renamed.content_hash == lf.content_hash
+    edited = EmailRecord.from_bytes(MULTIPART.replace(b"10:00", b"11:00"))
+    assert edited.content_hash != lf.content_hash
+    
+    assert normalize_body(" a \t b \r\n\r\n\r\n\xa0c ") == "a b\n\nc"
+    print("✅ Content hash ignores formatting, not content")
+
+
+def test_entry_points_agree():
+    """Test the Streamlit parser gives the record's subject and body."""
+    print("\nTesting entry points agree...")
+    
+    record = EmailRecord.from_bytes(MULTIPART)
+    subject, sender, body = parse_eml(io.BytesIO(MULTIPART))
+    assert (subject, sender, body) == (record.subject, "renee@example.com", record.body)
+    assert parse_eml(io.BytesIO(b"Subject: empty\n\n"))[2] == "(No Body)"
+    
+    # The batch pipeline's HTML budget applies to uploads too
+    html = b"Subject: Sale\nContent-Type: text/html\n\n<p>" + b"word " * 200 + b"</p>"
+    os.environ["HTML_TEXT_MAX_CHARS"] = "50"
+    try:
+        assert parse_eml(io.BytesIO(html))[2] == EmailRecord.from_bytes(html, max_html_chars=50).body
+        assert len(parse_eml(io.BytesIO(html))[2]) <= 50
+    finally:
+        del os.environ["HTML_TEXT_MAX_CHARS"]
+    assert len(parse_eml(io.BytesIO(html))[2]) > 50
+    print("✅ parse_eml and EmailRecord extract the same content")
+
+
+def test_html_budget_alternatives():
+    """Test the budget neither lets a long plain part win nor changes which alternative is used."""
+    print("\nTesting HTML budget with multipart alternatives...")
+    
+    def alternative(plain_words, html_words):
+        return (b"Subject: Digest\nMIME-Version: 1.0\n"
+                b"Content-Type: multipart/alternative; boundary=\"b\"\n\n"
+                b"--b\nContent-Type: text/plain\n\n" + b"plain " * plain_words + b"\n"
+                b"--b\nContent-Type: text/html\n\n<p>" + b"html " * html_words + b"</p>\n--b--\n")
+    
+    for plain_words, html_words, winner in ((300, 400, "html"), (400, 300, "plain")):
+        message = alternative(plain_words, html_words)
+        assert EmailRecord.from_bytes(message, max_html_chars=None).body.startswith(winner)
+        for budget in (100, 1000, 1600, 5000):
+            body = EmailRecord.from_bytes(message, max_html_chars=budget).body
+            assert body.startswith(winner), (plain_words, html_words, budget)
+            assert len(body) <= budget
+    print("✅ Both alternatives are held to the budget and the choice does not depend on it")
+
+
+def main():
+    """Main test function."""
+    print("🧪 Testing Email Record")
+    print("=" * 50)
+    
+    test_decoding()
+    test_stable_hash()
+    test_entry_points_agree()
+    test_html_budget_alternatives()
+    
+    print("\n" + "=" * 50)
+    print("🎉 All email record tests passed!")
+
+
+if __name__ == "__main__":
+    main()
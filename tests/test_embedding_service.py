@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Test script for the cached embedding service.
+"""
+
+import sys
+import asyncio
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.cache import DiskLRUCache, MemoryLRUCache
+from backend.embedding_service import EmbeddingService, normalize_embedding_text, pack_embedding_batches
+
+
+class FakeEmbedder:
+    """Counts calls and returns a deterministic vector per text."""
+
+    def __init__(self, delay: float = 0.0):
+        self.calls = []
+        self.delay = delay
+
+    def __call__(self, text, model):
+        self.calls.append((text, model))
+        time.sleep(self.delay)
+        return [float(len(text)), 0.5, -0.25]
+
+
+def test_normalization():
+    """Test that whitespace-only differences share a cache key."""
+    print("Testing text normalization...")
+    
+    a = normalize_embedding_text("Subject: Hi\r\n\r\n\r\n\r\nBody:  hello   world  \t")
+    b = normalize_embedding_text("Subject: Hi\n\nBody: hello world")
+    assert a == b == "Subject: Hi\n\nBody: hello world"
+    print("✅ Equivalent texts normalize identically")
+
+
+def test_each_text_embedded_once():
+    """Test memory hits, model separation and disk persistence across services."""
+    print("\nTesting embedding cache tiers...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "embeddings.sqlite3"
+        embedder = FakeEmbedder()
+        service = EmbeddingService(embedder, memory_cache=MemoryLRUCache(16), disk_cache=DiskLRUCache(path))
+        
+        first = service.embed("Subject: Hi\n\nBody: hello")
+        assert service.embed("Subject: Hi\n\n\nBody:  hello ") == first
+        service.embed("Subject: Hi\n\nBody: hello", model="text-embedding-3-small")
+        assert len(embedder.calls) == 2
+        
+        stats = service.stats()
+        assert stats["requests"] == 3 and stats["api_calls"] == 2 and stats["cache_hits"] == 1
+        
+        # A fresh process (new service, empty memory tier) reads from disk
+        restarted = EmbeddingService(embedder, memory_cache=MemoryLRUCache(16), disk_cache=DiskLRUCache(path))
+        assert restarted.embed("Subject: Hi\n\nBody: hello") == first
+        assert len(embedder.calls) == 2
+        assert restarted.stats()["disk"]["hits"] == 1
+    print("✅ Each distinct text is embedded once per model")
+
+
+def test_concurrent_requests_share_one_call():
+    """Test that simultaneous requests for the same text are deduplicated."""
+    print("\nTesting in-flight deduplication...")
+    
+    embedder = FakeEmbedder(delay=0.05)
+    service = EmbeddingService(embedder, memory_cache=MemoryLRUCache(16))
+    
+    threads = [threading.Thread(target=service.embed, args=("same text",)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(embedder.calls) == 1
+    
+    async def burst():
+        return await asyncio.gather(*(service.embed_async("other text") for _ in range(5)))
+    
+    vectors = asyncio.run(burst())
+    assert len(embedder.calls) == 2
+    assert all(vector == vectors[0] for vector in vectors)
+    print("✅ Concurrent callers share a single API call")
+
+
+def test_pack_embedding_batches():
+    """Test that batches respect both the input and the token bound."""
+    print("\nTesting batch packing...")
+    
+    assert pack_embedding_batches([10, 10, 10, 10, 10], max_inputs=2, max_tokens=100) == [[0, 1], [2, 3], [4]]
+    assert pack_embedding_batches([60, 50, 30, 200, 10], max_inputs=10, max_tokens=100) == [[0], [1, 2], [3], [4]]
+    assert pack_embedding_batches([], max_inputs=10, max_tokens=100) == []
+    print("✅ Batches are bounded by count and tokens")
+
+
+def test_embed_many_batches_misses_in_order():
+    """Test that embed_many skips cache hits, dedupes and preserves order."""
+    print("\nTesting batched embedding...")
+    
+    embedder = FakeEmbedder()
+    batches = []
+    
+    def embed_batch(texts, model):
+        batches.append(list(texts))
+        return [embedder(text, model) for text in texts]
+    
+    service = EmbeddingService(embedder, memory_cache=MemoryLRUCache(16), embed_batch=embed_batch,
+                               count_tokens=len, batch_size=2, batch_max_tokens=1000)
+    service.embed("cached")
+    embedder.calls.clear()
+    
+    texts = ["a", "cached", "bbb", "a", "cc", "dddd"]
+    vectors = service.embed_many(texts)
+    
+    assert [vector[0] for vector in vectors] == [1.0, 6.0, 3.0, 1.0, 2.0, 4.0]
+    assert batches == [["a", "bbb"], ["cc", "dddd"]]
+    assert service.stats()["api_calls"] == 3  # one single embed + two batch requests
+    print("✅ Only unique misses are sent, two per request, in input order")
+
+
+def main():
+    """Main test function."""
+    print("🧪 Testing Embedding Service")
+    print("=" * 50)
+    
+    test_normalization()
+    test_each_text_embedded_once()
+    test_concurrent_requests_share_one_call()
+    test_pack_embedding_batches()
+    test_embed_many_batches_misses_in_order()
+    
+    print("\n🎉 All embedding service tests completed!")
+
+
+if __name__ == "__main__":
+    main()
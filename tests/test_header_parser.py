@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test script for the header-only parser.
+"""
+
+import io
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils import header_parser
+from utils.header_parser import parse_header_block, read_header_block, read_headers
+from utils.mailbox_readers import iter_mbox
+
+
+def test_header_block():
+    """Test the header block ends at the first blank line, LF or CRLF, across chunk boundaries."""
+    print("Testing header block detection...")
+    
+    data, length = read_header_block(io.BytesIO(b"Subject: a\nFrom: b@example.com\n\nbody\n\nmore"))
+    assert data[:length] == b"Subject: a\nFrom: b@example.com\n\n"
+    
+    message = b"Subject: Folded\r\n subject\r\nAuto-Submitted: auto-replied\r\n\r\nbody"
+    data, length = read_header_block(io.BytesIO(message))
+    headers = parse_header_block(data[:length])
+    assert headers["Subject"] == "Folded\n subject"
+    assert headers["Auto-Submitted"] == "auto-replied"
+    
+    # A message without a body is all headers
+    data, length = read_header_block(io.BytesIO(b"Subject: no body\n"))
+    assert length == len(data) == len(b"Subject: no body\n")
+    
+    original = header_parser.HEADER_CHUNK_SIZE
+    header_parser.HEADER_CHUNK_SIZE = 4
+    try:
+        # The blank line straddles two chunks, and reading stops one chunk past it
+        stream = io.BytesIO(b"X-A: 1\r\n\r\n" + b"body" * 100)
+        data, length = read_header_block(stream)
+        assert data[:length] == b"X-A: 1\r\n\r\n" and len(data) == 12
+        assert stream.tell() == len(data)
+        
+        # Giving up on oversized header blocks
+        data, length = read_header_block(io.BytesIO(b"X-Long: " + b"a" * 100 + b"\n\nbody"), max_bytes=32)
+        assert length is None and len(data) == 32
+    finally:
+        header_parser.HEADER_CHUNK_SIZE = original
+    print("✅ Header blocks found without reading the body")
+
+
+def test_read_headers():
+    """Test headers of message files and mbox messages, limited to the message."""
+    print("\nTesting header reads from files and mbox messages...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        eml = Path(tmp) / "mail.eml"
+        eml.write_bytes(b"Subject: Accepted: Sync\r\nFrom: a@example.com\r\n\r\n" + b"x" * 100000)
+        headers, read = read_headers(eml)
+        assert headers["Subject"] == "Accepted: Sync"
+        assert read <= header_parser.HEADER_CHUNK_SIZE
+        
+        mbox = Path(tmp) / "export.mbox"
+        mbox.write_bytes(
+            b"From a@example.com Mon Jan  1 00:00:00 2024\n"
+            b"Subject: Headers only\n\n"
+            b"From b@example.com Mon Jan  1 00:01:00 2024\n"
+            b"Subject: Second\n\nbody\n"
+        )
+        first, second = iter_mbox(mbox)
+        headers, read = read_headers(first)
+        assert headers["Subject"] == "Headers only" and read == first.size
+        assert read_headers(second)[0]["Subject"] == "Second"
+    print("✅ Headers read from files and mbox messages")
+
+
+def main():
+    """Main test function."""
+    print("🧪 Testing Header Parser")
+    print("=" * 50)
+    
+    test_header_block()
+    test_read_headers()
+    
+    print("\n" + "=" * 50)
+    print("🎉 All header parser tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script for the streaming HTML-to-text converter.
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils import html_text
+from utils.email_record import EmailRecord
+from utils.html_text import convert_html, html_to_text
+
+NEWSLETTER = """<!DOCTYPE html><html><head><title>Weekly</title>
+<style type="text/css">body { font-family: Arial; } .x { color: red; }</style>
+<script>track("open");</script></head>
+<body>
+<div style="display:none; max-height:0">Preheader you never see</div>
+<table><tr><td>Hello&nbsp;<b>team</b>,</td><td>Issue   #42</td></tr></table>
+<p>First
+   paragraph.</p><p>Second &amp; last.<br/>New line</p>
+<!--[if mso]><div style="mso-hide:all">Outlook only</div><![endif]-->
+<div hidden><div>Nested hidden</div> still hidden</div>
+<img src="https://t.example.com/open.gif" width="1" height="1">
+<noscript>Enable scripts</noscript>
+</body></html>"""
+
+
+def test_visible_text():
+    """Test style, script, head and hidden blocks are dropped and blocks become lines."""
+    print("Testing visible text extraction...")
+    
+    text = html_to_text(NEWSLETTER)
+    assert text == "Hello team, Issue #42\nFirst paragraph.\nSecond & last.\nNew line", text
+    for invisible in ("font-family", "track", "Weekly", "Preheader", "Outlook", "hidden", "Enable"):
+        assert invisible not in text
+    
+    # A <head> left open ends at <body>
+    assert html_to_text("<head><title>t</title><body><p>Body text</p>") == "Body text"
+    print("✅ Only visible text is kept")
+
+
+def test_budget():
+    """Test conversion stops parsing once the visible text budget is reached."""
+    print("\nTesting text budget...")
+    
+    page = "<html><body>" + "<p>word word word word</p>\n" * 5000 + "</body></html>"
+    full = convert_html(page, max_chars=None)
+    assert not full.truncated and full.parsed_chars == len(page) == full.html_chars
+    
+    original = html_text.FEED_CHUNK_SIZE
+    html_text.FEED_CHUNK_SIZE = 1024
+    try:
+        result = convert_html(page, max_chars=100)
+    finally:
+        html_text.FEED_CHUNK_SIZE = original
+    assert result.truncated and len(result.text) <= 100
+    assert result.text.endswith("word") and full.text.startswith(result.text)
+    # Parsing stopped within a chunk of the budget
+    assert result.parsed_chars <= 2048 < len(page)
+    print(f"✅ Parsed {result.parsed_chars} of {len(page)} HTML chars for a 100-char budget")
+
+
+def test_email_record_html():
+    """Test records carry the HTML length and honour the budget."""
+    print("\nTesting EmailRecord HTML bodies...")
+    
+    message = (b"Subject: Sale\nContent-Type: text/html; charset=utf-8\n\n"
+               + NEWSLETTER.encode("utf-8"))
+    record = EmailRecord.from_bytes(message)
+    assert record.body.startswith("Hello team") and record.html_chars == len(NEWSLETTER)
+    assert EmailRecord.from_bytes(message, max_html_chars=11).body == "Hello team,"
+    
+    plain = EmailRecord.from_bytes(b"Subject: Hi\n\nPlain body\n")
+    assert plain.body == "Plain body" and plain.html_chars == 0
+    print("✅ HTML length recorded for token savings reports")
+
+
+def main():
+    """Main test function."""
+    print("🧪 Testing HTML Text")
+    print("=" * 50)
+    
+    test_visible_text()
+    test_budget()
+    test_email_record_html()
+    
+    print("\n" + "=" * 50)
+    print("🎉 All HTML text tests passed!")
+
+
+if __name__ == "__main__":
+    main()
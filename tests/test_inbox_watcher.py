@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test script for the inbox directory watcher.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils import inbox_watcher
+from utils.inbox_watcher import InboxWatcher
+
+
+def collect(watcher, deliver, wait=1.0):
+    """Run watcher.watch() in a thread, call deliver(), and return what was yielded."""
+    seen = []
+    thread = threading.Thread(target=lambda: seen.extend(path.name for path, _ in watcher.watch()))
+    thread.start()
+    time.sleep(0.2)
+    deliver()
+    time.sleep(wait)
+    watcher.stop()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    return seen
+
+
+def deliver_mail(inbox: Path):
+    """Deliver one message by rename (Maildir style) and one by a direct write, plus a non-.eml file."""
+    (inbox / "incoming.tmp").write_bytes(b"Subject: renamed\n\nbody")
+    os.rename(inbox / "incoming.tmp", inbox / "renamed.eml")
+    (inbox / "direct.eml").write_bytes(b"Subject: direct\n\nbody")
+    (inbox / "notes.txt").write_bytes(b"ignored")
+
+
+def test_polling():
+    """Test the polling fallback."""
+    print("Testing polling watcher...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        inbox = Path(tmp)
+        (inbox / "existing.eml").write_bytes(b"Subject: old\n\nbody")
+        watcher = InboxWatcher(inbox, poll_interval=0.05, use_inotify=False)
+        seen = collect(watcher, lambda: deliver_mail(inbox))
+    
+    assert watcher.mode == "polling"
+    assert seen[0] == "existing.eml"
+    assert sorted(seen) == ["direct.eml", "existing.eml", "renamed.eml"]
+    print("✅ Existing and new files reported once each")
+
+
+def test_inotify():
+    """Test inotify mode where the platform supports it."""
+    print("\nTesting inotify watcher...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        inbox = Path(tmp)
+        watcher = InboxWatcher(inbox, poll_interval=0.05)
+        seen = collect(watcher, lambda: deliver_mail(inbox), wait=0.3)
+    
+    if watcher.mode != "inotify":
+        print("⚠️  inotify unavailable, fell back to polling")
+    assert sorted(seen) == ["direct.eml", "renamed.eml"]
+    print(f"✅ New files reported ({watcher.mode})")
+
+
+def test_vanishing_files():
+    """Test that a file removed between listing and stat is skipped, not fatal."""
+    print("\nTesting files that vanish mid-scan...")
+    
+    class VanishingEntry:
+        def __init__(self, entry):
+            self.entry, self.name, self.path = entry, entry.name, entry.path
+        
+        def is_file(self):
+            return self.entry.is_file()
+        
+        def stat(self):
+            if self.name == "gone.eml":
+                raise FileNotFoundError(self.path)
+            return self.entry.stat()
+    
+    scandir = os.scandir
+    
+    class VanishingScandir:
+        def __init__(self, path):
+            self.entries = scandir(path)
+        
+        def __enter__(self):
+            return (VanishingEntry(entry) for entry in self.entries.__enter__())
+        
+        def __exit__(self, *exc):
+            return self.entries.__exit__(*exc)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        inbox = Path(tmp)
+        (inbox / "kept.eml").write_bytes(b"Subject: kept\n\nbody")
+        (inbox / "gone.eml").write_bytes(b"Subject: gone\n\nbody")
+        inbox_watcher.os.scandir = VanishingScandir
+        try:
+            found = InboxWatcher(inbox, use_inotify=False)._scan()
+        finally:
+            inbox_watcher.os.scandir = scandir
+    
+    assert [path.name for path in found] == ["kept.eml"]
+    print("✅ Vanished files are skipped")
+
+
+def main():
+    """Main test function."""
+    print("🧪 Testing Inbox Watcher")
+    print("=" * 50)
+    
+    test_polling()
+    test_inotify()
+    test_vanishing_files()
+    
+    print("\n" + "=" * 50)
+    print("🎉 All inbox watcher tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for the keyword fallbacks and meeting detection.
+
+The PatternMatcher versions must answer exactly as the per-keyword `in` loops
+they replaced on every sample email; scripts/benchmark_pattern_matching.py
+keeps those loops as reference implementations and times both.
+"""
+
+import sys
+import random
+from pathlib import Path
+
+# Add project root and scripts to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "scripts"))
+
+import agent_logic
+from backend.triage_core import is_meeting_notification
+from benchmark_pattern_matching import (legacy_contextual_flags, legacy_email_only_keywords,
+                                        legacy_is_meeting_notification, legacy_outcome_scores, load_corpus)
+
+SAMPLES = project_root / "data" / "sample_emails" / "eml_files"
+
+
+def _corpus():
+    emails = load_corpus(SAMPLES)
+    assert emails, f"no sample emails in {SAMPLES}"
+    return emails
+
+
+def test_meeting_notification_matches_legacy():
+    """Test is_meeting_notification against the old pattern loops."""
+    print("Testing is_meeting_notification...")
+    
+    emails = _corpus()
+    hits = 0
+    for subject, _, body in emails:
+        expected = legacy_is_meeting_notification(subject, body)
+        assert is_meeting_notification(subject, body) == expected, subject
+        hits += expected
+    # The corpus must exercise both answers for the comparison to mean anything
+    assert 0 < hits < len(emails)
+    print(f"✅ {len(emails)} emails agree ({hits} meeting notifications)")
+
+
+def test_email_only_fallback_matches_legacy():
+    """Test fallback_email_only_triage's flags and keyword lists against the old loops."""
+    print("\nTesting fallback_email_only_triage...")
+    
+    for subject, _, body in _corpus():
+        is_urgent, is_important, urgent, important = legacy_email_only_keywords(subject, body)
+        result = agent_logic.fallback_email_only_triage(subject, body)
+        assert result['reasoning'] == f"Fallback keyword analysis. Urgent: {is_urgent}, Important: {is_important}"
+        assert result['metadata']['urgent_keywords_found'] == urgent, subject
+        assert result['metadata']['important_keywords_found'] == important, subject
+    print("✅ Same flags and keywords on every sample")
+
+
+def test_contextual_fallback_matches_legacy():
+    """Test fallback_contextual_triage's sender and deadline checks against the old loops."""
+    print("\nTesting fallback_contextual_triage...")
+    
+    senders = ["CEO <ceo@executive.com>", "Ops <ops@sub.COMPANY.com>", "noreply@example.org", "no address"]
+    for subject, sender, body in _corpus():
+        for candidate in [sender] + senders:
+            is_important_sender, has_time_constraint = legacy_contextual_flags(subject, candidate, body)
+            metadata = agent_logic.fallback_contextual_triage(subject, candidate, body)['metadata']
+            assert metadata['is_important_sender'] == is_important_sender, candidate
+            assert metadata['has_time_constraint'] == has_time_constraint, subject
+    print("✅ Same sender and time-constraint flags on every sample")
+
+
+def test_outcomes_fallback_matches_legacy():
+    """Test fallback_outcomes_triage's impact scores and level against the old counting loop."""
+    print("\nTesting fallback_outcomes_triage...")
+    
+    for subject, _, body in _corpus():
+        scores = legacy_outcome_scores(subject, body)
+        metadata = agent_logic.fallback_outcomes_triage(subject, body)['metadata']
+        assert metadata['impact_scores'] == scores, subject
+        assert metadata['impact_level'] == max(scores.items(), key=lambda x: x[1])[0], subject
+    print("✅ Same impact scores on every sample")
+
+
+def test_embedding_fallback_unchanged():
+    """Test fallback_embedding_triage still depends only on its random draws, not on keywords."""
+    print("\nTesting fallback_embedding_triage...")
+    
+    subject, _, body = _corpus()[0]
+    random.seed(7)
+    first = agent_logic.fallback_embedding_triage(subject, body)
+    random.seed(7)
+    assert agent_logic.fallback_embedding_triage("", "") == first
+    print("✅ Embedding fallback is independent of the text")
+
+
+def main():
+    """Main test function."""
+    print("🧪 Testing Keyword Fallbacks")
+    print("=" * 50)
+    
+    test_meeting_notification_matches_legacy()
+    test_email_only_fallback_matches_legacy()
+    test_contextual_fallback_matches_legacy()
+    test_outcomes_fallback_matches_legacy()
+    test_embedding_fallback_unchanged()
+    
+    print("\n" + "=" * 50)
+    print("🎉 All keyword fallback tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for the local embedding classifier.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+project_root = Path(__file__).parent.parent
+backend_path = project_root / "backend"
+sys.path.insert(0, str(backend_path))
+
+from local_classifier import QUADRANT_LABELS, LocalClassifier, load_training_data
+
+
+def make_labelled_corpus(count=2000, dim=64, noise=0.6, seed=3):
+    """Quadrant-clustered vectors sharing a large common offset, like ada-002 embeddings."""
+    rng = np.random.default_rng(seed)
+    common = 5.0 * rng.normal(size=dim)
+    centers = rng.normal(size=(len(QUADRANT_LABELS), dim))
+    # Imbalanced classes: "do" is rare
+    targets = rng.choice(len(QUADRANT_LABELS), size=count, p=[0.1, 0.4, 0.2, 0.3])
+    vectors = common + centers[targets] + noise * rng.normal(size=(count, dim))
+    return vectors, [QUADRANT_LABELS[t] for t in targets]
+
+
+def test_fit_and_classify():
+    """Test that training separates the quadrants, rare class included."""
+    print("Testing training...")
+    
+    vectors, labels = make_labelled_corpus()
+    model = LocalClassifier(dim=64)
+    losses = model.fit(vectors[:1500], labels[:1500])
+    assert losses[-1] < losses[0]
+    
+    probabilities = model.predict_proba(vectors[1500:])
+    assert np.allclose(probabilities.sum(axis=1), 1.0, atol=1e-5)
+    predicted = [model.labels[i] for i in np.argmax(probabilities, axis=1)]
+    accuracy = np.mean([p == t for p, t in zip(predicted, labels[1500:])])
+    assert accuracy > 0.9, accuracy
+    
+    do_rows = [i for i, label in enumerate(labels[1500:]) if label == "do"]
+    assert np.mean([predicted[i] == "do" for i in do_rows]) > 0.8
+    
+    quadrant, confidence = model.classify(vectors[1600])
+    assert quadrant in QUADRANT_LABELS and 0.25 <= confidence <= 1.0
+    print(f"✅ Held-out accuracy {accuracy:.1%}")
+
+
+def test_threshold_trades_coverage_for_accuracy():
+    """Test evaluate() and choose_threshold() on a noisy corpus."""
+    print("\nTesting cascade evaluation...")
+    
+    vectors, labels = make_labelled_corpus(noise=1.5)
+    model = LocalClassifier(dim=64)
+    model.fit(vectors[:1500], labels[:1500])
+    report = model.evaluate(vectors[1500:], labels[1500:], thresholds=[0.0, 0.5, 0.9, 1.01])
+    
+    assert report[0]["coverage"] == 1.0
+    assert report[-1]["accepted"] == 0 and report[-1]["accuracy"] is None
+    coverages = [row["coverage"] for row in report]
+    assert coverages == sorted(coverages, reverse=True)
+    assert report[2]["accuracy"] >= report[0]["accuracy"]
+    
+    assert LocalClassifier.choose_threshold(report, report[2]["accuracy"]) <= 0.9
+    assert LocalClassifier.choose_threshold(report, 1.1) is None
+    print("✅ Higher thresholds accept fewer, more accurate predictions")
+
+
+def test_save_and_load():
+    """Test that a saved model predicts identically after loading."""
+    print("\nTesting persistence...")
+    
+    vectors, labels = make_labelled_corpus(count=300)
+    model = LocalClassifier(dim=64)
+    model.fit(vectors, labels, epochs=50)
+    model.threshold = 0.8
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "model.npz"
+        model.save(path)
+        loaded = LocalClassifier.load(path)
+    
+    assert loaded.labels == model.labels
+    assert loaded.threshold == 0.8 and loaded.trained_on == 300
+    assert np.allclose(loaded.predict_proba(vectors[:10]), model.predict_proba(vectors[:10]))
+    print("✅ Model round-trips through .npz")
+
+
+def test_training_labels_from_llm_only():
+    """Test that training data skips labels the system produced itself."""
+    print("\nTesting training label sources...")
+    
+    import backend.supabase_client as supabase_client
+    
+    stored = {
+        "llm": {"quadrant": "do", "reasoning": "Deadline today", "source": "llm"},
+        "legacy": {"quadrant": "schedule", "reasoning": "Stored before sources were recorded"},
+        "rule": {"quadrant": "delete", "reasoning": "Automatic reply (rule: automatic_reply)", "source": "rule"},
+        "local": {"quadrant": "delete", "reasoning": "Local embedding classifier (40 labelled emails), confidence 0.97"},
+        "knn": {"quadrant": "delete", "reasoning": "Vote", "source": "knn"},
+        "fallback": {"quadrant": "delegate", "reasoning": "Fallback due to OpenAI failure", "source": "fallback"},
+    }
+    rows = [{"email_id": email_id, "embedding": [1.0, 0.0]} for email_id in stored]
+    originals = supabase_client.fetch_embeddings, supabase_client.get_triage_results_many
+    supabase_client.fetch_embeddings = lambda: iter([rows])
+    supabase_client.get_triage_results_many = lambda ids, columns: {
+        email_id: {"message_id": email_id, "triage_email_only": stored[email_id]} for email_id in ids
+    }
+    try:
+        email_ids, vectors, quadrants = load_training_data()
+    finally:
+        supabase_client.fetch_embeddings, supabase_client.get_triage_results_many = originals
+    
+    assert email_ids == ["llm", "legacy"] and quadrants == ["do", "schedule"]
+    assert vectors.shape == (2, 2)
+    print("✅ Only LLM judgments become training labels")
+
+
+def main():
+    """Main test function."""
+    print("🧪 Testing Local Classifier")
+    print("=" * 50)
+    
+    test_fit_and_classify()
+    test_threshold_trades_coverage_for_accuracy()
+    test_save_and_load()
+    test_training_labels_from_llm_only()
+    
+    print("\n" + "=" * 50)
+    print("🎉 All local classifier tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for the mbox and Maildir readers.
+"""
+
+import sys
+import tempfile
+from email import message_from_bytes
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.mailbox_readers import iter_mailbox, iter_maildir, iter_mbox, read_mbox_message
+
+MBOX = (
+    b"From alice@example.com Mon Jan  1 00:00:00 2024\n"
+    b"From: alice@example.com\nSubject: First\nMessage-ID: <1@example.com>\n\n"
+    b"Hello\n>From the archive, quoted\n\n"
+    b"From bob@example.com Mon Jan  1 00:01:00 2024\r\n"
+    b"From: bob@example.com\r\nSubject: Second\r\n\r\nCRLF body\r\n\r\n"
+    b"From carol@example.com Mon Jan  1 00:02:00 2024\n"
+    b"From: carol@example.com\nSubject: Third\n\nNo trailing blank line"
+)
+
+
+def test_mbox():
+    """Test message boundaries, raw bytes and content hashes of an mbox file."""
+    print("Testing mbox reader...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "export.mbox"
+        path.write_bytes(MBOX)
+        messages = list(iter_mbox(path))
+        raws = [read_mbox_message(message) for message in messages]
+        
+        path.write_bytes(MBOX.replace(b"CRLF body", b"CRLF edit"))
+        rehashed = list(iter_mbox(path))
+        (Path(tmp) / "empty.mbox").write_bytes(b"")
+        assert list(iter_mbox(Path(tmp) / "empty.mbox")) == []
+    
+    assert len(messages) == 3
+    assert [message_from_bytes(raw)["subject"] for raw in raws] == ["First", "Second", "Third"]
+    # The blank line before the next separator is dropped, the last line's newline kept
+    assert raws[0].endswith(b"\n\nHello\n>From the archive, quoted\n")
+    assert raws[1].endswith(b"CRLF body\r\n") and raws[2].endswith(b"No trailing blank line")
+    assert messages[1].key == f"{messages[1].path}#{messages[1].offset}"
+    # Only the edited message changes hash; offsets are stable
+    assert [m.offset for m in rehashed] == [m.offset for m in messages]
+    assert [m.content_hash == r.content_hash for m, r in zip(messages, rehashed)] == [True, False, True]
+    print("✅ 3 messages split and hashed without loading the file")
+
+
+def test_maildir():
+    """Test Maildir scanning and source dispatch."""
+    print("\nTesting Maildir reader...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "Maildir"
+        for folder in (root, root / ".Archive"):
+            for sub in ("cur", "new", "tmp"):
+                (folder / sub).mkdir(parents=True)
+        (root / "new" / "1700000001.M1.host").write_bytes(b"Subject: new\n\nbody")
+        (root / "cur" / "1700000000.M1.host:2,S").write_bytes(b"Subject: read\n\nbody")
+        (root / "tmp" / "1700000002.M1.host").write_bytes(b"Subject: partial\n\nbo")
+        (root / ".Archive" / "cur" / "1600000000.M1.host:2,S").write_bytes(b"Subject: old\n\nbody")
+        
+        names = [path.name for path in iter_maildir(root)]
+        assert sorted(names) == ["1600000000.M1.host:2,S", "1700000000.M1.host:2,S", "1700000001.M1.host"]
+        assert [path.name for path in iter_mailbox(root)] == names
+        
+        eml_dir = Path(tmp) / "eml"
+        eml_dir.mkdir()
+        (eml_dir / "b.eml").write_bytes(b"Subject: b\n\nbody")
+        (eml_dir / "a.eml").write_bytes(b"Subject: a\n\nbody")
+        assert [path.name for path in iter_mailbox(eml_dir)] == ["a.eml", "b.eml"]
+    print("✅ cur/ and new/ messages found, tmp/ skipped")
+
+
+def main():
+    """Main test function."""
+    print("🧪 Testing Mailbox Readers")
+    print("=" * 50)
+    
+    test_mbox()
+    test_maildir()
+    
+    print("\n" + "=" * 50)
+    print("🎉 All mailbox reader tests passed!")
+
+
+if __name__ == "__main__":
+    main()
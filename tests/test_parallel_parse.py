@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test script for process-pool .eml parsing.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils import parallel_parse
+from utils.parallel_parse import ParallelParser, parse_eml_record
+
+
+def write_corpus(directory: Path, count: int):
+    """Write count small .eml files plus one that cannot be parsed."""
+    paths = []
+    for i in range(count):
+        path = directory / f"mail_{i:03d}.eml"
+        path.write_bytes(
+            f"From: Sender {i} <sender{i}@example.com>\r\n"
+            f"Subject: Message {i}\r\n"
+            f"Content-Type: text/html; charset=utf-8\r\n\r\n"
+            f"<p>Body of message {i} &amp; more</p>\r\n".encode()
+        )
+        paths.append(path)
+    paths.append(directory / "missing.eml")
+    return paths
+
+
+def test_parallel_matches_serial():
+    """Test that worker processes produce the same records as parsing in-process."""
+    print("Testing parallel parsing...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_corpus(Path(tmp), 40)
+        
+        serial = ParallelParser(parse_eml_record, workers=1)
+        expected = dict(serial.parse(paths))
+        parallel = ParallelParser(parse_eml_record, workers=2, chunk_size=3)
+        records = dict(parallel.parse(iter(paths)))
+    
+    assert records == expected and len(records) == 41
+    assert records[paths[7]] == {'subject': 'Message 7', 'sender': 'sender7@example.com',
+                                 'body': 'Body of message 7 & more'}
+    assert records[paths[-1]] is None
+    
+    stats = parallel.stats()
+    assert stats["files"] == 41 and stats["failed"] == 1 and stats["workers"] == 2
+    assert stats["megabytes"] > 0 and stats["files_per_second"] > 0 and stats["mb_per_second"] > 0
+    # Workers must not be forked from a process whose pipeline threads may hold locks
+    assert parallel_parse.POOL_START_METHOD in ("forkserver", "spawn")
+    print(f"✅ {stats['files']} files at {stats['files_per_second']:.0f} files/s")
+
+
+def main():
+    """Main test function."""
+    print("🧪 Testing Parallel Parsing")
+    print("=" * 50)
+    
+    test_parallel_matches_serial()
+    
+    print("\n" + "=" * 50)
+    print("🎉 All parallel parsing tests passed!")
+
+
+if __name__ == "__main__":
+    main()
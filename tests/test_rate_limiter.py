@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test script for the proactive OpenAI rate limiter.
+"""
+
+import sys
+from pathlib import Path
+
+# Add backend to path
+project_root = Path(__file__).parent.parent
+backend_path = project_root / "backend"
+sys.path.insert(0, str(backend_path))
+sys.path.insert(1, str(project_root))
+
+from rate_limiter import RateLimiter, get_rate_limiter, parse_reset_duration
+
+
+class FakeClock:
+    """Manually advanced clock so tests never sleep."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_parse_reset_duration():
+    """Test parsing of x-ratelimit-reset-* header values."""
+    print("Testing reset duration parsing...")
+    
+    assert parse_reset_duration("1s") == 1.0
+    assert parse_reset_duration("6m0s") == 360.0
+    assert abs(parse_reset_duration("20ms") - 0.02) < 1e-9
+    assert parse_reset_duration("1h2m3.5s") == 3723.5
+    assert parse_reset_duration("0.5") == 0.5
+    assert parse_reset_duration("") is None
+    assert parse_reset_duration("soon") is None
+    print("✅ Reset durations parsed correctly")
+
+
+def test_request_bucket_spaces_out_calls():
+    """Test that the RPM bucket spaces requests once the burst is used up."""
+    print("\nTesting request bucket...")
+    
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=0, clock=clock, sleep=clock.sleep)
+    
+    # The full minute's budget is available as a burst
+    waits = [limiter.reserve(0) for _ in range(60)]
+    assert all(wait == 0 for wait in waits)
+    
+    # Later callers get increasing, distinct waits instead of all waking together
+    next_waits = [limiter.reserve(0) for _ in range(3)]
+    assert next_waits == [1.0, 2.0, 3.0], next_waits
+    print(f"✅ Waits after burst: {next_waits}")
+
+
+def test_token_bucket_limits_large_prompts():
+    """Test that the TPM bucket accounts for request size."""
+    print("\nTesting token bucket...")
+    
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=6000, clock=clock, sleep=clock.sleep)
+    
+    assert limiter.acquire(4000) == 0
+    wait = limiter.acquire(4000)
+    # 2000 tokens of debt at 100 tokens/second
+    assert abs(wait - 20.0) < 1e-9, wait
+    assert clock.now == 20.0
+    
+    # Oversized requests are capped at the bucket capacity instead of blocking forever
+    clock.now += 60
+    assert limiter.acquire(10 ** 6) == 0
+    print("✅ Token bucket waits scale with request size")
+
+
+def test_headers_adapt_limits():
+    """Test adaptation from x-ratelimit-* response headers."""
+    print("\nTesting header adaptation...")
+    
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=500, tokens_per_minute=30000, clock=clock, sleep=clock.sleep)
+    
+    limiter.update_from_headers({
+        "x-ratelimit-limit-requests": "200",
+        "x-ratelimit-remaining-requests": "199",
+        "x-ratelimit-limit-tokens": "10000",
+        "x-ratelimit-remaining-tokens": "0",
+        "x-ratelimit-reset-tokens": "6s",
+    })
+    
+    stats = limiter.stats()
+    assert stats["requests_per_minute"] == 200
+    assert stats["tokens_per_minute"] == 10000
+    
+    # The server is out of tokens, so the next call waits at least until the reset
+    wait = limiter.reserve(100)
+    assert wait >= 6.0, wait
+    
+    # Missing or empty headers are ignored
+    limiter.update_from_headers(None)
+    limiter.update_from_headers({})
+    print(f"✅ Limits adapted from headers: {stats}")
+
+
+def test_limiters_per_model():
+    """Test that each model gets its own buckets, adapted only from its own headers."""
+    print("\nTesting per-model limiters...")
+    
+    strong = get_rate_limiter("chat", "test-strong-model")
+    cheap = get_rate_limiter("chat", "test-cheap-model")
+    assert strong is not cheap
+    assert get_rate_limiter("chat", "test-strong-model") is strong
+    assert get_rate_limiter("embedding", "test-strong-model") is not strong
+    
+    # The cheap model's far larger limits must not let strong-model requests burst
+    cheap.update_from_headers({"x-ratelimit-limit-requests": "30000", "x-ratelimit-limit-tokens": "150000000"})
+    strong.update_from_headers({"x-ratelimit-limit-requests": "500", "x-ratelimit-limit-tokens": "30000"})
+    assert cheap.stats()["requests_per_minute"] == 30000
+    assert strong.stats()["requests_per_minute"] == 500 and strong.stats()["tokens_per_minute"] == 30000
+    print("✅ Cascade tiers are limited independently")
+
+
+def main():
+    """Main test function."""
+    print("🧪 Testing Rate Limiter")
+    print("=" * 50)
+    
+    test_parse_reset_duration()
+    test_request_bucket_spaces_out_calls()
+    test_token_bucket_limits_large_prompts()
+    test_headers_adapt_limits()
+    test_limiters_per_model()
+    
+    print("\n🎉 All rate limiter tests completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Test script for the rule-based pre-classifier and the multi-pattern matcher.
+"""
+
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend import pattern_matcher
+from backend.pattern_matcher import PatternMatcher
+from backend.rules_engine import RulesEngine, load_rules_file
+from backend.config import Config
+from utils.email_record import decode_header_value
+from utils.header_parser import read_headers
+
+
+def test_pattern_matcher_finds_every_id():
+    """Test that one call reports all matching ids, case-insensitively."""
+    print("Testing PatternMatcher...")
+    
+    patterns = [("meeting", "accepted:"), ("meeting", "declined:"), ("urgent", "asap"), ("urgent", "urgent"),
+                ("medium:update", "update"), ("low:update", "update")]
+    for threshold in (pattern_matcher.LARGE_PATTERN_SET, 0):
+        # Exercise both the per-keyword and the combined-regex scan
+        original = pattern_matcher.LARGE_PATTERN_SET
+        pattern_matcher.LARGE_PATTERN_SET = threshold
+        try:
+            matcher = PatternMatcher(patterns, [("ticket", r"\bINC\d{7}\b")])
+        finally:
+            pattern_matcher.LARGE_PATTERN_SET = original
+        
+        assert matcher.find_all("Accepted: Sync - please reply ASAP re INC1315407") == {"meeting", "urgent", "ticket"}
+        assert matcher.find_all("Declined: lunch") == {"meeting"}
+        # A keyword shared by two ids reports both
+        assert matcher.find_all("Status UPDATE") == {"medium:update", "low:update"}
+        assert matcher.find_all("nothing here") == set()
+        assert matcher.find_all(None) == set()
+        assert matcher.search("URGENT") == "urgent"
+        assert matcher.search("plain text") is None
+    print("✅ All matching ids returned in one call")
+
+
+def test_rules_first_match_and_predicates():
+    """Test predicate conjunction, sender domains, headers and body limits."""
+    print("\nTesting rule evaluation...")
+    
+    engine = RulesEngine([
+        {"id": "expenses", "subject": "expense report", "sender_domain": "concursolutions.com",
+         "quadrant": "delete", "confidence": 0.85},
+        {"id": "auto_reply", "headers": {"Auto-Submitted": ["auto-replied"]}, "quadrant": "delete"},
+        {"id": "short_accept", "body": "accepted this meeting", "body_max_chars": 100, "quadrant": "delete"},
+        {"id": "outage", "subject_regex": r"^(urgent|p1)\b", "quadrant": "do", "confidence": 0.8},
+    ])
+    
+    assert engine.match("Expense Report Status Change", "body", "Concur <AutoNotification@eu.concursolutions.com>").id == "expenses"
+    assert engine.match("Expense Report Status Change", "body", "someone@example.com") is None
+    assert engine.match("Out", "body", "a@b.com", {"auto-submitted": "auto-replied"}).id == "auto_reply"
+    assert engine.match("Sync", "Bob accepted this meeting.", "a@b.com").id == "short_accept"
+    assert engine.match("Sync", "Bob accepted this meeting." + "x" * 200, "a@b.com") is None
+    
+    result = engine.classify("URGENT: db down", "Production database is down")
+    assert result["quadrant"] == "do" and result["confidence"] == 0.8
+    assert "(rule: outage)" in result["reasoning"]
+    
+    stats = engine.stats()
+    assert stats["evaluated"] == 6 and stats["matched"] == 4
+    assert stats["hits"] == {"expenses": 1, "auto_reply": 1, "short_accept": 1, "outage": 1}
+    print("✅ Rules match on every listed predicate and count their hits")
+
+
+def test_invalid_rules_rejected():
+    """Test validation of rule definitions."""
+    print("\nTesting rule validation...")
+    
+    invalid = [
+        [{"id": "a", "subject": "x", "quadrant": "urgent"}],
+        [{"id": "a", "quadrant": "delete"}],
+        [{"id": "a", "subjects": "x", "quadrant": "delete"}],
+        [{"id": "a", "subject": "x", "quadrant": "delete"}, {"id": "a", "subject": "y", "quadrant": "do"}],
+    ]
+    for rules in invalid:
+        try:
+            RulesEngine(rules)
+        except ValueError:
+            continue
+        raise AssertionError(f"Rules should have been rejected: {rules}")
+    print("✅ Invalid quadrants, missing predicates, typos and duplicate ids are rejected")
+
+
+def test_match_envelope():
+    """Test header-only matching defers to earlier rules that need the body."""
+    print("\nTesting header-only matching...")
+    
+    engine = RulesEngine([
+        {"id": "short_accept", "subject": "sync", "body": "accepted this meeting", "quadrant": "delete"},
+        {"id": "auto_reply", "headers": {"Auto-Submitted": ["auto-replied"]}, "quadrant": "delete"},
+        {"id": "outage", "subject_regex": r"^(urgent|p1)\b", "quadrant": "do"},
+    ])
+    
+    assert engine.match_envelope("URGENT: db down").id == "outage"
+    assert engine.match_envelope("Out", "a@b.com", {"Auto-Submitted": "auto-replied"}).id == "auto_reply"
+    # A body rule is still in the running, so the body decides
+    assert engine.match_envelope("Sync: urgent", "a@b.com", {"Auto-Submitted": "auto-replied"}) is None
+    assert engine.match_envelope("Lunch?") is None
+    
+    # Header-only matches are counted only when recorded
+    assert engine.stats()["evaluated"] == 0
+    engine.record("outage")
+    engine.record(None)
+    stats = engine.stats()
+    assert stats["evaluated"] == 2 and stats["hits"]["outage"] == 1
+    print("✅ Headers settle an email only when no body rule could take precedence")
+
+
+def test_shipped_rules_file():
+    """Test the default rules file loads and classifies typical notifications."""
+    print("\nTesting the shipped rules file...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "rules.json"
+        path.write_text(json.dumps({"rules": [{"id": "a", "subject": "x", "quadrant": "delete"}]}))
+        assert load_rules_file(path)[0]["id"] == "a"
+    
+    engine = RulesEngine.from_file(Config.TRIAGE_RULES_PATH)
+    assert engine.match("Accepted: Infosys Sync", "Meeting accepted").id == "meeting_response"
+    assert engine.match("Automatic reply: Bayer go-live", "I am out of office").id == "automatic_reply"
+    assert engine.match("Congratulations! You have earned a new achievement.", "Well done").id == "achievement_notice"
+    assert engine.match("Re: Proposal accepted: next steps", "Let's discuss the contract tomorrow") is None
+    
+    newsletter = {"List-Unsubscribe": "<https://writer.substack.com/u?id=1>, <mailto:unsub@substack.com>",
+                  "List-Unsubscribe-Post": "List-Unsubscribe=One-Click"}
+    assert engine.match_envelope("This week in AI", "Writer <writer@substack.com>", newsletter).id == "vendor_newsletter"
+    # One-click unsubscribe headers alone are not enough: transactional senders add them too
+    assert engine.match_envelope("Your upcoming trip", "travel@booking.example", newsletter) is None
+    # Discussion lists and tool notifications also carry List-Unsubscribe; they still go to the model
+    notification = {"List-Unsubscribe": "<mailto:unsub@github.com>", "Precedence": "list"}
+    assert engine.match("[repo] Review requested on #42", "Please review", None, notification) is None
+    print("✅ Default rules cover meeting responses, auto-replies, achievements and newsletters")
+
+
+def test_shipped_rules_keep_actionable_mail():
+    """Test the shipped rules settle no actionable ticket, HR or travel mail from its headers."""
+    print("\nTesting actionable sample mail reaches the strategies...")
+    
+    samples = project_root / "data" / "sample_emails" / "eml_files"
+    actionable = [
+        "Incident is awaiting your input - INC1315407.eml",
+        "Action required - Prepare for your Quarterly Growth Conversation.eml",
+        "Required training assigned - Use AI Day 2025.eml",
+        "QGC Feedback request for Brian Davis.eml",
+        "Finance Task - FT0309787 has been commented 2.eml",
+        "Infosys - Adidas   Sales Request SREQ9151047 has been commented 2.eml",
+        "Your upcoming trip to Las Vegas, Nevada.eml",
+    ]
+    engine = RulesEngine.from_file(Config.TRIAGE_RULES_PATH)
+    for name in actionable:
+        headers, _ = read_headers(samples / name)
+        # Bulk-precedence ticket mail and one-click transactional mail must not be settled as newsletters
+        assert headers.get("Precedence") == "bulk" or headers.get("List-Unsubscribe-Post"), name
+        rule = engine.match_envelope(decode_header_value(headers.get("subject")),
+                                     decode_header_value(headers.get("from")), headers)
+        assert rule is None, f"{name} settled by {rule.id}"
+    print(f"✅ {len(actionable)} actionable sample emails are left to the strategies")
+
+
+def main():
+    """Main test function."""
+    print("🧪 Testing Rules Engine")
+    print("=" * 50)
+    
+    test_pattern_matcher_finds_every_id()
+    test_rules_first_match_and_predicates()
+    test_invalid_rules_rejected()
+    test_match_envelope()
+    test_shipped_rules_file()
+    test_shipped_rules_keep_actionable_mail()
+    
+    print("\n🎉 All rules engine tests completed!")
+
+
+if __name__ == "__main__":
+    main()
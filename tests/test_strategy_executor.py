@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Test script for the strategy dependency graph.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend import strategy_executor, supabase_client
+from backend.strategy_executor import StrategyGraph, build_email_strategy_graph
+
+STEP_SECONDS = 0.2
+
+
+def test_graph_runs_independent_steps_concurrently():
+    """Test that independent steps overlap and dependent steps wait for their inputs."""
+    print("Testing StrategyGraph scheduling...")
+    
+    spans = {}
+    
+    def timed(name, blocking=False):
+        # Blocking steps run in a worker thread, coroutines on the loop; both must overlap
+        def sync_step(*inputs):
+            start = time.perf_counter()
+            time.sleep(STEP_SECONDS)
+            spans[name] = (start, time.perf_counter())
+            return [name, *inputs]
+        
+        async def async_step(*inputs):
+            start = time.perf_counter()
+            await asyncio.sleep(STEP_SECONDS)
+            spans[name] = (start, time.perf_counter())
+            return [name, *inputs]
+        return sync_step if blocking else async_step
+    
+    graph = (StrategyGraph()
+             .add("a", timed("a"))
+             .add("b", timed("b", blocking=True))
+             .add("c", timed("c"), depends_on=["a"])
+             .add("d", timed("d", blocking=True), depends_on=["c", "b"]))
+    
+    start = time.perf_counter()
+    results = graph.run_sync()
+    elapsed = time.perf_counter() - start
+    
+    # Critical path a -> c -> d, not the sum of all four steps
+    assert 3 * STEP_SECONDS <= elapsed < 3.75 * STEP_SECONDS, elapsed
+    assert abs(spans["a"][0] - spans["b"][0]) < STEP_SECONDS / 2
+    assert spans["c"][0] >= spans["a"][1] and spans["d"][0] >= max(spans["c"][1], spans["b"][1])
+    # Dependency results arrive in declaration order
+    assert results["d"] == ["d", ["c", ["a"]], ["b"]]
+    
+    try:
+        StrategyGraph().add("x", timed("x"), depends_on=["missing"])
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    print(f"✅ Four steps in {elapsed:.2f}s (critical path {3 * STEP_SECONDS:.2f}s)")
+
+
+def test_email_graph_order_and_overlap():
+    """Test the email graph runs the embedding chain alongside the independent strategies."""
+    print("\nTesting email strategy graph...")
+    
+    spans = {}
+    
+    def record(name, start):
+        spans[name] = (start, time.perf_counter())
+    
+    def classification(name):
+        return {"quadrant": "schedule", "confidence": 0.9, "reasoning": name, "source": "llm"}
+    
+    async def email_only(subject, body):
+        start = time.perf_counter()
+        await asyncio.sleep(STEP_SECONDS)
+        record("email_only", start)
+        return classification("email_only")
+    
+    async def with_context(subject, body, sender_profile):
+        start = time.perf_counter()
+        await asyncio.sleep(STEP_SECONDS)
+        record("with_context", start)
+        return classification("with_context")
+    
+    async def embedding(text):
+        start = time.perf_counter()
+        await asyncio.sleep(STEP_SECONDS)
+        record("embedding", start)
+        return [0.1] * 8
+    
+    def similar(vector, top_k=5):
+        start = time.perf_counter()
+        time.sleep(STEP_SECONDS)
+        record("similar", start)
+        return [{"email_id": "n1", "score": 0.9, "quadrant": "do", "confidence": 0.9, "reasoning": "Outage",
+                 "triage_email_only": {"quadrant": "do", "confidence": 0.9, "reasoning": "Outage", "source": "llm"},
+                 "summary": "Outage"}]
+    
+    async def with_embedding(subject, body, contexts):
+        start = time.perf_counter()
+        await asyncio.sleep(STEP_SECONDS)
+        record("with_embedding", start)
+        assert "Outage" in contexts
+        return classification("with_embedding")
+    
+    async def with_outcomes(subject, body, contexts, past_results):
+        start = time.perf_counter()
+        await asyncio.sleep(STEP_SECONDS)
+        record("with_outcomes", start)
+        assert past_results and past_results[0]["message_id"] == "n1"
+        return classification("with_outcomes")
+    
+    stubs = {
+        (strategy_executor, "triage_email_only_async"): email_only,
+        (strategy_executor, "triage_with_context_async"): with_context,
+        (strategy_executor, "get_embedding_async"): embedding,
+        (strategy_executor, "triage_with_embedding_async"): with_embedding,
+        (strategy_executor, "triage_with_outcomes_async"): with_outcomes,
+        (strategy_executor, "classify_with_rules"): lambda *args: None,
+        (supabase_client, "find_similar_emails_with_labels"): similar,
+        (supabase_client, "store_embedding"): lambda email_id, vector: True,
+    }
+    config = strategy_executor.Config
+    settings = {"LOCAL_CLASSIFIER_ENABLED": False, "KNN_VOTE_ENABLED": False, "TRIAGE_MODE": "separate"}
+    saved = {key: getattr(*key) for key in stubs}
+    saved_settings = {name: getattr(config, name) for name in settings}
+    for (module, name), stub in stubs.items():
+        setattr(module, name, stub)
+    for name, value in settings.items():
+        setattr(config, name, value)
+    try:
+        graph = build_email_strategy_graph("Server down", "Production is down", "email-1", embedding_stored=True)
+        start = time.perf_counter()
+        results = graph.run_sync()
+        elapsed = time.perf_counter() - start
+    finally:
+        for (module, name), value in saved.items():
+            setattr(module, name, value)
+        for name, value in saved_settings.items():
+            setattr(config, name, value)
+    
+    for name in ("email_only", "with_context", "with_embedding", "with_outcomes"):
+        assert results[name]["reasoning"] == name
+    
+    # embedding -> similar -> with_embedding / with_outcomes, in that order
+    assert spans["similar"][0] >= spans["embedding"][1]
+    for name in ("with_embedding", "with_outcomes"):
+        assert spans[name][0] >= spans["similar"][1]
+    # The independent strategies start with the embedding instead of waiting for the chain
+    for name in ("email_only", "with_context"):
+        assert spans[name][0] - spans["embedding"][0] < STEP_SECONDS / 2
+    # Total time is the critical path (three steps), not the six steps run one after another
+    assert 3 * STEP_SECONDS <= elapsed < 4 * STEP_SECONDS, elapsed
+    print(f"✅ Six steps in {elapsed:.2f}s (critical path {3 * STEP_SECONDS:.2f}s)")
+
+
+def main():
+    """Main test function."""
+    print("🧪 Testing Strategy Executor")
+    print("=" * 50)
+    
+    test_graph_runs_independent_steps_concurrently()
+    test_email_graph_order_and_overlap()
+    
+    print("\n" + "=" * 50)
+    print("🎉 All strategy executor tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,7 +23,10 @@ from supabase_client import (
     store_embedding,
     upsert_triage_result,
     get_triage_result,
-    get_recent_triage_results
+    get_recent_triage_results,
+    get_triage_results_many,
+    get_email_summaries_many,
+    get_sender_profile_cache_stats
 )
 
 
@@ -110,6 +113,32 @@ def test_sender_profiles():
     return True
 
 
+def test_sender_profile_cache():
+    """Test that repeat lookups and unknown senders are served from the cache."""
+    print("\nTesting sender profile cache...")
+    
+    timestamp = int(time.time())
+    test_email = f"cache.user.{timestamp}@example.com"
+    
+    # Unknown sender: the second lookup is a cached negative entry
+    before = get_sender_profile_cache_stats()
+    assert get_sender_profile(test_email) == {}
+    assert get_sender_profile(test_email) == {}
+    after = get_sender_profile_cache_stats()
+    assert after["hits"] == before["hits"] + 1, "Negative lookup should be cached"
+    
+    # Creating the profile invalidates the cached miss
+    assert create_sender_profile(test_email, {"name": "Cache User"}), "Failed to create profile"
+    assert get_sender_profile(test_email).get("name") == "Cache User"
+    
+    # Updating invalidates the cached profile
+    assert update_sender_profile(test_email, {"name": "Renamed User"}), "Failed to update profile"
+    assert get_sender_profile(test_email).get("name") == "Renamed User"
+    
+    print("✅ Sender profile cache working correctly")
+    return True
+
+
 def test_embedding_functions():
     """Test embedding functions."""
     print("\nTesting embedding functions...")
@@ -154,33 +183,33 @@ def test_embedding_functions():
 def test_triage_results():
     """Test triage result functions."""
     print("\nTesting triage result functions...")
-
+    
     test_message_id = "test_triage_message_67890"
-
+    
     # Test storing triage results
     print(f"Storing triage results for {test_message_id}...")
-
+    
     email_only_result = {
         "quadrant": "do",
         "confidence": 0.85,
         "reasoning": "Urgent server issue requires immediate attention"
     }
-
+    
     contextual_result = {
         "quadrant": "do",
         "confidence": 0.92,
         "reasoning": "Urgent server issue from IT admin requires immediate attention"
     }
-
+    
     embedding_result = {
         "quadrant": "do",
         "confidence": 0.88,
         "reasoning": "Similar to previous urgent server issues"
     }
-
+    
     success = upsert_triage_result(test_message_id, email_only_result, contextual_result, embedding_result)
     assert success, "Failed to store triage results"
-
+    
     # Test retrieving triage results
     print(f"Retrieving triage results for {test_message_id}...")
     retrieved_result = get_triage_result(test_message_id)
@@ -188,11 +217,88 @@ def test_triage_results():
     assert "triage_email_only" in retrieved_result, "Missing email_only result"
     assert "triage_with_context" in retrieved_result, "Missing contextual result"
     assert "triage_with_embedding" in retrieved_result, "Missing embedding result"
-
+    
     print("✅ Triage result functions working correctly")
     return True
 
 
+def test_bulk_triage_lookups():
+    """Test fetching several neighbours' triage results in one request."""
+    print("\nTesting bulk triage lookups...")
+    
+    stored_id = "test_triage_message_67890"
+    missing_id = "test_missing_message_00000"
+    
+    results = get_triage_results_many([stored_id, missing_id, stored_id])
+    assert stored_id in results, "Stored triage result missing from bulk fetch"
+    assert missing_id not in results, "Unknown message_id should be absent"
+    assert set(results[stored_id]) == {"message_id", "triage_email_only"}, "Projection should limit columns"
+    
+    summaries = get_email_summaries_many([stored_id, missing_id], results)
+    assert summaries[stored_id] == results[stored_id]["triage_email_only"]["reasoning"]
+    assert summaries[missing_id] == ""
+    
+    assert get_triage_results_many([]) == {}
+    
+    print("✅ Bulk triage lookups working correctly")
+    return True
+
+
+def test_labelled_rpc_fallback():
+    """Test that only a missing function disables the labelled RPC, and raw summaries join on message_id."""
+    print("\nTesting labelled RPC fallback...")
+    import supabase_client
+    
+    class Query:
+        def __init__(self, client, name):
+            self.client, self.name = client, name
+        
+        def __getattr__(self, method):
+            def record(*args):
+                self.client.calls.append((self.name, method) + args)
+                return self
+            return record
+        
+        def execute(self):
+            if self.name == "match_embeddings_with_labels":
+                raise self.client.rpc_error
+            rows = {"emails_raw": [{"message_id": "raw_only", "subject": "Lunch?", "body": "Noon"}]}
+            return type("Response", (), {"data": rows.get(self.name, [])})()
+    
+    class FakeClient:
+        def __init__(self, rpc_error):
+            self.rpc_error, self.calls = rpc_error, []
+        
+        def rpc(self, name, params):
+            return Query(self, name)
+        
+        def table(self, name):
+            return Query(self, name)
+    
+    saved = (supabase_client.supabase, supabase_client._labelled_rpc_available,
+             supabase_client.Config.VECTOR_SEARCH_BACKEND, supabase_client.find_similar_emails)
+    supabase_client.Config.VECTOR_SEARCH_BACKEND = "supabase"
+    supabase_client.find_similar_emails = lambda embedding, top_k: [{"email_id": "raw_only", "score": 0.9}]
+    try:
+        supabase_client._labelled_rpc_available = True
+        supabase_client.supabase = FakeClient(Exception("canceling statement due to statement timeout"))
+        rows = supabase_client.find_similar_emails_with_labels([0.1] * 1536)
+        assert supabase_client._labelled_rpc_available, "A transient error must not disable the RPC"
+        assert rows[0]["summary"] == "Lunch?\nNoon"
+        assert ("emails_raw", "in_", "message_id", ["raw_only"]) in supabase_client.supabase.calls
+        
+        supabase_client.supabase = FakeClient(Exception(
+            "{'code': 'PGRST202', 'message': 'Could not find the function public.match_embeddings_with_labels'}"))
+        supabase_client.find_similar_emails_with_labels([0.1] * 1536)
+        assert not supabase_client._labelled_rpc_available
+    finally:
+        (supabase_client.supabase, supabase_client._labelled_rpc_available,
+         supabase_client.Config.VECTOR_SEARCH_BACKEND, supabase_client.find_similar_emails) = saved
+    
+    print("✅ Missing function detected, other errors retried")
+    return True
+
+
 def test_error_handling():
     """Test error handling with invalid data."""
     print("\nTesting error handling...")
@@ -237,8 +343,11 @@ def main():
     # Run all tests
     tests = [
         ("Sender Profiles", test_sender_profiles),
+        ("Sender Profile Cache", test_sender_profile_cache),
         ("Embedding Functions", test_embedding_functions),
         ("Triage Results", test_triage_results),
+        ("Bulk Triage Lookups", test_bulk_triage_lookups),
+        ("Labelled RPC Fallback", test_labelled_rpc_fallback),
         ("Error Handling", test_error_handling)
     ]
     
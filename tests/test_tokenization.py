@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test script for shared tokenization.
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend import tokenization
+from backend.tokenization import TokenizedText
+
+
+class CountingEncoding:
+    """Whitespace 'tokenizer' that counts encode calls."""
+
+    def __init__(self):
+        self.encode_calls = 0
+
+    def encode(self, text, disallowed_special=()):
+        self.encode_calls += 1
+        return [len(word) for word in text.split(" ")]
+
+    def decode(self, tokens):
+        return " ".join("x" * length for length in tokens)
+
+
+def test_single_encode_per_text():
+    """Test that counting and truncating at several budgets encode once."""
+    print("Testing single-pass tokenization...")
+    
+    encoding = CountingEncoding()
+    tokenized = TokenizedText("aa bbb c dddd ee", encoding=encoding)
+    
+    assert tokenized.count() == 5
+    assert tokenized.truncate(10) == tokenized.text
+    assert tokenized.truncate(3) == "xx xxx x"
+    assert tokenized.truncate(2) == "xx xxx"
+    assert tokenized.truncated(3) is tokenized.truncated(3)
+    assert tokenized.truncated(3).count() == 3
+    assert tokenized.decode(1, 3) == "xxx x"
+    assert encoding.encode_calls == 1
+    print("✅ One encode serves every count and truncation")
+
+
+def test_character_fallback():
+    """Test the four-characters-per-token estimate without an encoding."""
+    print("\nTesting character fallback...")
+    
+    tokenized = TokenizedText("a" * 100)
+    tokenized._encoding = None
+    assert tokenized.count() == 25
+    assert tokenized.truncate(10) == "a" * 40
+    assert tokenized.truncate(50) == tokenized.text
+    print("✅ Character estimates used when tiktoken is unavailable")
+
+
+def test_tokenize_memoizes_texts():
+    """Test that tokenize() returns the shared instance for repeated texts."""
+    print("\nTesting tokenize() memo...")
+    
+    original = (tokenization.TIKTOKEN_AVAILABLE, tokenization._encoding, tokenization._encoding_failed)
+    encoding = CountingEncoding()
+    tokenization.TIKTOKEN_AVAILABLE, tokenization._encoding, tokenization._encoding_failed = True, encoding, False
+    tokenization._memo.clear()
+    try:
+        body = "one two three four five six"
+        assert tokenization.count_tokens(body) == 6
+        assert tokenization.truncate_tokens(body, 4) == "xxx xxx xxxxx xxxx"
+        assert tokenization.tokenize(body) is tokenization.tokenize(body)
+        
+        # The truncated prefix is memoized with its tokens, so counting it is free
+        assert tokenization.count_tokens("xxx xxx xxxxx xxxx") == 4
+        assert encoding.encode_calls == 1
+    finally:
+        tokenization.TIKTOKEN_AVAILABLE, tokenization._encoding, tokenization._encoding_failed = original
+        tokenization._memo.clear()
+    print("✅ Repeated texts and truncated prefixes are not re-encoded")
+
+
+def main():
+    """Main test function."""
+    print("🧪 Testing Tokenization")
+    print("=" * 50)
+    
+    test_single_encode_per_text()
+    test_character_fallback()
+    test_tokenize_memoizes_texts()
+    
+    print("\n🎉 All tokenization tests completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ Test script for triage_core.py module.
 import json
 import sys
 import os
+import threading
 from pathlib import Path
 
 # Add backend to path
@@ -14,6 +15,7 @@ backend_path = project_root / "backend"
 sys.path.insert(0, str(backend_path))
 
 from triage_core import triage_email_only, triage_with_context, triage_with_outcomes, get_quadrant_description
+from triage_core import build_fused_messages, _parse_fused_response, vote_neighbor_labels
 from config import Config
 
 
@@ -187,6 +189,235 @@ def test_quadrant_descriptions():
         print(f"  {quadrant}: {description}")
 
 
+def test_fused_response_parsing():
+    """Test the single-request mode's prompt and per-strategy validation."""
+    print("\nTesting fused classification parsing...")
+    
+    messages = build_fused_messages("Lunch?", "Want to grab lunch on Friday?", {"tags": ["friend"]},
+                                    strategies=["email_only", "with_context"])
+    prompt = messages[1]["content"]
+    assert prompt.count("Want to grab lunch on Friday?") == 1
+    assert '"with_context"' in prompt and '"with_embedding"' not in prompt
+    assert "Similar examples" not in prompt
+    
+    class Response:
+        def __init__(self, content):
+            message = type("Message", (), {"content": content})()
+            self.choices = [type("Choice", (), {"message": message})()]
+    
+    content = json.dumps({
+        "email_only": {"quadrant": "delete", "confidence": 0.7, "reasoning": "Social"},
+        "with_context": {"quadrant": "urgent", "confidence": 0.7, "reasoning": "Invalid quadrant"},
+    })
+    results = _parse_fused_response(Response(content), ["email_only", "with_context", "with_outcomes"])
+    assert results["email_only"]["quadrant"] == "delete"
+    assert results["with_context"]["quadrant"] == "delegate"  # triage_with_context fallback
+    assert results["with_outcomes"]["quadrant"] == "schedule"  # missing entry falls back alone
+    
+    results = _parse_fused_response(None, ["email_only"])
+    assert results["email_only"]["reasoning"].startswith("Fallback due to OpenAI failure")
+    print("✅ Each fused judgment is validated and falls back independently")
+
+
+def test_neighbor_vote():
+    """Test the similarity-weighted kNN vote and its split-vote fallback."""
+    print("\nTesting neighbour label vote...")
+    
+    def neighbours(*labelled):
+        matches = [{"email_id": f"n{i}", "score": score} for i, (_, score) in enumerate(labelled)]
+        results = {f"n{i}": {"triage_email_only": {"quadrant": quadrant}}
+                   for i, (quadrant, _) in enumerate(labelled) if quadrant}
+        return matches, results
+    
+    result = vote_neighbor_labels(*neighbours(("do", 0.9), ("do", 0.85), ("do", 0.8), ("delete", 0.6)))
+    assert result["quadrant"] == "do"
+    assert 0.5 < result["confidence"] < 1.0
+    
+    # More agreeing neighbours, more confidence
+    larger = vote_neighbor_labels(*neighbours(*[("do", 0.9)] * 8))
+    smaller = vote_neighbor_labels(*neighbours(*[("do", 0.9)] * 3))
+    assert larger["confidence"] > smaller["confidence"]
+    
+    # Split votes, thin neighbourhoods and the email itself go to GPT-4
+    assert vote_neighbor_labels(*neighbours(("do", 0.9), ("schedule", 0.9), ("delete", 0.9))) is None
+    assert vote_neighbor_labels(*neighbours(("do", 0.9), ("do", 0.9), (None, 0.9))) is None
+    matches, results = neighbours(("do", 1.0), ("do", 0.9), ("do", 0.9))
+    assert vote_neighbor_labels(matches, results, exclude_id="n0") is None
+    
+    # Only LLM judgments vote: rule, local classifier and earlier vote results are the system's own outputs
+    matches, results = neighbours(("do", 0.9), ("do", 0.9), ("do", 0.9))
+    for email_id, source in zip(results, ("rule", "local", "knn")):
+        results[email_id]["triage_email_only"]["source"] = source
+    assert vote_neighbor_labels(matches, results) is None
+    results["n1"]["triage_email_only"] = {"quadrant": "do", "reasoning": "Local embedding classifier (90 labelled emails)"}
+    results["n2"]["triage_email_only"]["source"] = "llm"
+    assert vote_neighbor_labels(matches, results) is None  # legacy local result recognised by its reasoning
+    print("✅ Decisive votes classify locally; split votes defer to GPT-4")
+
+
+def test_model_cascade():
+    """Test that the cheap model's confident answers are kept and the rest escalate."""
+    print("\nTesting model cascade...")
+    import triage_core
+    
+    class Response:
+        def __init__(self, content):
+            message = type("Message", (), {"content": content})()
+            self.choices = [type("Choice", (), {"message": message})()]
+    
+    answers = {}
+    models = []
+    
+    def fake_completion(messages, model=None, max_retries=5, max_tokens=400, validate=None):
+        models.append(model or triage_core.Config.OPENAI_MODEL)
+        return Response(json.dumps(answers[models[-1]]))
+    
+    saved = (triage_core.safe_openai_chat_completion, triage_core.Config.MODEL_CASCADE_ENABLED)
+    triage_core.safe_openai_chat_completion = fake_completion
+    triage_core.Config.MODEL_CASCADE_ENABLED = True
+    cheap, strong = triage_core.Config.OPENAI_CHEAP_MODEL, triage_core.Config.OPENAI_MODEL
+    try:
+        answers[cheap] = {"quadrant": "delete", "confidence": 0.95, "reasoning": "Newsletter"}
+        answers[strong] = {"quadrant": "do", "confidence": 0.9, "reasoning": "Outage"}
+        result = triage_core._cascade_chat_triage([], "triage_email_only")
+        assert result["quadrant"] == "delete" and models == [cheap]
+        # The cheap model's answers never become ground truth for the vote or the local classifier
+        assert result["source"] == "llm_cheap" and result["model"] == cheap
+        assert not triage_core.is_llm_label(result)
+        
+        # Unsure or invalid cheap answers go to the strong model
+        for cheap_answer in ({"quadrant": "delete", "confidence": 0.4, "reasoning": "?"},
+                             {"quadrant": "urgent", "confidence": 0.99, "reasoning": "Bad quadrant"}):
+            models.clear()
+            answers[cheap] = cheap_answer
+            result = triage_core._cascade_chat_triage([], "triage_email_only")
+            assert result["quadrant"] == "do" and models == [cheap, strong]
+            assert triage_core.is_llm_label(result)
+        
+        # Fused: only the unsure judgments are re-requested
+        answers[cheap] = {"email_only": {"quadrant": "delete", "confidence": 0.95, "reasoning": "Newsletter"},
+                          "with_context": {"quadrant": "delete", "confidence": 0.5, "reasoning": "?"}}
+        answers[strong] = {"with_context": {"quadrant": "schedule", "confidence": 0.9, "reasoning": "Known sender"}}
+        requested = []
+        results = triage_core._cascade_fused_triage(lambda names: requested.append(names) or [],
+                                                    ["email_only", "with_context"])
+        assert requested == [["email_only", "with_context"], ["with_context"]]
+        assert results["email_only"]["quadrant"] == "delete" and results["with_context"]["quadrant"] == "schedule"
+        assert not triage_core.is_llm_label(results["email_only"]) and triage_core.is_llm_label(results["with_context"])
+        
+        stats = triage_core.get_model_cascade_stats()
+        assert stats["accepted"] >= 2 and stats["escalated"] >= 3
+        assert stats["tiers"]["strong"]["requests"] >= 3
+    finally:
+        triage_core.safe_openai_chat_completion, triage_core.Config.MODEL_CASCADE_ENABLED = saved
+    print("✅ Confident cheap answers are kept, the rest escalate")
+
+
+def test_prompt_fingerprint():
+    """Test that rules, the local classifier and vote settings are part of the fingerprint."""
+    print("\nTesting prompt fingerprint...")
+    import tempfile
+    import triage_core
+    
+    config = triage_core.Config
+    names = ("TRIAGE_RULES_PATH", "TRIAGE_RULES_ENABLED", "LOCAL_CLASSIFIER_ENABLED", "LOCAL_CLASSIFIER_PATH",
+             "KNN_VOTE_ENABLED", "KNN_VOTE_MIN_SHARE", "HTML_TEXT_MAX_CHARS")
+    saved = {name: getattr(config, name) for name in names}
+    with tempfile.TemporaryDirectory() as tmp:
+        rules, model = Path(tmp) / "rules.json", Path(tmp) / "model.npz"
+        rules.write_text('{"rules": []}')
+        model.write_bytes(b"weights v1")
+        try:
+            config.TRIAGE_RULES_ENABLED, config.TRIAGE_RULES_PATH = True, str(rules)
+            config.LOCAL_CLASSIFIER_ENABLED, config.LOCAL_CLASSIFIER_PATH = True, str(model)
+            config.KNN_VOTE_ENABLED = True
+            fingerprints = [triage_core.prompt_fingerprint()]
+            assert triage_core.prompt_fingerprint() == fingerprints[0]
+            
+            rules.write_text('{"rules": [{"id": "new", "subject": ["x"], "quadrant": "delete"}]}')
+            fingerprints.append(triage_core.prompt_fingerprint())
+            model.write_bytes(b"weights v2")  # retrained
+            fingerprints.append(triage_core.prompt_fingerprint())
+            config.KNN_VOTE_MIN_SHARE += 0.05
+            fingerprints.append(triage_core.prompt_fingerprint())
+            config.HTML_TEXT_MAX_CHARS += 1000
+            fingerprints.append(triage_core.prompt_fingerprint())
+        finally:
+            for name, value in saved.items():
+                setattr(config, name, value)
+    assert len(set(fingerprints)) == len(fingerprints)
+    print("✅ Editing a rule, retraining or retuning settles nothing old")
+
+
+def test_cache_only_accepted_replies():
+    """Test that chat replies are cached only when the triage parsers accept them."""
+    print("\nTesting validated response cache...")
+    import triage_core
+    from openai.types.chat import ChatCompletion
+    
+    def completion(content):
+        return ChatCompletion.model_validate({
+            "id": "c", "object": "chat.completion", "created": 0, "model": "m",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": json.dumps(content)}}]
+        })
+    
+    class FakeCache(dict):
+        def set(self, key, value):
+            self[key] = value
+    
+    valid = {"quadrant": "do", "confidence": 0.9, "reasoning": "Outage"}
+    cache = FakeCache()
+    saved = triage_core.get_llm_cache
+    triage_core.get_llm_cache = lambda: cache
+    try:
+        triage_core._store_chat_completion("bad_quadrant", completion({**valid, "quadrant": "urgent"}),
+                                           triage_core._valid_triage_response)
+        triage_core._store_chat_completion("good", completion(valid), triage_core._valid_triage_response)
+        assert list(cache) == ["good"]
+        assert triage_core._cached_chat_completion("good", triage_core._valid_triage_response) is not None
+        
+        fused = triage_core._fused_validator(["email_only", "with_context"])
+        triage_core._store_chat_completion("partial", completion({"email_only": valid}), fused)
+        triage_core._store_chat_completion("fused", completion({"email_only": valid, "with_context": valid}), fused)
+        assert sorted(cache) == ["fused", "good"]
+        
+        # Entries cached before validation existed are ignored, not served
+        cache["old"] = completion({"confidence": 2}).model_dump_json().encode("utf-8")
+        assert triage_core._cached_chat_completion("old", triage_core._valid_triage_response) is None
+    finally:
+        triage_core.get_llm_cache = saved
+    print("✅ Only accepted replies are cached")
+
+
+def test_shared_event_loop():
+    """Test that blocking callers in several threads share one loop, client and in-flight limit."""
+    print("\nTesting shared event loop...")
+    import asyncio
+    import triage_core
+    
+    async def resources():
+        return asyncio.get_running_loop(), triage_core._get_async_client(), triage_core._get_openai_semaphore()
+    
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(triage_core.run_coroutine_sync(resources())))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(seen) == 4 and len(set(seen)) == 1
+    
+    async def nested():
+        triage_core.run_coroutine_sync(resources())
+    try:
+        triage_core.run_coroutine_sync(nested())
+        assert False, "expected RuntimeError"
+    except RuntimeError:
+        pass
+    print("✅ One AsyncOpenAI client and semaphore for every blocking caller")
+
+
 def main():
     """Main test function."""
     print("🧪 Testing EisenhowerTriageAgent Core Module")
@@ -199,6 +430,12 @@ def main():
     
     # Run tests
     test_quadrant_descriptions()
+    test_fused_response_parsing()
+    test_neighbor_vote()
+    test_model_cascade()
+    test_prompt_fingerprint()
+    test_cache_only_accepted_replies()
+    test_shared_event_loop()
     test_email_only_classification()
     test_contextual_classification()
     test_outcomes_classification()
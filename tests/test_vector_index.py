@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-process vector index.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+project_root = Path(__file__).parent.parent
+backend_path = project_root / "backend"
+sys.path.insert(0, str(backend_path))
+
+from vector_index import VectorIndex
+
+
+def make_corpus(count=2000, dim=64, clusters=20, seed=1):
+    """Clustered random vectors, roughly like topic-grouped email embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size=count)
+    vectors = centers[labels] + 0.3 * rng.normal(size=(count, dim))
+    return [f"email_{i}" for i in range(count)], vectors
+
+
+def brute_force(vectors, query, k):
+    """Reference cosine top-k."""
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    return list(np.argsort(-scores)[:k])
+
+
+def test_exact_search_matches_brute_force():
+    """Test exact top-k, scores and the similarity threshold."""
+    print("Testing exact search...")
+    
+    ids, vectors = make_corpus()
+    index = VectorIndex(dim=64)
+    index.add_many(ids, vectors)
+    
+    query = vectors[17] + 0.01
+    matches = index.search(query, top_k=5, threshold=-1.0)
+    assert [m["email_id"] for m in matches] == [ids[i] for i in brute_force(vectors, query, 5)]
+    assert matches[0]["email_id"] == "email_17"
+    assert all(a["score"] >= b["score"] for a, b in zip(matches, matches[1:]))
+    
+    assert index.search(-query, top_k=5, threshold=0.99) == []
+    print("✅ Exact search agrees with brute force")
+
+
+def test_incremental_updates():
+    """Test that add() appends new rows and replaces existing ones."""
+    print("\nTesting incremental updates...")
+    
+    index = VectorIndex(dim=3)
+    index.add("a", [1.0, 0.0, 0.0])
+    index.add("b", [0.0, 1.0, 0.0])
+    assert index.search([0.0, 1.0, 0.0], top_k=1)[0]["email_id"] == "b"
+    
+    index.add("a", [0.0, 0.9, 0.1])
+    assert len(index) == 2
+    assert index.search([1.0, 0.0, 0.0], top_k=2, threshold=0.5) == []
+    print("✅ Upserts keep one row per email")
+
+
+def test_ivf_recall_and_persistence():
+    """Test approximate search recall and save/load round trip."""
+    print("\nTesting IVF mode and persistence...")
+    
+    ids, vectors = make_corpus()
+    index = VectorIndex(dim=64)
+    index.add_many(ids, vectors)
+    index.build_ivf(n_lists=20)
+    
+    rng = np.random.default_rng(7)
+    hits = 0
+    for row in rng.choice(len(ids), size=50, replace=False):
+        query = vectors[row] + 0.05 * rng.normal(size=64)
+        expected = {ids[i] for i in brute_force(vectors, query, 5)}
+        found = {m["email_id"] for m in index.search(query, top_k=5, threshold=-1.0, n_probe=4)}
+        hits += len(expected & found)
+    recall = hits / 250
+    print(f"   Recall@5 with 4/20 lists probed: {recall:.2f}")
+    assert recall >= 0.9
+    
+    # Rows added after clustering are assigned to a list and found
+    index.add("late", vectors[3])
+    assert "late" in {m["email_id"] for m in index.search(vectors[3], top_k=2, n_probe=2)}
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "index.npz"
+        index.synced_at = "2024-01-01T00:00:00+00:00"
+        index.save(path)
+        loaded = VectorIndex.load(path)
+        assert len(loaded) == len(index)
+        assert loaded.synced_at == index.synced_at
+        assert loaded.search(vectors[42], top_k=3, n_probe=4) == index.search(vectors[42], top_k=3, n_probe=4)
+    print("✅ IVF search keeps high recall and survives a save/load")
+
+
+def main():
+    """Main test function."""
+    print("🧪 Testing Vector Index")
+    print("=" * 50)
+    
+    test_exact_search_matches_brute_force()
+    test_incremental_updates()
+    test_ivf_recall_and_persistence()
+    
+    print("\n🎉 All vector index tests completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Canonical email extraction shared by every entry point.
+
+The batch script, the Streamlit app and the parse workers all turn a message
+into an EmailRecord here, so the same email always yields the same subject,
+body and content hash whichever path read it - and therefore the same token
+counts, embedding text and cache keys. Headers are decoded from RFC 2047
+encoded words, text parts with their declared charset, and the body is the
+longer of the plain-text and HTML (converted to visible text by
+utils/html_text.py) alternatives, with line endings and whitespace normalised.
+"""
+
+import hashlib
+import json
+import re
+from email import message_from_bytes
+from email.errors import HeaderParseError
+from email.header import decode_header, make_header
+from email.message import Message
+from email.utils import parseaddr
+from pathlib import Path
+from typing import BinaryIO, Dict, NamedTuple, Optional, Tuple, Union
+
+from utils.html_text import MAX_TEXT_CHARS, convert_html, truncate_text
+
+
+class EmailRecord(NamedTuple):
+    """One parsed email, reduced to what triage needs (plain, picklable data)."""
+
+    subject: str
+    sender: str
+    message_id: str
+    body: str
+    headers: Dict[str, str]
+    content_hash: str
+    # Length of the HTML part the body was converted from (0 for a plain-text body)
+    html_chars: int = 0
+
+    @classmethod
+    def from_message(cls, msg: Message, max_html_chars: Optional[int] = MAX_TEXT_CHARS) -> "EmailRecord":
+        """
+        Extract the record of a parsed message.
+
+        Args:
+            msg: Email message object
+            max_html_chars: Visible text kept from an HTML body (None: all of it)
+
+        Returns:
+            EmailRecord; body is "" if the message has no text content and
+            message_id is "" if the message has no Message-ID header
+        """
+        subject = decode_header_value(msg.get('subject'))
+        sender = decode_header_value(msg.get('from'))
+        body, html_chars = _extract_body(msg, max_html_chars)
+        return cls(
+            subject=subject,
+            sender=sender,
+            message_id=str(msg.get('message-id', '') or '').strip(),
+            body=body,
+            headers={name: str(value) for name, value in msg.items()},
+            content_hash=email_content_hash(subject, sender, body),
+            html_chars=html_chars,
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes, max_html_chars: Optional[int] = MAX_TEXT_CHARS) -> "EmailRecord":
+        """
+        Parse raw RFC 822 message bytes.
+
+        CRLF line endings are normalised first, so a message gives the same
+        record whether it came from an .eml file, a Maildir or an mbox export.
+
+        Args:
+            data: Message bytes (headers and body)
+            max_html_chars: Visible text kept from an HTML body (None: all of it)
+
+        Returns:
+            EmailRecord of the message
+        """
+        return cls.from_message(message_from_bytes(data.replace(b"\r\n", b"\n")), max_html_chars)
+
+    @classmethod
+    def from_file(cls, source: Union[str, Path, BinaryIO],
+                  max_html_chars: Optional[int] = MAX_TEXT_CHARS) -> "EmailRecord":
+        """
+        Parse a message file or binary file-like object (e.g. an upload).
+
+        Args:
+            source: Path of an .eml file, or a binary file-like object
+            max_html_chars: Visible text kept from an HTML body (None: all of it)
+
+        Returns:
+            EmailRecord of the message
+        """
+        if isinstance(source, (str, Path)):
+            with open(source, 'rb') as f:
+                return cls.from_bytes(f.read(), max_html_chars)
+        return cls.from_bytes(source.read(), max_html_chars)
+
+
+def decode_header_value(value) -> str:
+    """
+    Decode a header value's RFC 2047 encoded words and unfold it onto one line.
+
+    Args:
+        value: Raw header value (None if the header is missing)
+
+    Returns:
+        Decoded header text
+    """
+    if value is None:
+        return ''
+    try:
+        text = str(make_header(decode_header(str(value))))
+    except (HeaderParseError, LookupError, UnicodeDecodeError):
+        # Malformed encoded words or unknown charsets: keep the raw value
+        text = str(value)
+    return ' '.join(text.split())
+
+
+def decode_part(part: Message) -> str:
+    """
+    Decode a text part's payload with its declared charset.
+
+    Args:
+        part: Non-multipart message or MIME part
+
+    Returns:
+        Payload text ("" if it has none); undeclared or unknown charsets are read as UTF-8
+    """
+    payload = part.get_payload(decode=True)
+    if not payload:
+        return ''
+    charset = part.get_content_charset() or 'utf-8'
+    try:
+        return payload.decode(charset, errors='ignore')
+    except LookupError:
+        return payload.decode('utf-8', errors='ignore')
+
+
+def extract_body(msg: Message, max_html_chars: Optional[int] = MAX_TEXT_CHARS) -> str:
+    """
+    Extract the normalised text body of a message.
+
+    The first plain-text and first HTML part that are not attachments are
+    decoded; the HTML is converted to its visible text (up to max_html_chars),
+    and whichever alternative holds more content is used (some senders put
+    only a stub in text/plain). When both exist the plain text is held to the
+    same budget, and the choice is the one the full texts would give.
+
+    Args:
+        msg: Email message object
+        max_html_chars: Visible text kept from an HTML body (None: all of it)
+
+    Returns:
+        Normalised body text, or "" if the message has no text content
+    """
+    return _extract_body(msg, max_html_chars)[0]
+
+
+def _extract_body(msg: Message, max_html_chars: Optional[int]) -> Tuple[str, int]:
+    """extract_body, also returning the length of the HTML the body came from (0 if plain text)."""
+    text_body = ''
+    html_body = ''
+    html = ''
+    html_chars = 0
+    html_truncated = False
+    for part in msg.walk():
+        if part.is_multipart() or 'attachment' in str(part.get('Content-Disposition', '')):
+            continue
+        content_type = part.get_content_type()
+        if content_type == 'text/plain' and not text_body:
+            text_body = normalize_body(decode_part(part))
+        elif content_type == 'text/html' and not html_body:
+            html = decode_part(part)
+            converted = convert_html(html, max_html_chars)
+            html_body = normalize_body(converted.text)
+            html_chars = converted.html_chars
+            html_truncated = converted.truncated
+        if text_body and html_body:
+            break
+    if not html_body:
+        return text_body, 0
+    if html_truncated:
+        # The HTML's visible text exceeds the budget; convert only as far as the plain text's length to compare
+        html_longer = len(text_body) <= max_html_chars or convert_html(html, len(text_body)).truncated
+    else:
+        html_longer = len(html_body) > len(text_body)
+    if html_longer:
+        return html_body, html_chars
+    return truncate_text(text_body, max_html_chars), 0
+
+
+def normalize_body(text: str) -> str:
+    """
+    Normalise body whitespace so equivalent bodies compare (and hash) equal.
+
+    Line endings become LF, non-breaking spaces plain spaces, runs of spaces
+    and tabs one space; trailing spaces and runs of blank lines are dropped.
+
+    Args:
+        text: Decoded body text
+
+    Returns:
+        Normalised text
+    """
+    text = text.replace('\r\n', '\n').replace('\r', '\n').replace('\xa0', ' ')
+    text = re.sub(r'[ \t]+', ' ', text)
+    text = re.sub(r' ?\n ?', '\n', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text.strip()
+
+
+def email_content_hash(subject: str, sender: str, body: str) -> str:
+    """
+    Stable hash of an email's content, for caching and de-duplication.
+
+    Covers the subject, the sender's address (not its display name) and the
+    normalised body, so the same email hashes alike from any source.
+
+    Args:
+        subject: Decoded subject
+        sender: Decoded From header value
+        body: Normalised body
+
+    Returns:
+        64-character hex digest
+    """
+    payload = json.dumps([subject, parseaddr(sender)[1].lower(), body], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -1,14 +1,23 @@
-import email
 from email import policy
 from email.parser import BytesParser
-from typing import Tuple, Optional
+from typing import Optional, Tuple
+import os
 import re
 
+from utils import email_record
+# html_to_text is kept importable from here for existing callers
+from utils.email_record import EmailRecord
+from utils.html_text import MAX_TEXT_CHARS, html_to_text
+
 
 def parse_eml(file) -> Tuple[str, str, str]:
     """
     Parse an .eml file and extract subject, sender, and body.
     
+    Uses the same EmailRecord extraction as the batch pipeline, so both give
+    an email the same subject and body, including the HTML_TEXT_MAX_CHARS
+    budget for HTML bodies.
+    
     Args:
         file: File-like object (e.g., from Streamlit file uploader)
         
@@ -19,32 +28,30 @@ def parse_eml(file) -> Tuple[str, str, str]:
         ValueError: If the file cannot be parsed as a valid email
     """
     try:
-        # Parse the email using Python's email parser
-        parser = BytesParser(policy=policy.default)
-        msg = parser.parse(file)
-        
-        # Extract subject
-        subject = msg.get('subject', '')
-        if subject is None:
-            subject = '(No Subject)'
-        
-        # Extract sender
-        sender = msg.get('from', '')
-        if sender is None:
-            sender = '(Unknown Sender)'
+        record = EmailRecord.from_file(file, html_text_budget())
         
         # Clean up sender (remove display names, keep email)
-        sender = clean_sender(sender)
+        sender = clean_sender(record.sender)
         
-        # Extract body
-        body = extract_body(msg)
-        
-        return subject, sender, body
+        return record.subject, sender, record.body or '(No Body)'
         
     except Exception as e:
         raise ValueError(f"Failed to parse email file: {str(e)}")
 
 
+def html_text_budget() -> Optional[int]:
+    """
+    The HTML_TEXT_MAX_CHARS setting as backend.config.Config reads it.
+    
+    Read from the environment: importing backend would create the OpenAI and
+    Supabase clients in every parse worker.
+    
+    Returns:
+        Visible text kept from an HTML body, or None when the setting is 0 (unlimited)
+    """
+    return int(os.getenv("HTML_TEXT_MAX_CHARS", str(MAX_TEXT_CHARS))) or None
+
+
 def clean_sender(sender: str) -> str:
     """
     Clean up the sender field to extract just the email address.
@@ -75,130 +82,15 @@ def clean_sender(sender: str) -> str:
 
 def extract_body(msg) -> str:
     """
-    Extract the text body from an email message, preferring the part with more content.
+    Extract the text body from an email message (see utils.email_record.extract_body).
     
     Args:
         msg: Parsed email message
         
     Returns:
-        Email body as string
-    """
-    text_body = ""
-    html_body = ""
-    
-    if msg.is_multipart():
-        # In multipart messages, walk through parts to find text and html
-        for part in msg.walk():
-            content_type = part.get_content_type()
-            content_disposition = str(part.get('Content-Disposition', ''))
-            
-            # Skip attachments
-            if 'attachment' in content_disposition:
-                continue
-
-            if content_type == 'text/plain' and not text_body:
-                try:
-                    payload = part.get_payload(decode=True)
-                    text_body = payload.decode('utf-8', errors='ignore')
-                except Exception:
-                    continue # Ignore decoding errors
-            
-            elif content_type == 'text/html' and not html_body:
-                try:
-                    payload = part.get_payload(decode=True)
-                    html_content = payload.decode('utf-8', errors='ignore')
-                    html_body = html_to_text(html_content)
-                except Exception:
-                    continue # Ignore decoding errors
-
-    else:
-        # Handle non-multipart messages
-        content_type = msg.get_content_type()
-        try:
-            payload = msg.get_payload(decode=True)
-            if content_type == 'text/plain':
-                text_body = payload.decode('utf-8', errors='ignore')
-            elif content_type == 'text/html':
-                html_body = html_to_text(payload.decode('utf-8', errors='ignore'))
-            else:
-                # Fallback for other content types
-                text_body = payload.decode('utf-8', errors='ignore')
-        except Exception:
-            text_body = str(msg.get_payload())
-            
-    # Choose the body with more content, as plain text can sometimes be empty
-    body = html_body if len(html_body) > len(text_body) else text_body
-
-    # Clean up the final chosen body
-    cleaned_body = clean_body(body)
-    
-    return cleaned_body if cleaned_body else '(No Body)'
-
-
-def html_to_text(html_content: str) -> str:
-    """
-    Simple HTML to text conversion.
-    
-    Args:
-        html_content: HTML string
-        
-    Returns:
-        Plain text version
-    """
-    # Remove HTML tags
-    import re
-    text = re.sub(r'<[^>]+>', '', html_content)
-    
-    # Decode HTML entities
-    import html
-    text = html.unescape(text)
-    
-    # Clean up whitespace
-    text = re.sub(r'\s+', ' ', text)
-    text = text.strip()
-    
-    return text
-
-
-def clean_body(body: str) -> str:
-    """
-    Clean up the email body text.
-    
-    Args:
-        body: Raw email body
-        
-    Returns:
-        Cleaned body text
+        Email body as string, or '(No Body)' if it has no text content
     """
-    if not body:
-        return ""
-    
-    # Remove excessive whitespace
-    import re
-    body = re.sub(r'\n\s*\n', '\n\n', body)  # Remove excessive line breaks
-    body = re.sub(r' +', ' ', body)  # Remove excessive spaces
-    
-    # Remove common email signatures and quoted text
-    lines = body.split('\n')
-    cleaned_lines = []
-    
-    for line in lines:
-        # Skip common signature indicators
-        if any(indicator in line.lower() for indicator in [
-            '-- ', 'sent from my', 'get outlook', 'sent from iphone',
-            'sent from mobile', 'best regards', 'kind regards', 'sincerely'
-        ]):
-            break
-        
-        # Skip quoted text (lines starting with >)
-        if line.strip().startswith('>'):
-            continue
-            
-        cleaned_lines.append(line)
-    
-    body = '\n'.join(cleaned_lines)
-    
-    return body.strip()
+    return email_record.extract_body(msg) or '(No Body)'
 
 
 def validate_eml_file(file) -> bool:
@@ -0,0 +1,109 @@
+"""
+Header-only message parsing.
+
+Most of a message's bytes are its body: HTML alternatives, inline images,
+attachments. Deciding whether a message needs triage at all (a meeting
+response, an automatic reply) only takes its headers, so read_headers reads a
+message file or mbox entry in small chunks up to the blank line that ends the
+header block and parses just that with BytesHeaderParser. Callers decode the
+full MIME structure only for messages the headers could not settle.
+"""
+
+from email.message import Message
+from email.parser import BytesHeaderParser
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple, Union
+
+from utils.mailbox_readers import MboxMessage
+
+# Larger header blocks are left to the full parser
+MAX_HEADER_BYTES = 256 * 1024
+
+# Bytes read per call while looking for the end of the headers
+HEADER_CHUNK_SIZE = 8192
+
+# A blank line, LF or CRLF; the match starts at the newline that ends the last header
+_HEADER_ENDS = (b"\n\n", b"\n\r\n")
+
+
+def read_header_block(f: BinaryIO, size: Optional[int] = None,
+                      max_bytes: int = MAX_HEADER_BYTES) -> Tuple[bytes, Optional[int]]:
+    """
+    Read a binary stream up to the blank line ending the headers.
+
+    Reads stop within one chunk of the end of the headers; the bytes read are
+    returned so a caller that needs the whole message can continue from them
+    instead of reading the start again.
+
+    Args:
+        f: Binary stream positioned at the start of a message
+        size: Bytes left in the message (None: the message runs to end of file)
+        max_bytes: Give up once this many bytes were read without finding the end
+
+    Returns:
+        Tuple of (bytes read, length of the header block including the blank
+        line, or None if it is longer than max_bytes). A message without a
+        body is all header block.
+    """
+    data = b""
+    while True:
+        want = HEADER_CHUNK_SIZE if size is None else min(HEADER_CHUNK_SIZE, size - len(data))
+        chunk = f.read(want) if want > 0 else b""
+        if not chunk:
+            return data, len(data)
+        # Resume the search just before the new chunk, in case the blank line straddles it
+        start = max(0, len(data) - 2)
+        data += chunk
+        stop = None
+        for end in _HEADER_ENDS:
+            found = data.find(end, start)
+            if found >= 0 and (stop is None or found + len(end) < stop):
+                stop = found + len(end)
+        if stop is not None:
+            return data, stop
+        if len(data) >= max_bytes:
+            return data, None
+
+
+def parse_header_block(block: bytes) -> Message:
+    """
+    Parse a header block with BytesHeaderParser.
+
+    Line endings are normalised to LF first, so header values are identical
+    to those of a message parsed from the file in text mode.
+
+    Args:
+        block: Header bytes as found by read_header_block
+
+    Returns:
+        Message holding only the headers
+    """
+    return BytesHeaderParser().parsebytes(block.replace(b"\r\n", b"\n"))
+
+
+def read_headers(source: Union[str, Path, MboxMessage],
+                 max_bytes: int = MAX_HEADER_BYTES) -> Tuple[Optional[Message], int]:
+    """
+    Parse only the headers of a message file or mbox message.
+
+    Args:
+        source: Message file path or MboxMessage reference
+        max_bytes: Largest header block to parse
+
+    Returns:
+        Tuple of (message holding only the headers, or None if the header block
+        is too large; bytes read from disk)
+
+    Raises:
+        OSError: If the message cannot be read
+    """
+    if isinstance(source, MboxMessage):
+        with open(source.path, "rb") as f:
+            f.seek(source.offset)
+            data, length = read_header_block(f, source.size, max_bytes)
+    else:
+        with open(source, "rb") as f:
+            data, length = read_header_block(f, max_bytes=max_bytes)
+    if length is None:
+        return None, len(data)
+    return parse_header_block(data[:length]), len(data)
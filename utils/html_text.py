@@ -0,0 +1,188 @@
+"""
+Streaming HTML-to-text conversion for email bodies.
+
+Marketing and notification emails are mostly markup: inline CSS, layout
+tables, tracking pixels and hidden preheaders around a few paragraphs of
+text. HTMLTextExtractor walks the HTML with html.parser one event at a time
+and keeps only what a reader would see: <style>, <script>, <head> and similar
+blocks are skipped, as are elements hidden with display:none,
+visibility:hidden or mso-hide:all, and block elements become line breaks.
+The HTML is fed in chunks and conversion stops as soon as a budget of visible
+text has been collected, so a 70 KB newsletter costs no more than the part
+of it that can reach a prompt.
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import List, NamedTuple, Optional, Tuple
+
+# Visible text kept per body: about 8000 tokens, the embedding input limit (prompts use at most 3000)
+MAX_TEXT_CHARS = 32000
+
+# HTML characters parsed between budget checks
+FEED_CHUNK_SIZE = 16384
+
+# Elements whose content is never visible
+SKIPPED_TAGS = frozenset({"head", "style", "script", "noscript", "template", "title", "svg", "object", "iframe"})
+
+# Elements that start a new line
+BLOCK_TAGS = frozenset({
+    "address", "article", "aside", "blockquote", "br", "center", "dd", "div", "dl", "dt", "footer",
+    "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "p",
+    "pre", "section", "table", "tr", "ul",
+})
+
+# Elements that have no content (and no end tag)
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source",
+    "track", "wbr",
+})
+
+HIDDEN_STYLE = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden|mso-hide\s*:\s*all", re.IGNORECASE)
+
+_WHITESPACE = re.compile(r"\s+")
+_LINE_PADDING = re.compile(r" *\n *")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+class HTMLText(NamedTuple):
+    """Result of converting one HTML document."""
+
+    text: str
+    html_chars: int
+    parsed_chars: int
+    truncated: bool
+
+
+class HTMLTextExtractor(HTMLParser):
+    """
+    Collects the visible text of an HTML document as it is fed.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.chars = 0
+        # Skipped or hidden element being ignored, and how deeply it is nested in itself
+        self._ignored: Optional[Tuple[str, int]] = None
+
+    def _is_hidden(self, tag: str, attrs) -> bool:
+        if tag in SKIPPED_TAGS:
+            return True
+        for name, value in attrs:
+            if name == "hidden" or (name == "style" and value and HIDDEN_STYLE.search(value)):
+                return True
+        return False
+
+    def _newline(self) -> None:
+        if self.parts and self.parts[-1] != "\n":
+            self.parts.append("\n")
+
+    def handle_starttag(self, tag, attrs):
+        if self._ignored is not None:
+            ignored_tag, depth = self._ignored
+            if tag == ignored_tag:
+                self._ignored = (ignored_tag, depth + 1)
+            elif tag == "body" and ignored_tag == "head":
+                # A <head> left open ends where the body starts
+                self._ignored = None
+            return
+        if tag not in VOID_TAGS and self._is_hidden(tag, attrs):
+            self._ignored = (tag, 1)
+            return
+        if tag in BLOCK_TAGS:
+            self._newline()
+        elif tag in ("td", "th"):
+            self.parts.append(" ")
+
+    def handle_startendtag(self, tag, attrs):
+        # <br/> and friends: self-closing tags have no content to hide
+        if self._ignored is None and tag in BLOCK_TAGS:
+            self._newline()
+
+    def handle_endtag(self, tag):
+        if self._ignored is not None:
+            ignored_tag, depth = self._ignored
+            if tag == ignored_tag:
+                self._ignored = (ignored_tag, depth - 1) if depth > 1 else None
+            return
+        if tag in BLOCK_TAGS:
+            self._newline()
+
+    def handle_data(self, data):
+        if self._ignored is not None:
+            return
+        # Source line breaks and indentation are just spaces in HTML
+        text = _WHITESPACE.sub(" ", data)
+        if text.strip():
+            self.parts.append(text)
+            self.chars += len(text)
+        elif self.parts and self.parts[-1] not in ("\n", " "):
+            self.parts.append(" ")
+
+    def text(self) -> str:
+        """The visible text collected so far, one line per block."""
+        text = _LINE_PADDING.sub("\n", "".join(self.parts))
+        return _BLANK_LINES.sub("\n\n", text).strip()
+
+
+def convert_html(html: str, max_chars: Optional[int] = MAX_TEXT_CHARS) -> HTMLText:
+    """
+    Convert HTML to its visible text, stopping once max_chars of it are collected.
+
+    Args:
+        html: HTML document or fragment
+        max_chars: Visible text budget (None: convert everything)
+
+    Returns:
+        HTMLText with the text (at most max_chars long), the HTML length, how
+        much of it was parsed and whether the budget cut the text short
+    """
+    extractor = HTMLTextExtractor()
+    parsed = 0
+    while parsed < len(html):
+        extractor.feed(html[parsed:parsed + FEED_CHUNK_SIZE])
+        parsed = min(len(html), parsed + FEED_CHUNK_SIZE)
+        if max_chars is not None and extractor.chars >= max_chars:
+            break
+    else:
+        extractor.close()
+
+    text = extractor.text()
+    truncated = max_chars is not None and len(text) > max_chars
+    if truncated:
+        text = truncate_text(text, max_chars)
+    return HTMLText(text, len(html), parsed, truncated or parsed < len(html))
+
+
+def truncate_text(text: str, max_chars: Optional[int]) -> str:
+    """
+    Cut text to at most max_chars, at the last word boundary within the budget.
+
+    Args:
+        text: Text to cut
+        max_chars: Character budget (None: no limit)
+
+    Returns:
+        The text, or its longest word-aligned prefix within max_chars
+    """
+    if max_chars is None or len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    if not text[max_chars].isspace() and len(cut.split(None, 1)) > 1:
+        cut = cut.rsplit(None, 1)[0]
+    return cut.rstrip()
+
+
+def html_to_text(html_content: str, max_chars: Optional[int] = MAX_TEXT_CHARS) -> str:
+    """
+    HTML to text conversion.
+
+    Args:
+        html_content: HTML string
+        max_chars: Visible text budget (None: convert everything)
+
+    Returns:
+        Plain text version
+    """
+    return convert_html(html_content, max_chars).text
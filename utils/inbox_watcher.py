@@ -0,0 +1,193 @@
+"""
+Inbox directory watcher for streaming ingestion.
+
+InboxWatcher yields .eml files as they land in a directory. On Linux it uses
+inotify (through libc, no extra dependency) and reacts to files being closed
+after writing or moved in, which covers both direct writes and the
+write-to-tmp-then-rename delivery of Maildir-style agents. Elsewhere, or if
+inotify cannot be set up, it polls the directory and only reports a file once
+its size and modification time have stopped changing for one poll interval,
+so half-written messages are never picked up.
+"""
+
+import ctypes
+import ctypes.util
+import fnmatch
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Minimal inotify binding: one watch, events read as file names."""
+
+    def __init__(self, directory: Path, mask: int):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(str(directory)), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def read(self, timeout: float) -> Optional[list]:
+        """
+        Wait up to timeout seconds for events.
+
+        Returns:
+            List of file names, or None if the kernel queue overflowed (rescan needed)
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class InboxWatcher:
+    """
+    Yields files matching a pattern as they appear in (or are rewritten into) a directory.
+    """
+
+    def __init__(self, directory: Union[str, Path], pattern: str = "*.eml", poll_interval: float = 1.0,
+                 use_inotify: Optional[bool] = None):
+        """
+        Args:
+            directory: Inbox directory to watch (not recursive)
+            pattern: fnmatch pattern of file names to report
+            poll_interval: Seconds between directory scans when polling; also how
+                often a blocked watch() checks whether it was stopped
+            use_inotify: Force inotify on/off (default: use it when available)
+        """
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.mode = None
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """Make watch() return at its next wake-up."""
+        self._stop.set()
+
+    def _matches(self, name: str) -> bool:
+        return fnmatch.fnmatch(name, self.pattern)
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        """Current (size, mtime_ns) of every matching file."""
+        found = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and self._matches(entry.name):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        # Moved or deleted since the directory was listed
+                        continue
+                    found[Path(entry.path)] = (stat.st_size, stat.st_mtime_ns)
+        return found
+
+    def watch(self, include_existing: bool = True) -> Iterator[Tuple[Path, float]]:
+        """
+        Yield files as they arrive, until stop() is called.
+
+        Args:
+            include_existing: Also yield the files already present, first and in name order
+
+        Yields:
+            Tuples of (path, arrival time as time.time()); files present at startup
+            arrive when the watch starts
+        """
+        self._stop.clear()
+        started = time.time()
+        inotify = None
+        if self.use_inotify is not False:
+            try:
+                inotify = _Inotify(self.directory, IN_CLOSE_WRITE | IN_MOVED_TO)
+            except (OSError, AttributeError) as e:
+                if self.use_inotify:
+                    raise
+                logger.warning(f"inotify unavailable ({str(e)}), polling {self.directory} instead")
+        self.mode = "inotify" if inotify else "polling"
+
+        try:
+            # With inotify the watch is set before the scan, so no file can slip between them
+            known = self._scan()
+            if include_existing:
+                for path in sorted(known):
+                    yield path, started
+
+            if inotify:
+                yield from self._watch_inotify(inotify)
+            else:
+                yield from self._watch_polling(known, started)
+        finally:
+            if inotify:
+                inotify.close()
+
+    def _watch_inotify(self, inotify: _Inotify) -> Iterator[Tuple[Path, float]]:
+        while not self._stop.is_set():
+            names = inotify.read(self.poll_interval)
+            now = time.time()
+            if names is None:
+                # Events were lost; report everything and let the caller skip what it has seen
+                logger.warning(f"inotify queue overflowed, rescanning {self.directory}")
+                for path in sorted(self._scan()):
+                    yield path, now
+                continue
+            for name in dict.fromkeys(names):
+                path = self.directory / name
+                if self._matches(name) and path.is_file():
+                    yield path, now
+
+    def _watch_polling(self, known: Dict[Path, Tuple[int, int]], started: float) -> Iterator[Tuple[Path, float]]:
+        # Files seen changing on the previous scan, reported once their signature holds still
+        changing: Dict[Path, Tuple[int, int]] = {}
+        while not self._stop.wait(self.poll_interval):
+            current = self._scan()
+            for path, signature in sorted(current.items()):
+                if known.get(path) == signature:
+                    continue
+                if changing.get(path) == signature:
+                    del changing[path]
+                    known[path] = signature
+                    # The modification time is when the message landed, not when the scan noticed
+                    yield path, max(started, signature[1] / 1e9)
+                else:
+                    changing[path] = signature
+            for table in (known, changing):
+                for path in [path for path in table if path not in current]:
+                    del table[path]
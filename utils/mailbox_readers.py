@@ -0,0 +1,146 @@
+"""
+Streaming readers for bulk mail exports.
+
+Exports rarely come as one .eml file per message. iter_mbox walks a
+(possibly multi-GB) mbox file through a read-only memory map, scanning for
+"From " separator lines without loading the file: each message is yielded as
+a small MboxMessage reference (offset, size and content hash) that workers
+can read independently. iter_maildir walks the cur/ and new/ directories of
+a Maildir tree (including Maildir++ subfolders) one directory at a time.
+iter_mailbox picks the right reader for a path, so callers can stream
+hundreds of thousands of messages in constant memory.
+"""
+
+import hashlib
+import mmap
+import os
+from pathlib import Path
+from typing import Iterator, NamedTuple, Union
+
+# Start of an mbox separator line ("From sender date"); messages begin on the line after it
+MBOX_SEPARATOR = b"From "
+
+
+class MboxMessage(NamedTuple):
+    """Location of one message inside an mbox file."""
+
+    path: str
+    offset: int
+    size: int
+    content_hash: str
+
+    @property
+    def key(self) -> str:
+        """Stable identifier of the message, e.g. for the batch manifest."""
+        return f"{self.path}#{self.offset}"
+
+    @property
+    def name(self) -> str:
+        """Short label for progress output."""
+        return f"{os.path.basename(self.path)}#{self.offset}"
+
+
+def iter_mbox(path: Union[str, Path]) -> Iterator[MboxMessage]:
+    """
+    Yield every message of an mbox file without reading it into memory.
+
+    A message runs from the line after a "From " separator to the next
+    separator; the blank line that precedes a separator is not part of it.
+
+    Args:
+        path: mbox file
+
+    Yields:
+        MboxMessage per message, in file order
+    """
+    path = str(Path(path).resolve())
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            end = len(data)
+            separator = 0 if data[:len(MBOX_SEPARATOR)] == MBOX_SEPARATOR else data.find(b"\n" + MBOX_SEPARATOR)
+            if separator < 0:
+                return
+            if separator > 0:
+                separator += 1
+            while separator < end:
+                line_end = data.find(b"\n", separator)
+                start = end if line_end < 0 else line_end + 1
+                following = data.find(b"\n" + MBOX_SEPARATOR, start - 1)
+                next_separator = end if following < 0 else following + 1
+                stop = next_separator
+                # Drop the blank line separating this message from the next
+                if stop > start and data[stop - 1:stop] == b"\n":
+                    stop -= 1
+                    if stop > start and data[stop - 1:stop] == b"\r":
+                        stop -= 1
+                if stop > start:
+                    with memoryview(data)[start:stop] as body:
+                        digest = hashlib.sha256(body).hexdigest()
+                    yield MboxMessage(path, start, stop - start, digest)
+                separator = next_separator
+
+
+def read_mbox_message(message: MboxMessage) -> bytes:
+    """
+    Read the raw bytes of one mbox message.
+
+    Args:
+        message: Reference yielded by iter_mbox
+
+    Returns:
+        RFC 822 message bytes (headers and body)
+    """
+    with open(message.path, "rb") as f:
+        f.seek(message.offset)
+        return f.read(message.size)
+
+
+def is_maildir(path: Union[str, Path]) -> bool:
+    """Whether a directory is a Maildir (has cur/ and new/ subdirectories)."""
+    path = Path(path)
+    return (path / "cur").is_dir() and (path / "new").is_dir()
+
+
+def iter_maildir(root: Union[str, Path]) -> Iterator[Path]:
+    """
+    Yield every message file of a Maildir tree.
+
+    Messages are files in cur/ and new/ directories at any depth (Maildir++
+    keeps folders as dot-directories beside them); tmp/ holds deliveries in
+    progress and is skipped, as are hidden files.
+
+    Args:
+        root: Maildir root directory
+
+    Yields:
+        Message file paths, directory by directory in name order
+    """
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = sorted(name for name in subdirectories if name != "tmp")
+        if os.path.basename(directory) not in ("cur", "new"):
+            continue
+        for name in sorted(files):
+            if not name.startswith("."):
+                yield Path(directory) / name
+
+
+def iter_mailbox(path: Union[str, Path], pattern: str = "*.eml") -> Iterator[Union[Path, MboxMessage]]:
+    """
+    Yield the messages of an mbox file, a Maildir tree or a directory of .eml files.
+
+    Args:
+        path: mbox file, Maildir root, or directory of message files
+        pattern: Glob for message files in a plain directory
+
+    Yields:
+        MboxMessage references for mbox files, message file paths otherwise
+    """
+    path = Path(path)
+    if path.is_file():
+        yield from iter_mbox(path)
+    elif is_maildir(path) or any(is_maildir(child) for child in path.iterdir() if child.is_dir()):
+        yield from iter_maildir(path)
+    else:
+        yield from sorted(path.glob(pattern))
@@ -0,0 +1,188 @@
+"""
+Parallel .eml parsing for large corpora.
+
+MIME parsing, payload decoding and HTML stripping are pure CPU work, so one
+Python thread parses one file at a time no matter how many cores exist.
+ParallelParser spreads files over a process pool: paths are submitted in
+chunks (one task per chunk keeps inter-process overhead low), at most a few
+chunks are in flight so memory stays bounded, and each file comes back as a
+small picklable record (plain strings, no Message objects) as soon as its
+chunk finishes. Throughput is tracked in files/s and MB/s.
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from utils.eml_parser import parse_eml
+
+logger = logging.getLogger(__name__)
+
+# Workers never fork from the caller: by the time a pipeline starts parsing, its stage
+# threads (and the shared OpenAI event loop) may hold logging, sqlite or httpx locks
+# that a forked child would inherit locked. forkserver children fork from a clean,
+# single-threaded server process; spawn is the fallback where forkserver is missing.
+POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def parse_eml_record(path: Union[str, Path]) -> Dict[str, str]:
+    """
+    Parse one .eml file into a lightweight record with parse_eml.
+
+    Args:
+        path: Path to the .eml file
+
+    Returns:
+        Dictionary with subject, sender and body
+
+    Raises:
+        ValueError: If the file cannot be parsed as a valid email
+    """
+    with open(path, 'rb') as f:
+        subject, sender, body = parse_eml(f)
+    return {'subject': subject, 'sender': sender, 'body': body}
+
+
+def _parse_chunk(parse_func: Callable[[Path], Any],
+                 paths: List[Path]) -> Tuple[List[Tuple[Path, Any, Optional[str]]], float]:
+    """Parse a chunk of files in a worker process; errors are returned, not raised."""
+    started = time.perf_counter()
+    results = []
+    for path in paths:
+        try:
+            results.append((path, parse_func(path), None))
+        except Exception as e:
+            results.append((path, None, str(e)))
+    return results, time.perf_counter() - started
+
+
+class ParallelParser:
+    """
+    Parses files on a pool of worker processes and streams the records back.
+
+    parse_func must be picklable (a module-level function) and should return
+    plain data; it is called in a worker process with a Path, or with the item
+    itself for picklable non-path items such as mbox message references
+    (whose size attribute is used for the MB/s figures).
+    """
+
+    def __init__(self, parse_func: Callable[[Path], Any] = parse_eml_record, workers: Optional[int] = None,
+                 chunk_size: int = 16, max_pending_chunks: Optional[int] = None):
+        """
+        Args:
+            parse_func: Module-level function turning a path into a record (None if unusable)
+            workers: Worker processes (default: os.cpu_count()); 1 parses in this process
+            chunk_size: Files per task sent to a worker
+            max_pending_chunks: Chunks submitted but not yet consumed (default: 2 per worker)
+        """
+        self.parse_func = parse_func
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.chunk_size = max(1, chunk_size)
+        self.max_pending_chunks = max_pending_chunks or 2 * self.workers
+        self._files = 0
+        self._bytes = 0
+        self._failed = 0
+        self._elapsed = 0.0
+        self._busy = 0.0
+
+    def _account(self, path: Any, record: Any, error: Optional[str]) -> None:
+        self._files += 1
+        # Items that are not plain files (e.g. mbox message references) carry their size
+        size = getattr(path, "size", None)
+        try:
+            self._bytes += size if size is not None else os.path.getsize(path)
+        except OSError:
+            pass
+        if error is not None:
+            self._failed += 1
+            logger.error(f"Error parsing {path}: {error}")
+        elif record is None:
+            self._failed += 1
+
+    def _chunks(self, paths: Iterable[Any]) -> Iterator[List[Any]]:
+        chunk = []
+        for path in paths:
+            chunk.append(Path(path) if isinstance(path, str) else path)
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def parse(self, paths: Iterable[Any]) -> Iterator[Tuple[Any, Any]]:
+        """
+        Parse every file, yielding records in completion order.
+
+        Args:
+            paths: Files to parse (consumed lazily)
+
+        Yields:
+            Tuples of (path, record); record is None if the file could not be parsed
+        """
+        started = time.perf_counter()
+        try:
+            if self.workers == 1:
+                for chunk in self._chunks(paths):
+                    results, busy = _parse_chunk(self.parse_func, chunk)
+                    self._busy += busy
+                    for path, record, error in results:
+                        self._account(path, record, error)
+                        yield path, record
+                return
+
+            context = multiprocessing.get_context(POOL_START_METHOD)
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as executor:
+                chunks = self._chunks(paths)
+                pending = set()
+                exhausted = False
+                while pending or not exhausted:
+                    # Keep a bounded number of chunks in flight
+                    while not exhausted and len(pending) < self.max_pending_chunks:
+                        chunk = next(chunks, None)
+                        if chunk is None:
+                            exhausted = True
+                        else:
+                            pending.add(executor.submit(_parse_chunk, self.parse_func, chunk))
+                    if not pending:
+                        break
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results, busy = future.result()
+                        self._busy += busy
+                        for path, record, error in results:
+                            self._account(path, record, error)
+                            yield path, record
+        finally:
+            self._elapsed += time.perf_counter() - started
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Throughput of the files parsed so far.
+
+        files_per_second and mb_per_second use wall time, which includes any
+        time the consumer held the parser back; the capacity_* rates use the
+        time workers actually spent parsing, i.e. what the pool could sustain.
+
+        Returns:
+            Dictionary with workers, files, failed, megabytes, elapsed_seconds,
+            files_per_second, mb_per_second, capacity_files_per_second and
+            capacity_mb_per_second
+        """
+        megabytes = self._bytes / (1024 * 1024)
+        elapsed = self._elapsed
+        busy = self._busy / self.workers
+        return {
+            "workers": self.workers,
+            "files": self._files,
+            "failed": self._failed,
+            "megabytes": megabytes,
+            "elapsed_seconds": elapsed,
+            "files_per_second": self._files / elapsed if elapsed else 0.0,
+            "mb_per_second": megabytes / elapsed if elapsed else 0.0,
+            "capacity_files_per_second": self._files / busy if busy else 0.0,
+            "capacity_mb_per_second": megabytes / busy if busy else 0.0,
+        }